@@ -162,6 +162,7 @@ async def get_config_options():
             {"value": "json", "label": "JSON File"},
             {"value": "csv", "label": "CSV File"},
             {"value": "excel", "label": "Excel File"},
+            {"value": "parquet", "label": "Parquet File"},
             {"value": "sqlite", "label": "SQLite Database"},
             {"value": "db", "label": "MySQL Database"},
             {"value": "mongodb", "label": "MongoDB Database"},
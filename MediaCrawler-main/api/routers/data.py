@@ -24,6 +24,8 @@ from typing import Optional
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import FileResponse
 
+from tools.json_records import iter_json_records, count_json_records
+
 router = APIRouter(prefix="/data", tags=["data"])
 
 # Data directory
@@ -37,14 +39,15 @@ def get_file_info(file_path: Path) -> dict:
 
     # Try to get record count
     try:
-        if file_path.suffix == ".json":
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if isinstance(data, list):
-                    record_count = len(data)
+        if file_path.suffix in (".json", ".jsonl"):
+            record_count = count_json_records(str(file_path))
         elif file_path.suffix == ".csv":
             with open(file_path, "r", encoding="utf-8") as f:
                 record_count = sum(1 for _ in f) - 1  # Subtract header row
+        elif file_path.suffix == ".parquet":
+            import pyarrow.parquet as pq
+            # Row count from the footer, no data is read
+            record_count = pq.ParquetFile(file_path).metadata.num_rows
     except Exception:
         pass
 
@@ -65,7 +68,7 @@ async def list_data_files(platform: Optional[str] = None, file_type: Optional[st
         return {"files": []}
 
     files = []
-    supported_extensions = {".json", ".csv", ".xlsx", ".xls"}
+    supported_extensions = {".json", ".jsonl", ".csv", ".xlsx", ".xls", ".parquet"}
 
     for root, dirs, filenames in os.walk(DATA_DIR):
         root_path = Path(root)
@@ -115,12 +118,14 @@ async def get_file_content(file_path: str, preview: bool = True, limit: int = 10
     if preview:
         # Return preview data
         try:
-            if full_path.suffix == ".json":
-                with open(full_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        return {"data": data[:limit], "total": len(data)}
-                    return {"data": data, "total": 1}
+            if full_path.suffix in (".json", ".jsonl"):
+                # Stream records so previewing a large file does not load it into memory
+                rows = []
+                for i, record in enumerate(iter_json_records(str(full_path))):
+                    if i >= limit:
+                        break
+                    rows.append(record)
+                return {"data": rows, "total": count_json_records(str(full_path))}
             elif full_path.suffix == ".csv":
                 import csv
                 with open(full_path, "r", encoding="utf-8") as f:
@@ -148,6 +153,17 @@ async def get_file_content(file_path: str, preview: bool = True, limit: int = 10
                     "total": total,
                     "columns": list(df.columns)
                 }
+            elif full_path.suffix == ".parquet":
+                import pyarrow.parquet as pq
+                parquet_file = pq.ParquetFile(full_path)
+                # Only the row groups covering the first limit rows are read
+                batch = next(parquet_file.iter_batches(batch_size=max(limit, 1)), None)
+                rows = batch.to_pylist()[:limit] if batch is not None else []
+                return {
+                    "data": rows,
+                    "total": parquet_file.metadata.num_rows,
+                    "columns": parquet_file.schema_arrow.names
+                }
             else:
                 raise HTTPException(status_code=400, detail="Unsupported file type for preview")
         except json.JSONDecodeError:
@@ -200,7 +216,7 @@ async def get_data_stats():
         "by_type": {}
     }
 
-    supported_extensions = {".json", ".csv", ".xlsx", ".xls"}
+    supported_extensions = {".json", ".jsonl", ".csv", ".xlsx", ".xls", ".parquet"}
 
     for root, dirs, filenames in os.walk(DATA_DIR):
         root_path = Path(root)
@@ -51,9 +51,11 @@ class SaveDataOptionEnum(str, Enum):
     CSV = "csv"
     DB = "db"
     JSON = "json"
+    JSONL = "jsonl"
     SQLITE = "sqlite"
     MONGODB = "mongodb"
     EXCEL = "excel"
+    PARQUET = "parquet"
 
 
 class CrawlerStartRequest(BaseModel):
@@ -18,7 +18,7 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from playwright.async_api import BrowserContext, BrowserType, Playwright
 
@@ -93,6 +93,24 @@ class AbstractStore(ABC):
     async def store_comment(self, comment_item: Dict):
         pass
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        store a page of contents, backends that can write many rows in one operation override this
+        :param content_items:
+        :return:
+        """
+        for content_item in content_items:
+            await self.store_content(content_item)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        store a page of comments, backends that can write many rows in one operation override this
+        :param comment_items:
+        :return:
+        """
+        for comment_item in comment_items:
+            await self.store_comment(comment_item)
+
     # TODO support all platform
     # only xhs is supported, so @abstractmethod is commented
     @abstractmethod
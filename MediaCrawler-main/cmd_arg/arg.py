@@ -70,10 +70,12 @@ class SaveDataOptionEnum(str, Enum):
     CSV = "csv"
     DB = "db"
     JSON = "json"
+    JSONL = "jsonl"
     SQLITE = "sqlite"
     MONGODB = "mongodb"
     EXCEL = "excel"
     POSTGRES = "postgres"
+    PARQUET = "parquet"
 
 
 class InitDbOptionEnum(str, Enum):
@@ -181,6 +183,31 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
                 rich_help_panel="Basic Configuration",
             ),
         ] = config.KEYWORDS,
+        keyword_sleep_sec: Annotated[
+            float,
+            typer.Option(
+                "--keyword_sleep_sec",
+                help="Random pause of N to 2N seconds before switching to the next search keyword (0 = no pause)",
+                rich_help_panel="Basic Configuration",
+            ),
+        ] = config.KEYWORD_SWITCH_SLEEP_SEC,
+        partitioned: Annotated[
+            str,
+            typer.Option(
+                "--partitioned",
+                help="Whether to write csv/json data into {item_type}/{date}/{keyword} partitions, supports yes/true/t/y/1 or no/false/f/n/0",
+                rich_help_panel="Storage Configuration",
+                show_default=True,
+            ),
+        ] = str(config.SAVE_DATA_PARTITIONED),
+        save_data_dir: Annotated[
+            str,
+            typer.Option(
+                "--save_data_dir",
+                help="Root directory of partitioned output (default: data/<platform>/<csv|json>)",
+                rich_help_panel="Storage Configuration",
+            ),
+        ] = config.SAVE_DATA_DIR,
         get_comment: Annotated[
             str,
             typer.Option(
@@ -212,7 +239,7 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
             SaveDataOptionEnum,
             typer.Option(
                 "--save_data_option",
-                help="Data save option (csv=CSV file | db=MySQL database | json=JSON file | sqlite=SQLite database | mongodb=MongoDB database | excel=Excel file | postgres=PostgreSQL database)",
+                help="Data save option (csv=CSV file | db=MySQL database | json=JSON file | jsonl=JSON Lines file, one record per line | sqlite=SQLite database | mongodb=MongoDB database | excel=Excel file | postgres=PostgreSQL database | parquet=Parquet file)",
                 rich_help_panel="Storage Configuration",
             ),
         ] = _coerce_enum(
@@ -276,6 +303,9 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
         config.CRAWLER_TYPE = crawler_type.value
         config.START_PAGE = start
         config.KEYWORDS = keywords
+        config.KEYWORD_SWITCH_SLEEP_SEC = keyword_sleep_sec
+        config.SAVE_DATA_PARTITIONED = _to_bool(partitioned)
+        config.SAVE_DATA_DIR = save_data_dir
         config.ENABLE_GET_COMMENTS = enable_comment
         config.ENABLE_GET_SUB_COMMENTS = enable_sub_comment
         config.HEADLESS = enable_headless
@@ -315,6 +345,9 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
             type=config.CRAWLER_TYPE,
             start=config.START_PAGE,
             keywords=config.KEYWORDS,
+            keyword_sleep_sec=config.KEYWORD_SWITCH_SLEEP_SEC,
+            partitioned=config.SAVE_DATA_PARTITIONED,
+            save_data_dir=config.SAVE_DATA_DIR,
             get_comment=config.ENABLE_GET_COMMENTS,
             get_sub_comment=config.ENABLE_GET_SUB_COMMENTS,
             headless=config.HEADLESS,
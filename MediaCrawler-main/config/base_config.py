@@ -70,8 +70,10 @@ BROWSER_LAUNCH_TIMEOUT = 60
 # 设置为False可以保持浏览器运行，便于调试
 AUTO_CLOSE_BROWSER = True
 
-# 数据保存类型选项配置,支持六种类型：csv、db、json、sqlite、excel、postgres, 最好保存到DB，有排重的功能。
-SAVE_DATA_OPTION = "json"  # csv or db or json or sqlite or excel or postgres
+# 数据保存类型选项配置,支持以下类型：csv、db、json、jsonl、sqlite、mongodb、excel、postgres、parquet, 最好保存到DB，有排重的功能。
+# json 为 JSON 数组文件，jsonl 为每行一条记录的 JSON Lines 文件；两者每条记录都只追加写入，不随文件变大而变慢
+# parquet 为列式存储文件，适合用 pandas / DuckDB 等工具分析
+SAVE_DATA_OPTION = "json"  # csv or db or json or jsonl or sqlite or mongodb or excel or postgres or parquet
 
 # 用户浏览器缓存的浏览器文件配置
 USER_DATA_DIR = "%s_user_data_dir"  # %s will be replaced by platform name
@@ -117,6 +119,40 @@ FONT_PATH = "./docs/STZHONGS.TTF"
 # 爬取间隔时间
 CRAWLER_MAX_SLEEP_SEC = 2
 
+# 多关键词搜索时，切换关键词前随机等待 [N, 2N] 秒，0 表示不等待 (目前仅小红书搜索生效)
+KEYWORD_SWITCH_SLEEP_SEC = 0
+
+# csv/json 按 {数据类型}/{日期}/{关键词} 分区写入，如 data/xhs/csv/comments/2026-01-25/关键词.csv
+# 无搜索关键词的记录 (详情 / 创作者模式) 写入 unknown 分区
+SAVE_DATA_PARTITIONED = False
+
+# 分区写入的根目录，为空时使用 data/{平台}/{csv|json}
+SAVE_DATA_DIR = ""
+
+# csv 写入缓冲：每个文件保持打开，攒够 N 行或首条待写记录超过 N 秒后写盘，程序退出时写出剩余记录
+CSV_BUFFER_ROWS = 100
+CSV_FLUSH_INTERVAL_SEC = 2
+
+# mongodb 批量写入：内容 / 评论按集合缓冲，攒够 N 条或首条待写记录超过 N 秒后以一次无序 bulk_write (upsert) 写入
+MONGODB_BULK_SIZE = 500
+MONGODB_FLUSH_INTERVAL_SEC = 2
+
+# parquet 写入：每个文件攒够 N 条记录写入一个行组 (row group)，程序退出时写出剩余记录并关闭文件
+# 列由 database/models.py 中的表结构决定，同一数据类型的文件 schema 始终一致
+PARQUET_ROW_GROUP_SIZE = 10000
+# 压缩算法：zstd、snappy、gzip、none
+PARQUET_COMPRESSION = "zstd"
+
+# 异步写入队列 (write-behind)：爬取协程只把记录放入有界队列，由后台任务按表分组批量写入存储
+# 队列满时爬取协程等待 (背压)；程序退出时写出队列中剩余的记录，有记录写入失败时以非零状态码退出
+ENABLE_WRITE_BEHIND = True
+# 队列容量 (条)
+WRITE_BEHIND_QUEUE_SIZE = 1000
+# 同一张表 / 文件攒够 N 条写入一次
+WRITE_BEHIND_BATCH_SIZE = 100
+# 首条待写记录最多等待 N 秒
+WRITE_BEHIND_FLUSH_INTERVAL_SEC = 1
+
 from .bilibili_config import *
 from .xhs_config import *
 from .dy_config import *
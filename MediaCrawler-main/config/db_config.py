@@ -49,8 +49,22 @@ CACHE_TYPE_MEMORY = "memory"
 # sqlite config
 SQLITE_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "database", "sqlite_tables.db")
 
+# sqlite writer profile, applied to every connection of the sqlite save option
+# WAL: readers (reports, WebUI preview) keep working while a crawl is writing
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+# NORMAL: no fsync per commit in WAL mode, a power loss can only lose the last transactions
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 64 * 1024))  # page cache per connection
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))  # bytes of the file read through mmap, 0 disables
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))  # wait for a lock instead of failing at once
+
 sqlite_db_config = {
-    "db_path": SQLITE_DB_PATH
+    "db_path": SQLITE_DB_PATH,
+    "journal_mode": SQLITE_JOURNAL_MODE,
+    "synchronous": SQLITE_SYNCHRONOUS,
+    "cache_size_kb": SQLITE_CACHE_SIZE_KB,
+    "mmap_size": SQLITE_MMAP_SIZE,
+    "busy_timeout_ms": SQLITE_BUSY_TIMEOUT_MS,
 }
 
 # mongodb config
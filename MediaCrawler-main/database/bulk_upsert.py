@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/database/bulk_upsert.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Bulk upsert helpers shared by the SQL stores (sqlite / db / postgres)
+
+A page of rows is written with one statement per table through SQLAlchemy Core, executed for all rows at once:
+- SQLite / Postgres: INSERT ... ON CONFLICT (key) DO UPDATE
+- MySQL: INSERT ... ON DUPLICATE KEY UPDATE
+
+Native upserts need a unique index on the natural key. Tables created before the key was unique fall back to
+one SELECT for the whole page, then a multi-row INSERT for new rows and an executemany UPDATE for existing ones,
+all in the caller's transaction. test/test_db_sync.py migrates such tables (de-duplicates them and adds the keys).
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, inspect, insert, select, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Columns never overwritten when an existing row is updated
+PROTECTED_COLUMNS = ("id", "add_ts")
+
+# (database url, table name, key) -> whether the key has a unique index
+_unique_key_cache: Dict[Tuple[str, str, str], bool] = {}
+
+
+async def bulk_upsert(session: AsyncSession, model, rows: List[Dict], key: str,
+                      update_columns: Optional[Sequence[str]] = None):
+    """
+    Insert new rows and update existing ones (matched on key) for a page of rows
+    Args:
+        session: open session, committed by the caller (get_session)
+        model: ORM model class
+        rows: column -> value dicts, keys that are not columns of the table are ignored
+        key: natural key column, e.g. note_id / comment_id
+        update_columns: columns refreshed on existing rows, defaults to every column in the row but id / add_ts
+    """
+    table = model.__table__
+    rows = _prepare_rows(table, rows, key)
+    if not rows:
+        return
+
+    if not await has_unique_key(session, table, key):
+        await _upsert_without_unique_key(session, table, rows, key, update_columns)
+        return
+
+    dialect = session.bind.dialect.name
+    for group in _group_by_columns(rows):
+        columns = _update_columns(group[0], key, update_columns)
+        if dialect in ("sqlite", "postgresql"):
+            dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+            stmt = dialect_insert(table)
+            if columns:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[key], set_={c: stmt.excluded[c] for c in columns}
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=[key])
+        elif dialect == "mysql":
+            stmt = mysql.insert(table)
+            # MySQL has no DO NOTHING: assigning the key to itself keeps the row unchanged
+            stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in columns or [key]})
+        else:
+            await _upsert_without_unique_key(session, table, group, key, update_columns)
+            continue
+        # One statement for the whole page, the compiled form is cached and reused for every page
+        await session.execute(stmt, group)
+
+
+async def bulk_update(session: AsyncSession, model, rows: List[Dict], key: str,
+                      update_columns: Optional[Sequence[str]] = None):
+    """
+    Update existing rows only (rows whose key is not in the table are skipped), one executemany per page
+    """
+    table = model.__table__
+    rows = _prepare_rows(table, rows, key)
+    for group in _group_by_columns(rows):
+        await _execute_update(session, table, group, key, update_columns)
+
+
+async def has_unique_key(session: AsyncSession, table, key: str) -> bool:
+    """Whether key is the primary key or has a unique index / constraint of its own (cached per database)"""
+    if any(c.name == key for c in table.primary_key.columns):
+        return True
+    cache_key = (str(session.bind.url), table.name, key)
+    if cache_key not in _unique_key_cache:
+        def _inspect(sync_session) -> bool:
+            inspector = inspect(sync_session.connection())
+            indexes = [i["column_names"] for i in inspector.get_indexes(table.name) if i.get("unique")]
+            constraints = [c["column_names"] for c in inspector.get_unique_constraints(table.name)]
+            return [key] in indexes + constraints
+
+        _unique_key_cache[cache_key] = await session.run_sync(_inspect)
+    return _unique_key_cache[cache_key]
+
+
+def clear_unique_key_cache():
+    """Forget inspected schemas, e.g. after a migration added unique keys"""
+    _unique_key_cache.clear()
+
+
+async def _upsert_without_unique_key(session: AsyncSession, table, rows: List[Dict], key: str,
+                                     update_columns: Optional[Sequence[str]]):
+    key_column = table.c[key]
+    result = await session.execute(select(key_column).where(key_column.in_([row[key] for row in rows])))
+    existing = {value for (value,) in result}
+    new_rows = [row for row in rows if row[key] not in existing]
+    old_rows = [row for row in rows if row[key] in existing]
+    for group in _group_by_columns(new_rows):
+        await session.execute(insert(table), group)
+    for group in _group_by_columns(old_rows):
+        await _execute_update(session, table, group, key, update_columns)
+
+
+async def _execute_update(session: AsyncSession, table, rows: List[Dict], key: str,
+                          update_columns: Optional[Sequence[str]]):
+    columns = _update_columns(rows[0], key, update_columns)
+    if not columns:
+        return
+    stmt = (
+        update(table)
+        .where(table.c[key] == bindparam("_key"))
+        .values({c: bindparam(f"_v_{c}") for c in columns})
+    )
+    params = [{"_key": row[key], **{f"_v_{c}": row.get(c) for c in columns}} for row in rows]
+    await session.execute(stmt, params)
+
+
+def _prepare_rows(table, rows: Iterable[Dict], key: str) -> List[Dict]:
+    """Keep table columns only and de-duplicate on key (the last row wins, like sequential upserts)"""
+    column_names = set(table.c.keys())
+    by_key: Dict = {}
+    for row in rows:
+        if row.get(key) is None:
+            continue
+        by_key[row[key]] = {k: v for k, v in row.items() if k in column_names}
+    return list(by_key.values())
+
+
+def _group_by_columns(rows: List[Dict]) -> List[List[Dict]]:
+    """Multi-row statements need the same columns in every row"""
+    groups: Dict[Tuple[str, ...], List[Dict]] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    return list(groups.values())
+
+
+def _update_columns(row: Dict, key: str, update_columns: Optional[Sequence[str]]) -> List[str]:
+    if update_columns is None:
+        return [c for c in row if c != key and c not in PROTECTED_COLUMNS]
+    return [c for c in update_columns if c in row and c != key]
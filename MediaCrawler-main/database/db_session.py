@@ -16,7 +16,7 @@
 # 详细许可条款请参阅项目根目录下的LICENSE文件。
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
-from sqlalchemy import text
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from contextlib import asynccontextmanager
@@ -26,6 +26,8 @@ from config.db_config import mysql_db_config, sqlite_db_config, postgres_db_conf
 
 # Keep a cache of engines
 _engines = {}
+# Session factories of the cached engines, built once per engine instead of on every get_session() call
+_session_factories = {}
 
 
 async def create_database_if_not_exists(db_type: str):
@@ -70,10 +72,41 @@ def get_async_engine(db_type: str = None):
         raise ValueError(f"Unsupported database type: {db_type}")
 
     engine = create_async_engine(db_url, echo=False)
+    if db_type == "sqlite":
+        event.listen(engine.sync_engine, "connect", _apply_sqlite_profile)
     _engines[db_type] = engine
     return engine
 
 
+def sqlite_pragmas() -> list:
+    """PRAGMA statements of the sqlite writer profile (see sqlite_db_config)"""
+    return [
+        f"PRAGMA journal_mode={sqlite_db_config['journal_mode']}",
+        f"PRAGMA synchronous={sqlite_db_config['synchronous']}",
+        # A negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size=-{int(sqlite_db_config['cache_size_kb'])}",
+        f"PRAGMA mmap_size={int(sqlite_db_config['mmap_size'])}",
+        f"PRAGMA busy_timeout={int(sqlite_db_config['busy_timeout_ms'])}",
+    ]
+
+
+def _apply_sqlite_profile(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in sqlite_pragmas():
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def get_session_factory(db_type: str = None):
+    engine = get_async_engine(db_type)
+    if not engine:
+        return None
+    factory = _session_factories.get(engine)
+    if factory is None:
+        factory = _session_factories[engine] = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    return factory
+
+
 async def create_tables(db_type: str = None):
     if db_type is None:
         db_type = config.SAVE_DATA_OPTION
@@ -86,11 +119,10 @@ async def create_tables(db_type: str = None):
 
 @asynccontextmanager
 async def get_session() -> AsyncSession:
-    engine = get_async_engine(config.SAVE_DATA_OPTION)
-    if not engine:
+    AsyncSessionFactory = get_session_factory(config.SAVE_DATA_OPTION)
+    if not AsyncSessionFactory:
         yield None
         return
-    AsyncSessionFactory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
     session = AsyncSessionFactory()
     try:
         yield session
@@ -16,7 +16,7 @@
 # 详细许可条款请参阅项目根目录下的LICENSE文件。
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
-from sqlalchemy import create_engine, Column, Integer, Text, String, BigInteger
+from sqlalchemy import create_engine, Column, Integer, Text, String, BigInteger, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -24,6 +24,9 @@ Base = declarative_base()
 
 class BilibiliVideo(Base):
     __tablename__ = 'bilibili_video'
+    __table_args__ = (
+        Index("ix_bilibili_video_source_keyword_create_time", "source_keyword", "create_time", mysql_length={"source_keyword": 255}),
+    )
     id = Column(Integer, primary_key=True)
     video_id = Column(BigInteger, nullable=False, index=True, unique=True)
     video_url = Column(Text, nullable=False)
@@ -49,6 +52,9 @@ class BilibiliVideo(Base):
 
 class BilibiliVideoComment(Base):
     __tablename__ = 'bilibili_video_comment'
+    __table_args__ = (
+        Index("ix_bilibili_video_comment_video_id_create_time", "video_id", "create_time"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(String(255))
     nickname = Column(Text)
@@ -57,7 +63,7 @@ class BilibiliVideoComment(Base):
     avatar = Column(Text)
     add_ts = Column(BigInteger)
     last_modify_ts = Column(BigInteger)
-    comment_id = Column(BigInteger, index=True)
+    comment_id = Column(BigInteger, index=True, unique=True)
     video_id = Column(BigInteger, index=True)
     content = Column(Text)
     create_time = Column(BigInteger)
@@ -68,7 +74,7 @@ class BilibiliVideoComment(Base):
 class BilibiliUpInfo(Base):
     __tablename__ = 'bilibili_up_info'
     id = Column(Integer, primary_key=True)
-    user_id = Column(BigInteger, index=True)
+    user_id = Column(BigInteger, index=True, unique=True)
     nickname = Column(Text)
     sex = Column(Text)
     sign = Column(Text)
@@ -97,7 +103,7 @@ class BilibiliContactInfo(Base):
 class BilibiliUpDynamic(Base):
     __tablename__ = 'bilibili_up_dynamic'
     id = Column(Integer, primary_key=True)
-    dynamic_id = Column(BigInteger, index=True)
+    dynamic_id = Column(BigInteger, index=True, unique=True)
     user_id = Column(String(255))
     user_name = Column(Text)
     text = Column(Text)
@@ -111,6 +117,9 @@ class BilibiliUpDynamic(Base):
 
 class DouyinAweme(Base):
     __tablename__ = 'douyin_aweme'
+    __table_args__ = (
+        Index("ix_douyin_aweme_source_keyword_create_time", "source_keyword", "create_time", mysql_length={"source_keyword": 255}),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(String(255))
     sec_uid = Column(String(255))
@@ -122,7 +131,7 @@ class DouyinAweme(Base):
     ip_location = Column(Text)
     add_ts = Column(BigInteger)
     last_modify_ts = Column(BigInteger)
-    aweme_id = Column(BigInteger, index=True)
+    aweme_id = Column(BigInteger, index=True, unique=True)
     aweme_type = Column(Text)
     title = Column(Text)
     desc = Column(Text)
@@ -140,6 +149,9 @@ class DouyinAweme(Base):
 
 class DouyinAwemeComment(Base):
     __tablename__ = 'douyin_aweme_comment'
+    __table_args__ = (
+        Index("ix_douyin_aweme_comment_aweme_id_create_time", "aweme_id", "create_time"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(String(255))
     sec_uid = Column(String(255))
@@ -151,7 +163,7 @@ class DouyinAwemeComment(Base):
     ip_location = Column(Text)
     add_ts = Column(BigInteger)
     last_modify_ts = Column(BigInteger)
-    comment_id = Column(BigInteger, index=True)
+    comment_id = Column(BigInteger, index=True, unique=True)
     aweme_id = Column(BigInteger, index=True)
     content = Column(Text)
     create_time = Column(BigInteger)
@@ -163,7 +175,7 @@ class DouyinAwemeComment(Base):
 class DyCreator(Base):
     __tablename__ = 'dy_creator'
     id = Column(Integer, primary_key=True)
-    user_id = Column(String(255))
+    user_id = Column(String(255), index=True, unique=True)
     nickname = Column(Text)
     avatar = Column(Text)
     ip_location = Column(Text)
@@ -178,13 +190,16 @@ class DyCreator(Base):
 
 class KuaishouVideo(Base):
     __tablename__ = 'kuaishou_video'
+    __table_args__ = (
+        Index("ix_kuaishou_video_source_keyword_create_time", "source_keyword", "create_time", mysql_length={"source_keyword": 255}),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(String(64))
     nickname = Column(Text)
     avatar = Column(Text)
     add_ts = Column(BigInteger)
     last_modify_ts = Column(BigInteger)
-    video_id = Column(String(255), index=True)
+    video_id = Column(String(255), index=True, unique=True)
     video_type = Column(Text)
     title = Column(Text)
     desc = Column(Text)
@@ -198,13 +213,16 @@ class KuaishouVideo(Base):
 
 class KuaishouVideoComment(Base):
     __tablename__ = 'kuaishou_video_comment'
+    __table_args__ = (
+        Index("ix_kuaishou_video_comment_video_id_create_time", "video_id", "create_time"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(Text)
     nickname = Column(Text)
     avatar = Column(Text)
     add_ts = Column(BigInteger)
     last_modify_ts = Column(BigInteger)
-    comment_id = Column(BigInteger, index=True)
+    comment_id = Column(BigInteger, index=True, unique=True)
     video_id = Column(String(255), index=True)
     content = Column(Text)
     create_time = Column(BigInteger)
@@ -212,6 +230,9 @@ class KuaishouVideoComment(Base):
 
 class WeiboNote(Base):
     __tablename__ = 'weibo_note'
+    __table_args__ = (
+        Index("ix_weibo_note_source_keyword_create_time", "source_keyword", "create_time", mysql_length={"source_keyword": 255}),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(String(255))
     nickname = Column(Text)
@@ -221,7 +242,7 @@ class WeiboNote(Base):
     ip_location = Column(Text, default='')
     add_ts = Column(BigInteger)
     last_modify_ts = Column(BigInteger)
-    note_id = Column(BigInteger, index=True)
+    note_id = Column(BigInteger, index=True, unique=True)
     content = Column(Text)
     create_time = Column(BigInteger, index=True)
     create_date_time = Column(String(255), index=True)
@@ -233,6 +254,9 @@ class WeiboNote(Base):
 
 class WeiboNoteComment(Base):
     __tablename__ = 'weibo_note_comment'
+    __table_args__ = (
+        Index("ix_weibo_note_comment_note_id_create_time", "note_id", "create_time"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(String(255))
     nickname = Column(Text)
@@ -242,7 +266,7 @@ class WeiboNoteComment(Base):
     ip_location = Column(Text, default='')
     add_ts = Column(BigInteger)
     last_modify_ts = Column(BigInteger)
-    comment_id = Column(BigInteger, index=True)
+    comment_id = Column(BigInteger, index=True, unique=True)
     note_id = Column(BigInteger, index=True)
     content = Column(Text)
     create_time = Column(BigInteger)
@@ -254,7 +278,7 @@ class WeiboNoteComment(Base):
 class WeiboCreator(Base):
     __tablename__ = 'weibo_creator'
     id = Column(Integer, primary_key=True)
-    user_id = Column(String(255))
+    user_id = Column(String(255), index=True, unique=True)
     nickname = Column(Text)
     avatar = Column(Text)
     ip_location = Column(Text)
@@ -269,7 +293,7 @@ class WeiboCreator(Base):
 class XhsCreator(Base):
     __tablename__ = 'xhs_creator'
     id = Column(Integer, primary_key=True)
-    user_id = Column(String(255))
+    user_id = Column(String(255), index=True, unique=True)
     nickname = Column(Text)
     avatar = Column(Text)
     ip_location = Column(Text)
@@ -284,6 +308,9 @@ class XhsCreator(Base):
 
 class XhsNote(Base):
     __tablename__ = 'xhs_note'
+    __table_args__ = (
+        Index("ix_xhs_note_source_keyword_time", "source_keyword", "time", mysql_length={"source_keyword": 255}),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(String(255))
     nickname = Column(Text)
@@ -291,7 +318,7 @@ class XhsNote(Base):
     ip_location = Column(Text)
     add_ts = Column(BigInteger)
     last_modify_ts = Column(BigInteger)
-    note_id = Column(String(255), index=True)
+    note_id = Column(String(255), index=True, unique=True)
     type = Column(Text)
     title = Column(Text)
     desc = Column(Text)
@@ -310,6 +337,9 @@ class XhsNote(Base):
 
 class XhsNoteComment(Base):
     __tablename__ = 'xhs_note_comment'
+    __table_args__ = (
+        Index("ix_xhs_note_comment_note_id_create_time", "note_id", "create_time"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(String(255))
     nickname = Column(Text)
@@ -317,7 +347,7 @@ class XhsNoteComment(Base):
     ip_location = Column(Text)
     add_ts = Column(BigInteger)
     last_modify_ts = Column(BigInteger)
-    comment_id = Column(String(255), index=True)
+    comment_id = Column(String(255), index=True, unique=True)
     create_time = Column(BigInteger, index=True)
     note_id = Column(String(255))
     content = Column(Text)
@@ -328,8 +358,11 @@ class XhsNoteComment(Base):
 
 class TiebaNote(Base):
     __tablename__ = 'tieba_note'
+    __table_args__ = (
+        Index("ix_tieba_note_source_keyword_publish_time", "source_keyword", "publish_time", mysql_length={"source_keyword": 255}),
+    )
     id = Column(Integer, primary_key=True)
-    note_id = Column(String(644), index=True)
+    note_id = Column(String(644), index=True, unique=True)
     title = Column(Text)
     desc = Column(Text)
     note_url = Column(Text)
@@ -349,8 +382,11 @@ class TiebaNote(Base):
 
 class TiebaComment(Base):
     __tablename__ = 'tieba_comment'
+    __table_args__ = (
+        Index("ix_tieba_comment_note_id_publish_time", "note_id", "publish_time"),
+    )
     id = Column(Integer, primary_key=True)
-    comment_id = Column(String(255), index=True)
+    comment_id = Column(String(255), index=True, unique=True)
     parent_comment_id = Column(String(255), default='')
     content = Column(Text)
     user_link = Column(Text, default='')
@@ -370,7 +406,7 @@ class TiebaComment(Base):
 class TiebaCreator(Base):
     __tablename__ = 'tieba_creator'
     id = Column(Integer, primary_key=True)
-    user_id = Column(String(64))
+    user_id = Column(String(64), index=True, unique=True)
     user_name = Column(Text)
     nickname = Column(Text)
     avatar = Column(Text)
@@ -384,8 +420,11 @@ class TiebaCreator(Base):
 
 class ZhihuContent(Base):
     __tablename__ = 'zhihu_content'
+    __table_args__ = (
+        Index("ix_zhihu_content_source_keyword_created_time", "source_keyword", "created_time", mysql_length={"source_keyword": 255}),
+    )
     id = Column(Integer, primary_key=True)
-    content_id = Column(String(64), index=True)
+    content_id = Column(String(64), index=True, unique=True)
     content_type = Column(Text)
     content_text = Column(Text)
     content_url = Column(Text)
@@ -412,8 +451,11 @@ class ZhihuContent(Base):
 
 class ZhihuComment(Base):
     __tablename__ = 'zhihu_comment'
+    __table_args__ = (
+        Index("ix_zhihu_comment_content_id_publish_time", "content_id", "publish_time"),
+    )
     id = Column(Integer, primary_key=True)
-    comment_id = Column(String(64), index=True)
+    comment_id = Column(String(64), index=True, unique=True)
     parent_comment_id = Column(String(64))
     content = Column(Text)
     publish_time = Column(String(32), index=True)
@@ -18,8 +18,12 @@
 
 """MongoDB storage base class: Provides connection management and common storage methods"""
 import asyncio
-from typing import Dict, List, Optional
+import weakref
+from typing import Any, Dict, List, Optional, Set, Tuple
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase, AsyncIOMotorCollection
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+import config
 from config import db_config
 from tools import utils
 
@@ -86,7 +90,17 @@ class MongoDBConnection:
 
 
 class MongoDBStoreBase:
-    """MongoDB storage base class: Provides common CRUD operations"""
+    """MongoDB storage base class: Provides common CRUD operations
+
+    Records passed to bulk_save_or_update are buffered per collection and written with one unordered bulk_write of
+    UpdateOne upserts once MONGODB_BULK_SIZE records are waiting or the first one waited MONGODB_FLUSH_INTERVAL_SEC.
+    The first time a collection is written, a unique index is created on its upsert key (note_id / comment_id ...).
+    """
+
+    # (collection name, key) pairs whose key index exists, checked once per process
+    _indexed_collections: Set[Tuple[str, str]] = set()
+    # Live stores, flushed together by flush_all()
+    _instances: "weakref.WeakSet[MongoDBStoreBase]" = weakref.WeakSet()
 
     def __init__(self, collection_prefix: str):
         """Initialize storage base class
@@ -95,6 +109,12 @@ class MongoDBStoreBase:
         """
         self.collection_prefix = collection_prefix
         self._connection = MongoDBConnection()
+        # (collection suffix, key) -> {key value: fields to $set}
+        self._buffers: Dict[Tuple[str, str], Dict[Any, Dict]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop = None
+        self._flush_tasks: Set[asyncio.Task] = set()
+        self._instances.add(self)
 
     async def get_collection(self, collection_suffix: str) -> AsyncIOMotorCollection:
         """Get collection: {prefix}_{suffix}"""
@@ -106,15 +126,114 @@ class MongoDBStoreBase:
         """Save or update data (upsert)"""
         try:
             collection = await self.get_collection(collection_suffix)
+            if len(query) == 1:
+                await self._ensure_key_index(collection_suffix, collection, next(iter(query)))
             await collection.update_one(query, {"$set": data}, upsert=True)
             return True
         except Exception as e:
             utils.logger.error(f"[MongoDBStoreBase] Save failed ({self.collection_prefix}_{collection_suffix}): {e}")
             return False
 
+    async def bulk_save_or_update(self, collection_suffix: str, key: str, items: List[Dict]) -> bool:
+        """Buffer upserts matched on key, written by flush() when the buffer is full or its timer fires"""
+        buffer = self._buffers.setdefault((collection_suffix, key), {})
+        for item in items:
+            value = item.get(key)
+            if value is None or value == "":
+                continue
+            # Updates of a key still in the buffer are merged, like consecutive $set updates
+            buffer.setdefault(value, {}).update(item)
+        if len(buffer) >= config.MONGODB_BULK_SIZE:
+            return await self.flush(collection_suffix)
+        if buffer:
+            self._schedule_flush()
+        return True
+
+    async def flush(self, collection_suffix: Optional[str] = None) -> bool:
+        """Write the buffered upserts of one collection (or of all of them)"""
+        ok = True
+        for buffer_key in [k for k in self._buffers if collection_suffix in (None, k[0])]:
+            docs = list(self._buffers.pop(buffer_key).values())
+            if docs:
+                ok = await self._bulk_upsert(buffer_key[0], buffer_key[1], docs) and ok
+        if not self._buffers and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return ok
+
+    @classmethod
+    async def flush_all(cls):
+        """Write the buffers of every store, called from main.async_cleanup"""
+        for store in list(cls._instances):
+            if store._flush_tasks:
+                await asyncio.gather(*store._flush_tasks, return_exceptions=True)
+            await store.flush()
+
+    async def _bulk_upsert(self, collection_suffix: str, key: str, docs: List[Dict]) -> bool:
+        collection_name = f"{self.collection_prefix}_{collection_suffix}"
+        try:
+            collection = await self.get_collection(collection_suffix)
+            await self._ensure_key_index(collection_suffix, collection, key)
+            operations = [UpdateOne({key: doc[key]}, {"$set": doc}, upsert=True) for doc in docs]
+            # Unordered: the server may apply the upserts in any order and one failing document does not stop the rest
+            result = await collection.bulk_write(operations, ordered=False)
+            utils.logger.info(
+                f"[MongoDBStoreBase] Bulk wrote {len(docs)} records to {collection_name} "
+                f"(upserted {result.upserted_count}, modified {result.modified_count})"
+            )
+            return True
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            first_error = errors[0].get("errmsg") if errors else e
+            utils.logger.error(
+                f"[MongoDBStoreBase] Bulk write to {collection_name}: {len(errors)} of {len(docs)} records failed, "
+                f"first error: {first_error}"
+            )
+            return False
+        except Exception as e:
+            utils.logger.error(f"[MongoDBStoreBase] Bulk write failed ({collection_name}): {e}")
+            return False
+
+    async def _ensure_key_index(self, collection_suffix: str, collection: AsyncIOMotorCollection, key: str):
+        """Create the unique index of the upsert key the first time a collection is written"""
+        collection_name = f"{self.collection_prefix}_{collection_suffix}"
+        if (collection_name, key) in self._indexed_collections:
+            return
+        try:
+            await collection.create_index([(key, ASCENDING)], unique=True)
+        except OperationFailure as e:
+            # Duplicates written before the index existed: a plain index still keeps the upsert lookups off a collection scan
+            utils.logger.warning(
+                f"[MongoDBStoreBase] Unique index on {collection_name}.{key} not created ({e}), using a plain index"
+            )
+            try:
+                await collection.create_index([(key, ASCENDING)])
+            except OperationFailure:
+                # An index on the key exists already, with other options
+                pass
+        self._indexed_collections.add((collection_name, key))
+
+    def _schedule_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._timer is not None and self._timer_loop is loop:
+            return
+        self._timer = loop.call_later(config.MONGODB_FLUSH_INTERVAL_SEC, self._flush_on_timer)
+        self._timer_loop = loop
+
+    def _flush_on_timer(self):
+        self._timer = None
+        task = asyncio.ensure_future(self.flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
     async def find_one(self, collection_suffix: str, query: Dict) -> Optional[Dict]:
         """Query a single record"""
         try:
+            # Buffered upserts are written first, so reads see every record stored so far
+            await self.flush(collection_suffix)
             collection = await self.get_collection(collection_suffix)
             return await collection.find_one(query)
         except Exception as e:
@@ -124,6 +243,7 @@ class MongoDBStoreBase:
     async def find_many(self, collection_suffix: str, query: Dict, limit: int = 0) -> List[Dict]:
         """Query multiple records (limit=0 means no limit)"""
         try:
+            await self.flush(collection_suffix)
             collection = await self.get_collection(collection_suffix)
             cursor = collection.find(query)
             if limit > 0:
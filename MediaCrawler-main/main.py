@@ -43,6 +43,7 @@ from media_platform.tieba import TieBaCrawler
 from media_platform.weibo import WeiboCrawler
 from media_platform.xhs import XiaoHongShuCrawler
 from media_platform.zhihu import ZhihuCrawler
+from store.write_behind import close_write_behind, drain_write_behind
 from tools.async_file_writer import AsyncFileWriter
 from var import crawler_type_var
 
@@ -68,6 +69,8 @@ class CrawlerFactory:
 
 
 crawler: Optional[AbstractCrawler] = None
+# Non-zero when crawled records could not be saved (write-behind failures are only logged during the crawl)
+exit_code = 0
 
 
 def _flush_excel_if_needed() -> None:
@@ -84,7 +87,7 @@ def _flush_excel_if_needed() -> None:
 
 
 async def _generate_wordcloud_if_needed() -> None:
-    if config.SAVE_DATA_OPTION != "json" or not config.ENABLE_GET_WORDCLOUD:
+    if config.SAVE_DATA_OPTION not in ("json", "jsonl") or not config.ENABLE_GET_WORDCLOUD:
         return
 
     try:
@@ -109,15 +112,17 @@ async def main() -> None:
     crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
     await crawler.start()
 
+    # Queued records must reach the stores before the Excel files and the wordcloud are built
+    await drain_write_behind()
     _flush_excel_if_needed()
 
     # Generate wordcloud after crawling is complete
-    # Only for JSON save mode
+    # Only for JSON / JSONL save modes
     await _generate_wordcloud_if_needed()
 
 
 async def async_cleanup() -> None:
-    global crawler
+    global crawler, exit_code
     if crawler:
         if getattr(crawler, "cdp_manager", None):
             try:
@@ -135,6 +140,32 @@ async def async_cleanup() -> None:
                 if "closed" not in error_msg and "disconnected" not in error_msg:
                     print(f"[Main] Error closing browser context: {e}")
 
+    # Queued records, buffered CSV rows, MongoDB upserts and Parquet row groups are written out even when the crawler is interrupted
+    try:
+        stats = await close_write_behind()
+        if stats and stats["records_failed"]:
+            exit_code = 1
+            print(f"[Main] Error: {stats['records_failed']} of {stats['records_queued']} crawled records were not "
+                  f"saved ({config.SAVE_DATA_OPTION}), see the WriteBehindQueue errors above")
+    except Exception as e:
+        exit_code = 1
+        print(f"[Main] Error draining write-behind queue: {e}")
+    AsyncFileWriter.flush_all()
+    if config.SAVE_DATA_OPTION == "mongodb":
+        try:
+            from database.mongodb_store_base import MongoDBStoreBase
+
+            await MongoDBStoreBase.flush_all()
+        except Exception as e:
+            print(f"[Main] Error flushing MongoDB buffers: {e}")
+    if config.SAVE_DATA_OPTION == "parquet":
+        try:
+            from store.parquet_store_base import ParquetStoreBase
+
+            ParquetStoreBase.flush_all()
+        except Exception as e:
+            print(f"[Main] Error closing Parquet files: {e}")
+
     if config.SAVE_DATA_OPTION in ("db", "sqlite"):
         await db.close()
 
@@ -155,3 +186,4 @@ if __name__ == "__main__":
             pass
 
     run(main, async_cleanup, cleanup_timeout_seconds=15.0, on_first_interrupt=_force_stop)
+    sys.exit(exit_code)
@@ -129,7 +129,12 @@ class XiaoHongShuCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < xhs_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = xhs_limit_count
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
+        for index, keyword in enumerate(config.KEYWORDS.split(",")):
+            if index > 0 and config.KEYWORD_SWITCH_SLEEP_SEC > 0:
+                # Pause between keywords so one session does not hit the search API back to back
+                sleep_sec = random.uniform(config.KEYWORD_SWITCH_SLEEP_SEC, 2 * config.KEYWORD_SWITCH_SLEEP_SEC)
+                utils.logger.info(f"[XiaoHongShuCrawler.search] Sleeping for {sleep_sec:.1f} seconds before next keyword")
+                await asyncio.sleep(sleep_sec)
             source_keyword_var.set(keyword)
             utils.logger.info(f"[XiaoHongShuCrawler.search] Current search keyword: {keyword}")
             page = 1
@@ -22,3 +22,29 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 17:29
 # @Desc    :
+
+from typing import Dict, Tuple, Type
+
+from base.base_crawler import AbstractStore
+from var import crawler_type_var
+
+_store_instances: Dict[Tuple[str, type, str], AbstractStore] = {}
+
+
+def get_store_instance(platform: str, store_class: Type) -> AbstractStore:
+    """
+    Return the store shared by every update_* call of one platform, save option and crawler type,
+    so the file writers (and their locks) and database helpers are created once per run
+    :param platform: platform name (xhs, dy, ks, etc.)
+    :param store_class: store implementation selected by the save option
+    :return:
+    """
+    key = (platform, store_class, crawler_type_var.get())
+    store = _store_instances.get(key)
+    if store is None:
+        store = store_class()
+        # Excel stores are singletons managed (and flushed) by ExcelStoreBase itself
+        if not isinstance(store, store_class):
+            return store
+        _store_instances[key] = store
+    return store
@@ -25,6 +25,8 @@
 from typing import List
 
 import config
+from store import get_store_instance
+from store.write_behind import write_behind
 from var import source_keyword_var
 
 from ._store_impl import *
@@ -37,17 +39,19 @@ class BiliStoreFactory:
         "db": BiliDbStoreImplement,
         "postgres": BiliDbStoreImplement,
         "json": BiliJsonStoreImplement,
+        "jsonl": BiliJsonStoreImplement,
         "sqlite": BiliSqliteStoreImplement,
         "mongodb": BiliMongoStoreImplement,
         "excel": BiliExcelStoreImplement,
+        "parquet": BiliParquetStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = BiliStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
-        return store_class()
+            raise ValueError("[BiliStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel or parquet ...")
+        return get_store_instance("bili", store_class)
 
 
 async def update_bilibili_video(video_item: Dict):
@@ -78,7 +82,7 @@ async def update_bilibili_video(video_item: Dict):
         "source_keyword": source_keyword_var.get(),
     }
     utils.logger.info(f"[store.bilibili.update_bilibili_video] bilibili video id:{video_id}, title:{save_content_item.get('title')}")
-    await BiliStoreFactory.create_store().store_content(content_item=save_content_item)
+    await write_behind(BiliStoreFactory.create_store()).store_content(content_item=save_content_item)
 
 
 async def update_up_info(video_item: Dict):
@@ -97,17 +101,22 @@ async def update_up_info(video_item: Dict):
         "is_official": video_item_card.get("official_verify").get("type"),
     }
     utils.logger.info(f"[store.bilibili.update_up_info] bilibili user_id:{video_item_card.get('mid')}")
-    await BiliStoreFactory.create_store().store_creator(creator=saver_up_info)
+    await write_behind(BiliStoreFactory.create_store()).store_creator(creator=saver_up_info)
 
 
 async def batch_update_bilibili_video_comments(video_id: str, comments: List[Dict]):
     if not comments:
         return
-    for comment_item in comments:
-        await update_bilibili_video_comment(video_id, comment_item)
+    comment_items = [_build_bilibili_video_comment(video_id, comment_item) for comment_item in comments]
+    await write_behind(BiliStoreFactory.create_store()).store_comments(comment_items)
 
 
 async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
+    save_comment_item = _build_bilibili_video_comment(video_id, comment_item)
+    await write_behind(BiliStoreFactory.create_store()).store_comment(save_comment_item)
+
+
+def _build_bilibili_video_comment(video_id: str, comment_item: Dict) -> Dict:
     comment_id = str(comment_item.get("rpid"))
     parent_comment_id = str(comment_item.get("parent", 0))
     content: Dict = comment_item.get("content")
@@ -129,7 +138,7 @@ async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.bilibili.update_bilibili_video_comment] Bilibili video comment: {comment_id}, content: {save_comment_item.get('content')}")
-    await BiliStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
 
 
 async def store_video(aid, video_content, extension_file_name):
@@ -212,7 +221,7 @@ async def update_bilibili_creator_contact(creator_info: Dict, fan_info: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
 
-    await BiliStoreFactory.create_store().store_contact(contact_item=save_contact_item)
+    await write_behind(BiliStoreFactory.create_store()).store_contact(contact_item=save_contact_item)
 
 
 async def update_bilibili_creator_dynamic(creator_info: Dict, dynamic_info: Dict):
@@ -229,4 +238,4 @@ async def update_bilibili_creator_dynamic(creator_info: Dict, dynamic_info: Dict
         "last_modify_ts": utils.get_current_timestamp(),
     }
 
-    await BiliStoreFactory.create_store().store_dynamic(dynamic_item=save_dynamic_item)
+    await write_behind(BiliStoreFactory.create_store()).store_dynamic(dynamic_item=save_dynamic_item)
@@ -27,7 +27,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
 from sqlalchemy import select
@@ -35,12 +35,14 @@ from sqlalchemy.orm import sessionmaker
 
 import config
 from base.base_crawler import AbstractStore
+from database.bulk_upsert import bulk_upsert
 from database.db_session import get_session
 from database.models import BilibiliVideoComment, BilibiliVideo, BilibiliUpInfo, BilibiliUpDynamic, BilibiliContactInfo
 from tools.async_file_writer import AsyncFileWriter
 from tools import utils, words
 from var import crawler_type_var
 from database.mongodb_store_base import MongoDBStoreBase
+from store.parquet_store_base import ParquetStoreBase
 
 
 class BiliCsvStoreImplement(AbstractStore):
@@ -78,6 +80,28 @@ class BiliCsvStoreImplement(AbstractStore):
             item_type="comments"
         )
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content CSV batch storage implementation
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.file_writer.write_items_to_csv(item_type="videos", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment CSV batch storage implementation
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.file_writer.write_items_to_csv(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         """
         creator CSV storage implementation
@@ -128,26 +152,25 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             content_item: content item dict
         """
-        video_id = int(content_item.get("video_id"))
-        content_item["video_id"] = video_id
-        content_item["user_id"] = int(content_item.get("user_id", 0) or 0)
-        content_item["liked_count"] = int(content_item.get("liked_count", 0) or 0)
-        content_item["create_time"] = int(content_item.get("create_time", 0) or 0)
-        
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Bilibili content DB batch storage implementation, one upsert per page
+        Args:
+            content_items: content item dicts
+        """
+        rows = []
+        for content_item in content_items:
+            content_item["video_id"] = int(content_item.get("video_id"))
+            content_item["user_id"] = int(content_item.get("user_id", 0) or 0)
+            content_item["liked_count"] = int(content_item.get("liked_count", 0) or 0)
+            content_item["create_time"] = int(content_item.get("create_time", 0) or 0)
+            content_item["last_modify_ts"] = utils.get_current_timestamp()
+            rows.append({**content_item, "add_ts": utils.get_current_timestamp()})
+
         async with get_session() as session:
-            result = await session.execute(select(BilibiliVideo).where(BilibiliVideo.video_id == video_id))
-            video_detail = result.scalar_one_or_none()
-
-            if not video_detail:
-                content_item["add_ts"] = utils.get_current_timestamp()
-                content_item["last_modify_ts"] = utils.get_current_timestamp()
-                new_content = BilibiliVideo(**content_item)
-                session.add(new_content)
-            else:
-                content_item["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in content_item.items():
-                    setattr(video_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, BilibiliVideo, rows, key="video_id")
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -155,28 +178,27 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = int(comment_item.get("comment_id"))
-        comment_item["comment_id"] = comment_id
-        comment_item["video_id"] = int(comment_item.get("video_id", 0) or 0)
-        comment_item["create_time"] = int(comment_item.get("create_time", 0) or 0)
-        comment_item["like_count"] = str(comment_item.get("like_count", "0"))
-        comment_item["sub_comment_count"] = str(comment_item.get("sub_comment_count", "0"))
-        comment_item["parent_comment_id"] = str(comment_item.get("parent_comment_id", "0"))
-        
+        await self.store_comments([comment_item])
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Bilibili comment DB batch storage implementation, one upsert per page
+        Args:
+            comment_items: comment item dicts
+        """
+        rows = []
+        for comment_item in comment_items:
+            comment_item["comment_id"] = int(comment_item.get("comment_id"))
+            comment_item["video_id"] = int(comment_item.get("video_id", 0) or 0)
+            comment_item["create_time"] = int(comment_item.get("create_time", 0) or 0)
+            comment_item["like_count"] = str(comment_item.get("like_count", "0"))
+            comment_item["sub_comment_count"] = str(comment_item.get("sub_comment_count", "0"))
+            comment_item["parent_comment_id"] = str(comment_item.get("parent_comment_id", "0"))
+            comment_item["last_modify_ts"] = utils.get_current_timestamp()
+            rows.append({**comment_item, "add_ts": utils.get_current_timestamp()})
+
         async with get_session() as session:
-            result = await session.execute(select(BilibiliVideoComment).where(BilibiliVideoComment.comment_id == comment_id))
-            comment_detail = result.scalar_one_or_none()
-
-            if not comment_detail:
-                comment_item["add_ts"] = utils.get_current_timestamp()
-                comment_item["last_modify_ts"] = utils.get_current_timestamp()
-                new_comment = BilibiliVideoComment(**comment_item)
-                session.add(new_comment)
-            else:
-                comment_item["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in comment_item.items():
-                    setattr(comment_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, BilibiliVideoComment, rows, key="comment_id")
 
     async def store_creator(self, creator: Dict):
         """
@@ -184,27 +206,17 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             creator: creator item dict
         """
-        creator_id = int(creator.get("user_id"))
-        creator["user_id"] = creator_id
+        creator["user_id"] = int(creator.get("user_id"))
         creator["total_fans"] = int(creator.get("total_fans", 0) or 0)
         creator["total_liked"] = int(creator.get("total_liked", 0) or 0)
         creator["user_rank"] = int(creator.get("user_rank", 0) or 0)
         creator["is_official"] = int(creator.get("is_official", 0) or 0)
 
+        creator["add_ts"] = utils.get_current_timestamp()
+        creator["last_modify_ts"] = utils.get_current_timestamp()
+
         async with get_session() as session:
-            result = await session.execute(select(BilibiliUpInfo).where(BilibiliUpInfo.user_id == creator_id))
-            creator_detail = result.scalar_one_or_none()
-
-            if not creator_detail:
-                creator["add_ts"] = utils.get_current_timestamp()
-                creator["last_modify_ts"] = utils.get_current_timestamp()
-                new_creator = BilibiliUpInfo(**creator)
-                session.add(new_creator)
-            else:
-                creator["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in creator.items():
-                    setattr(creator_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, BilibiliUpInfo, [creator], key="user_id")
 
     async def store_contact(self, contact_item: Dict):
         """
@@ -240,23 +252,12 @@ class BiliDbStoreImplement(AbstractStore):
         Args:
             dynamic_item: dynamic item dict
         """
-        dynamic_id = int(dynamic_item.get("dynamic_id"))
-        dynamic_item["dynamic_id"] = dynamic_id
-        
+        dynamic_item["dynamic_id"] = int(dynamic_item.get("dynamic_id"))
+        dynamic_item["add_ts"] = utils.get_current_timestamp()
+        dynamic_item["last_modify_ts"] = utils.get_current_timestamp()
+
         async with get_session() as session:
-            result = await session.execute(select(BilibiliUpDynamic).where(BilibiliUpDynamic.dynamic_id == dynamic_id))
-            dynamic_detail = result.scalar_one_or_none()
-
-            if not dynamic_detail:
-                dynamic_item["add_ts"] = utils.get_current_timestamp()
-                dynamic_item["last_modify_ts"] = utils.get_current_timestamp()
-                new_dynamic = BilibiliUpDynamic(**dynamic_item)
-                session.add(new_dynamic)
-            else:
-                dynamic_item["last_modify_ts"] = utils.get_current_timestamp()
-                for key, value in dynamic_item.items():
-                    setattr(dynamic_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, BilibiliUpDynamic, [dynamic_item], key="dynamic_id")
 
 
 class BiliJsonStoreImplement(AbstractStore):
@@ -294,6 +295,28 @@ class BiliJsonStoreImplement(AbstractStore):
             item_type="comments"
         )
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content JSON batch storage implementation
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.file_writer.write_items_to_json(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment JSON batch storage implementation
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.file_writer.write_items_to_json(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         """
         creator JSON storage implementation
@@ -354,16 +377,15 @@ class BiliMongoStoreImplement(AbstractStore):
         Args:
             content_item: Video content data
         """
-        video_id = content_item.get("video_id")
-        if not video_id:
-            return
+        await self.store_contents([content_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="contents",
-            query={"video_id": video_id},
-            data=content_item
-        )
-        utils.logger.info(f"[BiliMongoStoreImplement.store_content] Saved video {video_id} to MongoDB")
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Store a page of video content to MongoDB, buffered and upserted with one bulk_write
+        Args:
+            content_items: Video content data list
+        """
+        await self.mongo_store.bulk_save_or_update("contents", "video_id", content_items)
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -371,16 +393,15 @@ class BiliMongoStoreImplement(AbstractStore):
         Args:
             comment_item: Comment data
         """
-        comment_id = comment_item.get("comment_id")
-        if not comment_id:
-            return
+        await self.store_comments([comment_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="comments",
-            query={"comment_id": comment_id},
-            data=comment_item
-        )
-        utils.logger.info(f"[BiliMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Store a page of comments to MongoDB, buffered and upserted with one bulk_write
+        Args:
+            comment_items: Comment data list
+        """
+        await self.mongo_store.bulk_save_or_update("comments", "comment_id", comment_items)
 
     async def store_creator(self, creator_item: Dict):
         """
@@ -409,3 +430,18 @@ class BiliExcelStoreImplement:
             platform="bilibili",
             crawler_type=crawler_type_var.get()
         )
+
+
+class BiliParquetStoreImplement(ParquetStoreBase):
+    """Bilibili Parquet storage implementation, one file per item type"""
+
+    MODELS = {
+        "contents": BilibiliVideo,
+        "comments": BilibiliVideoComment,
+        "creators": BilibiliUpInfo,
+        "contacts": BilibiliContactInfo,
+        "dynamics": BilibiliUpDynamic,
+    }
+
+    def __init__(self):
+        super().__init__(platform="bilibili", crawler_type=crawler_type_var.get())
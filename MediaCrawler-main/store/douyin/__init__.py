@@ -21,9 +21,11 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 18:46
 # @Desc    :
-from typing import List
+from typing import List, Optional
 
 import config
+from store import get_store_instance
+from store.write_behind import write_behind
 from var import source_keyword_var
 
 from ._store_impl import *
@@ -36,17 +38,19 @@ class DouyinStoreFactory:
         "db": DouyinDbStoreImplement,
         "postgres": DouyinDbStoreImplement,
         "json": DouyinJsonStoreImplement,
+        "jsonl": DouyinJsonStoreImplement,
         "sqlite": DouyinSqliteStoreImplement,
         "mongodb": DouyinMongoStoreImplement,
         "excel": DouyinExcelStoreImplement,
+        "parquet": DouyinParquetStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = DouyinStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
-        return store_class()
+            raise ValueError("[DouyinStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel or parquet ...")
+        return get_store_instance("douyin", store_class)
 
 
 def _extract_note_image_list(aweme_detail: Dict) -> List[str]:
@@ -184,21 +188,27 @@ async def update_douyin_aweme(aweme_item: Dict):
         "source_keyword": source_keyword_var.get(),
     }
     utils.logger.info(f"[store.douyin.update_douyin_aweme] douyin aweme id:{aweme_id}, title:{save_content_item.get('title')}")
-    await DouyinStoreFactory.create_store().store_content(content_item=save_content_item)
+    await write_behind(DouyinStoreFactory.create_store()).store_content(content_item=save_content_item)
 
 
 async def batch_update_dy_aweme_comments(aweme_id: str, comments: List[Dict]):
     if not comments:
         return
-    for comment_item in comments:
-        await update_dy_aweme_comment(aweme_id, comment_item)
+    comment_items = [_build_dy_aweme_comment(aweme_id, comment_item) for comment_item in comments]
+    await write_behind(DouyinStoreFactory.create_store()).store_comments([item for item in comment_items if item])
 
 
 async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
+    save_comment_item = _build_dy_aweme_comment(aweme_id, comment_item)
+    if save_comment_item:
+        await write_behind(DouyinStoreFactory.create_store()).store_comment(save_comment_item)
+
+
+def _build_dy_aweme_comment(aweme_id: str, comment_item: Dict) -> Optional[Dict]:
     comment_aweme_id = comment_item.get("aweme_id")
     if aweme_id != comment_aweme_id:
         utils.logger.error(f"[store.douyin.update_dy_aweme_comment] comment_aweme_id: {comment_aweme_id} != aweme_id: {aweme_id}")
-        return
+        return None
     user_info = comment_item.get("user", {})
     comment_id = comment_item.get("cid")
     parent_comment_id = comment_item.get("reply_id", "0")
@@ -223,8 +233,7 @@ async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
         "pictures": ",".join(_extract_comment_image_list(comment_item)),
     }
     utils.logger.info(f"[store.douyin.update_dy_aweme_comment] douyin aweme comment: {comment_id}, content: {save_comment_item.get('content')}")
-
-    await DouyinStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
 
 
 async def save_creator(user_id: str, creator: Dict):
@@ -245,7 +254,7 @@ async def save_creator(user_id: str, creator: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.douyin.save_creator] creator:{local_db_item}")
-    await DouyinStoreFactory.create_store().store_creator(local_db_item)
+    await write_behind(DouyinStoreFactory.create_store()).store_creator(local_db_item)
 
 
 async def update_dy_aweme_image(aweme_id, pic_content, extension_file_name):
@@ -26,18 +26,19 @@ import asyncio
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
-from sqlalchemy import select
 
 import config
 from base.base_crawler import AbstractStore
+from database.bulk_upsert import bulk_update, bulk_upsert
 from database.db_session import get_session
 from database.models import DouyinAweme, DouyinAwemeComment, DyCreator
 from tools import utils, words
 from tools.async_file_writer import AsyncFileWriter
 from var import crawler_type_var
 from database.mongodb_store_base import MongoDBStoreBase
+from store.parquet_store_base import ParquetStoreBase
 
 
 class DouyinCsvStoreImplement(AbstractStore):
@@ -75,6 +76,28 @@ class DouyinCsvStoreImplement(AbstractStore):
             item_type="comments"
         )
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content CSV batch storage implementation
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.file_writer.write_items_to_csv(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment CSV batch storage implementation
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.file_writer.write_items_to_csv(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         """
         Douyin creator CSV storage implementation
@@ -97,20 +120,22 @@ class DouyinDbStoreImplement(AbstractStore):
         Args:
             content_item: content item dict
         """
-        aweme_id = int(content_item.get("aweme_id"))
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Douyin content DB batch storage implementation, one upsert per page
+        Args:
+            content_items: content item dicts
+        """
+        for content_item in content_items:
+            content_item["aweme_id"] = int(content_item.get("aweme_id"))
+        # Awemes without a title only refresh rows that already exist
+        titled = [{**item, "add_ts": utils.get_current_timestamp()} for item in content_items if item.get("title")]
+        untitled = [item for item in content_items if not item.get("title")]
         async with get_session() as session:
-            result = await session.execute(select(DouyinAweme).where(DouyinAweme.aweme_id == aweme_id))
-            aweme_detail = result.scalar_one_or_none()
-
-            if not aweme_detail:
-                content_item["add_ts"] = utils.get_current_timestamp()
-                if content_item.get("title"):
-                    new_content = DouyinAweme(**content_item)
-                    session.add(new_content)
-            else:
-                for key, value in content_item.items():
-                    setattr(aweme_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, DouyinAweme, titled, key="aweme_id")
+            await bulk_update(session, DouyinAweme, untitled, key="aweme_id")
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -118,19 +143,20 @@ class DouyinDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = int(comment_item.get("comment_id"))
+        await self.store_comments([comment_item])
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Douyin comment DB batch storage implementation, one upsert per page
+        Args:
+            comment_items: comment item dicts
+        """
+        rows = []
+        for comment_item in comment_items:
+            comment_item["comment_id"] = int(comment_item.get("comment_id"))
+            rows.append({**comment_item, "add_ts": utils.get_current_timestamp()})
         async with get_session() as session:
-            result = await session.execute(select(DouyinAwemeComment).where(DouyinAwemeComment.comment_id == comment_id))
-            comment_detail = result.scalar_one_or_none()
-
-            if not comment_detail:
-                comment_item["add_ts"] = utils.get_current_timestamp()
-                new_comment = DouyinAwemeComment(**comment_item)
-                session.add(new_comment)
-            else:
-                for key, value in comment_item.items():
-                    setattr(comment_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, DouyinAwemeComment, rows, key="comment_id")
 
     async def store_creator(self, creator: Dict):
         """
@@ -138,19 +164,9 @@ class DouyinDbStoreImplement(AbstractStore):
         Args:
             creator: creator dict
         """
-        user_id = creator.get("user_id")
+        row = {**creator, "add_ts": utils.get_current_timestamp()}
         async with get_session() as session:
-            result = await session.execute(select(DyCreator).where(DyCreator.user_id == user_id))
-            user_detail = result.scalar_one_or_none()
-
-            if not user_detail:
-                creator["add_ts"] = utils.get_current_timestamp()
-                new_creator = DyCreator(**creator)
-                session.add(new_creator)
-            else:
-                for key, value in creator.items():
-                    setattr(user_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, DyCreator, [row], key="user_id")
 
 
 class DouyinJsonStoreImplement(AbstractStore):
@@ -188,6 +204,28 @@ class DouyinJsonStoreImplement(AbstractStore):
             item_type="comments"
         )
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content JSON batch storage implementation
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.file_writer.write_items_to_json(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment JSON batch storage implementation
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.file_writer.write_items_to_json(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         """
         creator JSON storage implementation
@@ -220,16 +258,15 @@ class DouyinMongoStoreImplement(AbstractStore):
         Args:
             content_item: Video content data
         """
-        aweme_id = content_item.get("aweme_id")
-        if not aweme_id:
-            return
+        await self.store_contents([content_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="contents",
-            query={"aweme_id": aweme_id},
-            data=content_item
-        )
-        utils.logger.info(f"[DouyinMongoStoreImplement.store_content] Saved aweme {aweme_id} to MongoDB")
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Store a page of video content to MongoDB, buffered and upserted with one bulk_write
+        Args:
+            content_items: Video content data list
+        """
+        await self.mongo_store.bulk_save_or_update("contents", "aweme_id", content_items)
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -237,16 +274,15 @@ class DouyinMongoStoreImplement(AbstractStore):
         Args:
             comment_item: Comment data
         """
-        comment_id = comment_item.get("comment_id")
-        if not comment_id:
-            return
+        await self.store_comments([comment_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="comments",
-            query={"comment_id": comment_id},
-            data=comment_item
-        )
-        utils.logger.info(f"[DouyinMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Store a page of comments to MongoDB, buffered and upserted with one bulk_write
+        Args:
+            comment_items: Comment data list
+        """
+        await self.mongo_store.bulk_save_or_update("comments", "comment_id", comment_items)
 
     async def store_creator(self, creator_item: Dict):
         """
@@ -275,3 +311,16 @@ class DouyinExcelStoreImplement:
             platform="douyin",
             crawler_type=crawler_type_var.get()
         )
+
+
+class DouyinParquetStoreImplement(ParquetStoreBase):
+    """Douyin Parquet storage implementation, one file per item type"""
+
+    MODELS = {
+        "contents": DouyinAweme,
+        "comments": DouyinAwemeComment,
+        "creators": DyCreator,
+    }
+
+    def __init__(self):
+        super().__init__(platform="douyin", crawler_type=crawler_type_var.get())
@@ -29,16 +29,24 @@
 """
 Excel Store Base Implementation
 Provides Excel export functionality for crawled data with formatted sheets
+
+Rows are not kept in an openpyxl workbook during the crawl: each sheet spills its rows to a temporary file and
+tracks the column widths as rows arrive. flush() streams the spilled rows into a write-only workbook whose cells
+share two named styles, so memory stays flat regardless of the number of rows.
 """
 
+import json
+import tempfile
 import threading
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, Iterator, List, Any
 from pathlib import Path
 
 try:
     import openpyxl
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
     from openpyxl.utils import get_column_letter
     EXCEL_AVAILABLE = True
 except ImportError:
@@ -47,6 +55,54 @@ except ImportError:
 from base.base_crawler import AbstractStore
 from tools import utils
 
+HEADER_STYLE = "mediacrawler_header"
+BODY_STYLE = "mediacrawler_body"
+
+
+class ExcelSheetSpool:
+    """
+    Rows of one sheet, spilled to a temporary file (one JSON array per line) until the workbook is written
+    """
+
+    def __init__(self, title: str):
+        self.title = title
+        self.headers: List[str] = []
+        # Longest value seen per column, the header included
+        self.widths: List[int] = []
+        # Rows written so far, the header included (same meaning as Worksheet.max_row)
+        self.max_row = 0
+        self._file = None
+
+    def append(self, values: List[Any]):
+        if self._file is None:
+            self._file = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self._file.write(json.dumps(values, ensure_ascii=False, default=str) + "\n")
+        for col, value in enumerate(values):
+            length = len(str(value)) if value not in ("", None) else 0
+            if col < len(self.widths):
+                self.widths[col] = max(self.widths[col], length)
+            else:
+                self.widths.append(length)
+        self.max_row += 1
+
+    def rows(self) -> Iterator[List[Any]]:
+        if self._file is None:
+            return
+        self._file.flush()
+        self._file.seek(0)
+        for line in self._file:
+            yield json.loads(line)
+        self._file.seek(0, 2)
+
+    def column_widths(self) -> List[float]:
+        # Set width with min/max constraints
+        return [min(max(width + 2, 10), 50) for width in self.widths]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
 
 class ExcelStoreBase(AbstractStore):
     """
@@ -90,6 +146,8 @@ class ExcelStoreBase(AbstractStore):
                     utils.logger.info(f"[ExcelStoreBase] Flushed instance: {key}")
                 except Exception as e:
                     utils.logger.error(f"[ExcelStoreBase] Error flushing {key}: {e}")
+                finally:
+                    instance.close()
             cls._instances.clear()
 
     def __init__(self, platform: str, crawler_type: str = "search"):
@@ -114,14 +172,10 @@ class ExcelStoreBase(AbstractStore):
         self.data_dir = Path("data") / platform
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
-        # Initialize workbook
-        self.workbook = openpyxl.Workbook()
-        self.workbook.remove(self.workbook.active)  # Remove default sheet
-
-        # Create sheets
-        self.contents_sheet = self.workbook.create_sheet("Contents")
-        self.comments_sheet = self.workbook.create_sheet("Comments")
-        self.creators_sheet = self.workbook.create_sheet("Creators")
+        # Create sheets (spilled to disk, the workbook itself is only built by flush)
+        self.contents_sheet = ExcelSheetSpool("Contents")
+        self.comments_sheet = ExcelSheetSpool("Comments")
+        self.creators_sheet = ExcelSheetSpool("Creators")
 
         # Track if headers are written
         self.contents_headers_written = False
@@ -140,77 +194,53 @@ class ExcelStoreBase(AbstractStore):
 
         utils.logger.info(f"[ExcelStoreBase] Initialized Excel export to: {self.filename}")
 
-    def _apply_header_style(self, sheet, row_num: int = 1):
+    @staticmethod
+    def _register_styles(workbook):
         """
-        Apply formatting to header row
+        Register the header / body formatting once as named styles shared by every cell
 
         Args:
-            sheet: Worksheet object
-            row_num: Row number for headers (default: 1)
+            workbook: Workbook object
         """
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=11)
-        header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
         border = Border(
             left=Side(style='thin'),
             right=Side(style='thin'),
             top=Side(style='thin'),
             bottom=Side(style='thin')
         )
-
-        for cell in sheet[row_num]:
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = header_alignment
-            cell.border = border
-
-    def _auto_adjust_column_width(self, sheet):
-        """
-        Auto-adjust column widths based on content
-
-        Args:
-            sheet: Worksheet object
-        """
-        for column in sheet.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-
-            for cell in column:
-                try:
-                    if cell.value:
-                        max_length = max(max_length, len(str(cell.value)))
-                except (TypeError, AttributeError):
-                    pass
-
-            # Set width with min/max constraints
-            adjusted_width = min(max(max_length + 2, 10), 50)
-            sheet.column_dimensions[column_letter].width = adjusted_width
-
-    def _write_headers(self, sheet, headers: List[str]):
+        header = NamedStyle(name=HEADER_STYLE)
+        header.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+        header.font = Font(bold=True, color="FFFFFF", size=11)
+        header.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        header.border = border
+        body = NamedStyle(name=BODY_STYLE)
+        body.alignment = Alignment(vertical="top", wrap_text=True)
+        body.border = border
+        workbook.add_named_style(header)
+        workbook.add_named_style(body)
+
+    def _write_headers(self, sheet: ExcelSheetSpool, headers: List[str]):
         """
         Write headers to sheet
 
         Args:
-            sheet: Worksheet object
+            sheet: Sheet spool
             headers: List of header names
         """
-        for col_num, header in enumerate(headers, 1):
-            sheet.cell(row=1, column=col_num, value=header)
+        sheet.headers = headers
+        sheet.append(headers)
 
-        self._apply_header_style(sheet)
-
-    def _write_row(self, sheet, data: Dict[str, Any], headers: List[str]):
+    def _write_row(self, sheet: ExcelSheetSpool, data: Dict[str, Any], headers: List[str]):
         """
         Write data row to sheet
 
         Args:
-            sheet: Worksheet object
+            sheet: Sheet spool
             data: Data dictionary
             headers: List of header names (defines column order)
         """
-        row_num = sheet.max_row + 1
-
-        for col_num, header in enumerate(headers, 1):
+        values = []
+        for header in headers:
             value = data.get(header, "")
 
             # Handle different data types
@@ -218,17 +248,12 @@ class ExcelStoreBase(AbstractStore):
                 value = str(value)
             elif value is None:
                 value = ""
+            # Control characters are rejected by openpyxl when the workbook is written
+            if isinstance(value, str):
+                value = ILLEGAL_CHARACTERS_RE.sub("", value)
+            values.append(value)
 
-            cell = sheet.cell(row=row_num, column=col_num, value=value)
-
-            # Apply basic formatting
-            cell.alignment = Alignment(vertical="top", wrap_text=True)
-            cell.border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
+        sheet.append(values)
 
     async def store_content(self, content_item: Dict):
         """
@@ -301,7 +326,7 @@ class ExcelStoreBase(AbstractStore):
         """
         # Create contacts sheet if not exists
         if self.contacts_sheet is None:
-            self.contacts_sheet = self.workbook.create_sheet("Contacts")
+            self.contacts_sheet = ExcelSheetSpool("Contacts")
 
         # Define headers
         headers = list(contact_item.keys())
@@ -325,7 +350,7 @@ class ExcelStoreBase(AbstractStore):
         """
         # Create dynamics sheet if not exists
         if self.dynamics_sheet is None:
-            self.dynamics_sheet = self.workbook.create_sheet("Dynamics")
+            self.dynamics_sheet = ExcelSheetSpool("Dynamics")
 
         # Define headers
         headers = list(dynamic_item.keys())
@@ -340,41 +365,50 @@ class ExcelStoreBase(AbstractStore):
 
         utils.logger.info(f"[ExcelStoreBase] Stored dynamic to Excel: {dynamic_item.get('dynamic_id', 'N/A')}")
 
+    def _sheets(self) -> List[ExcelSheetSpool]:
+        sheets = [self.contents_sheet, self.comments_sheet, self.creators_sheet, self.contacts_sheet, self.dynamics_sheet]
+        return [sheet for sheet in sheets if sheet is not None]
+
     def flush(self):
         """
-        Save workbook to file
+        Save workbook to file, streaming the spilled rows into a write-only workbook
         """
         try:
-            # Auto-adjust column widths for all sheets
-            self._auto_adjust_column_width(self.contents_sheet)
-            self._auto_adjust_column_width(self.comments_sheet)
-            self._auto_adjust_column_width(self.creators_sheet)
-            if self.contacts_sheet is not None:
-                self._auto_adjust_column_width(self.contacts_sheet)
-            if self.dynamics_sheet is not None:
-                self._auto_adjust_column_width(self.dynamics_sheet)
-
-            # Remove empty sheets (only header row)
-            if self.contents_sheet.max_row == 1:
-                self.workbook.remove(self.contents_sheet)
-            if self.comments_sheet.max_row == 1:
-                self.workbook.remove(self.comments_sheet)
-            if self.creators_sheet.max_row == 1:
-                self.workbook.remove(self.creators_sheet)
-            if self.contacts_sheet is not None and self.contacts_sheet.max_row == 1:
-                self.workbook.remove(self.contacts_sheet)
-            if self.dynamics_sheet is not None and self.dynamics_sheet.max_row == 1:
-                self.workbook.remove(self.dynamics_sheet)
+            # Skip empty sheets (only header row)
+            sheets = [sheet for sheet in self._sheets() if sheet.max_row > 1]
 
             # Check if there are any sheets left
-            if len(self.workbook.sheetnames) == 0:
+            if not sheets:
                 utils.logger.info(f"[ExcelStoreBase] No data to save, skipping file creation: {self.filename}")
                 return
 
+            workbook = openpyxl.Workbook(write_only=True)
+            self._register_styles(workbook)
+            for spool in sheets:
+                worksheet = workbook.create_sheet(spool.title)
+                # Write-only sheets take their column widths before the first row
+                for col_num, width in enumerate(spool.column_widths(), 1):
+                    worksheet.column_dimensions[get_column_letter(col_num)].width = width
+                for row_num, values in enumerate(spool.rows()):
+                    style = HEADER_STYLE if row_num == 0 else BODY_STYLE
+                    row = []
+                    for value in values:
+                        cell = WriteOnlyCell(worksheet, value=value)
+                        cell.style = style
+                        row.append(cell)
+                    worksheet.append(row)
+
             # Save workbook
-            self.workbook.save(self.filename)
+            workbook.save(self.filename)
             utils.logger.info(f"[ExcelStoreBase] Excel file saved successfully: {self.filename}")
 
         except Exception as e:
             utils.logger.error(f"[ExcelStoreBase] Error saving Excel file: {e}")
             raise
+
+    def close(self):
+        """
+        Delete the spilled rows
+        """
+        for sheet in self._sheets():
+            sheet.close()
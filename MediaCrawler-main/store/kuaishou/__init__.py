@@ -25,6 +25,8 @@
 from typing import List
 
 import config
+from store import get_store_instance
+from store.write_behind import write_behind
 from var import source_keyword_var
 
 from ._store_impl import *
@@ -36,9 +38,11 @@ class KuaishouStoreFactory:
         "db": KuaishouDbStoreImplement,
         "postgres": KuaishouDbStoreImplement,
         "json": KuaishouJsonStoreImplement,
+        "jsonl": KuaishouJsonStoreImplement,
         "sqlite": KuaishouSqliteStoreImplement,
         "mongodb": KuaishouMongoStoreImplement,
         "excel": KuaishouExcelStoreImplement,
+        "parquet": KuaishouParquetStoreImplement,
     }
 
     @staticmethod
@@ -46,8 +50,8 @@ class KuaishouStoreFactory:
         store_class = KuaishouStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
-        return store_class()
+                "[KuaishouStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel or parquet ...")
+        return get_store_instance("kuaishou", store_class)
 
 
 async def update_kuaishou_video(video_item: Dict):
@@ -75,18 +79,23 @@ async def update_kuaishou_video(video_item: Dict):
     }
     utils.logger.info(
         f"[store.kuaishou.update_kuaishou_video] Kuaishou video id:{video_id}, title:{save_content_item.get('title')}")
-    await KuaishouStoreFactory.create_store().store_content(content_item=save_content_item)
+    await write_behind(KuaishouStoreFactory.create_store()).store_content(content_item=save_content_item)
 
 
 async def batch_update_ks_video_comments(video_id: str, comments: List[Dict]):
     utils.logger.info(f"[store.kuaishou.batch_update_ks_video_comments] video_id:{video_id}, comments:{comments}")
     if not comments:
         return
-    for comment_item in comments:
-        await update_ks_video_comment(video_id, comment_item)
+    comment_items = [_build_ks_video_comment(video_id, comment_item) for comment_item in comments]
+    await write_behind(KuaishouStoreFactory.create_store()).store_comments(comment_items)
 
 
 async def update_ks_video_comment(video_id: str, comment_item: Dict):
+    save_comment_item = _build_ks_video_comment(video_id, comment_item)
+    await write_behind(KuaishouStoreFactory.create_store()).store_comment(save_comment_item)
+
+
+def _build_ks_video_comment(video_id: str, comment_item: Dict) -> Dict:
     # V2 API uses snake_case field names and comment_id is int type
     # Old GraphQL API used camelCase field names
     # Support both formats for backward compatibility
@@ -107,7 +116,8 @@ async def update_ks_video_comment(video_id: str, comment_item: Dict):
     }
     utils.logger.info(
         f"[store.kuaishou.update_ks_video_comment] Kuaishou video comment: {comment_id}, content: {save_comment_item.get('content')}")
-    await KuaishouStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
+
 
 async def save_creator(user_id: str, creator: Dict):
     ownerCount = creator.get('ownerCount', {})
@@ -126,4 +136,4 @@ async def save_creator(user_id: str, creator: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.kuaishou.save_creator] creator:{local_db_item}")
-    await KuaishouStoreFactory.create_store().store_creator(local_db_item)
+    await write_behind(KuaishouStoreFactory.create_store()).store_creator(local_db_item)
@@ -27,19 +27,20 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 from tools.async_file_writer import AsyncFileWriter
 
 import aiofiles
-from sqlalchemy import select
 
 import config
 from base.base_crawler import AbstractStore
+from database.bulk_upsert import bulk_upsert
 from database.db_session import get_session
 from database.models import KuaishouVideo, KuaishouVideoComment
 from tools import utils, words
 from var import crawler_type_var
 from database.mongodb_store_base import MongoDBStoreBase
+from store.parquet_store_base import ParquetStoreBase
 
 
 def calculate_number_of_files(file_store_path: str) -> int:
@@ -84,6 +85,28 @@ class KuaishouCsvStoreImplement(AbstractStore):
         """
         await self.writer.write_to_csv(item_type="comments", item=comment_item)
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content CSV batch storage implementation
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_csv(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment CSV batch storage implementation
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_csv(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         pass
 
@@ -98,20 +121,17 @@ class KuaishouDbStoreImplement(AbstractStore):
         Args:
             content_item: content item dict
         """
-        video_id = content_item.get("video_id")
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Kuaishou content DB batch storage implementation, one upsert per page
+        Args:
+            content_items: content item dicts
+        """
+        rows = [{**item, "add_ts": utils.get_current_timestamp()} for item in content_items]
         async with get_session() as session:
-            result = await session.execute(select(KuaishouVideo).where(KuaishouVideo.video_id == video_id))
-            video_detail = result.scalar_one_or_none()
-
-            if not video_detail:
-                content_item["add_ts"] = utils.get_current_timestamp()
-                new_content = KuaishouVideo(**content_item)
-                session.add(new_content)
-            else:
-                for key, value in content_item.items():
-                    if hasattr(video_detail, key):
-                        setattr(video_detail, key, value)
-            await session.commit()
+            await bulk_upsert(session, KuaishouVideo, rows, key="video_id")
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -119,21 +139,17 @@ class KuaishouDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = comment_item.get("comment_id")
-        async with get_session() as session:
-            result = await session.execute(
-                select(KuaishouVideoComment).where(KuaishouVideoComment.comment_id == comment_id))
-            comment_detail = result.scalar_one_or_none()
+        await self.store_comments([comment_item])
 
-            if not comment_detail:
-                comment_item["add_ts"] = utils.get_current_timestamp()
-                new_comment = KuaishouVideoComment(**comment_item)
-                session.add(new_comment)
-            else:
-                for key, value in comment_item.items():
-                    if hasattr(comment_detail, key):
-                        setattr(comment_detail, key, value)
-            await session.commit()
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Kuaishou comment DB batch storage implementation, one upsert per page
+        Args:
+            comment_items: comment item dicts
+        """
+        rows = [{**item, "add_ts": utils.get_current_timestamp()} for item in comment_items]
+        async with get_session() as session:
+            await bulk_upsert(session, KuaishouVideoComment, rows, key="comment_id")
 
 
 class KuaishouJsonStoreImplement(AbstractStore):
@@ -163,6 +179,28 @@ class KuaishouJsonStoreImplement(AbstractStore):
         """
         await self.writer.write_single_item_to_json(item_type="comments", item=comment_item)
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content JSON batch storage implementation
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_json(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment JSON batch storage implementation
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_json(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         pass
 
@@ -184,16 +222,15 @@ class KuaishouMongoStoreImplement(AbstractStore):
         Args:
             content_item: Video content data
         """
-        video_id = content_item.get("video_id")
-        if not video_id:
-            return
+        await self.store_contents([content_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="contents",
-            query={"video_id": video_id},
-            data=content_item
-        )
-        utils.logger.info(f"[KuaishouMongoStoreImplement.store_content] Saved video {video_id} to MongoDB")
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Store a page of video content to MongoDB, buffered and upserted with one bulk_write
+        Args:
+            content_items: Video content data list
+        """
+        await self.mongo_store.bulk_save_or_update("contents", "video_id", content_items)
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -201,16 +238,15 @@ class KuaishouMongoStoreImplement(AbstractStore):
         Args:
             comment_item: Comment data
         """
-        comment_id = comment_item.get("comment_id")
-        if not comment_id:
-            return
+        await self.store_comments([comment_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="comments",
-            query={"comment_id": comment_id},
-            data=comment_item
-        )
-        utils.logger.info(f"[KuaishouMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Store a page of comments to MongoDB, buffered and upserted with one bulk_write
+        Args:
+            comment_items: Comment data list
+        """
+        await self.mongo_store.bulk_save_or_update("comments", "comment_id", comment_items)
 
     async def store_creator(self, creator_item: Dict):
         """
@@ -239,3 +275,15 @@ class KuaishouExcelStoreImplement:
             platform="kuaishou",
             crawler_type=crawler_type_var.get()
         )
+
+
+class KuaishouParquetStoreImplement(ParquetStoreBase):
+    """Kuaishou Parquet storage implementation, one file per item type"""
+
+    MODELS = {
+        "contents": KuaishouVideo,
+        "comments": KuaishouVideoComment,
+    }
+
+    def __init__(self):
+        super().__init__(platform="kuaishou", crawler_type=crawler_type_var.get())
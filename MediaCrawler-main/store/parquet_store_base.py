@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/store/parquet_store_base.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Parquet storage shared by all platforms
+
+Every platform / item type / date (plus keyword when SAVE_DATA_PARTITIONED is on, same layout as the CSV / JSON
+files) gets one Parquet file. Records are buffered and written as one zstd-compressed row group per
+PARQUET_ROW_GROUP_SIZE records. The file footer is only written when the file is closed, by
+ParquetStoreBase.flush_all() from main.async_cleanup.
+
+The columns come from the platform's ORM models (database/models.py), which mirror the dicts built by the
+store/*/__init__.py update_* functions, so every file of an item type has the same schema whatever the first
+record looked like. Integer columns are stored as int64, everything else as strings.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Integer
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+import config
+from base.base_crawler import AbstractStore
+from tools import utils
+from tools.async_file_writer import AsyncFileWriter
+
+# Model columns that are filled by the database, not by the update_* dicts
+DB_ONLY_COLUMNS = ("id", "add_ts")
+
+
+def schema_from_model(model) -> "pa.Schema":
+    """Arrow schema of the columns an update_* dict fills in an ORM model"""
+    fields = []
+    for column in model.__table__.columns:
+        if column.name in DB_ONLY_COLUMNS:
+            continue
+        fields.append(pa.field(column.name, pa.int64() if isinstance(column.type, Integer) else pa.string()))
+    return pa.schema(fields)
+
+
+class ParquetFileWriter:
+    """
+    Buffered writer of one Parquet file, records are written one row group at a time
+    """
+
+    def __init__(self, file_path: str, date: str, schema: "pa.Schema"):
+        self.file_path = file_path
+        self.date = date
+        self.schema = schema
+        self.rows: List[Dict] = []
+        self.rows_written = 0
+        self.dropped_keys = set()
+        self.invalid_columns = set()
+        self._int_columns = {field.name for field in schema if pa.types.is_integer(field.type)}
+        self._writer = None
+
+    def write(self, item: Dict):
+        extra = item.keys() - set(self.schema.names) - self.dropped_keys
+        if extra:
+            self.dropped_keys |= extra
+            utils.logger.warning(
+                f"[ParquetFileWriter.write] Columns {sorted(extra)} are not in the schema of {self.file_path}, dropped"
+            )
+        self.rows.append({name: self._coerce(name, item.get(name)) for name in self.schema.names})
+        if len(self.rows) >= config.PARQUET_ROW_GROUP_SIZE:
+            self.flush()
+
+    def _coerce(self, name: str, value: Any) -> Any:
+        if value is None or value == "":
+            return None
+        if name in self._int_columns:
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                if name not in self.invalid_columns:
+                    self.invalid_columns.add(name)
+                    utils.logger.warning(
+                        f"[ParquetFileWriter.write] Non-integer value {value!r} in column {name} of {self.file_path}, "
+                        f"stored as null"
+                    )
+                return None
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, ensure_ascii=False)
+        return str(value)
+
+    def flush(self):
+        """Write the buffered records as one row group"""
+        if not self.rows:
+            return
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.file_path, self.schema, compression=config.PARQUET_COMPRESSION)
+        rows, self.rows = self.rows, []
+        self._writer.write_table(pa.Table.from_pylist(rows, schema=self.schema), row_group_size=len(rows))
+        self.rows_written += len(rows)
+
+    def close(self):
+        """Write the remaining records and the file footer"""
+        try:
+            self.flush()
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+                utils.logger.info(f"[ParquetFileWriter.close] Saved {self.rows_written} records to {self.file_path}")
+
+
+class ParquetStoreBase(AbstractStore):
+    """
+    Parquet store of a platform, subclasses name their ORM models per item type in MODELS
+    """
+
+    # item type (contents / comments / creators / contacts / dynamics) -> ORM model
+    MODELS: Dict[str, Any] = {}
+
+    # Open writers shared by all stores, keyed by the absolute path the file was opened for
+    _writers: Dict[str, ParquetFileWriter] = {}
+
+    @classmethod
+    def flush_all(cls):
+        """
+        Write the buffered records and close the files
+        Called from the app_runner cleanup hook (main.async_cleanup) when the crawler stops
+        """
+        for file_path, writer in list(cls._writers.items()):
+            try:
+                writer.close()
+            except Exception as e:
+                utils.logger.error(f"[ParquetStoreBase.flush_all] Error closing {file_path}: {e}")
+        cls._writers.clear()
+
+    def __init__(self, platform: str, crawler_type: str):
+        if not PARQUET_AVAILABLE:
+            raise ImportError(
+                "pyarrow is required for Parquet export. "
+                "Install it with: pip install pyarrow"
+            )
+        self.platform = platform
+        self.file_writer = AsyncFileWriter(platform=platform, crawler_type=crawler_type)
+
+    async def store_content(self, content_item: Dict):
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        self.write_items("contents", content_items)
+
+    async def store_comment(self, comment_item: Dict):
+        await self.store_comments([comment_item])
+
+    async def store_comments(self, comment_items: List[Dict]):
+        self.write_items("comments", comment_items)
+
+    async def store_creator(self, creator: Dict):
+        self.write_items("creators", [creator])
+
+    async def store_contact(self, contact_item: Dict):
+        self.write_items("contacts", [contact_item])
+
+    async def store_dynamic(self, dynamic_item: Dict):
+        self.write_items("dynamics", [dynamic_item])
+
+    def write_items(self, item_type: str, items: List[Dict]):
+        """Buffer records in the writer of their file"""
+        if not items:
+            return
+        for keyword, group in self.file_writer.group_by_partition(items).items():
+            writer = self._get_writer(item_type, group[0], keyword)
+            for item in group:
+                writer.write(item)
+
+    def _get_writer(self, item_type: str, sample: Dict, keyword: Optional[str] = None) -> ParquetFileWriter:
+        date = utils.get_current_date()
+        file_path = os.path.abspath(
+            self.file_writer._get_file_path("parquet", item_type, date, create_dir=False, keyword=keyword)
+        )
+        writer = self._writers.get(file_path)
+        if writer is None:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            # A new day started: files of previous days will not receive records anymore
+            for path, old in list(self._writers.items()):
+                if old.date != date:
+                    old.close()
+                    del self._writers[path]
+            writer = self._writers[file_path] = ParquetFileWriter(
+                self._unused_path(file_path), date, self._schema(item_type, sample)
+            )
+        return writer
+
+    def _schema(self, item_type: str, sample: Dict) -> "pa.Schema":
+        model = self.MODELS.get(item_type)
+        if model is not None:
+            return schema_from_model(model)
+        # No model for this item type: string columns of the first record
+        return pa.schema([pa.field(key, pa.string()) for key in sample])
+
+    @staticmethod
+    def _unused_path(file_path: str) -> str:
+        """Parquet files cannot be appended to, a later run of the same day writes {name}.1.parquet and so on"""
+        stem, ext = os.path.splitext(file_path)
+        path, n = file_path, 0
+        while os.path.exists(path):
+            n += 1
+            path = f"{stem}.{n}{ext}"
+        return path
@@ -22,6 +22,8 @@
 from typing import List
 
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
+from store import get_store_instance
+from store.write_behind import write_behind
 from var import source_keyword_var
 
 from ._store_impl import *
@@ -33,9 +35,11 @@ class TieBaStoreFactory:
         "db": TieBaDbStoreImplement,
         "postgres": TieBaDbStoreImplement,
         "json": TieBaJsonStoreImplement,
+        "jsonl": TieBaJsonStoreImplement,
         "sqlite": TieBaSqliteStoreImplement,
         "mongodb": TieBaMongoStoreImplement,
         "excel": TieBaExcelStoreImplement,
+        "parquet": TieBaParquetStoreImplement,
     }
 
     @staticmethod
@@ -43,8 +47,8 @@ class TieBaStoreFactory:
         store_class = TieBaStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
-        return store_class()
+                "[TieBaStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel or parquet ...")
+        return get_store_instance("tieba", store_class)
 
 
 async def batch_update_tieba_notes(note_list: List[TiebaNote]):
@@ -58,8 +62,8 @@ async def batch_update_tieba_notes(note_list: List[TiebaNote]):
     """
     if not note_list:
         return
-    for note_item in note_list:
-        await update_tieba_note(note_item)
+    content_items = [_build_tieba_note(note_item) for note_item in note_list]
+    await write_behind(TieBaStoreFactory.create_store()).store_contents(content_items)
 
 
 async def update_tieba_note(note_item: TiebaNote):
@@ -71,12 +75,16 @@ async def update_tieba_note(note_item: TiebaNote):
     Returns:
 
     """
+    save_note_item = _build_tieba_note(note_item)
+    await write_behind(TieBaStoreFactory.create_store()).store_content(save_note_item)
+
+
+def _build_tieba_note(note_item: TiebaNote) -> Dict:
     note_item.source_keyword = source_keyword_var.get()
     save_note_item = note_item.model_dump()
     save_note_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.tieba.update_tieba_note] tieba note: {save_note_item}")
-
-    await TieBaStoreFactory.create_store().store_content(save_note_item)
+    return save_note_item
 
 
 async def batch_update_tieba_note_comments(note_id: str, comments: List[TiebaComment]):
@@ -91,8 +99,8 @@ async def batch_update_tieba_note_comments(note_id: str, comments: List[TiebaCom
     """
     if not comments:
         return
-    for comment_item in comments:
-        await update_tieba_note_comment(note_id, comment_item)
+    comment_items = [_build_tieba_note_comment(note_id, comment_item) for comment_item in comments]
+    await write_behind(TieBaStoreFactory.create_store()).store_comments(comment_items)
 
 
 async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
@@ -105,10 +113,15 @@ async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
     Returns:
 
     """
+    save_comment_item = _build_tieba_note_comment(note_id, comment_item)
+    await write_behind(TieBaStoreFactory.create_store()).store_comment(save_comment_item)
+
+
+def _build_tieba_note_comment(note_id: str, comment_item: TiebaComment) -> Dict:
     save_comment_item = comment_item.model_dump()
     save_comment_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.tieba.update_tieba_note_comment] tieba note id: {note_id} comment:{save_comment_item}")
-    await TieBaStoreFactory.create_store().store_comment(save_comment_item)
+    return save_comment_item
 
 
 async def save_creator(user_info: TiebaCreator):
@@ -123,4 +136,4 @@ async def save_creator(user_info: TiebaCreator):
     local_db_item = user_info.model_dump()
     local_db_item["last_modify_ts"] = utils.get_current_timestamp()
     utils.logger.info(f"[store.tieba.save_creator] creator:{local_db_item}")
-    await TieBaStoreFactory.create_store().store_creator(local_db_item)
+    await write_behind(TieBaStoreFactory.create_store()).store_creator(local_db_item)
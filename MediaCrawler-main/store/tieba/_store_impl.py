@@ -27,20 +27,21 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import config
 from base.base_crawler import AbstractStore
 from database.models import TiebaNote, TiebaComment, TiebaCreator
 from tools import utils, words
+from database.bulk_upsert import bulk_upsert
 from database.db_session import get_session
 from var import crawler_type_var
 from tools.async_file_writer import AsyncFileWriter
 from database.mongodb_store_base import MongoDBStoreBase
+from store.parquet_store_base import ParquetStoreBase
 
 
 def calculate_number_of_files(file_store_path: str) -> int:
@@ -85,6 +86,28 @@ class TieBaCsvStoreImplement(AbstractStore):
         """
         await self.writer.write_to_csv(item_type="comments", item=comment_item)
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content CSV batch storage implementation
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_csv(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment CSV batch storage implementation
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_csv(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         """
         tieba content CSV storage implementation
@@ -104,18 +127,16 @@ class TieBaDbStoreImplement(AbstractStore):
         Args:
             content_item: content item dict
         """
-        note_id = content_item.get("note_id")
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        tieba content DB batch storage implementation, one upsert per page
+        Args:
+            content_items: content item dicts
+        """
         async with get_session() as session:
-            stmt = select(TiebaNote).where(TiebaNote.note_id == note_id)
-            res = await session.execute(stmt)
-            db_note = res.scalar_one_or_none()
-            if db_note:
-                for key, value in content_item.items():
-                    setattr(db_note, key, value)
-            else:
-                db_note = TiebaNote(**content_item)
-                session.add(db_note)
-            await session.commit()
+            await bulk_upsert(session, TiebaNote, content_items, key="note_id")
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -123,18 +144,16 @@ class TieBaDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = comment_item.get("comment_id")
+        await self.store_comments([comment_item])
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        tieba comment DB batch storage implementation, one upsert per page
+        Args:
+            comment_items: comment item dicts
+        """
         async with get_session() as session:
-            stmt = select(TiebaComment).where(TiebaComment.comment_id == comment_id)
-            res = await session.execute(stmt)
-            db_comment = res.scalar_one_or_none()
-            if db_comment:
-                for key, value in comment_item.items():
-                    setattr(db_comment, key, value)
-            else:
-                db_comment = TiebaComment(**comment_item)
-                session.add(db_comment)
-            await session.commit()
+            await bulk_upsert(session, TiebaComment, comment_items, key="comment_id")
 
     async def store_creator(self, creator: Dict):
         """
@@ -142,18 +161,8 @@ class TieBaDbStoreImplement(AbstractStore):
         Args:
             creator: creator dict
         """
-        user_id = creator.get("user_id")
         async with get_session() as session:
-            stmt = select(TiebaCreator).where(TiebaCreator.user_id == user_id)
-            res = await session.execute(stmt)
-            db_creator = res.scalar_one_or_none()
-            if db_creator:
-                for key, value in creator.items():
-                    setattr(db_creator, key, value)
-            else:
-                db_creator = TiebaCreator(**creator)
-                session.add(db_creator)
-            await session.commit()
+            await bulk_upsert(session, TiebaCreator, [creator], key="user_id")
 
 
 class TieBaJsonStoreImplement(AbstractStore):
@@ -183,6 +192,28 @@ class TieBaJsonStoreImplement(AbstractStore):
         """
         await self.writer.write_single_item_to_json(item_type="comments", item=comment_item)
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content JSON batch storage implementation
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_json(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment JSON batch storage implementation
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_json(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         """
         tieba content JSON storage implementation
@@ -214,16 +245,15 @@ class TieBaMongoStoreImplement(AbstractStore):
         Args:
             content_item: Post content data
         """
-        note_id = content_item.get("note_id")
-        if not note_id:
-            return
+        await self.store_contents([content_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="contents",
-            query={"note_id": note_id},
-            data=content_item
-        )
-        utils.logger.info(f"[TieBaMongoStoreImplement.store_content] Saved note {note_id} to MongoDB")
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Store a page of post content to MongoDB, buffered and upserted with one bulk_write
+        Args:
+            content_items: Post content data list
+        """
+        await self.mongo_store.bulk_save_or_update("contents", "note_id", content_items)
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -231,16 +261,15 @@ class TieBaMongoStoreImplement(AbstractStore):
         Args:
             comment_item: Comment data
         """
-        comment_id = comment_item.get("comment_id")
-        if not comment_id:
-            return
+        await self.store_comments([comment_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="comments",
-            query={"comment_id": comment_id},
-            data=comment_item
-        )
-        utils.logger.info(f"[TieBaMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Store a page of comments to MongoDB, buffered and upserted with one bulk_write
+        Args:
+            comment_items: Comment data list
+        """
+        await self.mongo_store.bulk_save_or_update("comments", "comment_id", comment_items)
 
     async def store_creator(self, creator_item: Dict):
         """
@@ -269,3 +298,16 @@ class TieBaExcelStoreImplement:
             platform="tieba",
             crawler_type=crawler_type_var.get()
         )
+
+
+class TieBaParquetStoreImplement(ParquetStoreBase):
+    """Tieba Parquet storage implementation, one file per item type"""
+
+    MODELS = {
+        "contents": TiebaNote,
+        "comments": TiebaComment,
+        "creators": TiebaCreator,
+    }
+
+    def __init__(self):
+        super().__init__(platform="tieba", crawler_type=crawler_type_var.get())
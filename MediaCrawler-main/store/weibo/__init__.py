@@ -23,8 +23,10 @@
 # @Desc    :
 
 import re
-from typing import List
+from typing import List, Optional
 
+from store import get_store_instance
+from store.write_behind import write_behind
 from var import source_keyword_var
 
 from .weibo_store_media import *
@@ -37,17 +39,19 @@ class WeibostoreFactory:
         "db": WeiboDbStoreImplement,
         "postgres": WeiboDbStoreImplement,
         "json": WeiboJsonStoreImplement,
+        "jsonl": WeiboJsonStoreImplement,
         "sqlite": WeiboSqliteStoreImplement,
         "mongodb": WeiboMongoStoreImplement,
         "excel": WeiboExcelStoreImplement,
+        "parquet": WeiboParquetStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = WeibostoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
-        return store_class()
+            raise ValueError("[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel or parquet ...")
+        return get_store_instance("weibo", store_class)
 
 
 async def batch_update_weibo_notes(note_list: List[Dict]):
@@ -61,8 +65,8 @@ async def batch_update_weibo_notes(note_list: List[Dict]):
     """
     if not note_list:
         return
-    for note_item in note_list:
-        await update_weibo_note(note_item)
+    content_items = [_build_weibo_note(note_item) for note_item in note_list]
+    await write_behind(WeibostoreFactory.create_store()).store_contents([item for item in content_items if item])
 
 
 async def update_weibo_note(note_item: Dict):
@@ -74,8 +78,14 @@ async def update_weibo_note(note_item: Dict):
     Returns:
 
     """
+    save_content_item = _build_weibo_note(note_item)
+    if save_content_item:
+        await write_behind(WeibostoreFactory.create_store()).store_content(save_content_item)
+
+
+def _build_weibo_note(note_item: Dict) -> Optional[Dict]:
     if not note_item:
-        return
+        return None
 
     mblog: Dict = note_item.get("mblog")
     user_info: Dict = mblog.get("user")
@@ -104,7 +114,7 @@ async def update_weibo_note(note_item: Dict):
         "source_keyword": source_keyword_var.get(),
     }
     utils.logger.info(f"[store.weibo.update_weibo_note] weibo note id:{note_id}, title:{save_content_item.get('content')[:24]} ...")
-    await WeibostoreFactory.create_store().store_content(content_item=save_content_item)
+    return save_content_item
 
 
 async def batch_update_weibo_note_comments(note_id: str, comments: List[Dict]):
@@ -119,8 +129,8 @@ async def batch_update_weibo_note_comments(note_id: str, comments: List[Dict]):
     """
     if not comments:
         return
-    for comment_item in comments:
-        await update_weibo_note_comment(note_id, comment_item)
+    comment_items = [_build_weibo_note_comment(note_id, comment_item) for comment_item in comments]
+    await write_behind(WeibostoreFactory.create_store()).store_comments([item for item in comment_items if item])
 
 
 async def update_weibo_note_comment(note_id: str, comment_item: Dict):
@@ -133,8 +143,14 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
     Returns:
 
     """
+    save_comment_item = _build_weibo_note_comment(note_id, comment_item)
+    if save_comment_item:
+        await write_behind(WeibostoreFactory.create_store()).store_comment(save_comment_item)
+
+
+def _build_weibo_note_comment(note_id: str, comment_item: Dict) -> Optional[Dict]:
     if not comment_item or not note_id:
-        return
+        return None
     comment_id = str(comment_item.get("id"))
     user_info: Dict = comment_item.get("user")
     content_text = comment_item.get("text")
@@ -159,7 +175,7 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
         "avatar": user_info.get("profile_image_url", ""),
     }
     utils.logger.info(f"[store.weibo.update_weibo_note_comment] Weibo note comment: {comment_id}, content: {save_comment_item.get('content', '')[:24]} ...")
-    await WeibostoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    return save_comment_item
 
 
 async def update_weibo_note_image(picid: str, pic_content, extension_file_name):
@@ -199,4 +215,4 @@ async def save_creator(user_id: str, user_info: Dict):
         "last_modify_ts": utils.get_current_timestamp(),
     }
     utils.logger.info(f"[store.weibo.save_creator] creator:{local_db_item}")
-    await WeibostoreFactory.create_store().store_creator(local_db_item)
+    await write_behind(WeibostoreFactory.create_store()).store_creator(local_db_item)
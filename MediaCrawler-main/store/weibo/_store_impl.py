@@ -27,10 +27,9 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import config
@@ -38,9 +37,11 @@ from base.base_crawler import AbstractStore
 from database.models import WeiboCreator, WeiboNote, WeiboNoteComment
 from tools import utils, words
 from tools.async_file_writer import AsyncFileWriter
+from database.bulk_upsert import bulk_upsert
 from database.db_session import get_session
 from var import crawler_type_var
 from database.mongodb_store_base import MongoDBStoreBase
+from store.parquet_store_base import ParquetStoreBase
 
 
 def calculate_number_of_files(file_store_path: str) -> int:
@@ -85,6 +86,28 @@ class WeiboCsvStoreImplement(AbstractStore):
         """
         await self.writer.write_to_csv(item_type="comments", item=comment_item)
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content CSV batch storage implementation
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_csv(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment CSV batch storage implementation
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_csv(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         """
         Weibo creator CSV storage implementation
@@ -108,23 +131,24 @@ class WeiboDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        note_id = int(content_item.get("note_id"))
-        content_item["note_id"] = note_id
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Weibo content DB batch storage implementation, one upsert per page
+        Args:
+            content_items: content item dicts
+
+        Returns:
+
+        """
+        rows = []
+        for content_item in content_items:
+            content_item["note_id"] = int(content_item.get("note_id"))
+            content_item["last_modify_ts"] = utils.get_current_timestamp()
+            rows.append({**content_item, "add_ts": utils.get_current_timestamp()})
         async with get_session() as session:
-            stmt = select(WeiboNote).where(WeiboNote.note_id == note_id)
-            res = await session.execute(stmt)
-            db_note = res.scalar_one_or_none()
-            if db_note:
-                db_note.last_modify_ts = utils.get_current_timestamp()
-                for key, value in content_item.items():
-                    if hasattr(db_note, key):
-                        setattr(db_note, key, value)
-            else:
-                content_item["add_ts"] = utils.get_current_timestamp()
-                content_item["last_modify_ts"] = utils.get_current_timestamp()
-                db_note = WeiboNote(**content_item)
-                session.add(db_note)
-            await session.commit()
+            await bulk_upsert(session, WeiboNote, rows, key="note_id")
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -135,29 +159,29 @@ class WeiboDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        comment_id = int(comment_item.get("comment_id"))
-        comment_item["comment_id"] = comment_id
-        comment_item["note_id"] = int(comment_item.get("note_id", 0) or 0)
-        comment_item["create_time"] = int(comment_item.get("create_time", 0) or 0)
-        comment_item["comment_like_count"] = str(comment_item.get("comment_like_count", "0"))
-        comment_item["sub_comment_count"] = str(comment_item.get("sub_comment_count", "0"))
-        comment_item["parent_comment_id"] = str(comment_item.get("parent_comment_id", "0"))
+        await self.store_comments([comment_item])
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Weibo comment DB batch storage implementation, one upsert per page
+        Args:
+            comment_items: comment item dicts
+
+        Returns:
 
+        """
+        rows = []
+        for comment_item in comment_items:
+            comment_item["comment_id"] = int(comment_item.get("comment_id"))
+            comment_item["note_id"] = int(comment_item.get("note_id", 0) or 0)
+            comment_item["create_time"] = int(comment_item.get("create_time", 0) or 0)
+            comment_item["comment_like_count"] = str(comment_item.get("comment_like_count", "0"))
+            comment_item["sub_comment_count"] = str(comment_item.get("sub_comment_count", "0"))
+            comment_item["parent_comment_id"] = str(comment_item.get("parent_comment_id", "0"))
+            comment_item["last_modify_ts"] = utils.get_current_timestamp()
+            rows.append({**comment_item, "add_ts": utils.get_current_timestamp()})
         async with get_session() as session:
-            stmt = select(WeiboNoteComment).where(WeiboNoteComment.comment_id == comment_id)
-            res = await session.execute(stmt)
-            db_comment = res.scalar_one_or_none()
-            if db_comment:
-                db_comment.last_modify_ts = utils.get_current_timestamp()
-                for key, value in comment_item.items():
-                    if hasattr(db_comment, key):
-                        setattr(db_comment, key, value)
-            else:
-                comment_item["add_ts"] = utils.get_current_timestamp()
-                comment_item["last_modify_ts"] = utils.get_current_timestamp()
-                db_comment = WeiboNoteComment(**comment_item)
-                session.add(db_comment)
-            await session.commit()
+            await bulk_upsert(session, WeiboNoteComment, rows, key="comment_id")
 
     async def store_creator(self, creator: Dict):
         """
@@ -168,23 +192,11 @@ class WeiboDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        user_id = int(creator.get("user_id"))
-        creator["user_id"] = user_id
+        creator["user_id"] = int(creator.get("user_id"))
+        creator["add_ts"] = utils.get_current_timestamp()
+        creator["last_modify_ts"] = utils.get_current_timestamp()
         async with get_session() as session:
-            stmt = select(WeiboCreator).where(WeiboCreator.user_id == user_id)
-            res = await session.execute(stmt)
-            db_creator = res.scalar_one_or_none()
-            if db_creator:
-                db_creator.last_modify_ts = utils.get_current_timestamp()
-                for key, value in creator.items():
-                    if hasattr(db_creator, key):
-                        setattr(db_creator, key, value)
-            else:
-                creator["add_ts"] = utils.get_current_timestamp()
-                creator["last_modify_ts"] = utils.get_current_timestamp()
-                db_creator = WeiboCreator(**creator)
-                session.add(db_creator)
-            await session.commit()
+            await bulk_upsert(session, WeiboCreator, [creator], key="user_id")
 
 
 class WeiboJsonStoreImplement(AbstractStore):
@@ -214,6 +226,28 @@ class WeiboJsonStoreImplement(AbstractStore):
         """
         await self.writer.write_single_item_to_json(item_type="comments", item=comment_item)
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        content JSON batch storage implementation
+        Args:
+            content_items:
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_json(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        comment JSON batch storage implementation
+        Args:
+            comment_items:
+
+        Returns:
+
+        """
+        await self.writer.write_items_to_json(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator: Dict):
         """
         creator JSON storage implementation
@@ -245,16 +279,15 @@ class WeiboMongoStoreImplement(AbstractStore):
         Args:
             content_item: Weibo content data
         """
-        note_id = content_item.get("note_id")
-        if not note_id:
-            return
+        await self.store_contents([content_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="contents",
-            query={"note_id": note_id},
-            data=content_item
-        )
-        utils.logger.info(f"[WeiboMongoStoreImplement.store_content] Saved note {note_id} to MongoDB")
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Store a page of Weibo content to MongoDB, buffered and upserted with one bulk_write
+        Args:
+            content_items: Weibo content data list
+        """
+        await self.mongo_store.bulk_save_or_update("contents", "note_id", content_items)
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -262,16 +295,15 @@ class WeiboMongoStoreImplement(AbstractStore):
         Args:
             comment_item: Comment data
         """
-        comment_id = comment_item.get("comment_id")
-        if not comment_id:
-            return
+        await self.store_comments([comment_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="comments",
-            query={"comment_id": comment_id},
-            data=comment_item
-        )
-        utils.logger.info(f"[WeiboMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Store a page of comments to MongoDB, buffered and upserted with one bulk_write
+        Args:
+            comment_items: Comment data list
+        """
+        await self.mongo_store.bulk_save_or_update("comments", "comment_id", comment_items)
 
     async def store_creator(self, creator_item: Dict):
         """
@@ -300,3 +332,16 @@ class WeiboExcelStoreImplement:
             platform="weibo",
             crawler_type=crawler_type_var.get()
         )
+
+
+class WeiboParquetStoreImplement(ParquetStoreBase):
+    """Weibo Parquet storage implementation, one file per item type"""
+
+    MODELS = {
+        "contents": WeiboNote,
+        "comments": WeiboNoteComment,
+        "creators": WeiboCreator,
+    }
+
+    def __init__(self):
+        super().__init__(platform="weibo", crawler_type=crawler_type_var.get())
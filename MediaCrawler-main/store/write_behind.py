@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/store/write_behind.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Write-behind stage between store/* and the storage backends
+
+Crawl coroutines put records into a bounded queue and return immediately; a background task groups them per
+store and record type (one group per table / file), and writes a group through the batch store API when it
+reaches WRITE_BEHIND_BATCH_SIZE records or has waited WRITE_BEHIND_FLUSH_INTERVAL_SEC. When the queue is full,
+put() waits, so a slow backend slows crawling down instead of growing memory without bound.
+
+Each record keeps the context variables of the coroutine that queued it (source_keyword_var, crawler_type_var),
+records of different search keywords are grouped separately and every group is written in its own context, so
+the stores see the same values as with inline writes (e.g. the keyword partition of the file writers).
+"""
+
+import asyncio
+import contextvars
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+from base.base_crawler import AbstractStore
+from tools import utils
+from var import source_keyword_var
+
+# Single-record methods written through their batch counterpart
+BATCH_METHODS = {
+    "store_content": "store_contents",
+    "store_comment": "store_comments",
+}
+
+_FLUSH = object()
+
+
+class WriteBehindQueue:
+    """Bounded queue drained by a background task, see module docstring"""
+
+    def __init__(self, maxsize: int, batch_size: int, flush_interval: float):
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # (store id, method, keyword) -> (store, method, records, time the first record was queued, context)
+        self.pending: Dict[Tuple[int, str, str], Tuple[Any, str, List, float, contextvars.Context]] = {}
+        self.task: Optional[asyncio.Task] = None
+        self._stats = {
+            "records_queued": 0, "records_written": 0, "records_failed": 0, "flushes": 0,
+            "max_queue_depth": 0, "backpressure_waits": 0,
+            "flush_latency_total_sec": 0.0, "flush_latency_max_sec": 0.0, "last_flush_latency_sec": 0.0,
+        }
+
+    async def put(self, store, method: str, item: Any):
+        if self.task is None:
+            self.task = asyncio.create_task(self._run(), name="write_behind")
+        if self.queue.full():
+            self._stats["backpressure_waits"] += 1
+        await self.queue.put((store, method, item, contextvars.copy_context()))
+        self._stats["records_queued"] += 1
+        self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self.queue.qsize())
+
+    async def drain(self):
+        """Wait until every record queued so far has been written"""
+        if self.task is None or self.task.done():
+            return
+        done = self.loop.create_future()
+        await self.queue.put((_FLUSH, None, done, None))
+        await done
+
+    async def close(self):
+        """Drain the queue, stop the background task and log the statistics"""
+        await self.drain()
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self._stats["records_failed"]:
+            utils.logger.error(f"[WriteBehindQueue.close] {self._stats['records_failed']} of "
+                               f"{self._stats['records_queued']} queued records were not written: {self.stats()}")
+        elif self._stats["records_queued"]:
+            utils.logger.info(f"[WriteBehindQueue.close] {self.stats()}")
+
+    def stats(self) -> Dict:
+        """Queue depth, throughput and flush latency of the write-behind stage"""
+        flushes = self._stats["flushes"]
+        return {
+            "queue_depth": self.queue.qsize(),
+            "pending_records": sum(len(group[2]) for group in self.pending.values()),
+            **self._stats,
+            "flush_latency_avg_sec": self._stats["flush_latency_total_sec"] / flushes if flushes else 0.0,
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                entry = await asyncio.wait_for(self.queue.get(), timeout=self._next_deadline())
+            except asyncio.TimeoutError:
+                await self._flush_due()
+                continue
+
+            store, method, item, ctx = entry
+            if store is _FLUSH:
+                await self._flush_all()
+                if not item.done():
+                    item.set_result(None)
+                continue
+
+            key = (id(store), method, ctx.get(source_keyword_var, ""))
+            group = self.pending.get(key)
+            if group is None:
+                group = self.pending[key] = (store, method, [], time.monotonic(), ctx)
+            group[2].append(item)
+            if len(group[2]) >= self.batch_size:
+                await self._flush(key)
+            await self._flush_due()
+
+    def _next_deadline(self) -> Optional[float]:
+        if not self.pending:
+            return None
+        oldest = min(group[3] for group in self.pending.values())
+        return max(0.0, oldest + self.flush_interval - time.monotonic())
+
+    async def _flush_due(self):
+        now = time.monotonic()
+        for key in [k for k, group in self.pending.items() if now - group[3] >= self.flush_interval]:
+            await self._flush(key)
+
+    async def _flush_all(self):
+        for key in list(self.pending):
+            await self._flush(key)
+
+    async def _flush(self, key: Tuple[int, str, str]):
+        store, method, items, _, ctx = self.pending.pop(key)
+        start = time.perf_counter()
+        try:
+            # The background task was started in the context of the first put(): run the write in the group's own
+            await asyncio.create_task(self._write(store, method, items), context=ctx)
+            self._stats["records_written"] += len(items)
+        except Exception as e:
+            self._stats["records_failed"] += len(items)
+            utils.logger.error(f"[WriteBehindQueue._flush] {type(store).__name__}.{method} failed for {len(items)} records: {e}")
+        latency = time.perf_counter() - start
+        self._stats["flushes"] += 1
+        self._stats["flush_latency_total_sec"] += latency
+        self._stats["flush_latency_max_sec"] = max(self._stats["flush_latency_max_sec"], latency)
+        self._stats["last_flush_latency_sec"] = latency
+
+    @staticmethod
+    async def _write(store, method: str, items: List):
+        if method in BATCH_METHODS:
+            await getattr(store, BATCH_METHODS[method])(items)
+        else:
+            for item in items:
+                await getattr(store, method)(item)
+
+
+class WriteBehindStore:
+    """
+    Store proxy whose store_* calls only queue the record; every other attribute is the wrapped store's
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getattr__(self, name: str):
+        if not name.startswith("store_"):
+            return getattr(self.store, name)
+
+        if name.endswith("s") and name[:-1] in BATCH_METHODS:
+            async def enqueue_many(items: List[Dict]):
+                queue = get_write_behind_queue()
+                for item in items:
+                    await queue.put(self.store, name[:-1], item)
+            return enqueue_many
+
+        async def enqueue(item: Any = None, **kwargs):
+            # Store methods are called both positionally and with their parameter name (content_item=...)
+            if item is None and len(kwargs) == 1:
+                item = next(iter(kwargs.values()))
+            await get_write_behind_queue().put(self.store, name, item)
+        return enqueue
+
+
+_queue: Optional[WriteBehindQueue] = None
+_proxies: Dict[int, WriteBehindStore] = {}
+
+
+def get_write_behind_queue() -> WriteBehindQueue:
+    """The queue of the running event loop (created on first use)"""
+    global _queue
+    if _queue is None or _queue.loop is not asyncio.get_running_loop():
+        _queue = WriteBehindQueue(
+            maxsize=config.WRITE_BEHIND_QUEUE_SIZE,
+            batch_size=config.WRITE_BEHIND_BATCH_SIZE,
+            flush_interval=config.WRITE_BEHIND_FLUSH_INTERVAL_SEC,
+        )
+    return _queue
+
+
+def write_behind(store: AbstractStore) -> AbstractStore:
+    """Route the store calls through the write-behind queue when ENABLE_WRITE_BEHIND is on"""
+    if not config.ENABLE_WRITE_BEHIND:
+        return store
+    proxy = _proxies.get(id(store))
+    if proxy is None or proxy.store is not store:
+        proxy = _proxies[id(store)] = WriteBehindStore(store)
+    return proxy
+
+
+async def drain_write_behind():
+    """Write out everything queued so far (before reading the output, e.g. Excel flush or wordcloud)"""
+    if _queue is not None and _queue.loop is asyncio.get_running_loop():
+        await _queue.drain()
+
+
+async def close_write_behind() -> Optional[Dict]:
+    """Drain and stop the write-behind stage, called from main.async_cleanup; returns the final statistics"""
+    global _queue
+    stats = None
+    if _queue is not None and _queue.loop is asyncio.get_running_loop():
+        await _queue.close()
+        stats = _queue.stats()
+    _queue = None
+    return stats
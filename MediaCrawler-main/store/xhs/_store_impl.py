@@ -24,11 +24,11 @@ import os
 from datetime import datetime
 from typing import List, Dict, Any
 
-from sqlalchemy import select, update, delete
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete
 from sqlalchemy.orm import Session
 
 from base.base_crawler import AbstractStore
+from database.bulk_upsert import bulk_upsert
 from database.db_session import get_session
 from database.models import XhsNote, XhsNoteComment, XhsCreator
 
@@ -36,6 +36,7 @@ from tools.async_file_writer import AsyncFileWriter
 from tools.time_util import get_current_timestamp
 from var import crawler_type_var
 from database.mongodb_store_base import MongoDBStoreBase
+from store.parquet_store_base import ParquetStoreBase
 from tools import utils
 from store.excel_store_base import ExcelStoreBase
 
@@ -60,6 +61,22 @@ class XhsCsvStoreImplement(AbstractStore):
         """
         await self.writer.write_to_csv(item_type="comments", item=comment_item)
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        store a page of content data to csv file in one write
+        :param content_items:
+        :return:
+        """
+        await self.writer.write_items_to_csv(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        store a page of comment data to csv file in one write
+        :param comment_items:
+        :return:
+        """
+        await self.writer.write_items_to_csv(item_type="comments", items=comment_items)
+
 
     async def store_creator(self, creator_item: Dict):
         pass
@@ -89,6 +106,22 @@ class XhsJsonStoreImplement(AbstractStore):
         """
         await self.writer.write_single_item_to_json(item_type="comments", item=comment_item)
 
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        store a page of content data to json file in one write
+        :param content_items:
+        :return:
+        """
+        await self.writer.write_items_to_json(item_type="contents", items=content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        store a page of comment data to json file in one write
+        :param comment_items:
+        :return:
+        """
+        await self.writer.write_items_to_json(item_type="comments", items=comment_items)
+
     async def store_creator(self, creator_item: Dict):
         pass
 
@@ -105,20 +138,33 @@ class XhsDbStoreImplement(AbstractStore):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
+    # Columns refreshed when a note / comment is crawled again
+    CONTENT_UPDATE_COLUMNS = ["last_modify_ts", "liked_count", "collected_count", "comment_count", "share_count",
+                              "last_update_time"]
+    COMMENT_UPDATE_COLUMNS = ["last_modify_ts", "like_count", "sub_comment_count"]
+    CREATOR_UPDATE_COLUMNS = ["last_modify_ts", "nickname", "avatar", "desc", "follows", "fans", "interaction",
+                              "tag_list"]
+
     async def store_content(self, content_item: Dict):
-        note_id = content_item.get("note_id")
-        if not note_id:
+        await self.store_contents([content_item])
+
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        upsert a page of notes in one statement
+        :param content_items:
+        :return:
+        """
+        rows = [self.content_row(item) for item in content_items if item.get("note_id")]
+        if not rows:
             return
         async with get_session() as session:
-            if await self.content_is_exist(session, note_id):
-                await self.update_content(session, content_item)
-            else:
-                await self.add_content(session, content_item)
+            await bulk_upsert(session, XhsNote, rows, key="note_id", update_columns=self.CONTENT_UPDATE_COLUMNS)
 
-    async def add_content(self, session: AsyncSession, content_item: Dict):
+    @staticmethod
+    def content_row(content_item: Dict) -> Dict:
         add_ts = int(get_current_timestamp())
         last_modify_ts = int(get_current_timestamp())
-        note = XhsNote(
+        return dict(
             user_id=content_item.get("user_id"),
             nickname=content_item.get("nickname"),
             avatar=content_item.get("avatar"),
@@ -142,43 +188,30 @@ class XhsDbStoreImplement(AbstractStore):
             source_keyword=content_item.get("source_keyword", ""),
             xsec_token=content_item.get("xsec_token", "")
         )
-        session.add(note)
-
-    async def update_content(self, session: AsyncSession, content_item: Dict):
-        note_id = content_item.get("note_id")
-        last_modify_ts = int(get_current_timestamp())
-        update_data = {
-            "last_modify_ts": last_modify_ts,
-            "liked_count": str(content_item.get("liked_count")),
-            "collected_count": str(content_item.get("collected_count")),
-            "comment_count": str(content_item.get("comment_count")),
-            "share_count": str(content_item.get("share_count")),
-            "last_update_time": content_item.get("last_update_time"),
-        }
-        stmt = update(XhsNote).where(XhsNote.note_id == note_id).values(**update_data)
-        await session.execute(stmt)
-
-    async def content_is_exist(self, session: AsyncSession, note_id: str) -> bool:
-        stmt = select(XhsNote).where(XhsNote.note_id == note_id)
-        result = await session.execute(stmt)
-        return result.first() is not None
 
     async def store_comment(self, comment_item: Dict):
         if not comment_item:
             return
+        await self.store_comments([comment_item])
+
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        upsert a page of comments in one statement
+        :param comment_items:
+        :return:
+        """
+        rows = [self.comment_row(item) for item in comment_items if item and item.get("comment_id")]
+        if not rows:
+            return
         async with get_session() as session:
-            comment_id = comment_item.get("comment_id")
-            if not comment_id:
-                return
-            if await self.comment_is_exist(session, comment_id):
-                await self.update_comment(session, comment_item)
-            else:
-                await self.add_comment(session, comment_item)
-
-    async def add_comment(self, session: AsyncSession, comment_item: Dict):
+            await bulk_upsert(session, XhsNoteComment, rows, key="comment_id",
+                              update_columns=self.COMMENT_UPDATE_COLUMNS)
+
+    @staticmethod
+    def comment_row(comment_item: Dict) -> Dict:
         add_ts = int(get_current_timestamp())
         last_modify_ts = int(get_current_timestamp())
-        comment = XhsNoteComment(
+        return dict(
             user_id=comment_item.get("user_id"),
             nickname=comment_item.get("nickname"),
             avatar=comment_item.get("avatar"),
@@ -194,38 +227,24 @@ class XhsDbStoreImplement(AbstractStore):
             parent_comment_id=str(comment_item.get("parent_comment_id", "")),
             like_count=str(comment_item.get("like_count"))
         )
-        session.add(comment)
-
-    async def update_comment(self, session: AsyncSession, comment_item: Dict):
-        comment_id = comment_item.get("comment_id")
-        last_modify_ts = int(get_current_timestamp())
-        update_data = {
-            "last_modify_ts": last_modify_ts,
-            "like_count": str(comment_item.get("like_count")),
-            "sub_comment_count": int(comment_item.get("sub_comment_count", 0) or 0),
-        }
-        stmt = update(XhsNoteComment).where(XhsNoteComment.comment_id == comment_id).values(**update_data)
-        await session.execute(stmt)
-
-    async def comment_is_exist(self, session: AsyncSession, comment_id: str) -> bool:
-        stmt = select(XhsNoteComment).where(XhsNoteComment.comment_id == comment_id)
-        result = await session.execute(stmt)
-        return result.first() is not None
 
     async def store_creator(self, creator_item: Dict):
-        user_id = creator_item.get("user_id")
-        if not user_id:
+        """
+        upsert a creator on its user_id
+        :param creator_item:
+        :return:
+        """
+        if not creator_item.get("user_id"):
             return
         async with get_session() as session:
-            if await self.creator_is_exist(session, user_id):
-                await self.update_creator(session, creator_item)
-            else:
-                await self.add_creator(session, creator_item)
+            await bulk_upsert(session, XhsCreator, [self.creator_row(creator_item)], key="user_id",
+                              update_columns=self.CREATOR_UPDATE_COLUMNS)
 
-    async def add_creator(self, session: AsyncSession, creator_item: Dict):
+    @staticmethod
+    def creator_row(creator_item: Dict) -> Dict:
         add_ts = int(get_current_timestamp())
         last_modify_ts = int(get_current_timestamp())
-        creator = XhsCreator(
+        return dict(
             user_id=creator_item.get("user_id"),
             nickname=creator_item.get("nickname"),
             avatar=creator_item.get("avatar"),
@@ -239,28 +258,6 @@ class XhsDbStoreImplement(AbstractStore):
             interaction=str(creator_item.get("interaction")),
             tag_list=json.dumps(creator_item.get("tag_list"))
         )
-        session.add(creator)
-
-    async def update_creator(self, session: AsyncSession, creator_item: Dict):
-        user_id = creator_item.get("user_id")
-        last_modify_ts = int(get_current_timestamp())
-        update_data = {
-            "last_modify_ts": last_modify_ts,
-            "nickname": creator_item.get("nickname"),
-            "avatar": creator_item.get("avatar"),
-            "desc": creator_item.get("desc"),
-            "follows": str(creator_item.get("follows")),
-            "fans": str(creator_item.get("fans")),
-            "interaction": str(creator_item.get("interaction")),
-            "tag_list": json.dumps(creator_item.get("tag_list"))
-        }
-        stmt = update(XhsCreator).where(XhsCreator.user_id == user_id).values(**update_data)
-        await session.execute(stmt)
-
-    async def creator_is_exist(self, session: AsyncSession, user_id: str) -> bool:
-        stmt = select(XhsCreator).where(XhsCreator.user_id == user_id)
-        result = await session.execute(stmt)
-        return result.first() is not None
 
     async def get_all_content(self) -> List[Dict]:
         async with get_session() as session:
@@ -293,16 +290,15 @@ class XhsMongoStoreImplement(AbstractStore):
         Args:
             content_item: Note content data
         """
-        note_id = content_item.get("note_id")
-        if not note_id:
-            return
+        await self.store_contents([content_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="contents",
-            query={"note_id": note_id},
-            data=content_item
-        )
-        utils.logger.info(f"[XhsMongoStoreImplement.store_content] Saved note {note_id} to MongoDB")
+    async def store_contents(self, content_items: List[Dict]):
+        """
+        Store a page of note content to MongoDB, buffered and upserted with one bulk_write
+        Args:
+            content_items: Note content data list
+        """
+        await self.mongo_store.bulk_save_or_update("contents", "note_id", content_items)
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -310,16 +306,15 @@ class XhsMongoStoreImplement(AbstractStore):
         Args:
             comment_item: Comment data
         """
-        comment_id = comment_item.get("comment_id")
-        if not comment_id:
-            return
+        await self.store_comments([comment_item])
 
-        await self.mongo_store.save_or_update(
-            collection_suffix="comments",
-            query={"comment_id": comment_id},
-            data=comment_item
-        )
-        utils.logger.info(f"[XhsMongoStoreImplement.store_comment] Saved comment {comment_id} to MongoDB")
+    async def store_comments(self, comment_items: List[Dict]):
+        """
+        Store a page of comments to MongoDB, buffered and upserted with one bulk_write
+        Args:
+            comment_items: Comment data list
+        """
+        await self.mongo_store.bulk_save_or_update("comments", "comment_id", comment_items)
 
     async def store_creator(self, creator_item: Dict):
         """
@@ -348,3 +343,16 @@ class XhsExcelStoreImplement:
             platform="xhs",
             crawler_type=crawler_type_var.get()
         )
+
+
+class XhsParquetStoreImplement(ParquetStoreBase):
+    """Xiaohongshu Parquet storage implementation, one file per item type"""
+
+    MODELS = {
+        "contents": XhsNote,
+        "comments": XhsNoteComment,
+        "creators": XhsCreator,
+    }
+
+    def __init__(self):
+        super().__init__(platform="xhs", crawler_type=crawler_type_var.get())
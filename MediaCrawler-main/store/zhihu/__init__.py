@@ -19,9 +19,11 @@
 
 
 # -*- coding: utf-8 -*-
-from typing import List
+from typing import Dict, List
 
 import config
+from store import get_store_instance
+from store.write_behind import write_behind
 from base.base_crawler import AbstractStore
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from ._store_impl import (ZhihuCsvStoreImplement,
@@ -29,7 +31,8 @@ from ._store_impl import (ZhihuCsvStoreImplement,
                                           ZhihuJsonStoreImplement,
                                           ZhihuSqliteStoreImplement,
                                           ZhihuMongoStoreImplement,
-                                          ZhihuExcelStoreImplement)
+                                          ZhihuExcelStoreImplement,
+                                          ZhihuParquetStoreImplement)
 from tools import utils
 from var import source_keyword_var
 
@@ -40,17 +43,19 @@ class ZhihuStoreFactory:
         "db": ZhihuDbStoreImplement,
         "postgres": ZhihuDbStoreImplement,
         "json": ZhihuJsonStoreImplement,
+        "jsonl": ZhihuJsonStoreImplement,
         "sqlite": ZhihuSqliteStoreImplement,
         "mongodb": ZhihuMongoStoreImplement,
         "excel": ZhihuExcelStoreImplement,
+        "parquet": ZhihuParquetStoreImplement,
     }
 
     @staticmethod
     def create_store() -> AbstractStore:
         store_class = ZhihuStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel ...")
-        return store_class()
+            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb or excel or parquet ...")
+        return get_store_instance("zhihu", store_class)
 
 async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
     """
@@ -64,8 +69,8 @@ async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
     if not contents:
         return
 
-    for content_item in contents:
-        await update_zhihu_content(content_item)
+    content_items = [_build_zhihu_content(content_item) for content_item in contents]
+    await write_behind(ZhihuStoreFactory.create_store()).store_contents(content_items)
 
 async def update_zhihu_content(content_item: ZhihuContent):
     """
@@ -76,12 +81,16 @@ async def update_zhihu_content(content_item: ZhihuContent):
     Returns:
 
     """
+    local_db_item = _build_zhihu_content(content_item)
+    await write_behind(ZhihuStoreFactory.create_store()).store_content(local_db_item)
+
+
+def _build_zhihu_content(content_item: ZhihuContent) -> Dict:
     content_item.source_keyword = source_keyword_var.get()
     local_db_item = content_item.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.zhihu.update_zhihu_content] zhihu content: {local_db_item}")
-    await ZhihuStoreFactory.create_store().store_content(local_db_item)
-
+    return local_db_item
 
 
 async def batch_update_zhihu_note_comments(comments: List[ZhihuComment]):
@@ -96,8 +105,8 @@ async def batch_update_zhihu_note_comments(comments: List[ZhihuComment]):
     if not comments:
         return
 
-    for comment_item in comments:
-        await update_zhihu_content_comment(comment_item)
+    comment_items = [_build_zhihu_content_comment(comment_item) for comment_item in comments]
+    await write_behind(ZhihuStoreFactory.create_store()).store_comments(comment_items)
 
 
 async def update_zhihu_content_comment(comment_item: ZhihuComment):
@@ -109,10 +118,15 @@ async def update_zhihu_content_comment(comment_item: ZhihuComment):
     Returns:
 
     """
+    local_db_item = _build_zhihu_content_comment(comment_item)
+    await write_behind(ZhihuStoreFactory.create_store()).store_comment(local_db_item)
+
+
+def _build_zhihu_content_comment(comment_item: ZhihuComment) -> Dict:
     local_db_item = comment_item.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.zhihu.update_zhihu_note_comment] zhihu content comment:{local_db_item}")
-    await ZhihuStoreFactory.create_store().store_comment(local_db_item)
+    return local_db_item
 
 
 async def save_creator(creator: ZhihuCreator):
@@ -128,4 +142,4 @@ async def save_creator(creator: ZhihuCreator):
         return
     local_db_item = creator.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
-    await ZhihuStoreFactory.create_store().store_creator(local_db_item)
+    await write_behind(ZhihuStoreFactory.create_store()).store_creator(local_db_item)
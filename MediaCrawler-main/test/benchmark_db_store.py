@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/benchmark_db_store.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Compare the per-record store path (SELECT + ORM INSERT/UPDATE + commit per comment) with the bulk
+#            upsert path of XhsDbStoreImplement on a temporary SQLite database
+# @Usage   : python test/benchmark_db_store.py --comments 5000 --page-size 20 [--no-profile]
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import func, select, text, update
+
+# Add project root directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from config.db_config import sqlite_db_config
+from database import bulk_upsert, db_session
+from database.models import XhsNoteComment
+from store.xhs import XhsDbStoreImplement
+
+
+async def legacy_store_comment(comment_item):
+    """The per-record path replaced by the bulk upsert: one session, one SELECT and one INSERT/UPDATE per comment"""
+    async with db_session.get_session() as session:
+        comment_id = comment_item.get("comment_id")
+        result = await session.execute(select(XhsNoteComment).where(XhsNoteComment.comment_id == comment_id))
+        if result.first() is not None:
+            await session.execute(
+                update(XhsNoteComment).where(XhsNoteComment.comment_id == comment_id).values(
+                    last_modify_ts=int(time.time() * 1000),
+                    like_count=str(comment_item.get("like_count")),
+                    sub_comment_count=int(comment_item.get("sub_comment_count", 0) or 0),
+                )
+            )
+        else:
+            session.add(XhsNoteComment(**XhsDbStoreImplement.comment_row(comment_item)))
+
+
+def make_pages(n_comments, page_size, like_count):
+    comments = [{
+        "comment_id": f"c{i}", "note_id": f"n{i // 100}", "content": f"评论内容 {i}" * 5, "user_id": f"u{i % 997}",
+        "nickname": "用户", "like_count": like_count, "sub_comment_count": i % 3, "create_time": 1700000000 + i,
+    } for i in range(n_comments)]
+    return [comments[i:i + page_size] for i in range(0, n_comments, page_size)]
+
+
+async def run_variant(name, n_comments, page_size, workdir):
+    sqlite_db_config["db_path"] = os.path.join(workdir, f"{name}.db")
+    db_session._engines.clear()
+    bulk_upsert.clear_unique_key_cache()
+    await db_session.create_tables("sqlite")
+    if name != "bulk (unique key)":
+        # Tables created before comment_id was unique
+        async with db_session.get_session() as session:
+            await session.execute(text("DROP INDEX ix_xhs_note_comment_comment_id"))
+            await session.execute(text("CREATE INDEX ix_xhs_note_comment_comment_id ON xhs_note_comment (comment_id)"))
+
+    store = XhsDbStoreImplement()
+    timings = []
+    # First pass inserts every comment, the second one re-crawls them (updates)
+    for like_count in (1, 2):
+        pages = make_pages(n_comments, page_size, like_count)
+        start = time.perf_counter()
+        for page in pages:
+            if name == "per-record":
+                for comment in page:
+                    await legacy_store_comment(comment)
+            else:
+                await store.store_comments(page)
+        timings.append(time.perf_counter() - start)
+
+    async with db_session.get_session() as session:
+        rows = (await session.execute(select(func.count()).select_from(XhsNoteComment))).scalar()
+    await db_session.get_async_engine("sqlite").dispose()
+    return timings, rows
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="SQLite store benchmark: per-record path vs bulk upsert")
+    parser.add_argument("--comments", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=20, help="comments per store_comments call (one API page)")
+    parser.add_argument("--no-profile", action="store_true",
+                        help="SQLite defaults (rollback journal, synchronous=FULL) instead of the writer profile")
+    args = parser.parse_args()
+
+    config.SAVE_DATA_OPTION = "sqlite"
+    if args.no_profile:
+        sqlite_db_config.update(journal_mode="DELETE", synchronous="FULL", cache_size_kb=2000, mmap_size=0)
+    print(f"{args.comments} comments, {args.page_size} per page")
+    print(f"{'path':<20}{'insert (s)':>12}{'update (s)':>12}{'rows/s':>10}{'rows':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in ("per-record", "bulk (no unique key)", "bulk (unique key)"):
+            (insert_sec, update_sec), rows = await run_variant(name, args.comments, args.page_size, workdir)
+            rate = 2 * args.comments / (insert_sec + update_sec)
+            print(f"{name:<20}{insert_sec:>12.2f}{update_sec:>12.2f}{rate:>10.0f}{rows:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
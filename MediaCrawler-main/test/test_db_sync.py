@@ -19,17 +19,22 @@
 # @Author  : persist-1<persist1@126.com>
 # @Time    : 2025/9/8 00:02
 # @Desc    : Used to compare ORM mapping model (database/models.py) with actual database structure and perform update operations (connect database -> structure comparison -> difference report -> interactive synchronization)
-# @Tips    : This script requires dependency 'pymysql==1.1.0'
+#            Indexes are compared too: before a unique index is created on a natural key (note_id / comment_id ...),
+#            duplicate rows are removed, keeping the most recently inserted row of every key
+# @Usage   : python test/test_db_sync.py [--db sqlite mysql postgres] [--yes]
+# @Tips    : This script requires dependency 'pymysql==1.1.0' (MySQL) / 'psycopg2-binary' (Postgres)
 
+import argparse
 import os
 import sys
-from sqlalchemy import create_engine, inspect as sqlalchemy_inspect
+from sqlalchemy import create_engine, inspect as sqlalchemy_inspect, text
 from sqlalchemy.schema import MetaData
 
 # Add project root directory to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from config.db_config import mysql_db_config, sqlite_db_config
+from config.db_config import mysql_db_config, postgres_db_config, sqlite_db_config
+from database import bulk_upsert
 from database.models import Base
 
 def get_mysql_engine():
@@ -37,6 +42,11 @@ def get_mysql_engine():
     conn_str = f"mysql+pymysql://{mysql_db_config['user']}:{mysql_db_config['password']}@{mysql_db_config['host']}:{mysql_db_config['port']}/{mysql_db_config['db_name']}"
     return create_engine(conn_str)
 
+def get_postgres_engine():
+    """Create and return a PostgreSQL database engine"""
+    conn_str = f"postgresql+psycopg2://{postgres_db_config['user']}:{postgres_db_config['password']}@{postgres_db_config['host']}:{postgres_db_config['port']}/{postgres_db_config['db_name']}"
+    return create_engine(conn_str)
+
 def get_sqlite_engine():
     """Create and return a SQLite database engine"""
     conn_str = f"sqlite:///{sqlite_db_config['db_path']}"
@@ -95,9 +105,55 @@ def compare_schemas(db_schema, orm_schema):
     return {
         "added_tables": list(added_tables),
         "deleted_tables": list(deleted_tables),
-        "changed_tables": changed_tables
+        "changed_tables": changed_tables,
+        "changed_indexes": {},
     }
 
+def get_db_indexes(engine):
+    """Get current indexes of the database: {table: {index name: (columns, unique)}}"""
+    inspector = sqlalchemy_inspect(engine)
+    indexes = {}
+    for table_name in inspector.get_table_names():
+        table_indexes = {}
+        for index in inspector.get_indexes(table_name):
+            # Postgres reports the index behind a unique constraint as well, it is not managed here
+            if index.get("duplicates_constraint"):
+                continue
+            table_indexes[index["name"]] = (tuple(index["column_names"]), bool(index.get("unique")))
+        indexes[table_name] = table_indexes
+    return indexes
+
+def get_orm_indexes():
+    """Get indexes declared by the ORM model (index=True / unique=True columns and __table_args__)"""
+    indexes = {}
+    for table_name, table in Base.metadata.tables.items():
+        indexes[table_name] = {
+            index.name: (tuple(column.name for column in index.columns), bool(index.unique))
+            for index in table.indexes
+        }
+    return indexes
+
+def compare_indexes(db_indexes, orm_indexes):
+    """Compare indexes of the tables present on both sides, an index whose columns or uniqueness differ is modified"""
+    changed_indexes = {}
+    for table in set(db_indexes).intersection(orm_indexes):
+        db_table, orm_table = db_indexes[table], orm_indexes[table]
+        added = [name for name in orm_table if name not in db_table]
+        deleted = [name for name in db_table if name not in orm_table]
+        modified = {
+            name: (db_table[name], orm_table[name])
+            for name in set(db_table).intersection(orm_table) if db_table[name] != orm_table[name]
+        }
+        if added or deleted or modified:
+            changed_indexes[table] = {"added": added, "deleted": deleted, "modified": modified}
+    return changed_indexes
+
+def compare_database(engine):
+    """Compare columns and indexes of a database with the ORM model"""
+    diff = compare_schemas(get_db_schema(engine), get_orm_schema())
+    diff["changed_indexes"] = compare_indexes(get_db_indexes(engine), get_orm_indexes())
+    return diff
+
 def print_diff(db_name, diff):
     """Print difference report"""
     print(f"--- {db_name} Database Structure Difference Report ---")
@@ -127,9 +183,40 @@ def print_diff(db_name, diff):
                 print("    [*] Modified fields:")
                 for col, types in changes["modified"].items():
                     print(f"      - {col}: {types[0]} -> {types[1]}")
+
+    if diff.get("changed_indexes"):
+        print("\n[*] Changed indexes:")
+        for table, changes in diff["changed_indexes"].items():
+            print(f"  - {table}:")
+            if changes.get("added"):
+                print("    [+] Added indexes:", ", ".join(changes["added"]))
+            if changes.get("deleted"):
+                print("    [-] Deleted indexes:", ", ".join(changes["deleted"]))
+            if changes.get("modified"):
+                print("    [*] Modified indexes:")
+                for name, (old, new) in changes["modified"].items():
+                    print(f"      - {name}: {_format_index(old)} -> {_format_index(new)}")
     print("--- End of Report ---")
 
 
+def _format_index(index):
+    columns, unique = index
+    return f"{'UNIQUE ' if unique else ''}({', '.join(columns)})"
+
+
+def deduplicate_rows(conn, table_name, key):
+    """
+    Delete duplicate rows of a natural key so a unique index can be created, the row with the highest id
+    (the most recently inserted one) is kept. Returns the number of deleted rows
+    """
+    # The derived table lets MySQL read the table it deletes from
+    result = conn.execute(text(
+        f"DELETE FROM {table_name} WHERE {key} IS NOT NULL AND id NOT IN ("
+        f"SELECT id FROM (SELECT MAX(id) AS id FROM {table_name} WHERE {key} IS NOT NULL GROUP BY {key}) AS keep_rows)"
+    ))
+    return result.rowcount
+
+
 def sync_database(engine, diff):
     """Synchronize ORM model to database"""
     metadata = Base.metadata
@@ -138,9 +225,16 @@ def sync_database(engine, diff):
     from alembic.migration import MigrationContext
     from alembic.operations import Operations
 
-    conn = engine.connect()
-    ctx = MigrationContext.configure(conn)
-    op = Operations(ctx)
+    with engine.begin() as conn:
+        ctx = MigrationContext.configure(conn)
+        op = Operations(ctx)
+        _sync_tables(conn, op, metadata, diff)
+        _sync_indexes(conn, op, metadata, diff.get("changed_indexes", {}))
+    # Stores running in this process look the unique keys up again (native upsert instead of the fallback)
+    bulk_upsert.clear_unique_key_cache()
+
+
+def _sync_tables(conn, op, metadata, diff):
 
     # Handle deleted tables
     for table_name in diff['deleted_tables']:
@@ -151,7 +245,7 @@ def sync_database(engine, diff):
     for table_name in diff['added_tables']:
         table = metadata.tables.get(table_name)
         if table is not None:
-            table.create(engine)
+            table.create(conn)
             print(f"Created table: {table_name}")
 
     # Handle field changes
@@ -178,40 +272,71 @@ def sync_database(engine, diff):
                     print(f"Modified field in table {table_name}: {col_name} (type changed to {column.type})")
 
 
-def main():
-    """Main function"""
-    orm_schema = get_orm_schema()
+def _sync_indexes(conn, op, metadata, changed_indexes):
+    for table_name, changes in changed_indexes.items():
+        table = metadata.tables[table_name]
+        orm_indexes = {index.name: index for index in table.indexes}
 
-    # Handle MySQL
-    try:
-        mysql_engine = get_mysql_engine()
-        mysql_schema = get_db_schema(mysql_engine)
-        mysql_diff = compare_schemas(mysql_schema, orm_schema)
-        print_diff("MySQL", mysql_diff)
-        if any(mysql_diff.values()):
-            choice = input(">>> Manual confirmation required: Synchronize ORM model to MySQL database? (y/N): ")
-            if choice.lower() == 'y':
-                sync_database(mysql_engine, mysql_diff)
-                print("MySQL database synchronization completed.")
-    except Exception as e:
-        print(f"Error processing MySQL: {e}")
-
-
-    # Handle SQLite
+        # Drop first: a modified index is recreated under the same name
+        for index_name in changes["deleted"] + list(changes["modified"]):
+            op.drop_index(index_name, table_name=table_name)
+            print(f"Deleted index in table {table_name}: {index_name}")
+
+        for index_name in changes["added"] + list(changes["modified"]):
+            index = orm_indexes[index_name]
+            if index.unique and len(index.columns) == 1:
+                key = next(iter(index.columns)).name
+                deleted = deduplicate_rows(conn, table_name, key)
+                if deleted:
+                    print(f"Deleted {deleted} duplicate rows in table {table_name} (key: {key})")
+            index.create(conn)
+            print(f"Created index in table {table_name}: {index_name}")
+
+
+ENGINES = {
+    "mysql": ("MySQL", get_mysql_engine),
+    "postgres": ("PostgreSQL", get_postgres_engine),
+    "sqlite": ("SQLite", get_sqlite_engine),
+}
+
+
+def migrate(db_type, assume_yes=False):
+    """Compare one database with the ORM model and synchronize it after confirmation"""
+    db_name, get_engine = ENGINES[db_type]
+    engine = get_engine()
     try:
-        sqlite_engine = get_sqlite_engine()
-        sqlite_schema = get_db_schema(sqlite_engine)
-        sqlite_diff = compare_schemas(sqlite_schema, orm_schema)
-        print_diff("SQLite", sqlite_diff)
-        if any(sqlite_diff.values()):
-            choice = input(">>> Manual confirmation required: Synchronize ORM model to SQLite database? (y/N): ")
-            if choice.lower() == 'y':
-                # Note: SQLite does not support ALTER COLUMN to modify field types, simplified handling here
-                print("Warning: SQLite has limited support for field modifications, this script will not execute field type modification operations.")
-                sync_database(sqlite_engine, sqlite_diff)
-                print("SQLite database synchronization completed.")
-    except Exception as e:
-        print(f"Error processing SQLite: {e}")
+        diff = compare_database(engine)
+        print_diff(db_name, diff)
+        if not any(diff.values()):
+            return
+        if not assume_yes:
+            choice = input(f">>> Manual confirmation required: Synchronize ORM model to {db_name} database? (y/N): ")
+            if choice.lower() != 'y':
+                return
+        if db_type == "sqlite":
+            # Note: SQLite does not support ALTER COLUMN to modify field types, simplified handling here
+            print("Warning: SQLite has limited support for field modifications, this script will not execute field type modification operations.")
+            for changes in diff["changed_tables"].values():
+                changes["modified"] = {}
+        sync_database(engine, diff)
+        print(f"{db_name} database synchronization completed.")
+    finally:
+        engine.dispose()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Compare database/models.py with the databases and migrate them")
+    parser.add_argument("--db", nargs="+", choices=list(ENGINES), default=["mysql", "sqlite"],
+                        help="databases to check (default: mysql sqlite)")
+    parser.add_argument("--yes", action="store_true", help="synchronize without asking for confirmation")
+    args = parser.parse_args()
+
+    for db_type in args.db:
+        try:
+            migrate(db_type, assume_yes=args.yes)
+        except Exception as e:
+            print(f"Error processing {ENGINES[db_type][0]}: {e}")
 
 
 if __name__ == "__main__":
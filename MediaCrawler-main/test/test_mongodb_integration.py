@@ -219,6 +219,28 @@ class TestMongoDBRealConnection(unittest.TestCase):
 
         asyncio.run(test())
 
+    def test_real_bulk_save_or_update(self):
+        async def test():
+            store = MongoDBStoreBase(collection_prefix="test_douyin")
+
+            comments = [{"comment_id": f"bulk_{i:03d}", "content": f"Comment {i}", "like_count": 0} for i in range(20)]
+            await store.bulk_save_or_update("comments", "comment_id", comments)
+            await store.flush()
+            await store.bulk_save_or_update("comments", "comment_id", [{"comment_id": "bulk_005", "like_count": 9}])
+
+            # find_many writes the buffered update first
+            results = await store.find_many("comments", {"comment_id": {"$regex": "^bulk_"}})
+            self.assertEqual(len(results), 20)
+            updated = next(r for r in results if r["comment_id"] == "bulk_005")
+            self.assertEqual(updated["like_count"], 9)
+            self.assertEqual(updated["content"], "Comment 5")
+
+            collection = await store.get_collection("comments")
+            indexes = await collection.index_information()
+            self.assertTrue(indexes["comment_id_1"].get("unique"))
+
+        asyncio.run(test())
+
     def test_xhs_store_implementation(self):
         async def test():
             store = XhsMongoStoreImplement()
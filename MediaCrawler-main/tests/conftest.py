@@ -20,6 +20,7 @@
 Pytest configuration and shared fixtures
 """
 
+import asyncio
 import pytest
 import sys
 from pathlib import Path
@@ -96,3 +97,51 @@ def sample_xhs_creator():
         "interaction": 50000,
         "tag_list": '{"profession": "Designer", "interest": "Photography"}'
     }
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Write store output below a temporary working directory (flat files, no wordcloud, no write-behind)"""
+    import config
+    from tools.async_file_writer import AsyncFileWriter
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "ENABLE_GET_WORDCLOUD", False)
+    monkeypatch.setattr(config, "SAVE_DATA_PARTITIONED", False)
+    monkeypatch.setattr(config, "SAVE_DATA_DIR", "")
+    monkeypatch.setattr(config, "ENABLE_WRITE_BEHIND", False)
+    yield tmp_path
+    # Buffered CSV rows belong to this directory, write them before it goes away
+    AsyncFileWriter.flush_all()
+
+
+@pytest.fixture
+def writer(workdir):
+    """AsyncFileWriter of the xhs search crawler writing below workdir"""
+    from tools.async_file_writer import AsyncFileWriter
+
+    return AsyncFileWriter(platform="xhs", crawler_type="search")
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """Fresh SQLite database with all tables, used through the sqlite save option; yields its path"""
+    import config
+    from config.db_config import sqlite_db_config
+    from database import bulk_upsert, db_session
+
+    monkeypatch.setattr(config, "SAVE_DATA_OPTION", "sqlite")
+    monkeypatch.setitem(sqlite_db_config, "db_path", str(tmp_path / "test.db"))
+    monkeypatch.setattr(db_session, "_engines", {})
+    bulk_upsert.clear_unique_key_cache()
+    asyncio.run(_create_sqlite_tables())
+    yield sqlite_db_config["db_path"]
+    bulk_upsert.clear_unique_key_cache()
+
+
+async def _create_sqlite_tables():
+    from database import db_session
+
+    await db_session.create_tables("sqlite")
+    # The cached engine is bound to this event loop, tests open their own
+    await db_session.get_async_engine("sqlite").dispose()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/store_helpers.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+"""
+Store doubles and record factories shared by the store tests
+"""
+
+import asyncio
+from typing import Dict, List
+
+from base.base_crawler import AbstractStore
+
+
+class RecordingStore(AbstractStore):
+    """Records the single-record writes, the batch methods are AbstractStore's"""
+
+    def __init__(self):
+        self.contents: List[Dict] = []
+        self.comments: List[Dict] = []
+        self.creators: List[Dict] = []
+        self.name = "recording"
+
+    async def store_content(self, content_item: Dict):
+        self.contents.append(content_item)
+
+    async def store_comment(self, comment_item: Dict):
+        self.comments.append(comment_item)
+
+    async def store_creator(self, creator: Dict):
+        self.creators.append(creator)
+
+
+class BatchRecordingStore(RecordingStore):
+    """Records every batch of contents / comments it receives, optionally slow or failing"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        super().__init__()
+        self.delay = delay
+        self.fail = fail
+        self.batches: List[List[Dict]] = []
+
+    async def store_contents(self, content_items: List[Dict]):
+        await self.store_comments(content_items)
+
+    async def store_comments(self, comment_items: List[Dict]):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("backend down")
+        self.batches.append(list(comment_items))
+
+    async def store_content(self, content_item: Dict):
+        await self.store_contents([content_item])
+
+    async def store_comment(self, comment_item: Dict):
+        await self.store_comments([comment_item])
+
+
+def make_comments(ids=range(3), like_count=1, note_id="n1") -> List[Dict]:
+    """Comment records shaped like the ones built by the store/* update functions"""
+    return [{"comment_id": f"c{i}", "note_id": note_id, "content": f"评论 {i}", "like_count": like_count,
+             "sub_comment_count": 0} for i in ids]
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_csv_writer.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the buffered, schema-locked CSV writer
+"""
+
+import asyncio
+import csv
+import os
+
+import pytest
+
+import config
+from tools.async_file_writer import AsyncFileWriter
+
+
+@pytest.fixture(autouse=True)
+def csv_buffer_config(monkeypatch):
+    monkeypatch.setattr(config, "CSV_BUFFER_ROWS", 100)
+    monkeypatch.setattr(config, "CSV_FLUSH_INTERVAL_SEC", 60)
+
+
+def _read_rows(writer):
+    with open(writer._get_file_path("csv", "comments"), newline="", encoding="utf-8-sig") as f:
+        return list(csv.reader(f))
+
+
+def _write(writer, items):
+    async def write_all():
+        for item in items:
+            await writer.write_to_csv(item, "comments")
+
+    asyncio.run(write_all())
+
+
+class TestBufferedCsvWriter:
+    """Test cases for buffering and flushing"""
+
+    def test_rows_are_buffered_until_flush_all(self, writer):
+        _write(writer, [{"comment_id": str(i), "content": f"评论 {i}"} for i in range(3)])
+        assert not os.path.exists(writer._get_file_path("csv", "comments"))
+
+        AsyncFileWriter.flush_all()
+        assert _read_rows(writer) == [["comment_id", "content"]] + [[str(i), f"评论 {i}"] for i in range(3)]
+
+    def test_flush_on_buffer_size(self, writer, monkeypatch):
+        monkeypatch.setattr(config, "CSV_BUFFER_ROWS", 2)
+        _write(writer, [{"comment_id": str(i)} for i in range(5)])
+        assert _read_rows(writer) == [["comment_id"], ["0"], ["1"], ["2"], ["3"]]
+
+    def test_flush_on_interval(self, writer, monkeypatch):
+        monkeypatch.setattr(config, "CSV_FLUSH_INTERVAL_SEC", 0.01)
+
+        async def write_and_wait():
+            await writer.write_to_csv({"comment_id": "1"}, "comments")
+            await asyncio.sleep(0.05)
+
+        asyncio.run(write_and_wait())
+        assert _read_rows(writer) == [["comment_id"], ["1"]]
+
+    def test_writers_are_shared_across_instances(self, writer):
+        other = AsyncFileWriter(platform="xhs", crawler_type="search")
+        _write(writer, [{"comment_id": "1"}])
+        _write(other, [{"comment_id": "2"}])
+        AsyncFileWriter.flush_all()
+        assert _read_rows(writer) == [["comment_id"], ["1"], ["2"]]
+
+
+class TestCsvSchemaLock:
+    """Test cases for records whose keys drift from the header"""
+
+    def test_missing_and_extra_keys(self, writer):
+        _write(writer, [
+            {"comment_id": "1", "content": "a", "like_count": 1},
+            {"content": "b", "comment_id": "2"},
+            {"comment_id": "3", "content": "c", "like_count": 3, "ip_location": "上海"},
+        ])
+        AsyncFileWriter.flush_all()
+        assert _read_rows(writer) == [
+            ["comment_id", "content", "like_count"],
+            ["1", "a", "1"],
+            ["2", "b", ""],
+            ["3", "c", "3"],
+        ]
+
+    def test_header_of_existing_file_is_kept(self, writer):
+        path = writer._get_file_path("csv", "comments")
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            f.write("content,comment_id\r\nold,0\r\n")
+        _write(writer, [{"comment_id": "1", "content": "new"}])
+        AsyncFileWriter.flush_all()
+        assert _read_rows(writer) == [["content", "comment_id"], ["old", "0"], ["new", "1"]]
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_db_bulk_upsert.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the bulk upsert path of the SQL stores, run against a temporary SQLite database
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import func, select, text
+
+from database import bulk_upsert, db_session
+from database.models import DouyinAweme, XhsCreator, XhsNoteComment
+from store.douyin import DouyinDbStoreImplement
+from store.xhs import XhsDbStoreImplement
+from tests.store_helpers import make_comments
+
+
+async def _query(stmt):
+    async with db_session.get_session() as session:
+        return (await session.execute(stmt)).all()
+
+
+async def _drop_unique_key(table, column):
+    """Turn the unique index of the natural key back into a plain one, like tables created before it was unique"""
+    async with db_session.get_session() as session:
+        await session.execute(text(f"DROP INDEX ix_{table}_{column}"))
+        await session.execute(text(f"CREATE INDEX ix_{table}_{column} ON {table} ({column})"))
+
+
+def _run(*coros):
+    """Run the steps in one event loop, as during a crawl (the cached engine is bound to it)"""
+    async def run_all():
+        results = [await coro for coro in coros]
+        await db_session.get_async_engine("sqlite").dispose()
+        return results
+
+    return asyncio.run(run_all())
+
+
+class TestXhsBulkUpsert:
+    """Test cases for XhsDbStoreImplement.store_comments"""
+
+    @pytest.mark.parametrize("unique_key", [False, True])
+    def test_insert_then_update(self, sqlite_db, unique_key):
+        store = XhsDbStoreImplement()
+        steps = [] if unique_key else [_drop_unique_key("xhs_note_comment", "comment_id")]
+        steps += [
+            store.store_comments(make_comments(like_count=1)),
+            store.store_comments(make_comments(like_count=5, ids=[1, 2, 3]) + [{"comment_id": "c3", "like_count": 9}]),
+            _query(select(XhsNoteComment.comment_id, XhsNoteComment.like_count, XhsNoteComment.content)
+                   .order_by(XhsNoteComment.comment_id)),
+        ]
+        rows = _run(*steps)[-1]
+        # c1 / c2 only refresh the update columns, c3 is inserted once with the last row of the page
+        assert [tuple(r) for r in rows] == [
+            ("c0", "1", "评论 0"), ("c1", "5", "评论 1"), ("c2", "5", "评论 2"), ("c3", "9", None),
+        ]
+
+    def test_native_upsert_is_used_with_unique_key(self, sqlite_db):
+        async def check():
+            async with db_session.get_session() as session:
+                return await bulk_upsert.has_unique_key(session, XhsNoteComment.__table__, "comment_id")
+
+        async def check_legacy():
+            bulk_upsert.clear_unique_key_cache()
+            await _drop_unique_key("xhs_note_comment", "comment_id")
+            return await check()
+
+        assert _run(check(), check_legacy()) == [True, False]
+
+    def test_single_store_comment_uses_same_path(self, sqlite_db):
+        store = XhsDbStoreImplement()
+        rows = _run(
+            store.store_comment(make_comments(like_count=1)[0]),
+            store.store_comment(make_comments(like_count=2)[0]),
+            _query(select(func.count()).select_from(XhsNoteComment)),
+        )[-1]
+        assert rows[0][0] == 1
+
+    @pytest.mark.parametrize("unique_key", [False, True])
+    def test_creator_is_upserted_on_user_id(self, sqlite_db, unique_key):
+        store = XhsDbStoreImplement()
+        steps = [] if unique_key else [_drop_unique_key("xhs_creator", "user_id")]
+        steps += [
+            store.store_creator({"user_id": "u1", "nickname": "旧昵称", "gender": "女", "fans": 1}),
+            store.store_creator({"user_id": "u1", "nickname": "新昵称", "gender": "男", "fans": 2}),
+            _query(select(XhsCreator.user_id, XhsCreator.nickname, XhsCreator.gender, XhsCreator.fans)),
+        ]
+        rows = _run(*steps)[-1]
+        # gender is not one of the refreshed columns
+        assert [tuple(r) for r in rows] == [("u1", "新昵称", "女", "2")]
+
+
+class TestDouyinBulkUpsert:
+    """Awemes without a title never insert new rows"""
+
+    def test_untitled_rows_only_update(self, sqlite_db):
+        store = DouyinDbStoreImplement()
+        rows = _run(
+            store.store_contents([{"aweme_id": "1", "title": "a", "liked_count": "1"},
+                                  {"aweme_id": "2", "title": "", "liked_count": "1"}]),
+            store.store_contents([{"aweme_id": "1", "title": "", "liked_count": "7"}]),
+            _query(select(DouyinAweme.aweme_id, DouyinAweme.title, DouyinAweme.liked_count)),
+        )[-1]
+        assert [tuple(r) for r in rows] == [(1, "", "7")]
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_db_migration.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the unique key / index migration of test/test_db_sync.py, run against a temporary SQLite database
+"""
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from config.db_config import sqlite_db_config
+from database import bulk_upsert
+from database.models import Base
+from test import test_db_sync
+
+
+@pytest.fixture
+def legacy_db(tmp_path, monkeypatch):
+    """SQLite database shaped like one created before the unique keys and composite indexes existed"""
+    monkeypatch.setitem(sqlite_db_config, "db_path", str(tmp_path / "legacy.db"))
+    engine = create_engine(f"sqlite:///{sqlite_db_config['db_path']}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.unique or len(index.columns) > 1:
+                    conn.execute(text(f"DROP INDEX {index.name}"))
+                    if len(index.columns) == 1:
+                        column = next(iter(index.columns)).name
+                        conn.execute(text(f"CREATE INDEX {index.name} ON {table.name} ({column})"))
+        conn.execute(text(
+            "INSERT INTO xhs_note_comment (comment_id, note_id, like_count) VALUES "
+            "('c1', 'n1', '1'), ('c2', 'n1', '1'), ('c1', 'n1', '7'), (NULL, 'n1', '0'), (NULL, 'n1', '0')"
+        ))
+        conn.execute(text(
+            "INSERT INTO xhs_creator (user_id, fans) VALUES ('u1', '1'), ('u2', '1'), ('u1', '9')"
+        ))
+    yield engine
+    engine.dispose()
+
+
+class TestDbMigration:
+    """Test cases for the index comparison and synchronization"""
+
+    def test_report_lists_unique_and_composite_indexes(self, legacy_db):
+        changes = test_db_sync.compare_database(legacy_db)["changed_indexes"]["xhs_note_comment"]
+        assert changes["added"] == ["ix_xhs_note_comment_note_id_create_time"]
+        assert changes["modified"] == {
+            "ix_xhs_note_comment_comment_id": ((("comment_id",), False), (("comment_id",), True)),
+        }
+
+    def test_migrate_deduplicates_and_creates_indexes(self, legacy_db):
+        bulk_upsert._unique_key_cache[("sqlite", "xhs_note_comment", "comment_id")] = False
+        test_db_sync.migrate("sqlite", assume_yes=True)
+
+        assert not any(test_db_sync.compare_database(legacy_db).values())
+        with legacy_db.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT comment_id, like_count FROM xhs_note_comment ORDER BY comment_id"
+            )).all()
+        # The latest c1 is kept, rows without a key are left alone
+        assert [tuple(r) for r in rows] == [(None, "0"), (None, "0"), ("c1", "7"), ("c2", "1")]
+        with legacy_db.connect() as conn:
+            creators = conn.execute(text("SELECT user_id, fans FROM xhs_creator ORDER BY user_id")).all()
+        assert [tuple(r) for r in creators] == [("u1", "9"), ("u2", "1")]
+        assert bulk_upsert._unique_key_cache == {}
+
+    def test_up_to_date_database_has_no_diff(self, tmp_path, monkeypatch):
+        monkeypatch.setitem(sqlite_db_config, "db_path", str(tmp_path / "new.db"))
+        engine = test_db_sync.get_sqlite_engine()
+        Base.metadata.create_all(engine)
+        assert not any(test_db_sync.compare_database(engine).values())
+        engine.dispose()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_db_sqlite_profile.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the SQLite writer profile of database/db_session.py
+"""
+
+import asyncio
+import sqlite3
+
+from sqlalchemy import text
+
+from config.db_config import sqlite_db_config
+from database import db_session
+from store.xhs import XhsDbStoreImplement
+from tests.store_helpers import make_comments
+
+
+class TestSqliteProfile:
+    """Test cases for the pragmas and the cached session factory"""
+
+    def test_pragmas_are_applied(self, sqlite_db):
+        async def read_pragmas():
+            async with db_session.get_session() as session:
+                values = [
+                    (await session.execute(text(f"PRAGMA {name}"))).scalar()
+                    for name in ("journal_mode", "synchronous", "cache_size", "mmap_size", "busy_timeout")
+                ]
+            await db_session.get_async_engine("sqlite").dispose()
+            return values
+
+        # synchronous=NORMAL is reported as 1
+        assert asyncio.run(read_pragmas()) == [
+            "wal", 1, -sqlite_db_config["cache_size_kb"], sqlite_db_config["mmap_size"],
+            sqlite_db_config["busy_timeout_ms"],
+        ]
+
+    def test_session_factory_is_cached(self, sqlite_db):
+        factory = db_session.get_session_factory("sqlite")
+        assert factory is db_session.get_session_factory("sqlite")
+        assert factory.kw["bind"] is db_session.get_async_engine("sqlite")
+
+    def test_reader_keeps_working_during_writes(self, sqlite_db):
+        """A report holding a read transaction neither blocks the crawl nor sees half-written pages"""
+        reader = sqlite3.connect(sqlite_db, timeout=0.1, isolation_level=None)
+        store = XhsDbStoreImplement()
+
+        async def crawl():
+            await store.store_comments(make_comments(range(3)))
+            reader.execute("BEGIN")
+            during = reader.execute("SELECT COUNT(*) FROM xhs_note_comment").fetchone()[0]
+            # With a rollback journal the commit would fail with "database is locked" here
+            await store.store_comments(make_comments(range(3, 10)))
+            still = reader.execute("SELECT COUNT(*) FROM xhs_note_comment").fetchone()[0]
+            reader.execute("COMMIT")
+            after = reader.execute("SELECT COUNT(*) FROM xhs_note_comment").fetchone()[0]
+            await db_session.get_async_engine("sqlite").dispose()
+            return during, still, after
+
+        try:
+            assert asyncio.run(crawl()) == (3, 3, 10)
+        finally:
+            reader.close()
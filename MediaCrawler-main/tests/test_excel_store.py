@@ -68,7 +68,6 @@ class TestExcelStoreBase:
         """Test Excel store initialization"""
         assert excel_store.platform == "test"
         assert excel_store.crawler_type == "search"
-        assert excel_store.workbook is not None
         assert excel_store.contents_sheet is not None
         assert excel_store.comments_sheet is not None
         assert excel_store.creators_sheet is not None
@@ -163,12 +162,40 @@ class TestExcelStoreBase:
     def test_header_formatting(self, excel_store):
         """Test header row formatting"""
         asyncio.run(excel_store.store_content({"note_id": "test", "title": "Test"}))
+        excel_store.flush()
 
         # Check header formatting
-        header_cell = excel_store.contents_sheet.cell(row=1, column=1)
+        wb = openpyxl.load_workbook(excel_store.filename)
+        header_cell = wb["Contents"].cell(row=1, column=1)
         assert header_cell.font.bold is True
         # RGB color may have different prefix (00 or FF), check the actual color part
         assert header_cell.fill.start_color.rgb[-6:] == "366092"
+        body_cell = wb["Contents"].cell(row=2, column=1)
+        assert body_cell.border.left.style == "thin"
+        assert body_cell.alignment.wrap_text is True
+        wb.close()
+
+    def test_rows_and_column_widths(self, excel_store):
+        """Test rows written from the spilled sheet and column widths tracked while storing"""
+        items = [
+            {"note_id": f"note{i}", "title": "x" * (i * 20), "tags": ["a", "b"], "desc": None, "liked_count": i}
+            for i in range(4)
+        ]
+        for item in items:
+            asyncio.run(excel_store.store_content(item))
+        # Control characters would make openpyxl reject the whole workbook
+        asyncio.run(excel_store.store_content({"note_id": "bad\x01id", "title": "t"}))
+        excel_store.flush()
+
+        wb = openpyxl.load_workbook(excel_store.filename)
+        sheet = wb["Contents"]
+        rows = list(sheet.iter_rows(values_only=True))
+        assert rows[0] == ("note_id", "title", "tags", "desc", "liked_count")
+        assert rows[2] == ("note1", "x" * 20, "['a', 'b']", None, 1)
+        assert rows[5][0] == "badid"
+        # min 10, longest value + 2, max 50
+        assert [sheet.column_dimensions[c].width for c in "ABCE"] == [10, 50, 12, 13]
+        wb.close()
 
     def test_empty_sheets_removed(self, excel_store):
         """Test that empty sheets are removed on flush"""
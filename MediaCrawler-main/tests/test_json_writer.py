@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_json_writer.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the append-only JSON / JSONL writers and the streaming readers
+"""
+
+import asyncio
+import json
+
+import pytest
+
+import config
+from tools.json_records import iter_json_records, count_json_records
+
+
+def _items(n):
+    return [{"comment_id": str(i), "content": f"评论 {i}", "like_count": i, "tags": ["a", "b"]} for i in range(n)]
+
+
+class TestJsonArrayWriter:
+    """Test cases for the streaming JSON array mode (save option "json")"""
+
+    def test_output_matches_json_dumps(self, writer, monkeypatch):
+        monkeypatch.setattr(config, "SAVE_DATA_OPTION", "json")
+        items = _items(3)
+        for item in items:
+            asyncio.run(writer.write_single_item_to_json(item, "comments"))
+
+        path = writer._get_file_path("json", "comments")
+        with open(path, encoding="utf-8") as f:
+            assert f.read() == json.dumps(items, ensure_ascii=False, indent=4)
+
+    def test_appends_to_existing_file(self, writer, monkeypatch):
+        """Files written by the previous read-modify-rewrite implementation keep growing in place"""
+        monkeypatch.setattr(config, "SAVE_DATA_OPTION", "json")
+        items = _items(4)
+        path = writer._get_file_path("json", "comments")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(items[:2], ensure_ascii=False, indent=4) + "\n")
+        for item in items[2:]:
+            asyncio.run(writer.write_single_item_to_json(item, "comments"))
+
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f) == items
+
+    def test_appends_to_empty_array(self, writer, monkeypatch):
+        monkeypatch.setattr(config, "SAVE_DATA_OPTION", "json")
+        path = writer._get_file_path("json", "comments")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("[]")
+        asyncio.run(writer.write_single_item_to_json({"a": 1}, "comments"))
+
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f) == [{"a": 1}]
+
+    def test_non_array_file_is_wrapped(self, writer, monkeypatch):
+        monkeypatch.setattr(config, "SAVE_DATA_OPTION", "json")
+        path = writer._get_file_path("json", "comments")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('{"a": 1}')
+        asyncio.run(writer.write_single_item_to_json({"a": 2}, "comments"))
+
+        with open(path, encoding="utf-8") as f:
+            assert json.load(f) == [{"a": 1}, {"a": 2}]
+
+    def test_concurrent_writes_stay_valid(self, writer, monkeypatch):
+        monkeypatch.setattr(config, "SAVE_DATA_OPTION", "json")
+        items = _items(50)
+
+        async def write_all():
+            await asyncio.gather(*(writer.write_single_item_to_json(item, "comments") for item in items))
+
+        asyncio.run(write_all())
+        with open(writer._get_file_path("json", "comments"), encoding="utf-8") as f:
+            assert sorted(json.load(f), key=lambda x: int(x["comment_id"])) == items
+
+
+class TestJsonlWriter:
+    """Test cases for the JSON Lines mode (save option "jsonl")"""
+
+    def test_one_record_per_line(self, writer, monkeypatch):
+        monkeypatch.setattr(config, "SAVE_DATA_OPTION", "jsonl")
+        items = _items(3)
+        for item in items:
+            asyncio.run(writer.write_single_item_to_json(item, "comments"))
+
+        path = writer._get_file_path("jsonl", "comments")
+        assert path.endswith(".jsonl")
+        with open(path, encoding="utf-8") as f:
+            assert [json.loads(line) for line in f] == items
+
+    def test_wordcloud_source_reads_jsonl(self, writer, monkeypatch):
+        monkeypatch.setattr(config, "SAVE_DATA_OPTION", "jsonl")
+        for item in _items(3) + [{"comment_id": "x", "content": ""}]:
+            asyncio.run(writer.write_to_jsonl(item, "comments"))
+
+        contents = writer._load_comment_contents(writer._get_file_path("jsonl", "comments"))
+        assert contents == [{"content": f"评论 {i}"} for i in range(3)]
+
+
+class TestJsonRecords:
+    """Test cases for the streaming readers used by the wordcloud and the API preview"""
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+    def test_array_across_chunk_boundaries(self, tmp_path, monkeypatch, chunk_size):
+        import tools.json_records as json_records
+        monkeypatch.setattr(json_records, "CHUNK_SIZE", chunk_size)
+        data = _items(20) + [12345, "text, with ] bracket", None]
+        path = tmp_path / "a.json"
+        path.write_text(json.dumps(data, ensure_ascii=False, indent=4), encoding="utf-8")
+
+        assert list(iter_json_records(str(path))) == data
+        assert count_json_records(str(path)) == len(data)
+
+    def test_single_object_and_empty_array(self, tmp_path):
+        obj, empty = tmp_path / "obj.json", tmp_path / "empty.json"
+        obj.write_text('{"a": 1}', encoding="utf-8")
+        empty.write_text("[ ]", encoding="utf-8")
+        assert list(iter_json_records(str(obj))) == [{"a": 1}]
+        assert list(iter_json_records(str(empty))) == []
+
+    def test_jsonl_skips_blank_and_truncated_lines(self, tmp_path):
+        path = tmp_path / "a.jsonl"
+        path.write_text('{"a": 1}\n\n{"a": 2}\n{"a": ', encoding="utf-8")
+        assert list(iter_json_records(str(path))) == [{"a": 1}, {"a": 2}]
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_mongodb_bulk.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the buffered bulk_write path and the index bootstrap of MongoDBStoreBase
+
+The collections are in-memory doubles of the motor collection API, the same paths run against a local mongod in
+test/test_mongodb_integration.py.
+"""
+
+import asyncio
+import weakref
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import OperationFailure
+
+import config
+from database.mongodb_store_base import MongoDBStoreBase
+from store.xhs import XhsMongoStoreImplement
+from tests.store_helpers import make_comments
+
+
+class FakeCollection:
+    """Keeps the documents, the created indexes and the bulk_write calls (operation count, ordered)"""
+
+    def __init__(self, docs=None):
+        self.docs = list(docs or [])
+        self.indexes = []
+        self.bulk_calls = []
+
+    async def create_index(self, keys, unique=False):
+        field = keys[0][0]
+        values = [doc.get(field) for doc in self.docs]
+        if unique and len(values) != len(set(values)):
+            raise OperationFailure("E11000 duplicate key error")
+        self.indexes.append((keys, unique))
+
+    async def bulk_write(self, operations, ordered=True):
+        self.bulk_calls.append((len(operations), ordered))
+        upserted = modified = 0
+        for operation in operations:
+            assert operation._upsert
+            (field, value), = operation._filter.items()
+            doc = next((d for d in self.docs if d.get(field) == value), None)
+            if doc is None:
+                self.docs.append(dict(operation._doc["$set"]))
+                upserted += 1
+            else:
+                doc.update(operation._doc["$set"])
+                modified += 1
+        return SimpleNamespace(upserted_count=upserted, modified_count=modified)
+
+    async def update_one(self, query, update, upsert=False):
+        doc = await self.find_one(query)
+        if doc is None:
+            self.docs.append(dict(update["$set"]))
+        else:
+            doc.update(update["$set"])
+
+    async def find_one(self, query):
+        return next((d for d in self.docs if all(d.get(k) == v for k, v in query.items())), None)
+
+
+@pytest.fixture
+def collections(monkeypatch):
+    """{collection name: FakeCollection}, created on first use like MongoDB collections"""
+    collections = {}
+
+    async def get_collection(self, collection_suffix):
+        return collections.setdefault(f"{self.collection_prefix}_{collection_suffix}", FakeCollection())
+
+    monkeypatch.setattr(MongoDBStoreBase, "get_collection", get_collection)
+    monkeypatch.setattr(MongoDBStoreBase, "_indexed_collections", set())
+    monkeypatch.setattr(MongoDBStoreBase, "_instances", weakref.WeakSet())
+    monkeypatch.setattr(config, "MONGODB_BULK_SIZE", 3)
+    monkeypatch.setattr(config, "MONGODB_FLUSH_INTERVAL_SEC", 60)
+    return collections
+
+
+class TestMongoBulkWrite:
+    """Test cases for bulk_save_or_update / flush"""
+
+    def test_flush_by_size_with_one_unordered_bulk_write(self, collections):
+        store = XhsMongoStoreImplement()
+
+        async def run():
+            await store.store_comments(make_comments(range(2)))
+            buffered = len(collections.get("xhs_comments", FakeCollection()).bulk_calls)
+            await store.store_comments(make_comments(range(2, 4)))
+            return buffered
+
+        assert asyncio.run(run()) == 0
+        assert collections["xhs_comments"].bulk_calls == [(4, False)]
+        assert [d["comment_id"] for d in collections["xhs_comments"].docs] == ["c0", "c1", "c2", "c3"]
+
+    def test_flush_by_time(self, collections, monkeypatch):
+        monkeypatch.setattr(config, "MONGODB_FLUSH_INTERVAL_SEC", 0.05)
+        store = XhsMongoStoreImplement()
+
+        async def run():
+            await store.store_comment(make_comments([0])[0])
+            await asyncio.sleep(0.2)
+
+        asyncio.run(run())
+        assert collections["xhs_comments"].bulk_calls == [(1, False)]
+
+    def test_updates_are_merged_and_upserted(self, collections):
+        store = MongoDBStoreBase(collection_prefix="xhs")
+
+        async def run():
+            await store.bulk_save_or_update("comments", "comment_id", make_comments(range(2)))
+            await store.bulk_save_or_update("comments", "comment_id", [{"comment_id": "c1", "like_count": 5}])
+            await store.bulk_save_or_update("comments", "comment_id", [{"comment_id": "", "like_count": 9}])
+            await store.flush()
+            await store.bulk_save_or_update("comments", "comment_id", [{"comment_id": "c0", "like_count": 7}])
+            return await store.find_one("comments", {"comment_id": "c0"})
+
+        c0 = asyncio.run(run())
+        # find_one writes the buffer first
+        assert c0["like_count"] == 7
+        assert collections["xhs_comments"].bulk_calls == [(2, False), (1, False)]
+        assert collections["xhs_comments"].docs == [
+            {**make_comments([0])[0], "like_count": 7},
+            {**make_comments([1])[0], "like_count": 5},
+        ]
+
+    def test_flush_all_writes_every_store(self, collections):
+        xhs, douyin = MongoDBStoreBase("xhs"), MongoDBStoreBase("douyin")
+
+        async def run():
+            await xhs.bulk_save_or_update("contents", "note_id", [{"note_id": "n1"}])
+            await douyin.bulk_save_or_update("contents", "aweme_id", [{"aweme_id": "a1"}])
+            await MongoDBStoreBase.flush_all()
+
+        asyncio.run(run())
+        assert collections["xhs_contents"].docs == [{"note_id": "n1"}]
+        assert collections["douyin_contents"].docs == [{"aweme_id": "a1"}]
+
+
+class TestMongoIndexBootstrap:
+    """Test cases for the automatic key indexes"""
+
+    def test_unique_index_created_once_per_collection(self, collections):
+        store = MongoDBStoreBase(collection_prefix="xhs")
+
+        async def run():
+            for i in range(2):
+                await store.bulk_save_or_update("contents", "note_id", [{"note_id": f"n{i}"}])
+                await store.flush()
+            await store.save_or_update("creators", {"user_id": "u1"}, {"user_id": "u1"})
+
+        asyncio.run(run())
+        assert collections["xhs_contents"].indexes == [([("note_id", 1)], True)]
+        assert collections["xhs_creators"].indexes == [([("user_id", 1)], True)]
+
+    def test_duplicates_fall_back_to_plain_index(self, collections):
+        collections["xhs_comments"] = FakeCollection([{"comment_id": "c1"}, {"comment_id": "c1"}])
+        store = MongoDBStoreBase(collection_prefix="xhs")
+
+        async def run():
+            await store.bulk_save_or_update("comments", "comment_id", [{"comment_id": "c2"}])
+            return await store.flush()
+
+        assert asyncio.run(run()) is True
+        assert collections["xhs_comments"].indexes == [([("comment_id", 1)], False)]
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_parquet_store.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the Parquet store shared by all platforms
+"""
+
+import asyncio
+import os
+
+import pytest
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+import config
+from store.parquet_store_base import ParquetStoreBase
+from var import source_keyword_var
+
+
+def _comments(n, start=0):
+    return [{
+        "comment_id": str(i), "note_id": "n1", "content": f"评论 {i}", "create_time": 1700000000 + i,
+        "like_count": str(i), "sub_comment_count": i % 3, "pictures": ["a.jpg", "b.jpg"], "unknown_field": "x",
+    } for i in range(start, start + n)]
+
+
+@pytest.mark.skipif(not PARQUET_AVAILABLE, reason="pyarrow not installed")
+class TestParquetStore:
+    """Test cases for ParquetStoreBase through the Xiaohongshu implementation"""
+
+    @pytest.fixture(autouse=True)
+    def parquet_config(self, workdir, monkeypatch):
+        monkeypatch.setattr(config, "PARQUET_ROW_GROUP_SIZE", 4)
+        monkeypatch.setattr(config, "PARQUET_COMPRESSION", "zstd")
+        ParquetStoreBase._writers.clear()
+        yield
+        ParquetStoreBase.flush_all()
+
+    @pytest.fixture
+    def store(self):
+        from store.xhs import XhsParquetStoreImplement
+        return XhsParquetStoreImplement()
+
+    def _files(self, item_type):
+        root = "data/xhs/parquet"
+        return sorted(os.path.join(root, f) for f in os.listdir(root) if f"_{item_type}_" in f)
+
+    def test_row_groups_and_compression(self, store):
+        asyncio.run(store.store_comments(_comments(10)))
+        ParquetStoreBase.flush_all()
+
+        (path,) = self._files("comments")
+        parquet_file = pq.ParquetFile(path)
+        assert parquet_file.metadata.num_rows == 10
+        assert [parquet_file.metadata.row_group(i).num_rows for i in range(parquet_file.num_row_groups)] == [4, 4, 2]
+        assert parquet_file.metadata.row_group(0).column(0).compression == "ZSTD"
+
+    def test_schema_comes_from_model(self, store):
+        asyncio.run(store.store_comments(_comments(2)))
+        # A record missing most fields does not change the schema
+        asyncio.run(store.store_comment({"comment_id": "x", "sub_comment_count": "not a number"}))
+        ParquetStoreBase.flush_all()
+
+        table = pq.read_table(self._files("comments")[0])
+        assert "unknown_field" not in table.schema.names
+        assert "id" not in table.schema.names and "add_ts" not in table.schema.names
+        assert table.schema.field("create_time").type == pa.int64()
+        assert table.schema.field("like_count").type == pa.string()
+        rows = table.to_pylist()
+        assert rows[0]["comment_id"] == "0" and rows[0]["create_time"] == 1700000000
+        assert rows[1]["pictures"] == '["a.jpg", "b.jpg"]'
+        assert rows[2]["comment_id"] == "x" and rows[2]["sub_comment_count"] is None and rows[2]["content"] is None
+
+    def test_item_types_get_their_own_files(self, store):
+        asyncio.run(store.store_comments(_comments(1)))
+        asyncio.run(store.store_content({"note_id": "n1", "title": "标题", "time": 1700000000}))
+        asyncio.run(store.store_creator({"user_id": "u1", "nickname": "用户", "fans": "10"}))
+        ParquetStoreBase.flush_all()
+
+        assert pq.read_table(self._files("contents")[0]).to_pylist()[0]["title"] == "标题"
+        assert pq.read_table(self._files("creators")[0]).to_pylist()[0]["nickname"] == "用户"
+        assert len(self._files("comments")) == 1
+
+    def test_later_run_writes_new_file(self, store):
+        asyncio.run(store.store_comments(_comments(3)))
+        ParquetStoreBase.flush_all()
+        asyncio.run(store.store_comments(_comments(2, start=3)))
+        ParquetStoreBase.flush_all()
+
+        second, first = self._files("comments")
+        assert second == first[:-len(".parquet")] + ".1.parquet"
+        assert pq.read_table(first).num_rows == 3
+        assert pq.read_table(second).column("comment_id").to_pylist() == ["3", "4"]
+
+    def test_partitioned_layout(self, store, monkeypatch):
+        monkeypatch.setattr(config, "SAVE_DATA_PARTITIONED", True)
+        token = source_keyword_var.set("关键词")
+        try:
+            asyncio.run(store.store_comments(_comments(1)))
+            asyncio.run(store.store_content({"note_id": "n1", "source_keyword": "内容关键词"}))
+        finally:
+            source_keyword_var.reset(token)
+        ParquetStoreBase.flush_all()
+
+        day_dirs = os.listdir("data/xhs/parquet/comments")
+        assert len(day_dirs) == 1
+        assert pq.read_table(f"data/xhs/parquet/comments/{day_dirs[0]}/关键词.parquet").num_rows == 1
+        assert os.listdir(f"data/xhs/parquet/contents/{day_dirs[0]}") == ["内容关键词.parquet"]
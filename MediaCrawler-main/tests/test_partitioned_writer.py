@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_partitioned_writer.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for partitioned output files and the keyword switch options
+"""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+import config
+from cmd_arg.arg import parse_cmd
+from tools.async_file_writer import AsyncFileWriter
+from tools.utils import utils
+from var import source_keyword_var
+
+
+@pytest.fixture
+def keyword():
+    token = source_keyword_var.set("山姆必买")
+    yield "山姆必买"
+    source_keyword_var.reset(token)
+
+
+class TestPartitionPath:
+    """Test cases for AsyncFileWriter file layout"""
+
+    def test_flat_path_by_default(self, writer, keyword, monkeypatch):
+        monkeypatch.setattr(config, "SAVE_DATA_PARTITIONED", False)
+        path = writer._get_file_path("csv", "comments")
+        assert os.path.basename(path) == f"search_comments_{utils.get_current_date()}.csv"
+
+    def test_partition_path(self, writer, keyword, monkeypatch):
+        monkeypatch.setattr(config, "SAVE_DATA_PARTITIONED", True)
+        path = writer._get_file_path("csv", "comments")
+        assert path == os.path.join("data/xhs/csv", "comments", utils.get_current_date(), f"{keyword}.csv")
+        assert os.path.isdir(os.path.dirname(path))
+
+    def test_partition_root(self, writer, keyword, tmp_path, monkeypatch):
+        monkeypatch.setattr(config, "SAVE_DATA_PARTITIONED", True)
+        monkeypatch.setattr(config, "SAVE_DATA_DIR", str(tmp_path / "raw"))
+        path = writer._get_file_path("csv", "contents")
+        assert path == os.path.join(str(tmp_path / "raw"), "contents", utils.get_current_date(), f"{keyword}.csv")
+
+    def test_partition_without_keyword(self, writer, monkeypatch):
+        """Detail / creator mode has no search keyword"""
+        monkeypatch.setattr(config, "SAVE_DATA_PARTITIONED", True)
+        path = writer._get_file_path("json", "contents")
+        assert os.path.basename(path) == "unknown.json"
+
+    def test_partition_keyword_is_sanitized(self, writer, monkeypatch):
+        monkeypatch.setattr(config, "SAVE_DATA_PARTITIONED", True)
+        token = source_keyword_var.set("a/b:c")
+        try:
+            path = writer._get_file_path("csv", "comments")
+        finally:
+            source_keyword_var.reset(token)
+        assert os.path.basename(path) == "a_b_c.csv"
+
+    def test_concurrent_keywords_do_not_mix(self, writer, monkeypatch):
+        monkeypatch.setattr(config, "SAVE_DATA_PARTITIONED", True)
+
+        async def crawl(kw):
+            source_keyword_var.set(kw)
+            for i in range(3):
+                await writer.write_to_csv({"comment_id": f"{kw}_{i}"}, "comments")
+                await asyncio.sleep(0)
+
+        async def write_all():
+            # tasks copy the context, so each keeps its own source keyword
+            await asyncio.gather(crawl("山姆A"), crawl("山姆B"))
+
+        asyncio.run(write_all())
+        AsyncFileWriter.flush_all()
+        partition = os.path.join("data", "xhs", "csv", "comments", utils.get_current_date())
+        assert sorted(os.listdir(partition)) == ["山姆A.csv", "山姆B.csv"]
+        for name in os.listdir(partition):
+            with open(os.path.join(partition, name), encoding="utf-8-sig") as f:
+                lines = f.read().splitlines()
+            assert lines[0] == "comment_id"
+            assert lines[1:] == [f"{name[:-4]}_{i}" for i in range(3)]
+
+
+    def test_record_keyword_wins_over_context(self, writer, keyword, monkeypatch):
+        monkeypatch.setattr(config, "SAVE_DATA_PARTITIONED", True)
+        path = writer._get_file_path("csv", "contents", keyword="其他关键词")
+        assert os.path.basename(path) == "其他关键词.csv"
+
+    @pytest.mark.parametrize("save_option", ["csv", "json", "jsonl"])
+    def test_page_is_split_by_source_keyword(self, writer, keyword, monkeypatch, save_option):
+        """Contents carry source_keyword; records without one fall back to the crawl task's keyword"""
+        monkeypatch.setattr(config, "SAVE_DATA_PARTITIONED", True)
+        monkeypatch.setattr(config, "SAVE_DATA_OPTION", save_option)
+        items = [
+            {"note_id": "1", "source_keyword": "A"},
+            {"note_id": "2", "source_keyword": "B"},
+            {"note_id": "3", "source_keyword": "A"},
+            {"note_id": "4", "source_keyword": ""},
+        ]
+        if save_option == "csv":
+            asyncio.run(writer.write_items_to_csv(items, "contents"))
+            AsyncFileWriter.flush_all()
+        else:
+            asyncio.run(writer.write_items_to_json(items, "contents"))
+
+        partition = os.path.join("data", "xhs", save_option, "contents", utils.get_current_date())
+        assert sorted(os.listdir(partition)) == sorted(f"{kw}.{save_option}" for kw in ("A", "B", keyword))
+        with open(os.path.join(partition, f"A.{save_option}"), encoding="utf-8-sig") as f:
+            if save_option == "csv":
+                note_ids = [line.split(",")[0] for line in f.read().splitlines()[1:]]
+            elif save_option == "json":
+                note_ids = [record["note_id"] for record in json.load(f)]
+            else:
+                note_ids = [json.loads(line)["note_id"] for line in f]
+        assert note_ids == ["1", "3"]
+
+
+class TestKeywordOptions:
+    """Test cases for --keyword_sleep_sec / --partitioned / --save_data_dir"""
+
+    @pytest.fixture(autouse=True)
+    def restore_config(self, monkeypatch):
+        # parse_cmd overrides global config values
+        for name in ("PLATFORM", "LOGIN_TYPE", "CRAWLER_TYPE", "START_PAGE", "KEYWORDS",
+                     "KEYWORD_SWITCH_SLEEP_SEC", "SAVE_DATA_PARTITIONED", "SAVE_DATA_DIR",
+                     "ENABLE_GET_COMMENTS", "ENABLE_GET_SUB_COMMENTS", "HEADLESS", "CDP_HEADLESS",
+                     "SAVE_DATA_OPTION", "COOKIES", "CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES"):
+            monkeypatch.setattr(config, name, getattr(config, name))
+
+    def test_defaults(self):
+        args = asyncio.run(parse_cmd([]))
+        assert args.keyword_sleep_sec == 0
+        assert args.partitioned is False
+        assert args.save_data_dir == ""
+
+    def test_options(self):
+        args = asyncio.run(parse_cmd([
+            "--keywords", "山姆A,山姆B", "--keyword_sleep_sec", "5",
+            "--partitioned", "yes", "--save_data_dir", "/tmp/raw",
+        ]))
+        assert args.keywords == "山姆A,山姆B"
+        assert config.KEYWORD_SWITCH_SLEEP_SEC == 5
+        assert config.SAVE_DATA_PARTITIONED is True
+        assert config.SAVE_DATA_DIR == "/tmp/raw"
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_store_batch.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the batch store API and the shared store instances
+"""
+
+import asyncio
+import csv
+import json
+
+import pytest
+
+import config
+from store import xhs
+from store.xhs import XhsStoreFactory
+from tests.store_helpers import RecordingStore
+from tools.async_file_writer import AsyncFileWriter
+
+
+def _raw_comments(n):
+    return [{"id": str(i), "content": f"评论 {i}", "user_info": {"user_id": "u"}, "like_count": i} for i in range(n)]
+
+
+class TestBatchStore:
+    """Test cases for store_contents / store_comments"""
+
+    def test_default_batch_falls_back_to_single_writes(self):
+        store = RecordingStore()
+        asyncio.run(store.store_contents([{"a": 1}, {"a": 2}]))
+        asyncio.run(store.store_comments([{"b": 1}]))
+        assert store.contents == [{"a": 1}, {"a": 2}]
+        assert store.comments == [{"b": 1}]
+
+    @pytest.mark.parametrize("save_option", ["csv", "json", "jsonl"])
+    def test_batch_matches_single_writes(self, workdir, monkeypatch, save_option):
+        monkeypatch.setattr(config, "SAVE_DATA_OPTION", save_option)
+        store = XhsStoreFactory.create_store()
+        items = [{"comment_id": str(i), "content": f"评论 {i}"} for i in range(5)]
+        file_type = "json" if save_option == "json" else save_option
+
+        asyncio.run(store.store_comments(items[:3]))
+        for item in items[3:]:
+            asyncio.run(store.store_comment(item))
+        AsyncFileWriter.flush_all()
+
+        path = store.writer._get_file_path(file_type, "comments")
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            if save_option == "csv":
+                assert list(csv.DictReader(f)) == items
+            elif save_option == "json":
+                assert f.read() == json.dumps(items, ensure_ascii=False, indent=4)
+            else:
+                assert [json.loads(line) for line in f] == items
+
+    def test_batch_update_comments_writes_one_page(self, workdir, monkeypatch):
+        monkeypatch.setattr(config, "SAVE_DATA_OPTION", "csv")
+        asyncio.run(xhs.batch_update_xhs_note_comments("note_1", _raw_comments(4)))
+        AsyncFileWriter.flush_all()
+
+        path = XhsStoreFactory.create_store().writer._get_file_path("csv", "comments")
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.DictReader(f))
+        assert [row["comment_id"] for row in rows] == ["0", "1", "2", "3"]
+        assert {row["note_id"] for row in rows} == {"note_1"}
+
+
+class TestSharedStoreInstance:
+    """Test cases for the store shared by all update_* calls"""
+
+    def test_same_instance_per_save_option(self, monkeypatch):
+        monkeypatch.setattr(config, "SAVE_DATA_OPTION", "json")
+        first = XhsStoreFactory.create_store()
+        assert XhsStoreFactory.create_store() is first
+
+        monkeypatch.setattr(config, "SAVE_DATA_OPTION", "csv")
+        assert XhsStoreFactory.create_store() is not first
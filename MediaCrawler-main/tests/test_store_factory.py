@@ -13,8 +13,10 @@ from store.xhs._store_impl import (
     XhsDbStoreImplement,
     XhsSqliteStoreImplement,
     XhsMongoStoreImplement,
-    XhsExcelStoreImplement
+    XhsExcelStoreImplement,
+    XhsParquetStoreImplement
 )
+from store.parquet_store_base import PARQUET_AVAILABLE
 
 
 class TestXhsStoreFactory:
@@ -57,6 +59,13 @@ class TestXhsStoreFactory:
         store = XhsStoreFactory.create_store()
         assert isinstance(store, XhsExcelStoreImplement)
     
+    @pytest.mark.skipif(not PARQUET_AVAILABLE, reason="pyarrow not installed")
+    @patch('config.SAVE_DATA_OPTION', 'parquet')
+    def test_create_parquet_store(self):
+        """Test creating Parquet store"""
+        store = XhsStoreFactory.create_store()
+        assert isinstance(store, XhsParquetStoreImplement)
+    
     @patch('config.SAVE_DATA_OPTION', 'invalid')
     def test_invalid_store_option(self):
         """Test that invalid store option raises ValueError"""
@@ -67,7 +76,7 @@ class TestXhsStoreFactory:
     
     def test_all_stores_registered(self):
         """Test that all store types are registered"""
-        expected_stores = ['csv', 'json', 'db', 'sqlite', 'mongodb', 'excel']
+        expected_stores = ['csv', 'json', 'jsonl', 'db', 'postgres', 'sqlite', 'mongodb', 'excel', 'parquet']
         
         for store_type in expected_stores:
             assert store_type in XhsStoreFactory.STORES
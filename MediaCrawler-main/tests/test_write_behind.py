@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tests/test_write_behind.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Unit tests for the write-behind queue between store/* and the storage backends
+"""
+
+import asyncio
+import csv
+import os
+
+import pytest
+
+import config
+from store import xhs
+from store.write_behind import close_write_behind, drain_write_behind, get_write_behind_queue, write_behind
+from tests.store_helpers import BatchRecordingStore
+from tools import utils
+from tools.async_file_writer import AsyncFileWriter
+from var import source_keyword_var
+
+
+@pytest.fixture(autouse=True)
+def write_behind_config(monkeypatch):
+    monkeypatch.setattr(config, "ENABLE_WRITE_BEHIND", True)
+    monkeypatch.setattr(config, "WRITE_BEHIND_QUEUE_SIZE", 100)
+    monkeypatch.setattr(config, "WRITE_BEHIND_BATCH_SIZE", 3)
+    monkeypatch.setattr(config, "WRITE_BEHIND_FLUSH_INTERVAL_SEC", 60)
+
+
+class TestWriteBehindQueue:
+    """Test cases for grouping, flushing and backpressure"""
+
+    def test_groups_into_batches(self):
+        store = BatchRecordingStore()
+
+        async def run():
+            for i in range(7):
+                await write_behind(store).store_comment({"comment_id": i})
+            await drain_write_behind()
+            sizes = [len(batch) for batch in store.batches]
+            await close_write_behind()
+            return sizes
+
+        assert asyncio.run(run()) == [3, 3, 1]
+
+    def test_contents_and_comments_are_separate_groups(self):
+        store = BatchRecordingStore()
+
+        async def run():
+            await write_behind(store).store_content(content_item={"note_id": 1})
+            await write_behind(store).store_comments([{"comment_id": 1}, {"comment_id": 2}])
+            await write_behind(store).store_creator(creator={"user_id": 1})
+            await close_write_behind()
+
+        asyncio.run(run())
+        assert sorted(store.batches, key=len) == [[{"note_id": 1}], [{"comment_id": 1}, {"comment_id": 2}]]
+        assert store.creators == [{"user_id": 1}]
+
+    def test_flush_on_interval(self, monkeypatch):
+        monkeypatch.setattr(config, "WRITE_BEHIND_FLUSH_INTERVAL_SEC", 0.02)
+        store = BatchRecordingStore()
+
+        async def run():
+            await write_behind(store).store_comment({"comment_id": 1})
+            await asyncio.sleep(0.2)
+            written = list(store.batches)
+            await close_write_behind()
+            return written
+
+        assert asyncio.run(run()) == [[{"comment_id": 1}]]
+
+    def test_backpressure_when_full(self, monkeypatch):
+        monkeypatch.setattr(config, "WRITE_BEHIND_QUEUE_SIZE", 2)
+        monkeypatch.setattr(config, "WRITE_BEHIND_BATCH_SIZE", 1)
+        store = BatchRecordingStore(delay=0.01)
+
+        async def run():
+            for i in range(10):
+                await write_behind(store).store_comment({"comment_id": i})
+            stats = get_write_behind_queue().stats()
+            await close_write_behind()
+            return stats
+
+        stats = asyncio.run(run())
+        assert stats["max_queue_depth"] <= 2
+        assert stats["backpressure_waits"] > 0
+        assert sum(len(batch) for batch in store.batches) == 10
+
+    def test_failed_flush_is_counted_and_queue_keeps_running(self):
+        store, broken = BatchRecordingStore(), BatchRecordingStore(fail=True)
+
+        async def run():
+            await write_behind(broken).store_comment({"comment_id": 1})
+            await write_behind(store).store_comment({"comment_id": 2})
+            queue = get_write_behind_queue()
+            await queue.drain()
+            stats = queue.stats()
+            await close_write_behind()
+            return stats
+
+        stats = asyncio.run(run())
+        assert stats["records_failed"] == 1
+        assert stats["records_written"] == 1
+        assert stats["flushes"] == 2 and stats["flush_latency_max_sec"] >= 0
+        assert store.batches == [[{"comment_id": 2}]]
+
+    def test_close_returns_final_stats(self):
+        broken = BatchRecordingStore(fail=True)
+
+        async def run():
+            for i in range(2):
+                await write_behind(broken).store_comment({"comment_id": i})
+            return await close_write_behind(), await close_write_behind()
+
+        stats, closed_again = asyncio.run(run())
+        assert stats["records_queued"] == 2 and stats["records_failed"] == 2
+        assert closed_again is None
+
+    def test_cleanup_fails_the_run_when_records_were_lost(self, project_root_path, monkeypatch, capsys):
+        # The crawlers imported by main read their JS helpers relative to the project root
+        monkeypatch.chdir(project_root_path)
+        import main
+
+        monkeypatch.setattr(config, "ENABLE_WRITE_BEHIND", True)
+        monkeypatch.setattr(config, "SAVE_DATA_OPTION", "json")
+        monkeypatch.setattr(main, "crawler", None)
+        monkeypatch.setattr(main, "exit_code", 0)
+
+        async def run():
+            await write_behind(BatchRecordingStore(fail=True)).store_comment({"comment_id": 1})
+            await main.async_cleanup()
+
+        asyncio.run(run())
+        assert main.exit_code == 1
+        assert "1 of 1 crawled records were not saved" in capsys.readouterr().out
+
+
+class TestWriteBehindStore:
+    """Test cases for the store proxy"""
+
+    def test_disabled_returns_store(self, monkeypatch):
+        monkeypatch.setattr(config, "ENABLE_WRITE_BEHIND", False)
+        store = BatchRecordingStore()
+        assert write_behind(store) is store
+
+    def test_other_attributes_pass_through(self):
+        store = BatchRecordingStore()
+        assert write_behind(store).name == "recording"
+        assert write_behind(store) is write_behind(store)
+
+
+class TestWriteBehindContext:
+    """Test cases for the context variables seen by the stores"""
+
+    def test_keywords_keep_their_partition(self, tmp_path, monkeypatch):
+        """Comments carry no source_keyword: the partition comes from the keyword active when they were queued"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(config, "ENABLE_GET_WORDCLOUD", False)
+        monkeypatch.setattr(config, "SAVE_DATA_OPTION", "csv")
+        monkeypatch.setattr(config, "SAVE_DATA_PARTITIONED", True)
+        raw_comments = [{"id": str(i), "content": f"评论 {i}", "user_info": {"user_id": "u"}} for i in range(3)]
+
+        async def run():
+            for keyword in ("alpha", "beta", "gamma"):
+                source_keyword_var.set(keyword)
+                await xhs.batch_update_xhs_note_comments(f"note_{keyword}", raw_comments)
+            await close_write_behind()
+            AsyncFileWriter.flush_all()
+
+        asyncio.run(run())
+        partition = os.path.join("data", "xhs", "csv", "comments", utils.get_current_date())
+        assert sorted(os.listdir(partition)) == ["alpha.csv", "beta.csv", "gamma.csv"]
+        for keyword in ("alpha", "beta", "gamma"):
+            with open(os.path.join(partition, f"{keyword}.csv"), newline="", encoding="utf-8-sig") as f:
+                rows = list(csv.DictReader(f))
+            assert [row["note_id"] for row in rows] == [f"note_{keyword}"] * 3
+
+    def test_groups_split_by_keyword(self):
+        store = BatchRecordingStore()
+
+        async def run():
+            for keyword in ("a", "b", "a"):
+                source_keyword_var.set(keyword)
+                await write_behind(store).store_comment({"keyword": keyword})
+            await drain_write_behind()
+            await close_write_behind()
+
+        asyncio.run(run())
+        assert sorted(store.batches, key=len) == [[{"keyword": "b"}], [{"keyword": "a"}, {"keyword": "a"}]]
@@ -21,54 +21,283 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict, List
+import re
+import textwrap
+from typing import Dict, List, Optional
 import aiofiles
 import config
+from tools.json_records import iter_json_records
 from tools.utils import utils
 from tools.words import AsyncWordCloudGenerator
+from var import source_keyword_var
+
+# Bytes read from the end of a JSON array file to locate its closing bracket
+JSON_TAIL_BYTES = 64
+
+
+class BufferedCsvWriter:
+    """
+    Long-lived writer for one CSV file (one platform / item type / date, plus keyword when partitioned).
+
+    The file handle stays open and rows are buffered in memory, then written out when CSV_BUFFER_ROWS rows
+    are pending, CSV_FLUSH_INTERVAL_SEC seconds after the first pending row, or on shutdown (flush_all).
+    The header is locked at the first write (or taken from the existing file), so later records with
+    missing keys get empty cells and extra keys are dropped instead of shifting columns.
+    """
+
+    def __init__(self, file_path: str, date: str):
+        self.file_path = file_path
+        self.date = date
+        self.fieldnames: Optional[List[str]] = self._read_header(file_path)
+        self.rows: List[Dict] = []
+        self.dropped_keys = set()
+        self._file = None
+        self._writer = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_loop = None
+
+    @staticmethod
+    def _read_header(file_path: str) -> Optional[List[str]]:
+        if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+            return None
+        with open(file_path, "r", newline="", encoding="utf-8-sig") as f:
+            return next(csv.reader(f), None) or None
+
+    def write(self, item: Dict):
+        if self.fieldnames is None:
+            self.fieldnames = list(item.keys())
+        extra = item.keys() - set(self.fieldnames) - self.dropped_keys
+        if extra:
+            self.dropped_keys |= extra
+            utils.logger.warning(
+                f"[BufferedCsvWriter.write] Columns {sorted(extra)} are not in the header of {self.file_path}, dropped"
+            )
+        self.rows.append(item)
+
+        if len(self.rows) >= config.CSV_BUFFER_ROWS:
+            self.flush()
+        else:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._timer is not None and self._timer_loop is loop:
+            return
+        self._timer = loop.call_later(config.CSV_FLUSH_INTERVAL_SEC, self._flush_on_timer)
+        self._timer_loop = loop
+
+    def _flush_on_timer(self):
+        self._timer = None
+        try:
+            self.flush()
+        except Exception as e:
+            utils.logger.error(f"[BufferedCsvWriter._flush_on_timer] Error flushing {self.file_path}: {e}")
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self.rows:
+            return
+        if self._file is None:
+            self._file = open(self.file_path, "a", newline="", encoding="utf-8-sig")
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, restval="", extrasaction="ignore")
+            if self._file.tell() == 0:
+                self._writer.writeheader()
+        rows, self.rows = self.rows, []
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
 
 class AsyncFileWriter:
+    # Open CSV writers shared by all store instances, keyed by absolute file path
+    _csv_writers: Dict[str, BufferedCsvWriter] = {}
+
+    @classmethod
+    def flush_all(cls):
+        """
+        Flush buffered CSV rows and close the files
+        Called from the app_runner cleanup hook (main.async_cleanup) when the crawler stops
+        """
+        for file_path, writer in list(cls._csv_writers.items()):
+            try:
+                writer.close()
+            except Exception as e:
+                utils.logger.error(f"[AsyncFileWriter.flush_all] Error flushing {file_path}: {e}")
+        cls._csv_writers.clear()
+
     def __init__(self, platform: str, crawler_type: str):
         self.lock = asyncio.Lock()
         self.platform = platform
         self.crawler_type = crawler_type
         self.wordcloud_generator = AsyncWordCloudGenerator() if config.ENABLE_GET_WORDCLOUD else None
 
-    def _get_file_path(self, file_type: str, item_type: str) -> str:
+    def _get_file_path(self, file_type: str, item_type: str, date: str = "", create_dir: bool = True,
+                       keyword: Optional[str] = None) -> str:
+        date = date or utils.get_current_date()
+        if config.SAVE_DATA_PARTITIONED:
+            return self._get_partition_path(file_type, item_type, date, create_dir, keyword)
         base_path = f"data/{self.platform}/{file_type}"
-        pathlib.Path(base_path).mkdir(parents=True, exist_ok=True)
-        file_name = f"{self.crawler_type}_{item_type}_{utils.get_current_date()}.{file_type}"
+        if create_dir:
+            pathlib.Path(base_path).mkdir(parents=True, exist_ok=True)
+        file_name = f"{self.crawler_type}_{item_type}_{date}.{file_type}"
         return f"{base_path}/{file_name}"
 
+    def _get_partition_path(self, file_type: str, item_type: str, date: str, create_dir: bool = True,
+                            keyword: Optional[str] = None) -> str:
+        """
+        Partitioned layout: {root}/{item_type}/{date}/{keyword}.{file_type}
+        Each search keyword writes its own file, so keywords crawled concurrently never share a file.
+        keyword is the record's source_keyword; records without one (comments, creators) use the keyword
+        of the crawl task that stored them (source_keyword_var).
+        """
+        root = config.SAVE_DATA_DIR or f"data/{self.platform}/{file_type}"
+        if keyword is None:
+            keyword = source_keyword_var.get()
+        keyword = re.sub(r'[\\/:*?"<>|]', "_", keyword.strip()) or "unknown"
+        base_path = os.path.join(root, item_type, date)
+        if create_dir:
+            pathlib.Path(base_path).mkdir(parents=True, exist_ok=True)
+        return os.path.join(base_path, f"{keyword}.{file_type}")
+
+    @staticmethod
+    def partition_keyword(item: Dict) -> Optional[str]:
+        """The source_keyword a record carries, None when it has none"""
+        keyword = item.get("source_keyword") if isinstance(item, dict) else None
+        return keyword if isinstance(keyword, str) and keyword.strip() else None
+
+    @classmethod
+    def group_by_partition(cls, items: List[Dict]) -> Dict[Optional[str], List[Dict]]:
+        """Split a page of records by keyword partition (a single group when output is not partitioned)"""
+        if not config.SAVE_DATA_PARTITIONED:
+            return {None: items}
+        groups: Dict[Optional[str], List[Dict]] = {}
+        for item in items:
+            groups.setdefault(cls.partition_keyword(item), []).append(item)
+        return groups
+
     async def write_to_csv(self, item: Dict, item_type: str):
-        file_path = self._get_file_path('csv', item_type)
-        async with self.lock:
-            file_exists = os.path.exists(file_path)
-            async with aiofiles.open(file_path, 'a', newline='', encoding='utf-8-sig') as f:
-                writer = csv.DictWriter(f, fieldnames=item.keys())
-                if not file_exists or await f.tell() == 0:
-                    await writer.writeheader()
-                await writer.writerow(item)
+        """
+        Buffer one row in the long-lived writer of its file; see BufferedCsvWriter for when rows reach disk.
+        """
+        await self.write_items_to_csv([item], item_type)
+
+    async def write_items_to_csv(self, items: List[Dict], item_type: str):
+        """
+        Buffer a page of rows in the writer of their file
+        """
+        for keyword, group in self.group_by_partition(items).items():
+            writer = self._get_csv_writer(item_type, keyword)
+            for item in group:
+                writer.write(item)
+
+    def _get_csv_writer(self, item_type: str, keyword: Optional[str] = None) -> BufferedCsvWriter:
+        date = utils.get_current_date()
+        file_path = os.path.abspath(self._get_file_path('csv', item_type, date, create_dir=False, keyword=keyword))
+        writer = self._csv_writers.get(file_path)
+        if writer is None:
+            pathlib.Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+            # A new day started: files of previous days will not receive rows anymore
+            for path, old in list(self._csv_writers.items()):
+                if old.date != date:
+                    old.close()
+                    del self._csv_writers[path]
+            writer = self._csv_writers[file_path] = BufferedCsvWriter(file_path, date)
+        return writer
+
+    async def write_to_jsonl(self, item: Dict, item_type: str):
+        """
+        Append one record per line (JSON Lines). Each write costs O(1) regardless of file size.
+        """
+        await self.write_items_to_jsonl([item], item_type)
+
+    async def write_items_to_jsonl(self, items: List[Dict], item_type: str):
+        """
+        Append a page of records to a JSON Lines file in one write
+        """
+        if not items:
+            return
+        for keyword, group in self.group_by_partition(items).items():
+            file_path = self._get_file_path('jsonl', item_type, keyword=keyword)
+            lines = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in group)
+            async with self.lock:
+                async with aiofiles.open(file_path, 'a', encoding='utf-8') as f:
+                    await f.write(lines)
 
     async def write_single_item_to_json(self, item: Dict, item_type: str):
-        file_path = self._get_file_path('json', item_type)
+        """
+        Append one record to a JSON array file (save option "json"), or to a JSONL file (save option "jsonl").
+
+        The array is streamed: only the closing bracket at the end of the file is rewritten, so each
+        write is O(1) while the file stays a valid JSON array with the same layout as json.dumps(indent=4).
+        """
+        await self.write_items_to_json([item], item_type)
+
+    async def write_items_to_json(self, items: List[Dict], item_type: str):
+        """
+        Append a page of records to the JSON array (or JSONL) file in one write
+        """
+        if config.SAVE_DATA_OPTION == "jsonl":
+            await self.write_items_to_jsonl(items, item_type)
+            return
+        for keyword, group in self.group_by_partition(items).items():
+            await self._append_to_json(self._get_file_path('json', item_type, keyword=keyword), group)
+
+    async def _append_to_json(self, file_path: str, items: List[Dict]):
+        if not items:
+            return
+        records = b",\n".join(
+            textwrap.indent(json.dumps(item, ensure_ascii=False, indent=4), " " * 4).encode("utf-8") for item in items
+        )
         async with self.lock:
-            existing_data = []
-            if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-                async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                    try:
-                        content = await f.read()
-                        if content:
-                            existing_data = json.loads(content)
-                        if not isinstance(existing_data, list):
-                            existing_data = [existing_data]
-                    except json.JSONDecodeError:
-                        existing_data = []
-
-            existing_data.append(item)
-
-            async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-                await f.write(json.dumps(existing_data, ensure_ascii=False, indent=4))
+            if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+                async with aiofiles.open(file_path, 'wb') as f:
+                    await f.write(b"[\n" + records + b"\n]")
+                return
+
+            async with aiofiles.open(file_path, 'r+b') as f:
+                end = await f.seek(0, os.SEEK_END)
+                await f.seek(max(0, end - JSON_TAIL_BYTES))
+                tail = await f.read()
+                body = tail.rstrip()
+                if body.endswith(b"]") and body[:-1].strip():
+                    body = body[:-1].rstrip()
+                    separator = b"\n" if body.endswith(b"[") else b",\n"
+                    await f.seek(end - len(tail) + len(body))
+                    await f.truncate()
+                    await f.write(separator + records + b"\n]")
+                    return
+
+            # Not a JSON array (hand-edited or written by another tool): fall back to a full rewrite
+            await self._rewrite_json(file_path, items)
+
+    async def _rewrite_json(self, file_path: str, items: List[Dict]):
+        existing_data = []
+        async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
+            try:
+                content = await f.read()
+                if content:
+                    existing_data = json.loads(content)
+                if not isinstance(existing_data, list):
+                    existing_data = [existing_data]
+            except json.JSONDecodeError:
+                existing_data = []
+
+        existing_data.extend(items)
+
+        async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
+            await f.write(json.dumps(existing_data, ensure_ascii=False, indent=4))
 
     async def generate_wordcloud_from_comments(self):
         """
@@ -82,31 +311,16 @@ class AsyncFileWriter:
             return
 
         try:
-            # Read comments from JSON file
-            comments_file_path = self._get_file_path('json', 'comments')
+            # Read comments from the JSON / JSONL file record by record
+            file_type = 'jsonl' if config.SAVE_DATA_OPTION == "jsonl" else 'json'
+            comments_file_path = self._get_file_path(file_type, 'comments')
             if not os.path.exists(comments_file_path) or os.path.getsize(comments_file_path) == 0:
                 utils.logger.info(f"[AsyncFileWriter.generate_wordcloud_from_comments] No comments file found at {comments_file_path}")
                 return
 
-            async with aiofiles.open(comments_file_path, 'r', encoding='utf-8') as f:
-                content = await f.read()
-                if not content:
-                    utils.logger.info(f"[AsyncFileWriter.generate_wordcloud_from_comments] Comments file is empty")
-                    return
-
-                comments_data = json.loads(content)
-                if not isinstance(comments_data, list):
-                    comments_data = [comments_data]
-
             # Filter comments data to only include 'content' field
             # Handle different comment data structures across platforms
-            filtered_data = []
-            for comment in comments_data:
-                if isinstance(comment, dict):
-                    # Try different possible content field names
-                    content_text = comment.get('content') or comment.get('comment_text') or comment.get('text') or ''
-                    if content_text:
-                        filtered_data.append({'content': content_text})
+            filtered_data = await asyncio.to_thread(self._load_comment_contents, comments_file_path)
 
             if not filtered_data:
                 utils.logger.info(f"[AsyncFileWriter.generate_wordcloud_from_comments] No valid comment content found")
@@ -123,3 +337,14 @@ class AsyncFileWriter:
 
         except Exception as e:
             utils.logger.error(f"[AsyncFileWriter.generate_wordcloud_from_comments] Error generating wordcloud: {e}")
+
+    @staticmethod
+    def _load_comment_contents(comments_file_path: str) -> List[Dict]:
+        filtered_data = []
+        for comment in iter_json_records(comments_file_path):
+            if isinstance(comment, dict):
+                # Try different possible content field names
+                content_text = comment.get('content') or comment.get('comment_text') or comment.get('text') or ''
+                if content_text:
+                    filtered_data.append({'content': content_text})
+        return filtered_data
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/json_records.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Streaming readers for the JSON files written by AsyncFileWriter.
+
+Both formats are read record by record, so memory stays flat regardless of file size:
+- ``.jsonl``: one JSON object per line
+- ``.json``: a top-level JSON array (a single top-level object is yielded as one record)
+"""
+
+import json
+from typing import Any, Iterator
+
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_json_records(file_path: str) -> Iterator[Any]:
+    """Yield the records of a ``.jsonl`` or ``.json`` file one at a time."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        if file_path.endswith(".jsonl"):
+            yield from _iter_jsonl(f)
+        else:
+            yield from _iter_json_array(f, CHUNK_SIZE)
+
+
+def count_json_records(file_path: str) -> int:
+    """Count records without keeping them in memory (JSONL only counts non-blank lines)."""
+    if file_path.endswith(".jsonl"):
+        with open(file_path, "r", encoding="utf-8") as f:
+            return sum(1 for line in f if line.strip())
+    return sum(1 for _ in iter_json_records(file_path))
+
+
+def _iter_jsonl(f) -> Iterator[Any]:
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            # A line cut short by an interrupted run; the remaining records are still usable
+            continue
+
+
+def _iter_json_array(f, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    buf, eof = f.read(chunk_size).lstrip(), False
+    if not buf:
+        return
+    if not buf.startswith("["):
+        # Not an array: a single document, decoded as a whole
+        yield json.loads(buf + f.read())
+        return
+
+    idx = 1
+    while True:
+        # Skip whitespace and the separator before the next element
+        while idx < len(buf) and buf[idx] in " \t\r\n,":
+            idx += 1
+        if idx < len(buf) and buf[idx] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buf, idx)
+            # A scalar at the end of the buffer may continue in the next chunk
+            if end < len(buf) or eof:
+                yield item
+                idx = end
+                continue
+        except json.JSONDecodeError:
+            if eof:
+                raise
+        chunk = f.read(chunk_size)
+        eof = not chunk
+        buf, idx = buf[idx:] + chunk, 0
+        if eof and not buf.strip():
+            raise json.JSONDecodeError("Unterminated JSON array", buf, idx)
@@ -0,0 +1,318 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+from scipy import sparse
+
+# 将 src 加入 sys.path 以便导入模块
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from analysis.term_matrix import build_doc_term_matrix
+from data_pipeline.schema import read_table
+
+# 全局配置
+# 滚动基线窗口 (天)：用前 N 天的词出现率作为基线
+BASELINE_WINDOW = 7
+# 基线至少需要覆盖的天数，不足时不计算突发得分
+MIN_BASELINE_DAYS = 3
+# 词在整个时间段内的最少出现次数 (按文档计)，用于裁剪长尾词表
+MIN_TERM_COUNT = 5
+# 当天至少出现的文档数，避免 1 -> 2 这类小样本被判为突发
+MIN_DAY_COUNT = 3
+# 突发得分阈值 (z-score)
+Z_THRESHOLD = 3.0
+# 每次计算得分的词数：稠密中间矩阵为 块大小 x 天数，与词表大小无关
+TERM_BLOCK_SIZE = 10_000
+
+MS_PER_DAY = 86_400_000
+
+
+def resolve_day_index(df):
+    """
+    将时间列统一转换为整数天序号 (自 1970-01-01 起的天数)
+
+    评论使用 create_time (毫秒)，笔记使用 time (毫秒)，其余回退到 date 列。
+
+    Args:
+        df (pd.DataFrame): 含时间列的数据
+
+    Returns:
+        np.ndarray | None: 与 df 行对齐的天序号 (float，无法解析的为 NaN)；未找到时间列时返回 None
+    """
+    for col in ('create_time', 'time'):
+        if col in df.columns:
+            ts = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64')
+            return np.floor(ts / MS_PER_DAY)
+    if 'date' in df.columns:
+        dt = pd.to_datetime(df['date'], errors='coerce')
+        days = (dt - pd.Timestamp('1970-01-01')).dt.days
+        return days.to_numpy(dtype='float64')
+    return None
+
+
+def build_term_day_matrix(tokens_str, days, stopwords=None, min_term_count=MIN_TERM_COUNT):
+    """
+    构建 词 x 天 的稀疏文档频次矩阵
+
+    同一条评论中重复出现的词只计一次，因此矩阵元素表示“当天提及该词的文档数”。
+
+    Args:
+        tokens_str (pd.Series): 以空格分隔的分词结果
+        days (np.ndarray): 与 tokens_str 对齐的整数天序号 (已去除 NaN)
+        stopwords (set, optional): 额外过滤的停用词
+        min_term_count (int): 词的最少总文档数
+
+    Returns:
+        tuple: (terms, counts, n_docs)
+            terms (np.ndarray): 词表
+            counts (scipy.sparse.csr_matrix): 形状 (len(terms), n_days) 的文档频次
+            n_docs (np.ndarray): 每天的文档总数
+    """
+    days = np.asarray(days, dtype=np.int64)
+    n_days = int(days.max()) + 1 if len(days) else 0
+    n_docs = np.bincount(days, minlength=n_days).astype(np.float64)
+
+    # 文档 x 词 (二值，文档内去重) -> 词 x 天：左乘 文档 x 天 的指示矩阵
+    X, terms = build_doc_term_matrix(tokens_str, stopwords=stopwords, min_df=min_term_count)
+    if len(terms) == 0:
+        return terms, sparse.csr_matrix((0, n_days)), n_docs
+
+    day_onehot = sparse.csr_matrix(
+        (np.ones(len(days), dtype=np.float32), (np.arange(len(days)), days)),
+        shape=(len(days), n_days)
+    )
+    counts = (X.T @ day_onehot).tocsr()
+    return terms, counts, n_docs
+
+
+def burst_scores(counts, n_docs, window=BASELINE_WINDOW, min_baseline_days=MIN_BASELINE_DAYS):
+    """
+    计算每个词在每一天相对滚动基线的突发得分 (z-score)
+
+    基线为前 window 天的合并出现率 p (以全时段出现率作为先验平滑)，
+    当天期望文档数为 p * n_t。方差同时考虑二项抽样噪声与基线自身的日间波动，
+    避免高频词因为日常抖动被误判，也避免低频词因为 0 -> 少量 而得分爆炸。
+    全部计算为矩阵运算，不对词或天做 Python 循环。
+    各行 (词) 相互独立，大词表可按行分块调用 (见 top_bursts)。
+
+    Args:
+        counts (scipy.sparse.csr_matrix | np.ndarray): 词 x 天 文档频次
+        n_docs (np.ndarray): 每天的文档总数
+        window (int): 基线窗口天数
+        min_baseline_days (int): 基线内至少需要有数据的天数
+
+    Returns:
+        tuple: (z, baseline_rate, rate)，形状均为 (n_terms, n_days)，不可计算处为 NaN
+    """
+    c = counts.toarray() if sparse.issparse(counts) else np.asarray(counts)
+    c = c.astype(np.float32, copy=False)
+    n = np.asarray(n_docs, dtype=np.float32)
+    n_terms, n_days = c.shape
+
+    safe_n = np.maximum(n, 1.0)
+    rate = c / safe_n
+
+    # 前缀和：窗口 [t - window, t - 1] 的计数、文档数、出现率平方和
+    def prefix(a):
+        return np.concatenate([np.zeros(a.shape[:-1] + (1,), dtype=np.float32), np.cumsum(a, axis=-1)], axis=-1)
+
+    t = np.arange(n_days)
+    lo = np.maximum(t - window, 0)
+    active = (n > 0).astype(np.float32)
+
+    c_cum, r_cum, r2_cum = prefix(c), prefix(rate), prefix(rate * rate)
+    n_cum, a_cum = prefix(n), prefix(active)
+
+    win_c = c_cum[:, t] - c_cum[:, lo]
+    win_n = n_cum[t] - n_cum[lo]
+    win_days = a_cum[t] - a_cum[lo]
+
+    # 以全时段出现率为先验，强度为一天的平均文档量
+    prior_rate = c.sum(axis=1, keepdims=True) / max(float(n.sum()), 1.0)
+    prior_strength = max(float(n.sum()) / max(int((n > 0).sum()), 1), 1.0)
+    baseline = (win_c + prior_strength * prior_rate) / (win_n + prior_strength)
+
+    # 基线日间波动 (只统计有数据的天)
+    safe_days = np.maximum(win_days, 1.0)
+    win_r = r_cum[:, t] - r_cum[:, lo]
+    win_r2 = r2_cum[:, t] - r2_cum[:, lo]
+    mean_r = win_r / safe_days
+    var_r = np.maximum(win_r2 / safe_days - mean_r * mean_r, 0.0)
+
+    expected = baseline * n
+    var = n * baseline * (1.0 - baseline) + (n * n) * var_r
+    # 方差下限：相当于至少 1 次的泊松噪声
+    var = np.maximum(var, 1.0)
+
+    z = (c - expected) / np.sqrt(var)
+
+    valid = (win_days >= min_baseline_days) & (n > 0)
+    z[:, ~valid] = np.nan
+    baseline[:, ~valid] = np.nan
+    return z, baseline, rate
+
+
+def top_bursts(counts, n_docs, window=BASELINE_WINDOW, min_day_count=MIN_DAY_COUNT,
+               z_threshold=Z_THRESHOLD, top_n=20, block_size=TERM_BLOCK_SIZE):
+    """
+    每个词取得分最高的一天，返回超过阈值、得分最高的 top_n 个词
+
+    按 block_size 个词分块计算：每块只转为稠密矩阵一次，得分算完后只保留该块的前 top_n 个，
+    因此内存上限由 块大小 x 天数 决定，而不是 词表大小 x 天数。
+
+    Args:
+        counts (scipy.sparse.csr_matrix | np.ndarray): 词 x 天 文档频次
+        n_docs (np.ndarray): 每天的文档总数
+        window (int): 基线窗口天数
+        min_day_count (int): 突发日至少出现的文档数
+        z_threshold (float): 突发得分阈值
+        top_n (int): 最多保留的词数
+        block_size (int): 每块的词数
+
+    Returns:
+        pd.DataFrame: 列为 [row, day, count, rate, baseline_rate, z_score]，按 z_score 降序；row 为 counts 的行号
+    """
+    blocks = []
+    for start in range(0, counts.shape[0], block_size):
+        block = counts[start:start + block_size]
+        c = (block.toarray() if sparse.issparse(block) else np.asarray(block)).astype(np.float32, copy=False)
+        z, baseline, rate = burst_scores(c, n_docs, window=window)
+        # 当天出现次数不足的不参与排名
+        z[c < min_day_count] = np.nan
+
+        rows = np.flatnonzero(~np.all(np.isnan(z), axis=1))
+        if len(rows) == 0:
+            continue
+        best_day = np.nanargmax(z[rows], axis=1)
+        best_z = z[rows, best_day]
+
+        hit = best_z >= z_threshold
+        rows, best_day, best_z = rows[hit], best_day[hit], best_z[hit]
+        # 同分时按词的行号，分块大小不影响结果
+        order = np.argsort(-best_z, kind='stable')[:top_n]
+        rows, best_day = rows[order], best_day[order]
+        blocks.append(pd.DataFrame({
+            'row': rows + start,
+            'day': best_day,
+            'count': c[rows, best_day].astype(int),
+            'rate': rate[rows, best_day],
+            'baseline_rate': baseline[rows, best_day],
+            'z_score': best_z[order],
+        }))
+
+    if not blocks:
+        return pd.DataFrame(columns=['row', 'day', 'count', 'rate', 'baseline_rate', 'z_score'])
+    best = pd.concat(blocks, ignore_index=True)
+    return best.sort_values(['z_score', 'row'], ascending=[False, True], kind='stable').head(top_n)
+
+
+def detect_bursts(df, group_col='keyword', stopwords=None, window=BASELINE_WINDOW,
+                  min_term_count=MIN_TERM_COUNT, min_day_count=MIN_DAY_COUNT,
+                  z_threshold=Z_THRESHOLD, top_n=20):
+    """
+    按关键词检测突发/新兴词
+
+    每个词取其得分最高的一天作为突发日，超过阈值的按得分降序排列。
+
+    Args:
+        df (pd.DataFrame): 包含 tokens_str 与时间列的数据 (通常是 03_analyzed 的输出)
+        group_col (str): 分组列，默认按 keyword 分组；为 None 时视为整体
+        stopwords (set, optional): 额外过滤的停用词
+        window (int): 基线窗口天数
+        min_term_count (int): 词的最少总文档数
+        min_day_count (int): 突发日至少出现的文档数
+        z_threshold (float): 突发得分阈值
+        top_n (int): 每个分组最多保留的突发词数
+
+    Returns:
+        pd.DataFrame: 列为 [keyword, term, date, count, n_docs, rate, baseline_rate, z_score]
+    """
+    columns = ['keyword', 'term', 'date', 'count', 'n_docs', 'rate', 'baseline_rate', 'z_score']
+    if 'tokens_str' not in df.columns:
+        return pd.DataFrame(columns=columns)
+
+    days = resolve_day_index(df)
+    if days is None:
+        return pd.DataFrame(columns=columns)
+
+    valid = ~np.isnan(days)
+    data = df.loc[valid, [c for c in ('tokens_str', group_col) if c and c in df.columns]].copy()
+    data['_day'] = days[valid].astype(np.int64)
+    if data.empty:
+        return pd.DataFrame(columns=columns)
+
+    # 以最早日期为 0 点，使矩阵宽度等于实际覆盖的天数
+    day0 = int(data['_day'].min())
+    data['_day'] -= day0
+    data = data.reset_index(drop=True)
+
+    if group_col and group_col in data.columns:
+        # observed=True：keyword 为 category 时不产生已过滤类别 (unknown) 的空分组
+        groups = data[data[group_col] != 'unknown'].groupby(group_col, sort=False, observed=True)
+    else:
+        groups = [('全部', data)]
+
+    results = []
+    for keyword, part in groups:
+        part = part.reset_index(drop=True)
+        terms, counts, n_docs = build_term_day_matrix(
+            part['tokens_str'], part['_day'].to_numpy(), stopwords=stopwords, min_term_count=min_term_count
+        )
+        if len(terms) == 0 or counts.shape[1] == 0:
+            continue
+
+        best = top_bursts(counts, n_docs, window=window, min_day_count=min_day_count,
+                          z_threshold=z_threshold, top_n=top_n)
+        if best.empty:
+            continue
+
+        best_day = best['day'].to_numpy()
+        results.append(pd.DataFrame({
+            'keyword': keyword,
+            'term': terms[best['row'].to_numpy()],
+            'date': pd.to_datetime((best_day + day0) * MS_PER_DAY, unit='ms').date,
+            'count': best['count'].to_numpy(),
+            'n_docs': n_docs[best_day].astype(int),
+            'rate': best['rate'].to_numpy(),
+            'baseline_rate': best['baseline_rate'].to_numpy(),
+            'z_score': best['z_score'].to_numpy(),
+        }))
+
+    if not results:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(results, ignore_index=True).sort_values(
+        ['keyword', 'z_score'], ascending=[True, False], ignore_index=True
+    )
+
+
+def main():
+    input_dir = os.path.join('data', '03_analyzed')
+    output_dir = os.path.join('data', '03_visualizations')
+    os.makedirs(output_dir, exist_ok=True)
+
+    if not os.path.exists(input_dir):
+        print(f"输入目录 {input_dir} 不存在")
+        return
+
+    files = [f for f in os.listdir(input_dir) if f.endswith('.csv') and 'processed_all' in f]
+    for file in files:
+        print(f"\n正在检测突发词: {file}")
+        try:
+            df = read_table(os.path.join(input_dir, file), 'analyzed', stage='burst')
+            bursts = detect_bursts(df)
+            if bursts.empty:
+                print("  未检测到突发词")
+                continue
+
+            clean_name = file.replace('analyzed_', '').replace('processed_', '').replace('.csv', '')
+            output_path = os.path.join(output_dir, f"{clean_name}_emerging_terms.csv")
+            bursts.to_csv(output_path, index=False, encoding='utf-8-sig')
+            print(f"  共 {len(bursts)} 个突发词，已保存: {output_path}")
+            for keyword, part in bursts.groupby('keyword'):
+                top = ', '.join(f"{r.term}({r.date}, z={r.z_score:.1f})" for r in part.head(5).itertuples())
+                print(f"  [{keyword}] {top}")
+        except Exception as e:
+            print(f"  处理文件 {file} 失败: {e}")
+
+if __name__ == "__main__":
+    main()
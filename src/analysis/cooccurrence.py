@@ -0,0 +1,230 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+from scipy import sparse
+
+# 将 src 加入 sys.path 以便导入模块
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from analysis.term_matrix import build_doc_term_matrix, explode_tokens, top_k_per_row
+from data_pipeline.schema import read_table
+
+# 全局配置
+# 词的最少文档数，低于该值的词不进入共现矩阵
+MIN_DF = 5
+# 词对的最少共现次数，过滤偶然共现 (PMI 对低频词对偏高)
+MIN_COOC = 3
+# 每个词保留的最强关联数
+TOP_K = 10
+
+
+def document_cooccurrence(X):
+    """
+    文档级共现：两词出现在同一文档即计 1 次
+
+    Args:
+        X (scipy.sparse.csr_matrix): 二值 文档 x 词 矩阵
+
+    Returns:
+        scipy.sparse.csr_matrix: 词 x 词 共现次数 (对角线为 0)
+    """
+    C = (X.T @ X).tocsr()
+    C.setdiag(0)
+    C.eliminate_zeros()
+    return C
+
+
+def window_cooccurrence(tokens_str, terms, window=5, stopwords=None):
+    """
+    窗口级共现：两词在同一文档中相距不超过 window 个词即计 1 次
+
+    对每个偏移量 k = 1..window 一次性取出全部相邻词对，只循环 window 次而不是循环文档。
+
+    Args:
+        tokens_str (pd.Series): 以空格分隔的分词结果
+        terms (np.ndarray): 词表 (通常来自 build_doc_term_matrix 裁剪后的结果)
+        window (int): 窗口大小
+        stopwords (set, optional): 额外过滤的停用词
+
+    Returns:
+        scipy.sparse.csr_matrix: 词 x 词 共现次数 (对称，对角线为 0)
+    """
+    doc_idx, words = explode_tokens(tokens_str, stopwords=stopwords)
+    codes = pd.Index(terms).get_indexer(words)
+    # 不在词表中的词以 -1 占位，窗口距离按过滤停用词后的词序计算
+    n_terms = len(terms)
+
+    rows, cols = [], []
+    for k in range(1, window + 1):
+        same_doc = doc_idx[k:] == doc_idx[:-k]
+        left, right = codes[:-k][same_doc], codes[k:][same_doc]
+        known = (left >= 0) & (right >= 0) & (left != right)
+        rows.append(left[known])
+        cols.append(right[known])
+
+    rows = np.concatenate(rows) if rows else np.array([], dtype=np.int64)
+    cols = np.concatenate(cols) if cols else np.array([], dtype=np.int64)
+    C = sparse.coo_matrix(
+        (np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=(n_terms, n_terms)
+    ).tocsr()
+    return (C + C.T).tocsr()
+
+
+def pmi_matrix(C, term_counts, total, normalized=True):
+    """
+    在共现矩阵的非零元素上计算 (N)PMI
+
+    PMI(a, b) = log( P(a, b) / (P(a) * P(b)) )，NPMI 再除以 -log P(a, b) 归一到 [-1, 1]。
+
+    Args:
+        C (scipy.sparse.csr_matrix): 词 x 词 共现次数
+        term_counts (np.ndarray): 每个词的出现次数 (文档级共现时为文档频次)
+        total (float): 样本总数 (文档数或窗口数)
+        normalized (bool): 是否返回 NPMI
+
+    Returns:
+        scipy.sparse.csr_matrix: 与 C 结构相同的 (N)PMI 矩阵
+    """
+    C = C.tocoo()
+    p_ab = C.data / total
+    p_a = term_counts[C.row] / total
+    p_b = term_counts[C.col] / total
+    pmi = np.log(p_ab / (p_a * p_b))
+    if normalized:
+        # P(a, b) = 1 时 -log P 为 0，此时两词总是同时出现，NPMI 取 1
+        denom = -np.log(p_ab)
+        pmi = np.divide(pmi, denom, out=np.ones_like(pmi), where=denom > 0)
+    return sparse.csr_matrix((pmi.astype(np.float32), (C.row, C.col)), shape=C.shape)
+
+
+def build_cooccurrence_graph(df, mode='document', window=5, stopwords=None, min_df=MIN_DF,
+                             min_cooc=MIN_COOC, top_k=TOP_K, sentiment=None):
+    """
+    构建关键词关联图
+
+    节点为词，带有文档频次与负面占比 (neg_share)；边为词对，带有共现次数与 NPMI。
+    每个词只保留 NPMI 最高的 top_k 条边，图规模与语料量无关。
+
+    Args:
+        df (pd.DataFrame): 包含 tokens_str 的数据 (可含 sentiment_label)
+        mode (str): 'document' 文档级共现，'window' 窗口级共现
+        window (int): 窗口大小 (mode='window' 时生效)
+        stopwords (set, optional): 额外过滤的停用词
+        min_df (int): 词的最少文档数
+        min_cooc (int): 词对的最少共现次数
+        top_k (int): 每个词保留的最强关联数
+        sentiment (str, optional): 只统计该情感标签的评论，如 'Negative'
+
+    Returns:
+        tuple: (nodes, edges)
+            nodes (pd.DataFrame): [term, df, neg_share]
+            edges (pd.DataFrame): [source, target, cooc, npmi]
+    """
+    empty = (pd.DataFrame(columns=['term', 'df', 'neg_share']),
+             pd.DataFrame(columns=['source', 'target', 'cooc', 'npmi']))
+    if 'tokens_str' not in df.columns:
+        return empty
+
+    data = df
+    if sentiment is not None and 'sentiment_label' in df.columns:
+        data = df[df['sentiment_label'] == sentiment]
+    data = data.reset_index(drop=True)
+    if data.empty:
+        return empty
+
+    X, terms = build_doc_term_matrix(data['tokens_str'], stopwords=stopwords, min_df=min_df)
+    if len(terms) == 0:
+        return empty
+    doc_freq = np.asarray(X.sum(axis=0)).ravel()
+
+    if mode == 'window':
+        C = window_cooccurrence(data['tokens_str'], terms, window=window, stopwords=stopwords)
+        # 窗口级 PMI 的边际概率使用词在词对中出现的次数
+        marginal = np.asarray(C.sum(axis=1)).ravel()
+        total = max(float(C.sum()), 1.0)
+    else:
+        C = document_cooccurrence(X)
+        marginal = doc_freq.astype(np.float64)
+        total = float(X.shape[0])
+
+    C.data[C.data < min_cooc] = 0
+    C.eliminate_zeros()
+    if C.nnz == 0:
+        return empty
+
+    npmi = pmi_matrix(C, marginal, total)
+    # NPMI 可能为 0，先平移到正数区间，避免与稀疏矩阵的“空”混淆
+    shifted = npmi.copy()
+    shifted.data = shifted.data + 2.0
+    pruned = top_k_per_row(shifted, k=top_k).tocoo()
+
+    # 合并双向边 (a->b 与 b->a 只保留一条)
+    a, b = np.minimum(pruned.row, pruned.col), np.maximum(pruned.row, pruned.col)
+    pair = pd.DataFrame({'a': a, 'b': b}).drop_duplicates()
+    a, b = pair['a'].to_numpy(), pair['b'].to_numpy()
+
+    edges = pd.DataFrame({
+        'source': terms[a],
+        'target': terms[b],
+        'cooc': np.asarray(C[a, b]).ravel().astype(int),
+        'npmi': np.asarray(npmi[a, b]).ravel(),
+    }).sort_values('npmi', ascending=False, ignore_index=True)
+
+    # 节点属性：负面占比 (在全部评论上计算，即使只统计了某一情感的共现)
+    used = np.unique(np.concatenate([a, b]))
+    nodes = pd.DataFrame({'term': terms[used], 'df': doc_freq[used].astype(int)})
+    if 'sentiment_label' in df.columns:
+        X_all, _ = build_doc_term_matrix(df['tokens_str'], stopwords=stopwords, vocabulary=terms[used])
+        is_neg = (df['sentiment_label'] == 'Negative').to_numpy(dtype=np.float32)
+        neg = X_all.T @ is_neg
+        total_df = np.asarray(X_all.sum(axis=0)).ravel()
+        nodes['neg_share'] = np.divide(neg, total_df, out=np.zeros_like(neg), where=total_df > 0)
+    else:
+        nodes['neg_share'] = np.nan
+
+    return nodes.sort_values('df', ascending=False, ignore_index=True), edges
+
+
+def export_graph(nodes, edges, output_dir, prefix):
+    """
+    导出关联图为节点/边两张 CSV (可直接导入 Gephi 或由 visualizer 绘制)
+
+    Returns:
+        tuple: (nodes_path, edges_path)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    nodes_path = os.path.join(output_dir, f"{prefix}_cooccurrence_nodes.csv")
+    edges_path = os.path.join(output_dir, f"{prefix}_cooccurrence_edges.csv")
+    nodes.to_csv(nodes_path, index=False, encoding='utf-8-sig')
+    edges.to_csv(edges_path, index=False, encoding='utf-8-sig')
+    return nodes_path, edges_path
+
+
+def main():
+    input_dir = os.path.join('data', '03_analyzed')
+    output_dir = os.path.join('data', '03_visualizations')
+
+    if not os.path.exists(input_dir):
+        print(f"输入目录 {input_dir} 不存在")
+        return
+
+    files = [f for f in os.listdir(input_dir) if f.endswith('.csv') and 'processed_all' in f]
+    for file in files:
+        print(f"\n正在构建共现图: {file}")
+        try:
+            df = read_table(os.path.join(input_dir, file), 'analyzed', stage='cooccurrence')
+            clean_name = file.replace('analyzed_', '').replace('processed_', '').replace('.csv', '')
+
+            for sentiment, suffix in ((None, 'all'), ('Negative', 'negative')):
+                nodes, edges = build_cooccurrence_graph(df, sentiment=sentiment)
+                if edges.empty:
+                    print(f"  [{suffix}] 无满足条件的共现词对")
+                    continue
+                nodes_path, edges_path = export_graph(nodes, edges, output_dir, f"{clean_name}_{suffix}")
+                print(f"  [{suffix}] {len(nodes)} 个节点, {len(edges)} 条边 -> {edges_path}")
+        except Exception as e:
+            print(f"  处理文件 {file} 失败: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+import pandas as pd
+import numpy as np
+import os
+import io
+import sys
+import argparse
+from tqdm import tqdm
+
+# 将 src 加入 sys.path 以便导入模块
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from data_pipeline.schema import read_table
+
+# 全局配置
+# 与情感分析共用同一个中文 RoBERTa 编码器 (取最后一层 mean pooling 作为句向量)
+MODEL_NAME = "uer/roberta-base-finetuned-dianping-chinese"
+# 向量库根目录，每个数据集一个子目录
+EMBED_DIR = os.path.join('data', '03_analyzed', 'embeddings')
+# 编码批大小
+BATCH_SIZE = 64
+# 最大输入长度 (与情感分析一致)
+MAX_LENGTH = 512
+# 用于定位向量的 ID 列 (评论/笔记)，评论文件同时含 note_id，因此 comment_id 优先
+ID_COLUMNS = ('comment_id', 'note_id')
+
+VECTORS_FILE = 'vectors.npy'
+IDS_FILE = 'ids.txt'
+
+
+def find_id_column(df):
+    """返回数据中用于定位向量的 ID 列名，没有则返回 None"""
+    return next((c for c in ID_COLUMNS if c in df.columns), None)
+
+
+class EmbeddingStore:
+    """
+    基于内存映射 .npy 文件的句向量库
+
+    目录结构：
+        vectors.npy  float16 向量矩阵 (n x dim)，行已 L2 归一化，点积即余弦相似度
+        ids.txt      每行一个 ID，第 i 行对应 vectors.npy 的第 i 行
+
+    追加时只改写 .npy 头部中的行数并在文件末尾写入新行，已有数据不会被复制；
+    读取时通过 np.load(mmap_mode='r') 映射，按行切片 (store.vectors[a:b]) 不产生拷贝。
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self.vectors_path = os.path.join(store_dir, VECTORS_FILE)
+        self.ids_path = os.path.join(store_dir, IDS_FILE)
+        self.ids = []
+        self.row_of = {}
+        self._vectors = None
+
+        if os.path.exists(self.ids_path):
+            with open(self.ids_path, 'r', encoding='utf-8') as f:
+                self.ids = f.read().splitlines()
+            self.row_of = {id_: i for i, id_ in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id_):
+        return str(id_) in self.row_of
+
+    @property
+    def vectors(self):
+        """只读内存映射的向量矩阵 (n x dim)；库为空时返回 None"""
+        if self._vectors is None and os.path.exists(self.vectors_path):
+            vectors = np.load(self.vectors_path, mmap_mode='r')
+            # 若上次写入在 ids.txt 之前中断，多出的向量行没有对应 ID，直接忽略
+            self._vectors = vectors[:len(self.ids)]
+        return self._vectors
+
+    @property
+    def dim(self):
+        return None if self.vectors is None else self.vectors.shape[1]
+
+    def rows_for(self, ids):
+        """
+        查询 ID 对应的行号
+
+        Returns:
+            np.ndarray: 行号，不在库中的 ID 为 -1
+        """
+        return pd.Series(ids, dtype=object).astype(str).map(self.row_of).fillna(-1).to_numpy(dtype=np.int64)
+
+    def missing(self, ids):
+        """返回尚未编码的 ID (保持原顺序并去重)"""
+        ids = pd.Series(ids, dtype=object).astype(str).drop_duplicates()
+        return ids[~ids.isin(self.row_of)].tolist()
+
+    def get(self, ids):
+        """
+        按 ID 取向量 (float32)，不在库中的 ID 对应行为全 0
+
+        注意：按 ID 取值是花式索引，会产生拷贝；需要零拷贝时请直接对 store.vectors 做行切片。
+        """
+        rows = self.rows_for(ids)
+        out = np.zeros((len(rows), self.dim or 0), dtype=np.float32)
+        known = rows >= 0
+        if known.any():
+            out[known] = self.vectors[rows[known]]
+        return out
+
+    def append(self, ids, vectors):
+        """
+        追加新向量 (已在库中的 ID 会被跳过)
+
+        Args:
+            ids (list[str]): 与 vectors 行对应的 ID
+            vectors (np.ndarray): (len(ids), dim) 向量，写入前转为 float16
+        """
+        ids = [str(i) for i in ids]
+        vectors = np.asarray(vectors)
+        fresh = np.array([i not in self.row_of for i in ids], dtype=bool)
+        # 同一批内的重复 ID 只保留第一次出现
+        fresh &= ~pd.Series(ids).duplicated().to_numpy()
+        if not fresh.any():
+            return 0
+
+        ids = [i for i, keep in zip(ids, fresh) if keep]
+        rows = np.ascontiguousarray(vectors[fresh], dtype=np.float16)
+        os.makedirs(self.store_dir, exist_ok=True)
+        self._vectors = None
+
+        # 先写向量再写 ID：中断时最多留下无 ID 的尾部向量，读取时会被忽略
+        if os.path.exists(self.vectors_path):
+            _append_rows(self.vectors_path, rows, n_valid=len(self.ids))
+        else:
+            np.save(self.vectors_path, rows)
+
+        with open(self.ids_path, 'a', encoding='utf-8') as f:
+            f.write(''.join(f"{i}\n" for i in ids))
+        for i in ids:
+            self.row_of[i] = len(self.ids)
+            self.ids.append(i)
+        return len(ids)
+
+
+def _append_rows(path, rows, n_valid):
+    """
+    在 .npy 文件末尾追加行
+
+    numpy 写头部时为首维预留了位数 (可增长到 21 位)，因此更新行数后头部长度不变，
+    只需原地改写头部并写入新数据。n_valid 之后的残留行 (上次中断遗留) 会被覆盖。
+    """
+    with open(path, 'r+b') as f:
+        version = np.lib.format.read_magic(f)
+        read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                       else np.lib.format.read_array_header_2_0)
+        shape, fortran_order, dtype = read_header(f)
+        offset = f.tell()
+        if fortran_order or dtype != rows.dtype or shape[1:] != rows.shape[1:]:
+            raise ValueError(f"向量维度或类型不一致: 已有 {dtype}{shape[1:]}, 新增 {rows.dtype}{rows.shape[1:]}")
+
+        header = io.BytesIO()
+        np.lib.format.write_array_header_1_0(header, {
+            'descr': np.lib.format.dtype_to_descr(dtype),
+            'fortran_order': False,
+            'shape': (n_valid + len(rows),) + shape[1:],
+        })
+        if len(header.getvalue()) != offset:
+            raise ValueError(f"{path} 头部长度变化，无法原地追加")
+
+        f.seek(0)
+        f.write(header.getvalue())
+        f.seek(offset + n_valid * rows[0].nbytes)
+        f.write(rows.tobytes())
+        f.truncate()
+
+
+class TextEncoder:
+    """
+    中文句向量编码器 (Transformer 最后一层按 attention mask 做 mean pooling，再 L2 归一化)
+
+    transformers / torch 在首次编码时才导入，只读取向量库的下游分析不依赖它们。
+    """
+
+    def __init__(self, model_name=MODEL_NAME, max_length=MAX_LENGTH, device=None):
+        self.model_name = model_name
+        self.max_length = max_length
+        self.device = device
+        self.tokenizer = None
+        self.model = None
+
+    def _load(self):
+        import torch
+        from transformers import AutoTokenizer, AutoModel
+
+        print(f"正在加载编码模型: {self.model_name}...")
+        self.device = self.device or ('cuda' if torch.cuda.is_available() else 'cpu')
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        self.model = AutoModel.from_pretrained(self.model_name).to(self.device).eval()
+
+    def encode(self, texts):
+        """
+        Args:
+            texts (list[str]): 一批文本
+
+        Returns:
+            np.ndarray: (len(texts), hidden_size) float32，已 L2 归一化
+        """
+        if self.model is None:
+            self._load()
+        import torch
+
+        texts = [t if isinstance(t, str) and t.strip() else ' ' for t in texts]
+        batch = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_length,
+                               return_tensors='pt').to(self.device)
+        with torch.no_grad():
+            hidden = self.model(**batch).last_hidden_state
+        mask = batch['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1.0)
+        pooled = torch.nn.functional.normalize(pooled, dim=-1)
+        return pooled.float().cpu().numpy()
+
+
+def embed_dataframe(df, store, encoder, text_col='cleaned_text', batch_size=BATCH_SIZE):
+    """
+    对数据中尚未入库的 ID 编码并追加到向量库
+
+    每编码一批立即写入，运行中断后重跑只会处理剩余的 ID。
+
+    Args:
+        df (pd.DataFrame): 含 ID 列与文本列的数据
+        store (EmbeddingStore): 向量库
+        encoder: 提供 encode(list[str]) -> np.ndarray 的编码器
+        text_col (str): 文本列
+        batch_size (int): 批大小
+
+    Returns:
+        int: 新增的向量数
+    """
+    id_col = find_id_column(df)
+    if id_col is None or text_col not in df.columns:
+        print(f"  跳过: 缺少 ID 列或文本列 {text_col}")
+        return 0
+
+    ids = df[id_col].astype(str)
+    todo = set(store.missing(ids))
+    if not todo:
+        return 0
+    pending = df.loc[ids.isin(todo).to_numpy() & ~ids.duplicated().to_numpy(), [id_col, text_col]]
+
+    added = 0
+    for start in tqdm(range(0, len(pending), batch_size), desc="Embedding"):
+        chunk = pending.iloc[start:start + batch_size]
+        vectors = encoder.encode(chunk[text_col].fillna('').astype(str).tolist())
+        added += store.append(chunk[id_col].astype(str).tolist(), vectors)
+    return added
+
+
+def store_dir_for(file):
+    """由分析结果文件名得到向量库目录，如 analyzed_processed_all_comments.csv -> embeddings/all_comments"""
+    clean_name = file.replace('analyzed_', '').replace('processed_', '').replace('.csv', '')
+    return os.path.join(EMBED_DIR, clean_name)
+
+
+def load_aligned(df, store):
+    """
+    取与 df 行对齐的向量，供聚类 / 相似检索等下游分析使用
+
+    Returns:
+        tuple: (vectors, found)
+            vectors (np.ndarray): (len(df), dim) float32，缺失的行为 0
+            found (np.ndarray): bool，该行是否有向量
+    """
+    id_col = find_id_column(df)
+    if id_col is None or store.vectors is None:
+        return np.zeros((len(df), 0), dtype=np.float32), np.zeros(len(df), dtype=bool)
+    rows = store.rows_for(df[id_col])
+    found = rows >= 0
+    vectors = np.zeros((len(df), store.dim), dtype=np.float32)
+    vectors[found] = store.vectors[rows[found]]
+    return vectors, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对分析结果中的文本编码并写入句向量库 (只编码新增 ID)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='编码批大小')
+    parser.add_argument('--model', default=MODEL_NAME, help='编码模型名称')
+    args = parser.parse_args()
+
+    input_dir = os.path.join('data', '03_analyzed')
+    if not os.path.exists(input_dir):
+        print(f"输入目录 {input_dir} 不存在")
+        return
+
+    encoder = TextEncoder(model_name=args.model)
+    files = [f for f in os.listdir(input_dir) if f.endswith('.csv') and 'processed_all' in f]
+    for file in files:
+        print(f"\n正在编码: {file}")
+        try:
+            df = read_table(os.path.join(input_dir, file), 'analyzed', stage='embedding')
+            store = EmbeddingStore(store_dir_for(file))
+            added = embed_dataframe(df, store, encoder, batch_size=args.batch_size)
+            print(f"  新增 {added} 条向量 (累计 {len(store)} 条, 维度 {store.dim}) -> {store.store_dir}")
+        except Exception as e:
+            print(f"  处理文件 {file} 失败: {e}")
+
+if __name__ == "__main__":
+    main()
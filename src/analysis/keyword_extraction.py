@@ -0,0 +1,317 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+from scipy import sparse
+
+# 将 src 加入 sys.path 以便导入模块
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from analysis.term_matrix import explode_tokens, top_k_per_row
+from data_pipeline.schema import read_table
+
+# 全局配置
+# 增量统计量的持久化目录
+STATE_DIR = os.path.join('data', '03_analyzed', 'tfidf_state')
+# 每个分段输出的特征词数
+TOP_N = 20
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+# 用于去重的 ID 列 (评论/笔记)
+ID_COLUMNS = ('comment_id', 'note_id')
+# 已统计 ID 的 64 位哈希，追加写入 (每次保存只写新增部分)
+SEEN_IDS_FILE = 'seen_ids.u64'
+
+
+def hash_ids(ids):
+    """将 ID 映射为稳定的 uint64 哈希 (跨进程一致，可持久化)"""
+    return pd.util.hash_pandas_object(pd.Series(ids, dtype=object).astype(str), index=False).to_numpy(np.uint64)
+
+
+class SegmentTermStats:
+    """
+    按分段 (关键词 x 情感) 增量维护的词统计量
+
+    只保存计数，不保存原始文本：
+        - doc_freq: 每个词出现过的文档数 (全局，用于 IDF)
+        - seg_tf:   分段 x 词 的词频稀疏矩阵
+        - seg_docs / seg_len: 每个分段的文档数与总词数 (BM25 长度归一化)
+    新增一天的数据只需对新增行调用 partial_fit，统计量直接累加，无需全量重算。
+    """
+
+    def __init__(self):
+        self.terms = []
+        self.term_index = {}
+        self.segment_cols = None
+        self.segments = []
+        self.segment_index = {}
+        self.doc_freq = np.zeros(0, dtype=np.int64)
+        self.seg_tf = sparse.csr_matrix((0, 0), dtype=np.float64)
+        self.seg_docs = np.zeros(0, dtype=np.int64)
+        self.seg_len = np.zeros(0, dtype=np.float64)
+        self.n_docs = 0
+        # 按加入顺序排列的已统计 ID 哈希
+        self.seen_hashes = np.zeros(0, dtype=np.uint64)
+
+    # -------------------------------------------------------------------------
+    # 增量更新
+    # -------------------------------------------------------------------------
+    def _grow_vocabulary(self, words):
+        """将新词加入词表，返回 words 对应的词 ID"""
+        codes = pd.Series(words, dtype=object).map(self.term_index).fillna(-1).to_numpy(dtype=np.int64)
+        unknown = codes < 0
+        if unknown.any():
+            new_codes, new_terms = pd.factorize(words[unknown])
+            offset = len(self.terms)
+            codes[unknown] = new_codes + offset
+            for i, term in enumerate(new_terms, offset):
+                self.term_index[term] = i
+            self.terms.extend(new_terms)
+        return codes
+
+    def _grow_segments(self, keys):
+        """将新分段加入分段表，返回 keys 对应的分段 ID"""
+        seg_ids = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys):
+            if key not in self.segment_index:
+                self.segment_index[key] = len(self.segments)
+                self.segments.append(key)
+            seg_ids[i] = self.segment_index[key]
+        return seg_ids
+
+    def partial_fit(self, df, segment_cols=('keyword', 'sentiment_label')):
+        """
+        用新增数据更新统计量
+
+        若数据中包含 comment_id / note_id，已统计过的行会被跳过，因此对整个文件重复调用也只会累加新增行。
+        ID 缺失的行无法判断是否重复，总是计入。
+
+        Args:
+            df (pd.DataFrame): 含 tokens_str 的数据
+            segment_cols (tuple): 分段列；缺失的列以 'All' 代替 (例如尚未做情感分析的 02_processed 数据)
+
+        Returns:
+            int: 本次新增统计的文档数
+        """
+        if 'tokens_str' not in df.columns or df.empty:
+            return 0
+
+        id_col = next((c for c in ID_COLUMNS if c in df.columns), None)
+        if id_col is not None:
+            missing = df[id_col].isna().to_numpy()
+            hashes = hash_ids(df[id_col])
+            fresh = ~np.isin(hashes, self.seen_hashes) & ~pd.Series(hashes).duplicated().to_numpy()
+            keep = missing | fresh
+            df = df[keep]
+            if df.empty:
+                return 0
+            self.seen_hashes = np.concatenate([self.seen_hashes, hashes[fresh & ~missing]])
+        df = df.reset_index(drop=True)
+        if self.segment_cols is None:
+            self.segment_cols = tuple(segment_cols)
+
+        # 1. 分段
+        seg_frame = pd.DataFrame({
+            col: df[col].astype(str) if col in df.columns else 'All' for col in self.segment_cols
+        })
+        keys, key_codes = np.unique(seg_frame.to_numpy(dtype=object).astype(str), axis=0, return_inverse=True)
+        seg_of_key = self._grow_segments([tuple(k) for k in keys])
+        doc_seg = seg_of_key[np.ravel(key_codes)]
+
+        # 2. 文档 x 词 词频矩阵 (词表只增不减)
+        doc_idx, words = explode_tokens(df['tokens_str'])
+        codes = self._grow_vocabulary(words)
+        n_terms, n_segs = len(self.terms), len(self.segments)
+        X = sparse.coo_matrix(
+            (np.ones(len(codes), dtype=np.float64), (doc_idx, codes)), shape=(len(df), n_terms)
+        ).tocsr()
+        X.sum_duplicates()
+
+        # 3. 扩容已有统计量
+        self.doc_freq = np.concatenate([self.doc_freq, np.zeros(n_terms - len(self.doc_freq), dtype=np.int64)])
+        self.seg_docs = np.concatenate([self.seg_docs, np.zeros(n_segs - len(self.seg_docs), dtype=np.int64)])
+        self.seg_len = np.concatenate([self.seg_len, np.zeros(n_segs - len(self.seg_len))])
+        self.seg_tf.resize((n_segs, n_terms))
+
+        # 4. 累加
+        self.doc_freq += np.diff(X.tocsc().indptr)
+        onehot = sparse.csr_matrix(
+            (np.ones(len(df)), (np.arange(len(df)), doc_seg)), shape=(len(df), n_segs)
+        )
+        self.seg_tf = (self.seg_tf + onehot.T @ X).tocsr()
+        self.seg_docs += np.bincount(doc_seg, minlength=n_segs)
+        self.seg_len += np.bincount(doc_seg, weights=np.asarray(X.sum(axis=1)).ravel(), minlength=n_segs)
+        self.n_docs += len(df)
+        return len(df)
+
+    # -------------------------------------------------------------------------
+    # 打分
+    # -------------------------------------------------------------------------
+    def idf(self):
+        """平滑 IDF：log((1 + N) / (1 + df)) + 1"""
+        return np.log((1.0 + self.n_docs) / (1.0 + self.doc_freq)) + 1.0
+
+    def score(self, method='tfidf', k1=BM25_K1, b=BM25_B):
+        """
+        计算 分段 x 词 的区分度得分
+
+        Args:
+            method (str): 'tfidf' (对数词频 x IDF，按分段 L2 归一化) 或 'bm25'
+            k1 (float): BM25 词频饱和参数
+            b (float): BM25 长度归一化参数
+
+        Returns:
+            scipy.sparse.csr_matrix: 与 seg_tf 结构相同的得分矩阵
+        """
+        tf = self.seg_tf.tocsr().copy()
+        if tf.nnz == 0:
+            return tf
+        idf = self.idf()
+        row = np.repeat(np.arange(tf.shape[0]), np.diff(tf.indptr))
+
+        if method == 'bm25':
+            avg_len = max(self.seg_len.mean(), 1.0)
+            norm = k1 * (1.0 - b + b * self.seg_len[row] / avg_len)
+            tf.data = idf[tf.indices] * tf.data * (k1 + 1.0) / (tf.data + norm)
+            return tf
+
+        tf.data = (1.0 + np.log(tf.data)) * idf[tf.indices]
+        row_norm = np.sqrt(np.bincount(row, weights=tf.data ** 2, minlength=tf.shape[0]))
+        tf.data /= np.maximum(row_norm[row], 1e-12)
+        return tf
+
+    def top_terms(self, top_n=TOP_N, method='tfidf', exclude=None, min_len=2):
+        """
+        输出每个分段的特征词
+
+        Args:
+            top_n (int): 每个分段的特征词数
+            method (str): 'tfidf' 或 'bm25'
+            exclude (set, optional): 排除的词 (如停用词)
+            min_len (int): 词的最小长度
+
+        Returns:
+            pd.DataFrame: 列为 [分段列..., term, score, tf, doc_freq]
+        """
+        S = self.score(method=method)
+        if S.nnz == 0:
+            return pd.DataFrame()
+
+        terms = np.asarray(self.terms, dtype=object)
+        mask = pd.Series(terms).str.len().to_numpy() >= min_len
+        if exclude:
+            mask &= ~pd.Series(terms).isin(exclude).to_numpy()
+        S = S.multiply(mask[np.newaxis, :].astype(np.float64)).tocsr()
+        S.eliminate_zeros()
+
+        top = top_k_per_row(S, k=top_n).tocoo()
+        seg_cols = list(self.segment_cols)
+        segs = pd.DataFrame([self.segments[r] for r in top.row], columns=seg_cols)
+        result = segs.assign(
+            term=terms[top.col],
+            score=top.data,
+            tf=np.asarray(self.seg_tf[top.row, top.col]).ravel().astype(int),
+            doc_freq=self.doc_freq[top.col],
+        )
+        return result.sort_values(seg_cols + ['score'], ascending=[True] * len(seg_cols) + [False], ignore_index=True)
+
+    # -------------------------------------------------------------------------
+    # 持久化
+    # -------------------------------------------------------------------------
+    def _save_seen_hashes(self, state_dir):
+        """只追加上次保存之后新增的哈希；文件比内存中的多 (例如换了状态) 时整体重写"""
+        path = os.path.join(state_dir, SEEN_IDS_FILE)
+        saved = os.path.getsize(path) // 8 if os.path.exists(path) else 0
+        if saved > len(self.seen_hashes):
+            saved = 0
+        with open(path, 'ab' if saved else 'wb') as f:
+            self.seen_hashes[saved:].astype('<u8').tofile(f)
+
+    def save(self, state_dir=STATE_DIR):
+        os.makedirs(state_dir, exist_ok=True)
+        # 先写哈希再写 meta：中断时 meta 中的 n_seen 仍指向上一次完整保存的位置
+        self._save_seen_hashes(state_dir)
+        sparse.save_npz(os.path.join(state_dir, 'seg_tf.npz'), self.seg_tf.tocsr())
+        np.savez(os.path.join(state_dir, 'counts.npz'),
+                 doc_freq=self.doc_freq, seg_docs=self.seg_docs, seg_len=self.seg_len)
+        meta = {
+            'n_docs': self.n_docs,
+            'segment_cols': list(self.segment_cols or ()),
+            'terms': self.terms,
+            'segments': [list(s) for s in self.segments],
+            'n_seen': len(self.seen_hashes),
+        }
+        with open(os.path.join(state_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, state_dir=STATE_DIR):
+        """从目录加载统计量；目录不存在时返回空实例"""
+        stats = cls()
+        meta_path = os.path.join(state_dir, 'meta.json')
+        if not os.path.exists(meta_path):
+            return stats
+
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        stats.n_docs = meta['n_docs']
+        stats.segment_cols = tuple(meta['segment_cols']) or None
+        stats.terms = meta['terms']
+        stats.term_index = {t: i for i, t in enumerate(stats.terms)}
+        stats.segments = [tuple(s) for s in meta['segments']]
+        stats.segment_index = {s: i for i, s in enumerate(stats.segments)}
+        if 'seen_ids' in meta:
+            # 旧版状态：ID 明文存放在 meta.json 中，下次保存时转为哈希文件
+            stats.seen_hashes = hash_ids(meta['seen_ids'])
+        else:
+            seen_path = os.path.join(state_dir, SEEN_IDS_FILE)
+            stats.seen_hashes = np.fromfile(seen_path, dtype='<u8', count=meta['n_seen']).astype(np.uint64)
+
+        stats.seg_tf = sparse.load_npz(os.path.join(state_dir, 'seg_tf.npz')).tocsr()
+        counts = np.load(os.path.join(state_dir, 'counts.npz'))
+        stats.doc_freq = counts['doc_freq']
+        stats.seg_docs = counts['seg_docs']
+        stats.seg_len = counts['seg_len']
+        return stats
+
+
+def extract_distinctive_terms(df, top_n=TOP_N, method='tfidf', exclude=None):
+    """
+    一次性计算 (不持久化) 每个 关键词 x 情感 分段的特征词，供 visualizer 直接调用
+    """
+    stats = SegmentTermStats()
+    stats.partial_fit(df)
+    return stats.top_terms(top_n=top_n, method=method, exclude=exclude)
+
+
+def main():
+    input_dir = os.path.join('data', '03_analyzed')
+
+    if not os.path.exists(input_dir):
+        print(f"输入目录 {input_dir} 不存在")
+        return
+
+    files = [f for f in os.listdir(input_dir) if f.endswith('.csv') and 'processed_all' in f]
+    for file in files:
+        clean_name = file.replace('analyzed_', '').replace('processed_', '').replace('.csv', '')
+        state_dir = os.path.join(STATE_DIR, clean_name)
+
+        print(f"\n正在更新特征词统计: {file}")
+        try:
+            stats = SegmentTermStats.load(state_dir)
+            df = read_table(os.path.join(input_dir, file), 'analyzed', stage='keywords')
+            added = stats.partial_fit(df)
+            print(f"  新增 {added} 条文档 (累计 {stats.n_docs} 条，词表 {len(stats.terms)} 个词，{len(stats.segments)} 个分段)")
+            stats.save(state_dir)
+
+            result = stats.top_terms()
+            output_path = os.path.join(input_dir, 'tfidf_state', f"{clean_name}_distinctive_terms.csv")
+            result.to_csv(output_path, index=False, encoding='utf-8-sig')
+            print(f"  已保存: {output_path}")
+        except Exception as e:
+            print(f"  处理文件 {file} 失败: {e}")
+
+if __name__ == "__main__":
+    main()
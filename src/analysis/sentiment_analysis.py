@@ -1,8 +1,17 @@
 import pandas as pd
+import numpy as np
 import os
 import sys
+import argparse
 from tqdm import tqdm
-from transformers import pipeline
+
+# 将 src 加入 sys.path 以便导入模块
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from data_pipeline.sampling import stratified_shares
+from analysis.embedding_store import EmbeddingStore, EMBED_DIR, find_id_column
+from data_pipeline.schema import read_table
+from data_pipeline import profiling
 
 # 全局配置
 # 使用 uer/roberta-base-finetuned-dianping-chinese
@@ -10,113 +19,384 @@ MODEL_NAME = "uer/roberta-base-finetuned-dianping-chinese"
 # 置信度阈值：低于此值的预测将被归类为 Neutral
 # 基于 determine_threshold.py 测算，0.56 对应约 8% 的中性占比
 CONFIDENCE_THRESHOLD = 0.56
+# 每次前向计算的文本数
+BATCH_SIZE = 32
+# 截断长度 (字符数 / token 数)
+MAX_CHARS = 500
+MAX_LENGTH = 512
+
+# 方面 (Aspect) 分类头
+# 方面头是在编码器 mean pooling 输出上训练的逻辑回归，与情感头共用同一次前向计算
+ASPECT_HEADS_PATH = os.path.join('data', 'models', 'aspect_heads.npz')
+# 概率不低于该值才输出对应方面
+ASPECT_THRESHOLD = 0.5
+ASPECTS = {
+    'product': '商品',
+    'delivery': '配送/极速达',
+    'store': '排队/停车',
+    'membership': '会员/续卡',
+}
+# 训练方面头时的弱标签：按搜索关键词推断评论所属方面 (泛关键词不参与训练)
+ASPECT_KEYWORDS = {
+    'product': ['山姆必买', '山姆红榜', '山姆无限回购', '山姆避雷', '山姆黑榜', '山姆难吃', '山姆试吃'],
+    'delivery': ['山姆极速达', '山姆配送'],
+    'store': ['山姆排队', '山姆停车'],
+    'membership': ['山姆续卡', '山姆退卡', '山姆卓越卡', '山姆年费'],
+}
+# 人工标注 (可选)：列为 [comment_id, aspect]，aspect 取 ASPECTS 的键，优先于弱标签
+ASPECT_LABELS_PATH = os.path.join('data', 'dictionaries', 'aspect_labels.csv')
+
+
+def calibrate(model_label, raw_conf):
+    """
+    对模型输出做阈值校正
+    返回: (calibrated_label, calibrated_score)
+    """
+    calibrated_label = model_label
+
+    # 核心逻辑：如果模型确信度低于阈值，则视为中性
+    if raw_conf < CONFIDENCE_THRESHOLD:
+        calibrated_label = 'Neutral'
+
+    # 计算用于绘图的可视化得分 (0=Negative, 1=Positive)
+    # 如果是 Neutral，得分为 0.5
+    # 如果是 Positive，得分为 raw_conf (0.56 ~ 1.0)
+    # 如果是 Negative，得分为 1 - raw_conf (0.0 ~ 0.44)
+    if calibrated_label == 'Neutral':
+        calibrated_score = 0.5
+    elif calibrated_label == 'Positive':
+        calibrated_score = raw_conf
+    else: # Negative
+        calibrated_score = 1 - raw_conf
+
+    return calibrated_label, calibrated_score
 
-print(f"正在初始化 Hugging Face 模型: {MODEL_NAME}...")
-# ... (省略中间代码) ...
 
-def analyze_sentiment_hf(text):
+class AspectHeads:
     """
-    使用 Hugging Face 模型进行预测
-    返回: (model_label, model_conf, calibrated_label, calibrated_score)
+    方面分类头：每个方面一个独立的逻辑回归 (sigmoid)，一条评论可同时属于多个方面
+
+    权重以 npz 保存：W (dim x n_aspects), b (n_aspects), names
     """
-    if not isinstance(text, str) or not text.strip():
-        # 空文本默认处理
-        return 'Neutral', 0.5, 'Neutral', 0.5
-    
-    text = text[:500]
-    
-    try:
-        result = sentiment_pipeline(text, truncation=True, max_length=512)[0]
-        
-        # 1. 获取原始模型输出 (Raw Data)
-        # raw_label 通常是 'positive (stars 4, 5)' 或 'negative (stars 1, 2, 3)'
-        raw_output_label = str(result['label']).lower()
-        raw_conf = float(result['score']) # 置信度 0.5 - 1.0
-        
-        # 简化原始标签
-        if 'positive' in raw_output_label:
-            model_label = 'Positive'
-        elif 'negative' in raw_output_label:
-            model_label = 'Negative'
-        else:
-            model_label = 'Neutral' # 极少情况
-            
-        # 2. 应用阈值校正 (Calibration)
-        calibrated_label = model_label
-        
-        # 核心逻辑：如果模型确信度低于阈值，则视为中性
-        if raw_conf < CONFIDENCE_THRESHOLD:
-            calibrated_label = 'Neutral'
-            
-        # 3. 计算用于绘图的可视化得分 (0=Negative, 1=Positive)
-        # 如果是 Neutral，得分为 0.5
-        # 如果是 Positive，得分为 raw_conf (0.56 ~ 1.0)
-        # 如果是 Negative，得分为 1 - raw_conf (0.0 ~ 0.44)
-        if calibrated_label == 'Neutral':
-            calibrated_score = 0.5
-        elif calibrated_label == 'Positive':
-            calibrated_score = raw_conf
-        else: # Negative
-            calibrated_score = 1 - raw_conf
-            
-        return model_label, raw_conf, calibrated_label, calibrated_score
-
-    except Exception as e:
-        return 'Neutral', 0.5, 'Neutral', 0.5
+
+    def __init__(self, W, b, names):
+        self.W = np.asarray(W, dtype=np.float32)
+        self.b = np.asarray(b, dtype=np.float32)
+        self.names = list(names)
+
+    def predict_proba(self, pooled):
+        """pooled: (n, dim) L2 归一化的 mean pooling 向量 -> (n, n_aspects) 概率"""
+        return 1.0 / (1.0 + np.exp(-(pooled @ self.W + self.b)))
+
+    def save(self, path=ASPECT_HEADS_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(path, W=self.W, b=self.b, names=np.array(self.names))
+
+    @classmethod
+    def load(cls, path=ASPECT_HEADS_PATH):
+        """加载方面头；文件不存在时返回 None"""
+        if not os.path.exists(path):
+            return None
+        data = np.load(path)
+        return cls(data['W'], data['b'], data['names'].tolist())
+
+    @classmethod
+    def train(cls, X, Y, names, epochs=300, lr=0.5, l2=1e-4):
+        """
+        全批量梯度下降训练一组逻辑回归 (正负样本按频率加权，缓解方面间样本量不均)
+
+        Args:
+            X (np.ndarray): (n, dim) 特征
+            Y (np.ndarray): (n, n_aspects) 0/1 标签
+            names (list[str]): 方面名
+        """
+        X = np.asarray(X, dtype=np.float32)
+        Y = np.asarray(Y, dtype=np.float32)
+        n, dim = X.shape
+        pos_rate = np.clip(Y.mean(axis=0), 1e-3, 1 - 1e-3)
+        weight = np.where(Y > 0, 0.5 / pos_rate, 0.5 / (1 - pos_rate)).astype(np.float32)
+
+        W = np.zeros((dim, Y.shape[1]), dtype=np.float32)
+        b = np.zeros(Y.shape[1], dtype=np.float32)
+        for _ in range(epochs):
+            P = 1.0 / (1.0 + np.exp(-(X @ W + b)))
+            G = weight * (P - Y) / n
+            W -= lr * (X.T @ G + l2 * W)
+            b -= lr * G.sum(axis=0)
+        return cls(W, b, names)
+
+
+class MultiHeadScorer:
+    """
+    共享编码器的多头打分
+
+    每批文本只做一次 RoBERTa 编码：
+        - 情感头：模型自带的分类头 (BERT 结构作用于 pooler 输出，RoBERTa 结构作用于 [CLS] 隐状态)
+        - 方面头：作用于按 attention mask 的 mean pooling 向量 (与 embedding_store.py 的句向量一致)
+    因此增加方面分类几乎不增加推理成本，pooling 向量还可顺带写入句向量库。
+    """
+
+    def __init__(self, model_name=MODEL_NAME, aspect_heads=None, device=None):
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+        print(f"正在初始化 Hugging Face 模型: {model_name}...")
+        self.torch = torch
+        self.device = device or ('cuda' if torch.cuda.is_available() else 'cpu')
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name).to(self.device).eval()
+        self.encoder = getattr(self.model, self.model.base_model_prefix)
+        self.id2label = self.model.config.id2label
+        self.aspect_heads = aspect_heads
+
+    def score(self, texts):
+        """
+        对一批文本打分
+
+        Returns:
+            dict: model_label (list), model_confidence (np.ndarray), pooled (np.ndarray),
+                  aspect_proba (np.ndarray 或 None)
+        """
+        torch = self.torch
+        # 空文本按单个空格编码，输出稍后统一置为中性
+        texts = [t[:MAX_CHARS] if isinstance(t, str) and t.strip() else ' ' for t in texts]
+        with profiling.stage('tokenize', rows=len(texts)):
+            batch = self.tokenizer(texts, padding=True, truncation=True, max_length=MAX_LENGTH,
+                                   return_tensors='pt').to(self.device)
+        with torch.no_grad(), profiling.stage('forward', rows=len(texts)):
+            outputs = self.encoder(**batch)
+            hidden = outputs.last_hidden_state
+            # 与 *ForSequenceClassification.forward 保持一致：有 pooler 时分类头接 pooler 输出
+            pooler_output = getattr(outputs, 'pooler_output', None)
+            head_input = pooler_output if pooler_output is not None else hidden
+            probs = torch.softmax(self.model.classifier(head_input), dim=-1)
+            mask = batch['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1.0)
+            pooled = torch.nn.functional.normalize(pooled, dim=-1)
+
+            conf, idx = probs.max(dim=-1)
+            # 拷回 CPU 时 GPU 计算才真正同步完成，计入 forward
+            pooled = pooled.float().cpu().numpy()
+        return {
+            'model_label': [_simplify_label(self.id2label[int(i)]) for i in idx.cpu().numpy()],
+            'model_confidence': conf.float().cpu().numpy(),
+            'pooled': pooled,
+            'aspect_proba': self.aspect_heads.predict_proba(pooled) if self.aspect_heads else None,
+        }
+
+
+def _simplify_label(raw_output_label):
+    """
+    简化原始标签
+    raw_label 通常是 'positive (stars 4, 5)' 或 'negative (stars 1, 2, 3)'
+    """
+    raw_output_label = str(raw_output_label).lower()
+    if 'positive' in raw_output_label:
+        return 'Positive'
+    elif 'negative' in raw_output_label:
+        return 'Negative'
+    return 'Neutral' # 极少情况
+
+
+def score_dataframe(df, scorer, target_col, batch_size=BATCH_SIZE, store=None):
+    """
+    对整列文本批量打分，并写入情感列与方面列
+
+    文本按长度排序后分批，减少 padding 带来的无效计算；结果按原顺序写回。
+
+    Args:
+        store (EmbeddingStore, optional): 给定时把 pooling 向量顺带写入句向量库 (只追加新 ID)
+    """
+    texts = df[target_col].fillna('').astype(str)
+    is_empty = (texts.str.strip() == '').to_numpy()
+    order = np.argsort(texts.str.len().clip(upper=MAX_CHARS).to_numpy(), kind='stable')
+
+    n = len(df)
+    model_label = np.empty(n, dtype=object)
+    model_conf = np.empty(n, dtype=np.float64)
+    aspect_proba = None
+    id_col = find_id_column(df) if store is not None else None
+
+    for start in tqdm(range(0, n, batch_size), desc="Processing"):
+        rows = order[start:start + batch_size]
+        result = scorer.score(texts.iloc[rows].tolist())
+        model_label[rows] = result['model_label']
+        model_conf[rows] = result['model_confidence']
+        if result['aspect_proba'] is not None:
+            if aspect_proba is None:
+                aspect_proba = np.zeros((n, result['aspect_proba'].shape[1]), dtype=np.float32)
+            aspect_proba[rows] = result['aspect_proba']
+        if id_col is not None:
+            with profiling.stage('save_embeddings', rows=len(rows)):
+                store.append(df[id_col].iloc[rows].astype(str).tolist(), result['pooled'])
+
+    # 空文本默认处理
+    model_label[is_empty] = 'Neutral'
+    model_conf[is_empty] = 0.5
+
+    # 保存四列数据：2列原始，2列校正
+    # 原始模型输出
+    df['model_label'] = model_label
+    df['model_confidence'] = model_conf
+
+    # 校正后的用于展示的数据 (Visualizer 默认读取这两列)
+    calibrated = [calibrate(label, conf) for label, conf in zip(model_label, model_conf)]
+    df['sentiment_label'] = [c[0] for c in calibrated]
+    df['sentiment_score'] = [c[1] for c in calibrated]
+
+    # 方面：每个方面一列概率，aspect_label 为概率最高且超过阈值的方面
+    if aspect_proba is not None:
+        aspect_proba[is_empty] = 0.0
+        for j, name in enumerate(scorer.aspect_heads.names):
+            df[f'aspect_{name}'] = aspect_proba[:, j]
+        best = aspect_proba.argmax(axis=1)
+        display = np.array([ASPECTS.get(name, name) for name in scorer.aspect_heads.names], dtype=object)
+        df['aspect_label'] = np.where(aspect_proba.max(axis=1) >= ASPECT_THRESHOLD, display[best], '其他')
+    return df
+
+
+def train_aspect_heads(dataset='all_comments'):
+    """
+    在句向量库的向量上训练方面头
+
+    标签来源：ASPECT_LABELS_PATH 的人工标注 (若存在)，否则按 ASPECT_KEYWORDS 由搜索关键词推断。
+    向量库需先由 embedding_store.py (或带 --save-embeddings 的本脚本) 生成。
+    """
+    store = EmbeddingStore(os.path.join(EMBED_DIR, dataset))
+    if len(store) == 0:
+        print(f"向量库 {store.store_dir} 为空，请先运行 src/analysis/embedding_store.py")
+        return None
+
+    names = list(ASPECTS)
+    if os.path.exists(ASPECT_LABELS_PATH):
+        labels = pd.read_csv(ASPECT_LABELS_PATH, encoding='utf-8-sig', dtype={'comment_id': str})
+        print(f"使用人工标注训练方面头: {ASPECT_LABELS_PATH} ({len(labels)} 条)")
+    else:
+        input_path = os.path.join('data', '02_processed', f"processed_{dataset}.csv")
+        df = read_table(input_path, 'processed', columns=['comment_id', 'keyword'])
+        keyword_aspect = {kw: name for name, kws in ASPECT_KEYWORDS.items() for kw in kws}
+        labels = df.assign(aspect=df['keyword'].astype(str).map(keyword_aspect)).dropna(subset=['aspect'])
+        print(f"使用关键词弱标签训练方面头 ({len(labels)} 条)")
+
+    Y = pd.crosstab(labels['comment_id'].astype(str), labels['aspect']).reindex(columns=names, fill_value=0)
+    rows = store.rows_for(Y.index)
+    known = rows >= 0
+    if not known.any():
+        print("标注数据与向量库没有重合的 ID")
+        return None
+    X = np.asarray(store.vectors[np.sort(rows[known])], dtype=np.float32)
+    Y = (Y.to_numpy()[known][np.argsort(rows[known])] > 0).astype(np.float32)
+
+    heads = AspectHeads.train(X, Y, names)
+    pred = heads.predict_proba(X) >= ASPECT_THRESHOLD
+    for j, name in enumerate(names):
+        print(f"  {ASPECTS[name]}: 正样本 {int(Y[:, j].sum())}, 训练集准确率 {np.mean(pred[:, j] == Y[:, j]):.1%}")
+    heads.save()
+    print(f"方面头已保存: {ASPECT_HEADS_PATH}")
+    return heads
+
+
+def report_sample_shares(df, output_dir, file):
+    """
+    抽样模式下输出情感占比的分层估计与 95% 置信区间 (整体 + 分关键词)
+    """
+    overall = stratified_shares(df, group_col=None)
+    by_keyword = stratified_shares(df, group_col='keyword')
+    report = pd.concat([overall, by_keyword], ignore_index=True)
+
+    print("  情感占比估计 (分层抽样, 95% 置信区间):")
+    for row in overall.itertuples():
+        print(f"    {row.label}: {row.share:.1%} [{row.ci_low:.1%}, {row.ci_high:.1%}]  (样本 {row.n_sample} / 总体 {row.n_population})")
+
+    output_path = os.path.join(output_dir, f"sentiment_ci_{file}")
+    report.to_csv(output_path, index=False, encoding='utf-8-sig')
+    print(f"  置信区间报告已保存: {output_path}")
 
 def main():
+    parser = argparse.ArgumentParser(description="对预处理后的数据进行情感分析")
+    parser.add_argument('--sample', action='store_true',
+                        help='只分析 process_data.py --sample 生成的抽样文件，并输出带置信区间的占比估计')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='每次前向计算的文本数')
+    parser.add_argument('--no-aspects', action='store_true', help='只做情感分析，不输出方面分类')
+    parser.add_argument('--save-embeddings', action='store_true',
+                        help='把编码器的 pooling 向量顺带写入句向量库 (免去单独运行 embedding_store.py)')
+    parser.add_argument('--train-aspects', action='store_true', help='在句向量库上训练方面头后退出')
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start_from_args('sentiment_analysis', args)
+
+    if args.train_aspects:
+        train_aspect_heads()
+        profiling.finish()
+        return
+
+    aspect_heads = None if args.no_aspects else AspectHeads.load()
+    if aspect_heads is None and not args.no_aspects:
+        print(f"未找到方面头 {ASPECT_HEADS_PATH}，本次只输出情感 (可用 --train-aspects 训练)")
+    with profiling.stage('load_model'):
+        scorer = MultiHeadScorer(aspect_heads=aspect_heads)
+
     # 读取预处理后的数据
     input_dir = os.path.join('data', '02_processed')
     output_dir = os.path.join('data', '03_analyzed')
     os.makedirs(output_dir, exist_ok=True)
-    
+
     files = [f for f in os.listdir(input_dir) if f.endswith('.csv')]
-    
+
     for file in files:
         if 'comments' not in file and 'contents' not in file:
             continue
-            
+        # 全量模式与抽样模式的文件互不处理
+        if ('processed_sample' in file) != args.sample:
+            continue
+
         print(f"\n正在处理文件: {file}")
         file_path = os.path.join(input_dir, file)
-        
+
         try:
-            df = pd.read_csv(file_path, encoding='utf-8-sig')
-            
-            target_col = 'cleaned_text'
-            if target_col not in df.columns:
-                target_col = 'desc' if 'desc' in df.columns else 'content'
-            
-            if target_col not in df.columns:
-                print(f"  跳过: 未找到文本列")
-                continue
-
-            print(f"  开始分析 {len(df)} 条数据 (基于阈值 {CONFIDENCE_THRESHOLD} 进行校正)...")
-            
-            tqdm.pandas(desc="Processing")
-            
-            df[target_col] = df[target_col].fillna('')
-            
-            # 批量分析
-            results = df[target_col].progress_apply(analyze_sentiment_hf)
-            
-            # 保存四列数据：2列原始，2列校正
-            # 原始模型输出
-            df['model_label'] = results.apply(lambda x: x[0])
-            df['model_confidence'] = results.apply(lambda x: x[1])
-            
-            # 校正后的用于展示的数据 (Visualizer 默认读取这两列)
-            df['sentiment_label'] = results.apply(lambda x: x[2])
-            df['sentiment_score'] = results.apply(lambda x: x[3])
-            
-            output_path = os.path.join(output_dir, f"analyzed_{file}")
-            df.to_csv(output_path, index=False, encoding='utf-8-sig')
-            print(f"  已保存: {output_path}")
-            
-            print("  校正后情感分布 (Corrected Distribution):")
-            print(df['sentiment_label'].value_counts())
-            
+            with profiling.stage(file[:-len('.csv')]):
+                with profiling.stage('read') as rec:
+                    df = read_table(file_path, 'processed')
+                    rec['rows'] = len(df)
+
+                target_col = 'cleaned_text'
+                if target_col not in df.columns:
+                    target_col = 'desc' if 'desc' in df.columns else 'content'
+
+                if target_col not in df.columns:
+                    print(f"  跳过: 未找到文本列")
+                    continue
+
+                print(f"  开始分析 {len(df)} 条数据 (基于阈值 {CONFIDENCE_THRESHOLD} 进行校正)...")
+
+                store = None
+                if args.save_embeddings:
+                    clean_name = file.replace('processed_', '').replace('.csv', '')
+                    store = EmbeddingStore(os.path.join(EMBED_DIR, clean_name))
+
+                # 批量分析 (一次编码，情感头与方面头同时输出)
+                with profiling.stage('score', rows=len(df)):
+                    df = score_dataframe(df, scorer, target_col, batch_size=args.batch_size, store=store)
+
+                output_path = os.path.join(output_dir, f"analyzed_{file}")
+                with profiling.stage('write', rows=len(df)):
+                    df.to_csv(output_path, index=False, encoding='utf-8-sig')
+                print(f"  已保存: {output_path}")
+
+                print("  校正后情感分布 (Corrected Distribution):")
+                print(df['sentiment_label'].value_counts())
+
+                if 'aspect_label' in df.columns:
+                    print("  方面分布 (Aspect Distribution):")
+                    print(df['aspect_label'].value_counts())
+
+                if 'stratum_size' in df.columns:
+                    report_sample_shares(df, output_dir, file)
+
         except Exception as e:
             print(f"  处理文件 {file} 失败: {e}")
 
+    profiling.finish()
+
 if __name__ == "__main__":
     main()
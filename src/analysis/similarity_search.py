@@ -0,0 +1,363 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+import argparse
+from scipy import sparse
+
+# 将 src 加入 sys.path 以便导入模块
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from analysis.embedding_store import EmbeddingStore, TextEncoder, find_id_column, EMBED_DIR
+from data_pipeline.schema import read_table
+
+# 全局配置
+# 每个倒排桶平均容纳的向量数 (桶数 = n / LIST_SIZE，至少 1 个)
+LIST_SIZE = 256
+# 查询时默认探查的桶数；越大召回越高、速度越慢
+N_PROBE = 8
+# 训练 k-means 时的采样数与迭代次数
+TRAIN_SIZE = 50_000
+KMEANS_ITER = 20
+# 分块计算的行数 (控制中间矩阵的内存)
+CHUNK_SIZE = 20_000
+# 默认返回的近邻数
+TOP_K = 10
+# 元数据中随结果一起返回的列
+META_COLUMNS = ['keyword', 'sentiment_label', 'cleaned_text']
+
+
+def spherical_kmeans(X, n_clusters, n_iter=KMEANS_ITER, train_size=TRAIN_SIZE, seed=42):
+    """
+    球面 k-means (向量已 L2 归一化，按点积分配，质心重新归一化)
+
+    只在随机采样的 train_size 个向量上训练，训练代价与语料规模无关。
+
+    Returns:
+        np.ndarray: (n_clusters, dim) float32 质心
+    """
+    rng = np.random.default_rng(seed)
+    n = X.shape[0]
+    sample = np.sort(rng.choice(n, size=min(n, train_size), replace=False))
+    data = np.asarray(X[sample], dtype=np.float32)
+    n_clusters = min(n_clusters, len(data))
+
+    centroids = data[rng.choice(len(data), size=n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        assign = assign_nearest(data, centroids)
+        onehot = sparse.csr_matrix((np.ones(len(data), dtype=np.float32), (assign, np.arange(len(data)))),
+                                   shape=(n_clusters, len(data)))
+        sums = np.asarray(onehot @ data)
+        counts = np.bincount(assign, minlength=n_clusters)
+        # 空簇重新从样本中随机取点
+        empty = counts == 0
+        sums[empty] = data[rng.choice(len(data), size=empty.sum(), replace=False)]
+        centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+    return centroids
+
+
+def assign_nearest(X, centroids, chunk_size=CHUNK_SIZE):
+    """按点积把每个向量分配到最近的质心 (分块计算)"""
+    assign = np.empty(X.shape[0], dtype=np.int64)
+    for start in range(0, X.shape[0], chunk_size):
+        block = np.asarray(X[start:start + chunk_size], dtype=np.float32)
+        assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assign
+
+
+def _top_k(scores, k):
+    """每行取得分最高的 k 列，返回 (列号, 得分)，按得分降序"""
+    k = min(k, scores.shape[1])
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part = np.take_along_axis(scores, idx, axis=1)
+    order = np.argsort(-part, axis=1)
+    return np.take_along_axis(idx, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+
+def brute_force_search(vectors, queries, k=TOP_K, chunk_size=CHUNK_SIZE):
+    """
+    精确的余弦近邻 (分块遍历全部向量)，用作召回率基准
+
+    Returns:
+        tuple: (rows, scores)，形状均为 (len(queries), k)
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    best_rows = np.full((len(queries), 0), -1, dtype=np.int64)
+    best_scores = np.zeros((len(queries), 0), dtype=np.float32)
+    for start in range(0, vectors.shape[0], chunk_size):
+        block = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        rows, scores = _top_k(queries @ block.T, k)
+        cand_rows = np.hstack([best_rows, rows + start])
+        cand_scores = np.hstack([best_scores, scores])
+        idx, best_scores = _top_k(cand_scores, k)
+        best_rows = np.take_along_axis(cand_rows, idx, axis=1)
+    return best_rows, best_scores
+
+
+class IVFIndex:
+    """
+    倒排文件 (IVF) 近似近邻索引
+
+    用 k-means 质心把向量划分为若干桶，向量按桶重排后连续存放 (float16，内存映射)，
+    查询时只在与查询最接近的 n_probe 个桶内精确打分。
+    """
+
+    def __init__(self, centroids, order, offsets, list_vectors):
+        self.centroids = centroids          # (n_lists, dim) float32
+        self.order = order                  # 重排后第 i 行对应的原始行号
+        self.offsets = offsets              # 第 l 个桶为 list_vectors[offsets[l]:offsets[l+1]]
+        self.list_vectors = list_vectors    # (n, dim) float16
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    def __len__(self):
+        return len(self.order)
+
+    @classmethod
+    def build(cls, vectors, n_lists=None, centroids=None, seed=42, out_path=None):
+        """
+        构建索引
+
+        Args:
+            vectors (np.ndarray): (n, dim) L2 归一化向量 (可为内存映射)
+            n_lists (int, optional): 桶数，默认 n / LIST_SIZE
+            centroids (np.ndarray, optional): 复用已有质心 (增量重建时跳过训练)
+            seed (int): 随机种子
+            out_path (str, optional): 重排后的向量直接写入该 .npy 文件 (内存映射)，避免在内存中保留整份拷贝
+        """
+        if centroids is None:
+            n_lists = n_lists or max(1, vectors.shape[0] // LIST_SIZE)
+            centroids = spherical_kmeans(vectors, n_lists, seed=seed)
+        assign = assign_nearest(vectors, centroids)
+        order = np.argsort(assign, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=len(centroids)))])
+
+        if out_path is not None:
+            list_vectors = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float16, shape=vectors.shape)
+        else:
+            list_vectors = np.empty(vectors.shape, dtype=np.float16)
+        for start in range(0, len(order), CHUNK_SIZE):
+            rows = order[start:start + CHUNK_SIZE]
+            # 按原始行号顺序读取内存映射，再放回重排后的位置
+            sorted_rows = np.sort(rows)
+            block = np.asarray(vectors[sorted_rows], dtype=np.float16)
+            list_vectors[start:start + len(rows)] = block[np.searchsorted(sorted_rows, rows)]
+        return cls(centroids.astype(np.float32), order, offsets, list_vectors)
+
+    def search(self, queries, k=TOP_K, n_probe=N_PROBE):
+        """
+        批量查询
+
+        按桶而不是按查询循环：对每个被探查的桶，一次性计算所有探查它的查询的得分，
+        再把候选合并为每个查询的 top-k。
+
+        Returns:
+            tuple: (rows, scores)，形状均为 (len(queries), k)；候选不足 k 个时 rows 以 -1 补齐
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        n_q = len(queries)
+        n_probe = min(n_probe, self.n_lists)
+        probes, _ = _top_k(queries @ self.centroids.T, n_probe)
+
+        q_idx = np.repeat(np.arange(n_q), n_probe)
+        lists = probes.ravel()
+        by_list = np.argsort(lists, kind='stable')
+        q_idx, lists = q_idx[by_list], lists[by_list]
+        bounds = np.flatnonzero(np.diff(lists)) + 1
+        starts = np.concatenate([[0], bounds])
+
+        cand_q, cand_rows, cand_scores = [], [], []
+        for qs, l in zip(np.split(q_idx, bounds), lists[starts]):
+            lo, hi = self.offsets[l], self.offsets[l + 1]
+            if hi == lo:
+                continue
+            block = np.asarray(self.list_vectors[lo:hi], dtype=np.float32)
+            rows, scores = _top_k(queries[qs] @ block.T, k)
+            cand_q.append(np.repeat(qs, rows.shape[1]))
+            cand_rows.append(self.order[rows.ravel() + lo])
+            cand_scores.append(scores.ravel())
+
+        out_rows = np.full((n_q, k), -1, dtype=np.int64)
+        out_scores = np.full((n_q, k), -np.inf, dtype=np.float32)
+        if not cand_q:
+            return out_rows, out_scores
+        cand_q = np.concatenate(cand_q)
+        cand_rows = np.concatenate(cand_rows)
+        cand_scores = np.concatenate(cand_scores)
+
+        # 每个查询内按得分降序排名，取前 k
+        order = np.lexsort((-cand_scores, cand_q))
+        cand_q, cand_rows, cand_scores = cand_q[order], cand_rows[order], cand_scores[order]
+        first = np.searchsorted(cand_q, np.arange(n_q))
+        rank = np.arange(len(cand_q)) - first[cand_q]
+        keep = rank < k
+        out_rows[cand_q[keep], rank[keep]] = cand_rows[keep]
+        out_scores[cand_q[keep], rank[keep]] = cand_scores[keep]
+        return out_rows, out_scores
+
+    # -------------------------------------------------------------------------
+    # 持久化
+    # -------------------------------------------------------------------------
+    def save(self, index_dir):
+        os.makedirs(index_dir, exist_ok=True)
+        np.save(os.path.join(index_dir, 'centroids.npy'), self.centroids)
+        np.save(os.path.join(index_dir, 'order.npy'), self.order)
+        np.save(os.path.join(index_dir, 'offsets.npy'), self.offsets)
+        list_path = os.path.join(index_dir, 'list_vectors.npy')
+        if getattr(self.list_vectors, 'filename', None) != os.path.abspath(list_path):
+            np.save(list_path, self.list_vectors)
+        else:
+            self.list_vectors.flush()
+        with open(os.path.join(index_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'n_vectors': len(self), 'n_lists': self.n_lists}, f)
+
+    @classmethod
+    def load(cls, index_dir):
+        """加载索引；不存在时返回 None"""
+        if not os.path.exists(os.path.join(index_dir, 'meta.json')):
+            return None
+        return cls(
+            np.load(os.path.join(index_dir, 'centroids.npy')),
+            np.load(os.path.join(index_dir, 'order.npy')),
+            np.load(os.path.join(index_dir, 'offsets.npy')),
+            np.load(os.path.join(index_dir, 'list_vectors.npy'), mmap_mode='r'),
+        )
+
+
+def build_or_update_index(store, index_dir, rebuild=False):
+    """
+    为向量库构建索引，并保存到 index_dir
+
+    向量库有新增时复用已有质心重新分桶 (不重新训练)；rebuild=True 时重新训练质心。
+    """
+    index = None if rebuild else IVFIndex.load(index_dir)
+    if index is not None and len(index) == len(store):
+        return index
+    centroids = index.centroids if index is not None else None
+    # 先释放旧索引对 list_vectors.npy 的映射，再原地重写
+    index = None
+    os.makedirs(index_dir, exist_ok=True)
+    index = IVFIndex.build(store.vectors, centroids=centroids,
+                           out_path=os.path.join(index_dir, 'list_vectors.npy'))
+    index.save(index_dir)
+    return IVFIndex.load(index_dir)
+
+
+def evaluate_index(index, vectors, n_queries=200, k=TOP_K, n_probes=(1, 2, 4, 8, 16, 32), seed=0):
+    """
+    以库内随机向量为查询，对比暴力检索给出 recall@k 与吞吐
+
+    Returns:
+        pd.DataFrame: 列为 [n_probe, recall, qps, brute_force_qps]
+    """
+    rng = np.random.default_rng(seed)
+    sample = np.sort(rng.choice(vectors.shape[0], size=min(n_queries, vectors.shape[0]), replace=False))
+    queries = np.asarray(vectors[sample], dtype=np.float32)
+
+    start = time.perf_counter()
+    exact, _ = brute_force_search(vectors, queries, k=k)
+    brute_qps = len(queries) / (time.perf_counter() - start)
+
+    rows = []
+    for n_probe in n_probes:
+        if n_probe > index.n_lists:
+            break
+        start = time.perf_counter()
+        found, _ = index.search(queries, k=k, n_probe=n_probe)
+        qps = len(queries) / (time.perf_counter() - start)
+        hits = sum(len(np.intersect1d(a, b)) for a, b in zip(found, exact))
+        rows.append({'n_probe': n_probe, 'recall': hits / exact.size, 'qps': qps, 'brute_force_qps': brute_qps})
+    return pd.DataFrame(rows)
+
+
+class SimilaritySearcher:
+    """
+    “找相似评论”查询接口：返回近邻及其关键词、情感等元数据
+
+    Args:
+        store (EmbeddingStore): 向量库
+        index (IVFIndex): 近似近邻索引
+        df (pd.DataFrame): 分析结果 (含 ID 列与 META_COLUMNS)
+        encoder (TextEncoder, optional): 按文本查询时使用，默认懒加载
+    """
+
+    def __init__(self, store, index, df, encoder=None):
+        self.store = store
+        self.index = index
+        self.encoder = encoder
+        id_col = find_id_column(df)
+        meta_cols = [c for c in META_COLUMNS if c in df.columns]
+        meta = df.assign(**{id_col: df[id_col].astype(str)}).drop_duplicates(id_col).set_index(id_col)
+        # 与向量库行号对齐的元数据表
+        self.meta = meta[meta_cols].reindex(store.ids).rename_axis(id_col).reset_index()
+
+    def _results(self, rows, scores):
+        keep = rows >= 0
+        result = self.meta.iloc[rows[keep]].copy()
+        result.insert(1, 'similarity', scores[keep])
+        return result.reset_index(drop=True)
+
+    def by_id(self, id_, k=TOP_K, n_probe=N_PROBE):
+        """查询与某条评论/笔记最相似的 k 条 (不含其自身)"""
+        row = self.store.rows_for([id_])[0]
+        if row < 0:
+            raise KeyError(f"{id_} 不在向量库中")
+        query = np.asarray(self.store.vectors[row], dtype=np.float32)
+        rows, scores = self.index.search(query, k=k + 1, n_probe=n_probe)
+        mask = rows[0] != row
+        return self._results(rows[0][mask][:k], scores[0][mask][:k])
+
+    def by_text(self, text, k=TOP_K, n_probe=N_PROBE):
+        """查询与任意文本最相似的 k 条"""
+        if self.encoder is None:
+            self.encoder = TextEncoder()
+        query = self.encoder.encode([text])
+        rows, scores = self.index.search(query, k=k, n_probe=n_probe)
+        return self._results(rows[0], scores[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="基于句向量的相似评论检索 (IVF 近似近邻)")
+    parser.add_argument('--dataset', default='all_comments', help='向量库名称，如 all_comments / all_contents')
+    parser.add_argument('--rebuild', action='store_true', help='重新训练质心并重建索引')
+    parser.add_argument('--evaluate', action='store_true', help='输出与暴力检索对比的召回率与每秒查询数')
+    parser.add_argument('--query-id', help='按评论/笔记 ID 查询相似内容')
+    parser.add_argument('--query-text', help='按任意文本查询相似内容')
+    parser.add_argument('--k', type=int, default=TOP_K, help='返回的近邻数')
+    parser.add_argument('--n-probe', type=int, default=N_PROBE, help='探查的桶数')
+    args = parser.parse_args()
+
+    store = EmbeddingStore(os.path.join(EMBED_DIR, args.dataset))
+    if len(store) == 0:
+        print(f"向量库 {store.store_dir} 为空，请先运行 src/analysis/embedding_store.py")
+        return
+
+    index_dir = os.path.join(store.store_dir, 'ivf_index')
+    start = time.perf_counter()
+    index = build_or_update_index(store, index_dir, rebuild=args.rebuild)
+    print(f"索引就绪: {len(index)} 条向量, {index.n_lists} 个桶 ({time.perf_counter() - start:.1f}s) -> {index_dir}")
+
+    if args.evaluate:
+        report = evaluate_index(index, store.vectors, k=args.k)
+        print(report.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+        report_path = os.path.join(index_dir, 'evaluation.csv')
+        report.to_csv(report_path, index=False, encoding='utf-8-sig')
+        print(f"评估结果已保存: {report_path}")
+
+    if args.query_id or args.query_text:
+        input_path = os.path.join('data', '03_analyzed', f"analyzed_processed_{args.dataset}.csv")
+        df = read_table(input_path, 'analyzed', stage='search')
+        searcher = SimilaritySearcher(store, index, df)
+        if args.query_id:
+            result = searcher.by_id(args.query_id, k=args.k, n_probe=args.n_probe)
+        else:
+            result = searcher.by_text(args.query_text, k=args.k, n_probe=args.n_probe)
+        with pd.option_context('display.max_colwidth', 60, 'display.width', 200):
+            print(result.to_string(index=False))
+
+if __name__ == "__main__":
+    main()
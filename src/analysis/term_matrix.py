@@ -0,0 +1,93 @@
+import pandas as pd
+import numpy as np
+from scipy import sparse
+
+
+def explode_tokens(tokens_str, stopwords=None, min_len=2):
+    """
+    将以空格分隔的分词结果展开为 (文档序号, 词) 长表
+
+    Args:
+        tokens_str (pd.Series): 以空格分隔的分词结果 (process_data.py 生成的 tokens_str 列)
+        stopwords (set, optional): 额外过滤的停用词
+        min_len (int): 词的最小长度，默认过滤单字 (与词云的过滤规则保持一致)
+
+    Returns:
+        tuple: (doc_idx, words)
+            doc_idx (np.ndarray): 每个词所属文档的位置序号 (0 ~ len(tokens_str)-1)，保持原文顺序
+            words (np.ndarray): 词
+    """
+    tokens_str = tokens_str.reset_index(drop=True)
+    exploded = tokens_str.fillna('').astype(str).str.split().explode().dropna()
+
+    mask = (exploded.str.len() >= min_len).to_numpy()
+    if stopwords:
+        mask &= ~exploded.isin(stopwords).to_numpy()
+
+    return exploded.index.to_numpy()[mask], exploded.to_numpy(dtype=object)[mask]
+
+
+def build_doc_term_matrix(tokens_str, stopwords=None, min_df=1, binary=True, vocabulary=None):
+    """
+    构建稀疏的 文档 x 词 矩阵
+
+    Args:
+        tokens_str (pd.Series): 以空格分隔的分词结果
+        stopwords (set, optional): 额外过滤的停用词
+        min_df (int): 词的最少文档数，低于该值的词被裁剪
+        binary (bool): True 时同一文档内重复出现只计 1 次，否则为词频
+        vocabulary (array-like, optional): 固定词表；给定时不在词表中的词被忽略，且不做 min_df 裁剪
+
+    Returns:
+        tuple: (X, terms)
+            X (scipy.sparse.csr_matrix): 形状 (len(tokens_str), len(terms))
+            terms (np.ndarray): 词表
+    """
+    n_docs = len(tokens_str)
+    doc_idx, words = explode_tokens(tokens_str, stopwords=stopwords)
+
+    if vocabulary is not None:
+        terms = np.asarray(vocabulary, dtype=object)
+        term_codes = pd.Index(terms).get_indexer(words)
+        known = term_codes >= 0
+        doc_idx, term_codes = doc_idx[known], term_codes[known]
+    else:
+        term_codes, terms = pd.factorize(words)
+        terms = np.asarray(terms, dtype=object)
+
+    X = sparse.coo_matrix(
+        (np.ones(len(doc_idx), dtype=np.float32), (doc_idx, term_codes)),
+        shape=(n_docs, len(terms))
+    ).tocsr()
+    X.sum_duplicates()
+    if binary:
+        X.data[:] = 1.0
+
+    if vocabulary is None and min_df > 1:
+        df = np.diff(X.tocsc().indptr)
+        keep = np.flatnonzero(df >= min_df)
+        X, terms = X[:, keep], terms[keep]
+
+    return X, terms
+
+
+def top_k_per_row(S, k):
+    """
+    对稀疏矩阵每一行只保留得分最高的 k 个元素
+
+    Args:
+        S (scipy.sparse.csr_matrix): 得分矩阵
+        k (int): 每行保留数
+
+    Returns:
+        scipy.sparse.csr_matrix: 裁剪后的矩阵
+    """
+    S = S.tocsr()
+    S.sort_indices()
+    row = np.repeat(np.arange(S.shape[0]), np.diff(S.indptr))
+    # 行内按得分降序排名
+    order = np.lexsort((-S.data, row))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order)) - S.indptr[row[order]]
+    keep = rank < k
+    return sparse.csr_matrix((S.data[keep], (row[keep], S.indices[keep])), shape=S.shape)
@@ -0,0 +1,326 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import argparse
+from scipy import sparse
+
+# 将 src 加入 sys.path 以便导入模块
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from analysis.term_matrix import explode_tokens, build_doc_term_matrix, top_k_per_row
+from analysis.embedding_store import EmbeddingStore, find_id_column, store_dir_for
+from data_pipeline.schema import read_table
+
+# 全局配置
+# 每个关键词的最大簇数；小关键词按 MIN_CLUSTER_SIZE 自动减少簇数
+N_CLUSTERS = 8
+MIN_CLUSTER_SIZE = 30
+# 流式读取的分块行数 (内存上限由它决定，与语料规模无关)
+CHUNK_SIZE = 50_000
+# 初始化质心前每个关键词最多缓存的样本数
+INIT_SIZE = 3_000
+# 对语料的训练轮数 (每轮都是一次流式遍历)
+N_EPOCHS = 2
+# TF-IDF 词表：最多保留的词数与最少文档数
+MAX_FEATURES = 20_000
+MIN_DF = 3
+# 每个簇输出的标签词数
+TOP_TERMS = 8
+
+
+class MiniBatchKMeans:
+    """
+    小批量球面 k-means (Sculley, 2010)
+
+    输入行需 L2 归一化 (句向量或 TF-IDF)，按点积分配。每个质心的学习率为 1 / 累计样本数，
+    批内按簇汇总后一次更新，因此每批的计算与内存只与批大小有关。
+    """
+
+    def __init__(self, n_clusters, init_size=INIT_SIZE, seed=42):
+        self.n_clusters = n_clusters
+        self.init_size = init_size
+        self.rng = np.random.default_rng(seed)
+        self.centers = None
+        self.counts = None
+        self._pending = []
+
+    @property
+    def fitted(self):
+        return self.centers is not None
+
+    def _init_centers(self, X):
+        """k-means++ 初始化；X 可为稀疏矩阵，只把选中的质心行转为稠密向量"""
+        k = min(self.n_clusters, X.shape[0])
+        centers = [_dense(X[self.rng.integers(X.shape[0])]).ravel()]
+        closest = 1.0 - np.asarray(X @ centers[0]).ravel()
+        for _ in range(1, k):
+            probs = np.maximum(closest, 0)
+            probs = probs / probs.sum() if probs.sum() > 0 else None
+            centers.append(_dense(X[self.rng.choice(X.shape[0], p=probs)]).ravel())
+            closest = np.minimum(closest, 1.0 - np.asarray(X @ centers[-1]).ravel())
+        self.centers = np.vstack(centers).astype(np.float32)
+        self.counts = np.zeros(k, dtype=np.float64)
+
+    def partial_fit(self, X):
+        """用一批数据更新质心；初始化前的数据先缓存，攒够 init_size 行或调用 flush 时初始化"""
+        if X.shape[0] == 0:
+            return self
+        if not self.fitted:
+            self._pending.append(X)
+            if sum(x.shape[0] for x in self._pending) < self.init_size:
+                return self
+            return self.flush()
+
+        assign = self.predict(X)
+        k = len(self.centers)
+        onehot = sparse.csr_matrix((np.ones(X.shape[0]), (assign, np.arange(X.shape[0]))), shape=(k, X.shape[0]))
+        sums = _dense(onehot @ X)
+        batch_counts = np.bincount(assign, minlength=k)
+        new_counts = self.counts + batch_counts
+        hit = batch_counts > 0
+        # c <- c * n_old / n_new + sum(x) / n_new，等价于逐样本以 1/n 的学习率更新
+        self.centers[hit] = (self.centers[hit] * (self.counts[hit] / new_counts[hit])[:, None]
+                             + sums[hit] / new_counts[hit][:, None])
+        self.centers[hit] /= np.maximum(np.linalg.norm(self.centers[hit], axis=1, keepdims=True), 1e-12)
+        self.counts = new_counts
+        return self
+
+    def flush(self):
+        """
+        用缓存的数据初始化并训练 (数据量不足 init_size 的关键词在遍历结束时调用)
+
+        缓存可能是整块数据 (最多 CHUNK_SIZE 行)：k-means++ 只在其中随机抽取的 init_size 行上运行，
+        之后按 init_size 行一批走正常的更新路径，因此稠密中间结果的大小只与 init_size 有关。
+        """
+        if not self._pending:
+            return self
+        X = sparse.vstack(self._pending).tocsr() if sparse.issparse(self._pending[0]) else np.vstack(self._pending)
+        self._pending = []
+        if not self.fitted:
+            sample = self.rng.choice(X.shape[0], size=min(X.shape[0], self.init_size), replace=False)
+            self._init_centers(X[np.sort(sample)])
+        for start in range(0, X.shape[0], self.init_size):
+            self.partial_fit(X[start:start + self.init_size])
+        return self
+
+    def predict(self, X):
+        return np.asarray(np.argmax(_dense(X @ self.centers.T), axis=1)).ravel()
+
+
+def _dense(X):
+    return X.toarray() if sparse.issparse(X) else np.asarray(X)
+
+
+def _read_chunks(path, columns, chunk_size):
+    """按块读取分析结果，只读取需要的列 (类型见 data_pipeline/schema.py)"""
+    return read_table(path, 'analyzed', columns=columns, chunksize=chunk_size)
+
+
+class TopicClusterer:
+    """
+    按关键词分组的流式主题聚类
+
+    共遍历语料三遍：
+        1. 统计每个关键词的文档数与全局文档频次 (确定簇数、TF-IDF 词表)
+        2. 训练 N_EPOCHS 轮，每个关键词一个 MiniBatchKMeans
+        3. 分配 cluster_id，累加 簇 x 词 词频，用类别 TF-IDF (c-TF-IDF) 给每个簇取标签词
+    向量来源为句向量库 (embedding) 或 TF-IDF；'auto' 时向量库存在则用句向量。
+    """
+
+    def __init__(self, path, features='auto', n_clusters=N_CLUSTERS, chunk_size=CHUNK_SIZE, seed=42):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.n_clusters = n_clusters
+        self.seed = seed
+
+        self.store = None
+        if features in ('auto', 'embedding'):
+            store = EmbeddingStore(store_dir_for(os.path.basename(path)))
+            if len(store) > 0:
+                self.store = store
+            elif features == 'embedding':
+                raise FileNotFoundError(f"向量库 {store.store_dir} 为空，请先运行 src/analysis/embedding_store.py")
+        self.features = 'embedding' if self.store is not None else 'tfidf'
+
+        self.terms = None
+        self.idf = None
+        self.models = {}
+
+    # -------------------------------------------------------------------------
+    # 向量化
+    # -------------------------------------------------------------------------
+    def _scan(self):
+        """第 1 遍：文档数与文档频次 -> 簇数与词表"""
+        doc_counts = pd.Series(dtype=np.int64)
+        doc_freq = pd.Series(dtype=np.int64)
+        n_docs = 0
+        for chunk in _read_chunks(self.path, ['keyword', 'tokens_str'], self.chunk_size):
+            doc_counts = doc_counts.add(chunk['keyword'].astype(str).value_counts(), fill_value=0)
+            doc_idx, words = explode_tokens(chunk['tokens_str'])
+            unique = pd.DataFrame({'d': doc_idx, 'w': words}).drop_duplicates()['w']
+            doc_freq = doc_freq.add(unique.value_counts(), fill_value=0)
+            n_docs += len(chunk)
+
+        doc_freq = doc_freq[doc_freq >= MIN_DF].sort_values(ascending=False).head(MAX_FEATURES)
+        self.terms = doc_freq.index.to_numpy(dtype=object)
+        self.idf = (np.log((1.0 + n_docs) / (1.0 + doc_freq.to_numpy())) + 1.0).astype(np.float32)
+
+        for keyword, count in doc_counts.items():
+            k = int(min(self.n_clusters, max(1, count // MIN_CLUSTER_SIZE)))
+            self.models[keyword] = MiniBatchKMeans(k, seed=self.seed)
+        return doc_counts
+
+    def _vectorize(self, part):
+        """
+        Returns:
+            tuple: (X, valid)，X 为 L2 归一化的行向量 (只含 valid 行)
+        """
+        if self.features == 'embedding':
+            rows = self.store.rows_for(part[find_id_column(part)])
+            valid = rows >= 0
+            X = np.asarray(self.store.vectors[rows[valid]], dtype=np.float32)
+            return X, valid
+
+        counts, _ = build_doc_term_matrix(part['tokens_str'], vocabulary=self.terms, binary=False)
+        counts.data = (1.0 + np.log(counts.data)) * self.idf[counts.indices]
+        norms = np.sqrt(np.asarray(counts.multiply(counts).sum(axis=1)).ravel())
+        valid = norms > 0
+        X = sparse.diags(1.0 / np.where(valid, norms, 1.0)) @ counts
+        return X.tocsr()[valid], valid
+
+    def _keyword_parts(self, columns):
+        for chunk in _read_chunks(self.path, columns, self.chunk_size):
+            for keyword, part in chunk.groupby(chunk['keyword'].astype(str), sort=False):
+                yield keyword, part
+
+    # -------------------------------------------------------------------------
+    # 训练与分配
+    # -------------------------------------------------------------------------
+    def fit(self, n_epochs=N_EPOCHS):
+        doc_counts = self._scan()
+        print(f"  特征: {self.features}, {len(self.models)} 个关键词, 共 {int(doc_counts.sum())} 条文档")
+        id_cols = ['comment_id', 'note_id']
+        for epoch in range(n_epochs):
+            for keyword, part in self._keyword_parts(['keyword', 'tokens_str'] + id_cols):
+                X, _ = self._vectorize(part)
+                self.models[keyword].partial_fit(X)
+            # 数据量不足 INIT_SIZE 的关键词在第一轮结束时初始化
+            for model in self.models.values():
+                model.flush()
+        return self
+
+    def assign(self, output_path, top_terms=TOP_TERMS):
+        """
+        第 3 遍：逐块写出带 cluster_id 的数据，并生成簇摘要
+
+        无向量 (无分词结果或不在向量库中) 的行 cluster_id 为 -1。
+
+        Returns:
+            pd.DataFrame: 簇摘要 [keyword, cluster_id, size, neg_share, top_terms]
+        """
+        keys, term_counts, sizes, negs = [], [], [], []
+        key_index = {}
+        tmp_path = output_path + '.tmp'
+        first = True
+        # 分配结果原样写回全部列：以 object 读取，避免类型转换改写原有内容
+        for chunk in read_table(self.path, 'analyzed', chunksize=self.chunk_size, dtype=object):
+            chunk = chunk.drop(columns='cluster_id', errors='ignore')
+            chunk['cluster_id'] = -1
+            for keyword, part in chunk.groupby(chunk['keyword'].astype(str), sort=False):
+                model = self.models.get(keyword)
+                if model is None or not model.fitted:
+                    continue
+                X, valid = self._vectorize(part)
+                if not valid.any():
+                    continue
+                labels = model.predict(X)
+                chunk.loc[part.index[valid], 'cluster_id'] = labels
+
+                # 累加 (关键词, 簇) x 词 词频，用于给簇取标签词
+                counts, _ = build_doc_term_matrix(part['tokens_str'][valid], vocabulary=self.terms, binary=False)
+                is_neg = (part['sentiment_label'][valid] == 'Negative').to_numpy() if 'sentiment_label' in part else None
+                for c in np.unique(labels):
+                    key = (keyword, int(c))
+                    in_c = labels == c
+                    if key not in key_index:
+                        key_index[key] = len(keys)
+                        keys.append(key)
+                        term_counts.append(sparse.csr_matrix((1, len(self.terms)), dtype=np.float64))
+                        sizes.append(0)
+                        negs.append(0)
+                    i = key_index[key]
+                    term_counts[i] = term_counts[i] + sparse.csr_matrix(counts[in_c].sum(axis=0))
+                    sizes[i] += int(in_c.sum())
+                    negs[i] += int(is_neg[in_c].sum()) if is_neg is not None else 0
+
+            # 只在首块写入 BOM 与表头，后续块追加
+            if first:
+                chunk.to_csv(tmp_path, index=False, encoding='utf-8-sig')
+                first = False
+            else:
+                chunk.to_csv(tmp_path, mode='a', header=False, index=False, encoding='utf-8')
+        os.replace(tmp_path, output_path)
+
+        if not keys:
+            return pd.DataFrame(columns=['keyword', 'cluster_id', 'size', 'neg_share', 'top_terms'])
+        summary = pd.DataFrame(keys, columns=['keyword', 'cluster_id'])
+        summary['size'] = sizes
+        summary['neg_share'] = np.array(negs) / np.maximum(np.array(sizes), 1)
+        summary['top_terms'] = self._label_clusters(summary['keyword'], sparse.vstack(term_counts).tocsr(), top_terms)
+        return summary.sort_values(['keyword', 'size'], ascending=[True, False], ignore_index=True)
+
+    def _label_clusters(self, keywords, tf, top_terms):
+        """
+        类别 TF-IDF：W(c, t) = tf(c, t) / |c| * log(1 + A / f(t))
+        其中 f(t) 为词 t 在同一关键词所有簇中的总词频，A 为该关键词每簇平均词数，
+        因此标签词突出的是本簇相对同关键词其他簇的区别。
+        """
+        kw_codes, _ = pd.factorize(keywords)
+        onehot = sparse.csr_matrix((np.ones(len(kw_codes)), (kw_codes, np.arange(len(kw_codes)))))
+        kw_tf = (onehot @ tf).tocsr()
+        cluster_len = np.asarray(tf.sum(axis=1)).ravel()
+        n_clusters = np.bincount(kw_codes)
+        avg_len = np.asarray(kw_tf.sum(axis=1)).ravel() / n_clusters
+
+        W = tf.tocoo()
+        f_t = np.asarray(kw_tf[kw_codes[W.row], W.col]).ravel()
+        W.data = W.data / np.maximum(cluster_len[W.row], 1) * np.log1p(avg_len[kw_codes[W.row]] / f_t)
+        top = top_k_per_row(W.tocsr(), k=top_terms).tocoo()
+
+        order = np.lexsort((-top.data, top.row))
+        labels = pd.Series(self.terms[top.col[order]]).groupby(top.row[order]).agg(' / '.join)
+        return labels.reindex(np.arange(tf.shape[0]), fill_value='').to_numpy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按关键词的流式主题聚类，写入 cluster_id")
+    parser.add_argument('--features', choices=['auto', 'embedding', 'tfidf'], default='auto',
+                        help='聚类特征：句向量库 / TF-IDF；auto 时向量库存在则用句向量')
+    parser.add_argument('--n-clusters', type=int, default=N_CLUSTERS, help='每个关键词的最大簇数')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='流式读取的分块行数')
+    args = parser.parse_args()
+
+    input_dir = os.path.join('data', '03_analyzed')
+    if not os.path.exists(input_dir):
+        print(f"输入目录 {input_dir} 不存在")
+        return
+
+    files = [f for f in os.listdir(input_dir) if f.endswith('.csv') and f.startswith('analyzed_processed_all')]
+    for file in files:
+        print(f"\n正在聚类: {file}")
+        path = os.path.join(input_dir, file)
+        try:
+            clusterer = TopicClusterer(path, features=args.features, n_clusters=args.n_clusters,
+                                       chunk_size=args.chunk_size).fit()
+            summary = clusterer.assign(path)
+            clean_name = file.replace('analyzed_', '').replace('processed_', '').replace('.csv', '')
+            summary_path = os.path.join(input_dir, f"{clean_name}_topic_clusters.csv")
+            summary.to_csv(summary_path, index=False, encoding='utf-8-sig')
+            print(f"  {len(summary)} 个簇, cluster_id 已写入 {path}")
+            print(f"  簇摘要已保存: {summary_path}")
+        except Exception as e:
+            print(f"  处理文件 {file} 失败: {e}")
+
+if __name__ == "__main__":
+    main()
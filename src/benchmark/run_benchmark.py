@@ -0,0 +1,361 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import tracemalloc
+import multiprocessing
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows 无 resource 模块，改用 tracemalloc 统计 Python 分配峰值
+    resource = None
+
+# 将 src 加入 sys.path 以便导入模块
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from benchmark.synthetic_corpus import generate_corpus, PROFILE_DIR
+from data_pipeline.raw_files import list_raw_files
+from data_pipeline.schema import read_table, raw_dataset_of, apply_schema, STAGE_COLUMNS
+
+# 全局配置
+WORK_DIR = os.path.join('data', 'benchmark')
+# 依次执行的阶段，每个阶段读取上一阶段的中间结果 (pickle，不计入耗时)
+STAGES = ['read', 'clean_text', 'tokenize', 'sentiment', 'visualize']
+# 与 process_data.py 一致的文本列
+TARGET_COLS = {'comments': ['content'], 'contents': ['desc', 'description', 'content']}
+# 与基线报告对比时，吞吐下降超过该比例记为回归
+REGRESSION_TOLERANCE = 0.10
+# 桩模型的句向量维度
+STUB_DIM = 256
+
+
+class StubScorer:
+    """
+    纯 CPU 的桩模型，接口与 MultiHeadScorer.score 一致，无需下载模型即可离线跑通情感阶段
+
+    句向量为字符 bigram 哈希到 STUB_DIM 维后归一化，情感与方面由固定随机投影给出；
+    结果只用于计时，不代表真实的情感判断。
+    """
+
+    def __init__(self, seed=0):
+        from analysis.sentiment_analysis import AspectHeads, ASPECTS
+        rng = np.random.default_rng(seed)
+        self.sentiment_w = rng.standard_normal(STUB_DIM).astype(np.float32) * 4
+        self.aspect_heads = AspectHeads(rng.standard_normal((STUB_DIM, len(ASPECTS))) * 4,
+                                        np.zeros(len(ASPECTS)), list(ASPECTS))
+
+    def score(self, texts):
+        pooled = np.zeros((len(texts), STUB_DIM), dtype=np.float32)
+        for i, text in enumerate(texts):
+            text = text if isinstance(text, str) and text.strip() else ' '
+            for j in range(max(1, len(text) - 1)):
+                pooled[i, (ord(text[j]) * 31 + ord(text[j + 1 if len(text) > 1 else j])) % STUB_DIM] += 1.0
+        pooled /= np.linalg.norm(pooled, axis=1, keepdims=True).clip(min=1e-6)
+        positive = 1.0 / (1.0 + np.exp(-(pooled @ self.sentiment_w)))
+        return {
+            'model_label': ['Positive' if p >= 0.5 else 'Negative' for p in positive],
+            'model_confidence': np.maximum(positive, 1 - positive),
+            'pooled': pooled,
+            'aspect_proba': self.aspect_heads.predict_proba(pooled),
+        }
+
+
+def _target_col(df, dtype):
+    return next((c for c in TARGET_COLS[dtype] if c in df.columns), None)
+
+
+def _load_pickle(work_dir, stage):
+    return pd.read_pickle(os.path.join(work_dir, f"stage_{stage}.pkl"))
+
+
+# 各阶段：setup(work_dir, options) -> 输入 (不计时)；run(inputs, options) -> (输出, 行数, 子步骤耗时)
+
+def setup_read(work_dir, options):
+    return list_raw_files(os.path.join(work_dir, '01_raw'))
+
+
+def run_read(files, options):
+    """按 schema 读取原始 CSV 并附加关键词 (同 process_data.process_and_merge)"""
+    from data_pipeline.process_data import extract_keyword_from_filename
+    frames = {'comments': [], 'contents': []}
+    for path in files:
+        df = read_table(path, raw_dataset_of(path), stage='process')
+        df['keyword'] = extract_keyword_from_filename(path)
+        frames[raw_dataset_of(path)[len('raw_'):]].append(df)
+    merged = {dtype: pd.concat(dfs, ignore_index=True) for dtype, dfs in frames.items() if dfs}
+    return merged, sum(len(df) for df in merged.values()), {}
+
+
+def setup_clean_text(work_dir, options):
+    return _load_pickle(work_dir, 'read')
+
+
+def run_clean_text(frames, options):
+    from data_pipeline.preprocess.cleaner import clean_text
+    for dtype, df in frames.items():
+        col = _target_col(df, dtype)
+        df['cleaned_text'] = df[col].fillna('').astype(str).apply(clean_text) if col else ''
+    return frames, sum(len(df) for df in frames.values()), {}
+
+
+def setup_tokenize(work_dir, options):
+    from data_pipeline.preprocess.tokenizer import Tokenizer
+    # 词典加载与 jieba 初始化计入 setup_sec
+    tokenizer = Tokenizer(dict_path=os.path.join(options['dict_dir'], 'user_dict.txt'),
+                          stopwords_path=os.path.join(options['dict_dir'], 'hit_stopwords.txt'))
+    tokenizer.tokenize('山姆')
+    return _load_pickle(work_dir, 'clean_text'), tokenizer
+
+
+def run_tokenize(inputs, options):
+    frames, tokenizer = inputs
+    for df in frames.values():
+        df['tokens'] = df['cleaned_text'].apply(tokenizer.tokenize)
+        df['tokens_str'] = df['tokens'].apply(lambda x: ' '.join(x))
+    return frames, sum(len(df) for df in frames.values()), {}
+
+
+def setup_sentiment(work_dir, options):
+    # 模型加载计入 setup_sec
+    if options['stub_model']:
+        scorer = StubScorer()
+    else:
+        from analysis.sentiment_analysis import MultiHeadScorer, AspectHeads
+        scorer = MultiHeadScorer(aspect_heads=AspectHeads.load())
+    return _load_pickle(work_dir, 'tokenize'), scorer
+
+
+def run_sentiment(inputs, options):
+    from analysis.sentiment_analysis import score_dataframe
+    frames, scorer = inputs
+    for dtype, df in frames.items():
+        frames[dtype] = score_dataframe(df, scorer, 'cleaned_text', batch_size=options['batch_size'])
+    return frames, sum(len(df) for df in frames.values()), {}
+
+
+def setup_visualize(work_dir, options):
+    import matplotlib
+    matplotlib.use('Agg')
+    from visualization.visualizer import Visualizer
+    viz = Visualizer()
+    viz.output_dir = os.path.join(work_dir, 'visualizations')
+    os.makedirs(viz.output_dir, exist_ok=True)
+    # 与 visualizer.main 一致：按 schema 的 visualize 列与类型
+    frames = {dtype: apply_schema(df, 'analyzed', STAGE_COLUMNS['visualize'])
+              for dtype, df in _load_pickle(work_dir, 'sentiment').items()}
+    return frames, viz
+
+
+def run_visualize(inputs, options):
+    frames, viz = inputs
+    charts = ['plot_word_cloud_and_freq', 'plot_time_distribution', 'plot_sentiment_distribution',
+              'plot_keyword_volume', 'plot_emerging_terms', 'plot_cooccurrence_network', 'plot_distinctive_terms']
+    substeps = {}
+    for dtype, df in frames.items():
+        for chart in charts:
+            start = time.perf_counter()
+            try:
+                getattr(viz, chart)(df, f"bench_{dtype}")
+                status = None
+            except Exception as e:
+                status = f"{type(e).__name__}: {e}"
+            step = substeps.setdefault(chart, {'wall_sec': 0.0})
+            step['wall_sec'] += time.perf_counter() - start
+            if status:
+                step['error'] = status
+    return frames, sum(len(df) for df in frames.values()), substeps
+
+
+def peak_memory_mb():
+    """当前进程的峰值常驻内存 (MB)；无 resource 模块时返回 tracemalloc 峰值"""
+    if resource is None:
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 计，macOS 以字节计
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def _stage_worker(stage, work_dir, options, queue):
+    """在独立子进程中执行单个阶段，使峰值内存只反映该阶段"""
+    try:
+        if resource is None:
+            tracemalloc.start()
+        start = time.perf_counter()
+        inputs = globals()[f"setup_{stage}"](work_dir, options)
+        setup_sec = time.perf_counter() - start
+
+        peak_before = peak_memory_mb()
+        # 重复执行取最快一次 (各阶段对同一输入重复执行结果相同)
+        best = None
+        for _ in range(options['repeat']):
+            wall, cpu = time.perf_counter(), time.process_time()
+            output, rows, substeps = globals()[f"run_{stage}"](inputs, options)
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            if best is None or wall < best[0]:
+                best = (wall, cpu, substeps)
+        wall, cpu, substeps = best
+        peak_after = peak_memory_mb()
+
+        pd.to_pickle(output, os.path.join(work_dir, f"stage_{stage}.pkl"))
+        queue.put({
+            'rows': int(rows), 'setup_sec': setup_sec, 'wall_sec': wall, 'cpu_sec': cpu,
+            'rows_per_sec': rows / wall if wall > 0 else None,
+            'peak_rss_mb': peak_after, 'peak_rss_growth_mb': peak_after - peak_before,
+            'substeps': substeps,
+        })
+    except Exception as e:
+        queue.put({'error': f"{type(e).__name__}: {e}"})
+
+
+def run_stage(stage, work_dir, options):
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_stage_worker, args=(stage, work_dir, options, queue))
+    proc.start()
+    # 先取结果再 join，避免子进程因队列未清空而阻塞
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def prepare_corpus(work_dir, rows, seed, profile_dir):
+    """合成数据按 (行数, 种子, 样板目录) 复用，参数变化时重新生成"""
+    raw_dir = os.path.join(work_dir, '01_raw')
+    manifest_path = os.path.join(work_dir, 'corpus.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('rows') == rows and manifest.get('seed') == seed and manifest.get('profile_dir') == profile_dir:
+            print(f"复用已生成的合成数据: {raw_dir}")
+            return manifest
+
+    for path in list_raw_files(raw_dir):
+        os.remove(path)
+    print(f"正在生成合成数据 (评论 {rows} 行)...")
+    start = time.perf_counter()
+    manifest = generate_corpus(raw_dir, rows, profile_dir=profile_dir, seed=seed)
+    manifest.update(rows=rows, generate_sec=time.perf_counter() - start)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def run_benchmark(rows, work_dir=WORK_DIR, stages=STAGES, stub_model=False, batch_size=32,
+                  seed=42, profile_dir=PROFILE_DIR, dict_dir=None, repeat=1):
+    """
+    生成 (或复用) 合成数据并依次测量各阶段
+
+    Returns:
+        dict: 报告，stages 下每个阶段含 rows / setup_sec / wall_sec / cpu_sec / rows_per_sec /
+              peak_rss_mb / peak_rss_growth_mb / substeps (出错时为 error)
+    """
+    from analysis.sentiment_analysis import MODEL_NAME
+    if dict_dir is None:
+        dict_dir = next((d for d in (os.path.join('data', 'dictionaries'), os.path.join('demo', 'dictionaries'))
+                         if os.path.isdir(d)), os.path.join('data', 'dictionaries'))
+    options = {'stub_model': stub_model, 'batch_size': batch_size, 'dict_dir': dict_dir, 'repeat': repeat}
+    corpus = prepare_corpus(work_dir, rows, seed, profile_dir)
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'packages': {'pandas': pd.__version__, 'numpy': np.__version__},
+        'memory_metric': 'ru_maxrss' if resource is not None else 'tracemalloc',
+        'params': {'rows': rows, 'seed': seed, 'batch_size': batch_size, 'repeat': repeat,
+                   'model': 'stub' if stub_model else MODEL_NAME, 'dict_dir': dict_dir},
+        'corpus': corpus,
+        'stages': {},
+    }
+    for stage in stages:
+        print(f"\n=== 阶段: {stage} ===")
+        result = run_stage(stage, work_dir, options)
+        report['stages'][stage] = result
+        if 'error' in result:
+            print(f"  失败: {result['error']} (后续阶段跳过)")
+            break
+        print(f"  {result['rows']} 行, {result['wall_sec']:.2f}s (CPU {result['cpu_sec']:.2f}s), "
+              f"{result['rows_per_sec']:.0f} 行/秒, 峰值内存 {result['peak_rss_mb']:.0f} MB")
+
+    for stage in stages:
+        path = os.path.join(work_dir, f"stage_{stage}.pkl")
+        if os.path.exists(path):
+            os.remove(path)
+    return report
+
+
+def compare_reports(current, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    与基线报告逐阶段对比吞吐与峰值内存
+
+    Returns:
+        pd.DataFrame: 列为 [stage, baseline_rows_per_sec, rows_per_sec, speed_change, peak_rss_change, regression]
+    """
+    rows = []
+    for stage, cur in current['stages'].items():
+        base = baseline.get('stages', {}).get(stage)
+        if not base or 'error' in cur or 'error' in base:
+            continue
+        speed = cur['rows_per_sec'] / base['rows_per_sec'] - 1
+        rows.append({
+            'stage': stage, 'baseline_rows_per_sec': base['rows_per_sec'], 'rows_per_sec': cur['rows_per_sec'],
+            'speed_change': speed, 'peak_rss_change': cur['peak_rss_mb'] / base['peak_rss_mb'] - 1,
+            'regression': speed < -tolerance,
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="合成数据性能基准：逐阶段测量耗时、吞吐与峰值内存")
+    parser.add_argument('--rows', type=int, default=10_000, help='合成评论行数 (1 万 ~ 500 万)')
+    parser.add_argument('--stages', nargs='+', default=STAGES, choices=STAGES, help='要测量的阶段 (按流水线顺序)')
+    parser.add_argument('--stub-model', action='store_true', help='使用纯 CPU 桩模型代替 BERT (离线运行)')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=1, help='每个阶段重复执行次数 (取最快一次，小规模数据建议 3 次以上)')
+    parser.add_argument('--work-dir', default=WORK_DIR, help='合成数据与中间结果目录')
+    parser.add_argument('--profile-dir', default=PROFILE_DIR, help='作为分布样板的原始数据目录')
+    parser.add_argument('--output', default=None, help='JSON 报告路径 (默认 {work-dir}/report_{rows}.json)')
+    parser.add_argument('--baseline', default=None, help='基线 JSON 报告；吞吐下降超过容差时以非零状态退出')
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE)
+    args = parser.parse_args()
+
+    stages = [s for s in STAGES if s in args.stages]
+    report = run_benchmark(args.rows, work_dir=args.work_dir, stages=stages, stub_model=args.stub_model,
+                           batch_size=args.batch_size, seed=args.seed, profile_dir=args.profile_dir,
+                           repeat=args.repeat)
+
+    output = args.output or os.path.join(args.work_dir, f"report_{args.rows}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n报告已保存: {output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            diff = compare_reports(report, json.load(f), tolerance=args.tolerance)
+        if diff.empty:
+            print("基线报告中没有可对比的阶段")
+            return
+        with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.float_format', lambda x: f"{x:.3f}"):
+            print(diff)
+        if diff['regression'].any():
+            print(f"吞吐下降超过 {args.tolerance:.0%} 的阶段: {', '.join(diff.loc[diff['regression'], 'stage'])}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
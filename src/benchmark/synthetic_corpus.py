@@ -0,0 +1,205 @@
+import pandas as pd
+import numpy as np
+import os
+import re
+import sys
+import json
+import argparse
+
+# 将 src 加入 sys.path 以便导入模块
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from data_pipeline.raw_files import parse_raw_path, list_raw_files
+from data_pipeline.schema import read_table, raw_dataset_of
+
+# 全局配置
+# 作为分布样板的原始数据 (列结构、文本长度、表情密度、各关键词 / 日期的行数占比)
+PROFILE_DIR = os.path.join('demo', '01_raw')
+# 每次生成并写出的行数 (控制 500 万行规模时的内存)
+CHUNK_ROWS = 100_000
+# 文本列：评论取 content，笔记取 title / desc
+TEXT_COLUMNS = {'comments': ['content'], 'contents': ['title', 'desc']}
+# 重新生成的 ID 列 (保证唯一；评论的 note_id 指向同关键词下生成的笔记)
+FRESH_ID_COLUMNS = ('comment_id', 'note_id')
+# 时间戳在样板值基础上的随机抖动 (毫秒)，避免大量完全相同的时间
+TIME_JITTER_MS = 12 * 3600 * 1000
+
+# 小红书表情 [萌萌哒R] 与 Unicode emoji
+EMOJI_PATTERN = re.compile(r'\[[^\[\]\s]{1,8}R\]|[\U0001F300-\U0001FAFF☀-➿]')
+# 按中英文句读切分文本片段 (保留结尾标点)
+FRAGMENT_PATTERN = re.compile(r'[^，。！？!?\n~～]+[，。！？!?\n~～]*')
+
+
+class CorpusProfile:
+    """
+    原始数据的分布样板
+
+    由 demo/01_raw 统计得到：每个文件 (数据类型, 日期, 关键词) 的行数、各列的经验取值、
+    文本片段池与表情池，以及每行文本的 (去表情长度, 表情个数) 联合经验分布。
+    """
+
+    def __init__(self, profile_dir=PROFILE_DIR):
+        self.files = []
+        self.columns = {}
+        self.values = {}
+        self.text = {}
+
+        for path in list_raw_files(profile_dir):
+            dtype, date, keyword = parse_raw_path(path)
+            df = read_table(path, raw_dataset_of(path), dtype=object)
+            self.files.append((dtype, date, keyword, len(df)))
+            self.columns.setdefault(dtype, list(df.columns))
+            self.values.setdefault(dtype, []).append(df)
+
+        if not self.files:
+            raise FileNotFoundError(f"未找到样板原始数据: {profile_dir}")
+
+        for dtype, frames in self.values.items():
+            df = pd.concat(frames, ignore_index=True)
+            self.values[dtype] = {c: df[c].to_numpy(dtype=object) for c in df.columns}
+            self.text[dtype] = {c: self._text_profile(df[c]) for c in TEXT_COLUMNS[dtype] if c in df.columns}
+
+    @staticmethod
+    def _text_profile(series):
+        """统计片段池、表情池与每行 (长度, 表情数)"""
+        fragments, emojis, lengths, emoji_counts = [], [], [], []
+        for text in series.fillna('').astype(str):
+            found = EMOJI_PATTERN.findall(text)
+            # 单独的 \r 写出时不加引号，会被 C 解析器当作换行拆成两行
+            plain = EMOJI_PATTERN.sub('', text).replace('\r', '')
+            emojis += found
+            fragments += [f for f in FRAGMENT_PATTERN.findall(plain) if f.strip()]
+            lengths.append(len(plain))
+            emoji_counts.append(len(found))
+        return {
+            'fragments': np.array(fragments or [''], dtype=object),
+            'emojis': np.array(emojis or [''], dtype=object),
+            'lengths': np.array(lengths),
+            'emoji_counts': np.array(emoji_counts),
+            'mean_fragment_len': max(1.0, np.mean([len(f) for f in fragments]) if fragments else 1.0),
+        }
+
+    def row_counts(self, n_comments):
+        """按样板中各文件的行数占比，把目标规模分配到每个 (数据类型, 日期, 关键词) 文件"""
+        demo_comments = sum(n for dtype, _, _, n in self.files if dtype == 'comments')
+        scale = n_comments / max(demo_comments, 1)
+        return [(dtype, date, keyword, max(1, int(round(n * scale)))) for dtype, date, keyword, n in self.files]
+
+
+def synth_texts(profile, n, rng):
+    """
+    按样板分布生成 n 条文本
+
+    每行从样板中抽取一行的 (长度, 表情数)，拼接随机片段并截断到该长度，再把表情插入片段之间；
+    样板中的空文本比例也随之保留。
+    """
+    picks = rng.integers(len(profile['lengths']), size=n)
+    lengths = profile['lengths'][picks]
+    n_frags = np.where(lengths > 0, np.ceil(lengths / profile['mean_fragment_len']) + 1, 0).astype(int)
+    n_emojis = profile['emoji_counts'][picks]
+
+    frag_idx = iter(rng.integers(len(profile['fragments']), size=int(n_frags.sum())))
+    emoji_idx = iter(rng.integers(len(profile['emojis']), size=int(n_emojis.sum())))
+    fragments, emojis = profile['fragments'], profile['emojis']
+
+    texts = []
+    for length, k, e in zip(lengths, n_frags, n_emojis):
+        pieces, remaining = [], length
+        for _ in range(k):
+            piece = fragments[next(frag_idx)]
+            if remaining > 0:
+                pieces.append(piece[:remaining])
+                remaining -= len(piece)
+        for _ in range(e):
+            pieces.insert(int(rng.integers(len(pieces) + 1)), emojis[next(emoji_idx)])
+        texts.append(''.join(pieces))
+    return texts
+
+
+def _fresh_ids(rng, n):
+    """24 位十六进制 ID (与平台 ID 形态一致)"""
+    raw = rng.integers(0, 256, size=(n, 12), dtype=np.uint8)
+    return [row.tobytes().hex() for row in raw]
+
+
+def synth_chunk(profile, dtype, n, rng, note_ids=None):
+    """
+    生成一块 n 行的原始数据
+
+    非文本列从样板中按列独立有放回抽样 (保留 "2.1万" 这类展示文本与缺失值)；
+    ID 重新生成，时间戳加随机抖动，评论的 note_id 从同关键词的笔记中抽取。
+    """
+    values = profile.values[dtype]
+    chunk = {}
+    for col in profile.columns[dtype]:
+        if col in profile.text[dtype]:
+            chunk[col] = synth_texts(profile.text[dtype][col], n, rng)
+        elif col == 'note_id' and note_ids is not None and len(note_ids):
+            chunk[col] = note_ids[rng.integers(len(note_ids), size=n)]
+        elif col in FRESH_ID_COLUMNS:
+            chunk[col] = _fresh_ids(rng, n)
+        elif col in ('create_time', 'time'):
+            base = pd.to_numeric(pd.Series(values[col][rng.integers(len(values[col]), size=n)]), errors='coerce')
+            jitter = rng.integers(-TIME_JITTER_MS, TIME_JITTER_MS, size=n)
+            chunk[col] = (base + jitter).astype('Int64')
+        else:
+            chunk[col] = values[col][rng.integers(len(values[col]), size=n)]
+    return pd.DataFrame(chunk, columns=profile.columns[dtype])
+
+
+def generate_corpus(output_dir, n_comments, profile_dir=PROFILE_DIR, seed=42, chunk_rows=CHUNK_ROWS):
+    """
+    生成合成原始数据 (扁平文件命名，与 data/01_raw 的读取方式一致)
+
+    Args:
+        output_dir (str): 输出目录 (写入 search_{类型}_{日期}_{关键词}.csv)
+        n_comments (int): 评论总行数；笔记行数按样板中的 笔记/评论 比例缩放
+        profile_dir (str): 样板原始数据目录
+        seed (int): 随机种子，同一参数生成的数据完全一致
+        chunk_rows (int): 分块写出的行数
+
+    Returns:
+        dict: 生成清单 {comments, contents, files, seed, profile_dir}
+    """
+    profile = CorpusProfile(profile_dir)
+    rng = np.random.default_rng(seed)
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest = {'comments': 0, 'contents': 0, 'files': 0, 'seed': seed, 'profile_dir': profile_dir}
+    note_ids = {}
+    # 先生成笔记，评论的 note_id 才能指向已存在的笔记
+    plan = sorted(profile.row_counts(n_comments), key=lambda x: x[0] != 'contents')
+    for dtype, date, keyword, rows in plan:
+        path = os.path.join(output_dir, f"search_{dtype}_{date}_{keyword}.csv")
+        parent_ids = note_ids.get(keyword) if dtype == 'comments' else None
+        written, file_note_ids = 0, []
+        while written < rows:
+            n = min(chunk_rows, rows - written)
+            chunk = synth_chunk(profile, dtype, n, rng, note_ids=parent_ids)
+            chunk.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0,
+                         index=False, encoding='utf-8-sig' if written == 0 else 'utf-8')
+            if dtype == 'contents':
+                file_note_ids += chunk['note_id'].tolist()
+            written += n
+        if dtype == 'contents':
+            note_ids[keyword] = np.concatenate([note_ids.get(keyword, np.array([], dtype=object)),
+                                                np.array(file_note_ids, dtype=object)])
+        manifest[dtype] += rows
+        manifest['files'] += 1
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按 demo/01_raw 的分布生成合成原始数据 (用于性能基准)")
+    parser.add_argument('--rows', type=int, default=10_000, help='评论总行数 (笔记按样板比例缩放)，建议 1 万 ~ 500 万')
+    parser.add_argument('--output-dir', default=os.path.join('data', 'benchmark', '01_raw'))
+    parser.add_argument('--profile-dir', default=PROFILE_DIR, help='作为分布样板的原始数据目录')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    manifest = generate_corpus(args.output_dir, args.rows, profile_dir=args.profile_dir, seed=args.seed)
+    print(json.dumps(manifest, ensure_ascii=False))
+    print(f"已生成 {manifest['files']} 个文件 (评论 {manifest['comments']} 行, 笔记 {manifest['contents']} 行): {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
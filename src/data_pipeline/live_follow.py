@@ -0,0 +1,357 @@
+import pandas as pd
+import numpy as np
+import os
+import io
+import sys
+import json
+import time
+import argparse
+
+# 将 src 加入 sys.path 以便导入模块
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from data_pipeline.process_data import extract_keyword_from_filename, clean_and_tokenize
+from data_pipeline.schema import apply_schema, read_header, raw_dataset_of, STAGE_COLUMNS
+
+# 全局配置
+CONFIG_FILE = "crawler_config.json"
+# 轮询间隔 (秒)；结果延迟约为 轮询间隔 + 一个微批的处理时间
+POLL_INTERVAL = 10
+# 每个文件每次最多读取的字节数 (控制单个微批的大小)
+MAX_BATCH_BYTES = 4 * 1024 * 1024
+# 断点状态：每个文件已处理到的字节偏移
+STATE_PATH = os.path.join('data', '02_processed', 'live_state.json')
+# 笔记 -> 关键词 映射：只追加新增/变化的条目，每轮不再重写全部历史
+NOTE_KEYWORD_FILE = 'live_note_keyword.jsonl'
+OUTPUT_DIR = os.path.join('data', '03_analyzed')
+SUMMARY_FILE = 'live_sentiment_summary.csv'
+SUMMARY_COLUMNS = ['keyword', 'date', 'sentiment_label', 'count']
+# 与 process_data.py 一致的文本列
+TEXT_COLUMNS = {
+    'comments': ['content'],
+    'contents': ['desc', 'description', 'content'],
+}
+
+
+def default_watch_dirs():
+    """MediaCrawler 的默认输出目录 与 data/01_raw (fetch_data.py 让 MediaCrawler 直接分区写入此处)"""
+    config = {}
+    if os.path.exists(CONFIG_FILE):
+        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    crawler_dir = config.get("crawler_dir", "MediaCrawler-main")
+    platform = config.get("platform", "xhs")
+    raw_dir = os.path.normpath(config.get("data_raw_dir", os.path.join("data", "01_raw")))
+    return [os.path.join(crawler_dir, "data", platform, "csv"), raw_dir]
+
+
+def file_key(path):
+    """
+    以 (设备号, inode) 标识文件
+
+    文件在同一磁盘内移动 (如手动把 MediaCrawler 输出搬到 data/01_raw) 时 inode 不变，
+    仍能接着上次的偏移读取，不会重复处理。
+    """
+    st = os.stat(path)
+    return f"{st.st_dev}:{st.st_ino}"
+
+
+def complete_records_end(data):
+    """
+    返回 data 中最后一条完整 CSV 记录的结束位置
+
+    记录边界是引号外的换行：换行之前的双引号个数为偶数 (转义的 "" 成对出现，不影响奇偶)。
+    正在写入的半行、以及字段内含换行的评论都不会被截断。
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    newlines = np.flatnonzero(buf == ord('\n'))
+    if len(newlines) == 0:
+        return 0
+    quotes = np.cumsum(buf == ord('"'))
+    outside = newlines[quotes[newlines] % 2 == 0]
+    return int(outside[-1]) + 1 if len(outside) else 0
+
+
+def _parse(data, **kwargs):
+    for encoding in ('utf-8', 'gbk'):
+        try:
+            return pd.read_csv(io.BytesIO(data), encoding=encoding, **kwargs)
+        except UnicodeDecodeError:
+            continue
+    raise UnicodeDecodeError('utf-8', data[:1], 0, 1, '无法以 utf-8 / gbk 解码')
+
+
+def read_new_records(path, entry, max_bytes=MAX_BATCH_BYTES):
+    """
+    从上次的偏移读取新增的完整记录
+
+    Args:
+        path (str): 文件路径
+        entry (dict): 该文件的状态 {offset, columns}，读取后原地更新
+
+    Returns:
+        pd.DataFrame: 新增记录 (可能为空)
+    """
+    size = os.path.getsize(path)
+    if size < entry.get('offset', 0):
+        # 文件被截断或替换，从头读取
+        entry.update(offset=0, columns=None)
+    offset = entry.get('offset', 0)
+    if size == offset:
+        return pd.DataFrame()
+
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(max_bytes)
+
+    if offset == 0 and data.startswith(b'\xef\xbb\xbf'):
+        data, offset = data[3:], 3
+        entry['offset'] = offset
+
+    end = complete_records_end(data)
+    if end == 0:
+        return pd.DataFrame()
+
+    if not entry.get('columns'):
+        # 首次读取：第一行为表头 (表头不含换行)
+        header_end = data.index(b'\n') + 1
+        entry['columns'] = list(_parse(data[:header_end], nrows=0).columns)
+        data, offset, end = data[header_end:], offset + header_end, end - header_end
+        entry['offset'] = offset
+        if end == 0:
+            return pd.DataFrame()
+
+    # 全部按文本解析，类型由 schema 统一转换 (避免各微批推断出不同类型)
+    records = _parse(data[:end], header=None, names=entry['columns'], dtype=object)
+    entry['offset'] = offset + end
+    return records
+
+
+class LiveFollower:
+    """
+    跟随 (tail) 爬虫输出文件，对新增行做微批的清洗、分词、情感打分
+
+    结果追加到 data/03_analyzed/analyzed_live_{comments,contents}.csv，
+    并在每个微批后更新 关键词 x 日期 x 情感 的汇总 live_sentiment_summary.csv。
+
+    断点状态 live_state.json 只保存各文件的偏移 (规模随文件数而非行数增长)，且仅在变化时重写；
+    笔记 -> 关键词 映射追加写入 live_note_keyword.jsonl，汇总以 live_sentiment_summary.csv 为准，
+    两者都不随每轮状态重新序列化。
+    """
+
+    def __init__(self, watch_dirs, state_path=STATE_PATH, output_dir=OUTPUT_DIR, scorer=None):
+        self.watch_dirs = watch_dirs
+        self.state_path = state_path
+        self.output_dir = output_dir
+        self.scorer = scorer
+        self.note_keyword_path = os.path.join(os.path.dirname(state_path), NOTE_KEYWORD_FILE)
+        self.summary_path = os.path.join(output_dir, SUMMARY_FILE)
+
+        state = {}
+        if os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        self.state = {'files': state.get('files', {})}
+        # 旧版状态文件 (含 note_keyword / summary) 在下一轮重写为只含偏移的格式
+        self._saved_state = (json.dumps(self.state, ensure_ascii=False, sort_keys=True)
+                             if state.keys() == {'files'} else None)
+
+        self.note_keyword = self._load_note_keyword()
+        # 兼容旧版状态文件：映射与汇总曾整体存放在 live_state.json 中
+        if state.get('note_keyword'):
+            self._record_note_keyword(state['note_keyword'])
+        self.summary = self._load_summary(state.get('summary'))
+        self.summary_changed = False
+
+    def _load_note_keyword(self):
+        """逐行读取追加写入的映射，同一笔记以最后一次为准"""
+        mapping = {}
+        if os.path.exists(self.note_keyword_path):
+            with open(self.note_keyword_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        mapping.update(json.loads(line))
+                    except json.JSONDecodeError:
+                        # 中断时可能留下写了一半的最后一行，对应的笔记会在重读时再次写入
+                        continue
+        return mapping
+
+    def _record_note_keyword(self, pairs):
+        """只追加新增或关键词变化的笔记"""
+        changed = {}
+        for note_id, keyword in pairs.items() if isinstance(pairs, dict) else pairs:
+            if self.note_keyword.get(note_id) != keyword:
+                changed[note_id] = keyword
+        if not changed:
+            return
+        self.note_keyword.update(changed)
+        os.makedirs(os.path.dirname(self.note_keyword_path) or '.', exist_ok=True)
+        with open(self.note_keyword_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(changed, ensure_ascii=False) + '\n')
+
+    def _load_summary(self, legacy=None):
+        if os.path.exists(self.summary_path):
+            return pd.read_csv(self.summary_path, encoding='utf-8-sig',
+                               dtype={'keyword': str, 'date': str, 'sentiment_label': str},
+                               keep_default_na=False)[SUMMARY_COLUMNS]
+        return pd.DataFrame(legacy or [], columns=SUMMARY_COLUMNS)
+
+    def _save_state(self):
+        """状态只含文件偏移，内容未变化时不重写"""
+        serialized = json.dumps(self.state, ensure_ascii=False, sort_keys=True)
+        if serialized == self._saved_state:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(serialized)
+        os.replace(tmp_path, self.state_path)
+        self._saved_state = serialized
+
+    def _save_summary(self):
+        if not self.summary_changed:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = self.summary_path + '.tmp'
+        self.summary.to_csv(tmp_path, index=False, encoding='utf-8-sig')
+        os.replace(tmp_path, self.summary_path)
+        self.summary_changed = False
+
+    def _watched_files(self):
+        """监视目录下的扁平文件与 {comments,contents}/{date}/{keyword}.csv 分区文件"""
+        for watch_dir in self.watch_dirs:
+            if not os.path.isdir(watch_dir):
+                continue
+            for root, dirs, names in os.walk(watch_dir):
+                dirs.sort()
+                for name in sorted(names):
+                    path = os.path.join(root, name)
+                    dataset = raw_dataset_of(path) if name.endswith('.csv') else None
+                    if dataset:
+                        yield path, dataset[len('raw_'):]
+
+    def _assign_keyword(self, df, path, data_type):
+        """
+        关键词优先取文件路径 (分区文件或 data/01_raw 中的扁平文件)，其次取笔记的 source_keyword；
+        爬取中的评论文件两者都没有，先记为 unknown，由 poll 按 note_id 继承所属笔记的关键词
+        """
+        keyword = extract_keyword_from_filename(path)
+        if keyword != 'unknown':
+            df['keyword'] = keyword
+        elif data_type == 'contents' and 'source_keyword' in df.columns:
+            df['keyword'] = df['source_keyword'].astype(object).fillna('unknown').astype(str)
+        else:
+            df['keyword'] = 'unknown'
+
+        if data_type == 'contents' and 'note_id' in df.columns:
+            self._record_note_keyword(zip(df['note_id'].astype(str), df['keyword']))
+        return df
+
+    def poll(self):
+        """
+        处理一轮新增数据
+
+        Returns:
+            int: 本轮处理的行数
+        """
+        batches = {'comments': [], 'contents': []}
+        for path, data_type in self._watched_files():
+            try:
+                key = file_key(path)
+                entry = self.state['files'].setdefault(key, {})
+                entry['path'] = path
+                records = read_new_records(path, entry)
+            except (OSError, ValueError) as e:
+                # 文件可能恰好在读取时被搬运，下一轮再读
+                print(f"[Live] 读取 {path} 失败: {e}")
+                continue
+            if not records.empty:
+                # 与 process_data.py 一致：按 schema 裁剪列并转换类型
+                records = apply_schema(records, f"raw_{data_type}", STAGE_COLUMNS['process'])
+                batches[data_type].append(self._assign_keyword(records, path, data_type))
+
+        total = 0
+        # 先处理笔记，使同一轮中的评论能继承笔记的关键词
+        for data_type in ('contents', 'comments'):
+            if not batches[data_type]:
+                continue
+            df = pd.concat(batches[data_type], ignore_index=True)
+            if data_type == 'comments':
+                unknown = df['keyword'] == 'unknown'
+                if unknown.any() and 'note_id' in df.columns:
+                    df.loc[unknown, 'keyword'] = df.loc[unknown, 'note_id'].astype(str).map(
+                        self.note_keyword).fillna('unknown')
+            self._process(df, data_type)
+            total += len(df)
+
+        # 汇总先于偏移落盘：中断后重读的微批至多重复计数，不会丢失
+        self._save_summary()
+        self._save_state()
+        return total
+
+    def _process(self, df, data_type):
+        df = clean_and_tokenize(df, TEXT_COLUMNS[data_type])
+        df = df.drop(columns='tokens', errors='ignore')
+
+        if self.scorer is not None and 'cleaned_text' in df.columns:
+            from analysis.sentiment_analysis import score_dataframe
+            df = score_dataframe(df, self.scorer, 'cleaned_text')
+
+        output_path = os.path.join(self.output_dir, f"analyzed_live_{data_type}.csv")
+        os.makedirs(self.output_dir, exist_ok=True)
+        if os.path.exists(output_path):
+            # 列以已有文件的表头为准，新增列丢弃、缺失列留空
+            columns = read_header(output_path, 'utf-8-sig')
+            df.reindex(columns=columns).to_csv(output_path, mode='a', header=False, index=False, encoding='utf-8')
+        else:
+            df.to_csv(output_path, index=False, encoding='utf-8-sig')
+
+        if 'sentiment_label' in df.columns:
+            self._update_summary(df)
+
+        print(f"[Live] {time.strftime('%H:%M:%S')} {data_type}: +{len(df)} 行 -> {output_path}")
+
+    def _update_summary(self, df):
+        time_col = next((c for c in ('create_time', 'time') if c in df.columns), None)
+        if time_col:
+            dt = pd.to_datetime(pd.to_numeric(df[time_col], errors='coerce'), unit='ms', errors='coerce')
+            dates = dt.dt.strftime('%Y-%m-%d').fillna('unknown')
+        else:
+            dates = pd.Series('unknown', index=df.index)
+        counts = (df.assign(date=dates)
+                  .groupby(['keyword', 'date', 'sentiment_label']).size().rename('count').reset_index())
+        self.summary = (pd.concat([self.summary, counts], ignore_index=True)
+                        .groupby(['keyword', 'date', 'sentiment_label'], as_index=False)['count'].sum())
+        self.summary_changed = True
+
+    def run(self, interval=POLL_INTERVAL, once=False):
+        print(f"[Live] 开始跟随: {', '.join(self.watch_dirs)} (轮询间隔 {interval}s, Ctrl+C 退出)")
+        try:
+            while True:
+                processed = self.poll()
+                if once and not processed:
+                    break
+                if not processed:
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            print("\n[Live] 已停止")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="跟随爬虫输出，实时清洗、分词并情感打分")
+    parser.add_argument('--watch', nargs='+', default=None,
+                        help='跟随的目录 (默认: MediaCrawler 输出目录 与 data/01_raw)')
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help='轮询间隔 (秒)')
+    parser.add_argument('--once', action='store_true', help='处理完当前已有的新增数据后退出')
+    parser.add_argument('--no-score', action='store_true', help='只做清洗分词，不加载情感模型')
+    args = parser.parse_args()
+
+    scorer = None
+    if not args.no_score:
+        from analysis.sentiment_analysis import MultiHeadScorer, AspectHeads
+        scorer = MultiHeadScorer(aspect_heads=AspectHeads.load())
+
+    LiveFollower(args.watch or default_watch_dirs(), scorer=scorer).run(interval=args.interval, once=args.once)
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
 import os
 import glob
 import re
+import sys
 import pandas as pd
 
+# 将 src 加入 sys.path 以便导入模块
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from data_pipeline.schema import read_table, raw_dataset_of
+
 def merge_raw_data():
     raw_dir = os.path.join("data", "01_raw")
     
@@ -10,6 +16,7 @@ def merge_raw_data():
     # 提取: 类型(comments/contents), 日期, 关键词
     pattern = re.compile(r"search_(comments|contents)_(\d{4}-\d{2}-\d{2})_(.+)\.csv")
     
+    # 只处理 01_raw 顶层的扁平文件；{dtype}/{date}/{keyword}.csv 分区文件按日期分开存放，无需合并
     files = glob.glob(os.path.join(raw_dir, "*.csv"))
     groups = {}
 
@@ -47,11 +54,8 @@ def merge_raw_data():
         dfs = []
         for file_info in file_list:
             try:
-                # 尝试读取，处理编码
-                try:
-                    df = pd.read_csv(file_info['path'], encoding='utf-8-sig')
-                except UnicodeDecodeError:
-                    df = pd.read_csv(file_info['path'], encoding='gbk')
+                # 合并结果写回 01_raw，需原样保留全部列与文本 (ID 不会被读成 float 而丢失精度)
+                df = read_table(file_info['path'], raw_dataset_of(file_info['path']), dtype=object)
                 
                 dfs.append(df)
                 print(f"  读取: {file_info['filename']} ({len(df)} 条)")
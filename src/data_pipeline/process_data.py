@@ -1,19 +1,27 @@
 import pandas as pd
 import os
 import sys
-import glob
+import argparse
 
 # 将 src 加入 sys.path 以便导入模块
 sys.path.append(os.path.join(os.getcwd(), 'src'))
 
 from data_pipeline.preprocess.cleaner import clean_text
 from data_pipeline.preprocess.tokenizer import get_tokenizer
+from data_pipeline.sampling import stratified_reservoir_sample, PER_STRATUM, STRATUM_PERIOD
+from data_pipeline.schema import read_table, raw_dataset_of
+from data_pipeline.raw_files import parse_raw_path, list_raw_files
+from data_pipeline import profiling
 
 def extract_keyword_from_filename(filename):
     """
     文件名格式: search_comments_2026-01-25_山姆必买.csv
     提取: 山姆必买
+    分区文件 (comments/2026-01-25/山姆必买.csv) 需传入完整路径
     """
+    info = parse_raw_path(filename)
+    if info:
+        return info[2]
     try:
         # 去掉扩展名
         name_no_ext = os.path.splitext(filename)[0]
@@ -28,43 +36,62 @@ def extract_keyword_from_filename(filename):
     except:
         return "unknown"
 
-def process_and_merge(input_dir, output_dir, file_pattern, output_filename, target_col_names):
+def process_and_merge(input_dir, output_dir, dtype, output_filename, target_col_names, sample_per_stratum=None, sample_period=STRATUM_PERIOD):
     """
-    合并指定模式的所有 CSV 文件，进行清洗分词，并保存为一个总文件
+    合并指定类型 (comments / contents) 的所有原始 CSV 文件 (扁平文件与分区文件)，进行清洗分词，并保存为一个总文件
+
+    sample_per_stratum 不为空时进入抽样模式：按 关键词 x 时间段 分层蓄水池抽样，只对样本做清洗分词，
+    输出附带 stratum_size / sample_weight 列，供情感分析阶段给出带置信区间的占比估计。
     """
-    all_files = glob.glob(os.path.join(input_dir, file_pattern))
+    all_files = list_raw_files(input_dir, dtype)
     if not all_files:
-        print(f"在 {input_dir} 未找到匹配 {file_pattern} 的文件")
+        print(f"在 {input_dir} 未找到 {dtype} 原始文件")
+        return
+
+    if sample_per_stratum:
+        print(f"正在对 {len(all_files)} 个文件分层抽样 (类型: {dtype}, 每层 {sample_per_stratum} 条, 粒度 {sample_period})...")
+        with profiling.stage('sample') as rec:
+            merged_df = stratified_reservoir_sample(all_files, extract_keyword_from_filename,
+                                                    per_stratum=sample_per_stratum, period=sample_period)
+            rec['rows'] = len(merged_df)
+        if merged_df.empty:
+            return
+        print(f"抽样完成，共 {len(merged_df)} 行样本 (总体 {int(merged_df.groupby(['keyword', 'sample_period'])['stratum_size'].first().sum())} 行)")
+        save_processed(clean_and_tokenize(merged_df, target_col_names), output_dir, output_filename)
         return
 
-    print(f"正在合并 {len(all_files)} 个文件 (模式: {file_pattern})...")
+    print(f"正在合并 {len(all_files)} 个文件 (类型: {dtype})...")
     
     df_list = []
     
-    for file_path in all_files:
-        try:
-            # 尝试不同编码读取
+    with profiling.stage('read') as rec:
+        for file_path in all_files:
             try:
-                df = pd.read_csv(file_path, encoding='utf-8-sig')
-            except UnicodeDecodeError:
-                df = pd.read_csv(file_path, encoding='gbk')
-            
-            # 提取关键词并添加列
-            filename = os.path.basename(file_path)
-            keyword = extract_keyword_from_filename(filename)
-            df['keyword'] = keyword
-            
-            df_list.append(df)
-        except Exception as e:
-            print(f"读取文件 {file_path} 失败: {e}")
+                # 按 schema 只读取下游需要的列 (utf-8-sig 失败时自动改用 gbk)
+                df = read_table(file_path, raw_dataset_of(file_path), stage='process')
+                
+                # 提取关键词并添加列
+                keyword = extract_keyword_from_filename(file_path)
+                df['keyword'] = keyword
+                
+                df_list.append(df)
+            except Exception as e:
+                print(f"读取文件 {file_path} 失败: {e}")
 
-    if not df_list:
-        return
+        if not df_list:
+            return
 
-    # 合并 DataFrame
-    merged_df = pd.concat(df_list, ignore_index=True)
+        # 合并 DataFrame
+        merged_df = pd.concat(df_list, ignore_index=True)
+        rec['rows'] = len(merged_df)
     print(f"合并完成，共 {len(merged_df)} 行数据")
 
+    save_processed(clean_and_tokenize(merged_df, target_col_names), output_dir, output_filename)
+
+def clean_and_tokenize(merged_df, target_col_names):
+    """
+    对第一个存在的文本列进行清洗与分词，生成 cleaned_text / tokens / tokens_str 列
+    """
     # 确定目标文本列
     # target_col_names 是一个列表，如 ['desc', 'content']，优先匹配存在的
     target_col = None
@@ -77,46 +104,72 @@ def process_and_merge(input_dir, output_dir, file_pattern, output_filename, targ
         print(f"正在对列 '{target_col}' 进行清洗和分词...")
         # 1. 清洗
         # 填充 NaN 防止报错
-        merged_df[target_col] = merged_df[target_col].fillna('')
-        merged_df['cleaned_text'] = merged_df[target_col].astype(str).apply(clean_text)
+        with profiling.stage('clean_text', rows=len(merged_df)):
+            merged_df[target_col] = merged_df[target_col].fillna('')
+            merged_df['cleaned_text'] = merged_df[target_col].astype(str).apply(clean_text)
         
-        # 2. 分词
-        tokenizer = get_tokenizer()
-        merged_df['tokens'] = merged_df['cleaned_text'].apply(tokenizer.tokenize)
-        merged_df['tokens_str'] = merged_df['tokens'].apply(lambda x: ' '.join(x))
+        # 2. 分词 (词典加载单独计时，与逐行分词区分)
+        with profiling.stage('load_tokenizer'):
+            tokenizer = get_tokenizer()
+        with profiling.stage('tokenize', rows=len(merged_df)):
+            merged_df['tokens'] = merged_df['cleaned_text'].apply(tokenizer.tokenize)
+            merged_df['tokens_str'] = merged_df['tokens'].apply(lambda x: ' '.join(x))
     else:
         print("Warning: 未找到文本列，仅合并数据，不进行NLP处理")
 
-    # 保存
+    return merged_df
+
+def save_processed(merged_df, output_dir, output_filename):
     output_path = os.path.join(output_dir, output_filename)
-    merged_df.to_csv(output_path, index=False, encoding='utf-8-sig')
+    with profiling.stage('write', rows=len(merged_df)):
+        merged_df.to_csv(output_path, index=False, encoding='utf-8-sig')
     print(f"保存合并后的文件至: {output_path}")
 
 def main():
+    parser = argparse.ArgumentParser(description="合并原始数据并进行清洗分词")
+    parser.add_argument('--sample', type=int, nargs='?', const=PER_STRATUM, default=None, metavar='PER_STRATUM',
+                        help=f'抽样预览模式：按 关键词 x 时间段 分层抽样，每层保留的条数 (默认 {PER_STRATUM})')
+    parser.add_argument('--sample-period', default=STRATUM_PERIOD,
+                        help="抽样分层的时间粒度：D 按天 / W 按周 / M 按月")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start_from_args('process_data', args)
+
     raw_dir = os.path.join('data', '01_raw')
     processed_dir = os.path.join('data', '02_processed')
     os.makedirs(processed_dir, exist_ok=True)
+
+    # 抽样模式输出 processed_sample_*，不覆盖全量结果
+    tag = 'sample' if args.sample else 'all'
     
-    # 1. 处理所有 search_comments_*.csv
-    process_and_merge(
-        input_dir=raw_dir,
-        output_dir=processed_dir,
-        file_pattern="search_comments_*.csv",
-        output_filename="processed_all_comments.csv",
-        target_col_names=['content']
-    )
+    # 1. 处理所有评论文件 (search_comments_*.csv 与 comments/ 分区)
+    with profiling.stage('comments'):
+        process_and_merge(
+            input_dir=raw_dir,
+            output_dir=processed_dir,
+            dtype="comments",
+            output_filename=f"processed_{tag}_comments.csv",
+            target_col_names=['content'],
+            sample_per_stratum=args.sample,
+            sample_period=args.sample_period
+        )
     
     print("-" * 30)
 
-    # 2. 处理所有 search_contents_*.csv
+    # 2. 处理所有笔记文件 (search_contents_*.csv 与 contents/ 分区)
     # 注意: MediaCrawler 导出的笔记内容列名可能是 'desc'
-    process_and_merge(
-        input_dir=raw_dir,
-        output_dir=processed_dir,
-        file_pattern="search_contents_*.csv",
-        output_filename="processed_all_contents.csv",
-        target_col_names=['desc', 'description', 'content']
-    )
+    with profiling.stage('contents'):
+        process_and_merge(
+            input_dir=raw_dir,
+            output_dir=processed_dir,
+            dtype="contents",
+            output_filename=f"processed_{tag}_contents.csv",
+            target_col_names=['desc', 'description', 'content'],
+            sample_per_stratum=args.sample,
+            sample_period=args.sample_period
+        )
+
+    profiling.finish()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,285 @@
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import platform
+import threading
+import tracemalloc
+import unicodedata
+from contextlib import contextmanager
+from datetime import datetime
+
+# 全局配置
+# 运行报告与 cProfile 结果的输出目录
+REPORT_DIR = os.path.join('data', 'reports')
+# RSS 采样间隔 (秒)
+SAMPLE_INTERVAL = 0.05
+# 报告中保留的 cProfile 函数条数 (按累计耗时)
+PROFILE_TOP_N = 30
+# 一屏摘要中展示的最大层级
+SUMMARY_DEPTH = 3
+
+_run = None
+
+
+def current_rss_mb():
+    """当前进程的常驻内存 (MB)；无法获取时返回 None (此时改用 tracemalloc)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class _RunProfiler:
+    """
+    一次运行的分阶段计时与内存统计
+
+    阶段可以嵌套 (如 comments/read)，同一路径的阶段多次进入时累加耗时、行数与调用次数 (如逐批的模型前向)。
+    峰值内存优先用后台线程按 SAMPLE_INTERVAL 采样 RSS；无法读取 RSS 的平台 (Windows 未装 psutil)
+    改用 tracemalloc，只统计 Python 对象分配，数值偏小但可比较各阶段的相对大小。
+    """
+
+    def __init__(self, script, cprofile_stage=None, report_dir=REPORT_DIR):
+        self.script = script
+        self.report_dir = report_dir
+        self.started_at = datetime.now()
+        self.start_wall, self.start_cpu = time.perf_counter(), time.process_time()
+        self.records = {}
+        self.stack = []
+        self.lock = threading.Lock()
+
+        self.cprofile_stage = cprofile_stage
+        self.cprofile = cProfile.Profile() if cprofile_stage else None
+
+        self.memory_metric = 'rss' if current_rss_mb() is not None else 'tracemalloc'
+        self.run_peak = 0.0
+        self._stop = threading.Event()
+        if self.memory_metric == 'rss':
+            self._sampler = threading.Thread(target=self._sample_loop, daemon=True)
+            self._sampler.start()
+        else:
+            tracemalloc.start()
+
+    def _memory_now(self):
+        """采样当前内存，并把 tracemalloc 峰值计入所有未结束的阶段"""
+        if self.memory_metric == 'rss':
+            return current_rss_mb() or 0.0
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        with self.lock:
+            for rec in self.stack:
+                rec['_peak'] = max(rec['_peak'], peak / 2 ** 20)
+            self.run_peak = max(self.run_peak, peak / 2 ** 20)
+        return current / 2 ** 20
+
+    def _sample_loop(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            rss = current_rss_mb() or 0.0
+            with self.lock:
+                for rec in self.stack:
+                    rec['_peak'] = max(rec['_peak'], rss)
+                self.run_peak = max(self.run_peak, rss)
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        path = '/'.join([r['path'] for r in self.stack[-1:]] + [name])
+        memory = self._memory_now()
+        rec = {'path': path, 'rows': rows, '_peak': memory}
+        # 进入时先占位，使报告中父阶段排在子阶段之前
+        self._entry(path)
+        with self.lock:
+            self.stack.append(rec)
+        profiling = self.cprofile is not None and name == self.cprofile_stage
+        if profiling:
+            self.cprofile.enable()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield rec
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            if profiling:
+                self.cprofile.disable()
+            end_memory = self._memory_now()
+            with self.lock:
+                self.stack.pop()
+                self._merge(rec, wall, cpu, max(rec['_peak'], end_memory), end_memory - memory)
+                # 子阶段的峰值同时是父阶段的峰值
+                for parent in self.stack:
+                    parent['_peak'] = max(parent['_peak'], rec['_peak'])
+
+    def _entry(self, path):
+        return self.records.setdefault(path, {
+            'stage': path, 'calls': 0, 'wall_sec': 0.0, 'cpu_sec': 0.0, 'rows': None,
+            'peak_memory_mb': 0.0, 'memory_growth_mb': 0.0,
+        })
+
+    def _merge(self, rec, wall, cpu, peak, growth):
+        total = self._entry(rec['path'])
+        total['calls'] += 1
+        total['wall_sec'] += wall
+        total['cpu_sec'] += cpu
+        if rec['rows'] is not None:
+            total['rows'] = (total['rows'] or 0) + int(rec['rows'])
+        total['peak_memory_mb'] = max(total['peak_memory_mb'], peak)
+        total['memory_growth_mb'] += growth
+
+    def report(self):
+        """汇总为可序列化的运行报告"""
+        stages = []
+        for rec in self.records.values():
+            rows, wall = rec['rows'], rec['wall_sec']
+            stages.append({**rec, 'rows_per_sec': rows / wall if rows and wall > 0 else None})
+        report = {
+            'script': self.script,
+            'argv': sys.argv[1:],
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'wall_sec': time.perf_counter() - self.start_wall,
+            'cpu_sec': time.process_time() - self.start_cpu,
+            'peak_memory_mb': max([self.run_peak] + [s['peak_memory_mb'] for s in stages]),
+            'memory_metric': self.memory_metric,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'stages': stages,
+        }
+        if self.cprofile is not None:
+            top = []
+            # 指定的阶段从未执行时 profiler 为空，pstats.Stats 会抛出 TypeError
+            if self.cprofile.getstats():
+                stats = pstats.Stats(self.cprofile)
+                top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP_N]
+            report['cprofile'] = {
+                'stage': self.cprofile_stage,
+                'top_functions': [{
+                    'function': f"{os.path.basename(file)}:{line}({func})", 'ncalls': nc,
+                    'tottime': tt, 'cumtime': ct,
+                } for (file, line, func), (cc, nc, tt, ct, callers) in top],
+            }
+        return report
+
+    def close(self):
+        self._stop.set()
+        if self.memory_metric == 'tracemalloc':
+            tracemalloc.stop()
+
+
+def start(script, cprofile_stage=None, report_dir=REPORT_DIR):
+    """开启本次运行的分阶段统计 (未调用时 stage() 不做任何统计)"""
+    global _run
+    _run = _RunProfiler(script, cprofile_stage=cprofile_stage, report_dir=report_dir)
+    return _run
+
+
+def enabled():
+    return _run is not None
+
+
+def add_arguments(parser):
+    """为脚本添加 --profile / --profile-stage 参数 (process_data / sentiment_analysis / visualizer 共用)"""
+    parser.add_argument('--profile', action='store_true',
+                        help=f'记录各阶段耗时、CPU 时间、行/秒与峰值内存，输出运行报告到 {REPORT_DIR}')
+    parser.add_argument('--profile-stage', default=None, metavar='STAGE',
+                        help='对指定阶段 (如 tokenize、forward、plot_distinctive_terms) 运行 cProfile，隐含 --profile')
+
+
+def start_from_args(script, args):
+    """按命令行参数决定是否开启统计"""
+    if args.profile or args.profile_stage:
+        return start(script, cprofile_stage=args.profile_stage)
+    return None
+
+
+@contextmanager
+def stage(name, rows=None):
+    """
+    统计一个阶段 (可嵌套) 的耗时、CPU 时间、行数与峰值内存
+
+    Args:
+        name (str): 阶段名；嵌套时路径为 父阶段/子阶段，与 --profile-stage 比较的是该名字
+        rows (int, optional): 处理的行数；也可在块内通过 rec['rows'] = n 补充
+
+    Yields:
+        dict: 阶段记录 (未开启统计时为空字典)
+    """
+    if _run is None:
+        yield {}
+        return
+    with _run.stage(name, rows=rows) as rec:
+        yield rec
+
+
+def finish():
+    """
+    结束统计：写出 JSON 运行报告 (及 cProfile 的 .prof 文件) 并打印一屏摘要
+
+    Returns:
+        str | None: 报告路径；未开启统计时返回 None
+    """
+    global _run
+    if _run is None:
+        return None
+    run, _run = _run, None
+    run.close()
+    report = run.report()
+
+    os.makedirs(run.report_dir, exist_ok=True)
+    tag = f"{run.script}_{run.started_at.strftime('%Y%m%d_%H%M%S')}"
+    if run.cprofile is not None and report['cprofile']['top_functions']:
+        prof_path = os.path.join(run.report_dir, f"{tag}_{run.cprofile_stage}.prof")
+        run.cprofile.dump_stats(prof_path)
+        report['cprofile']['prof_file'] = prof_path
+    report_path = os.path.join(run.report_dir, f"run_{tag}.json")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print_summary(report)
+    print(f"运行报告已保存: {report_path}")
+    return report_path
+
+
+def _cell(text, width, left=False):
+    """按终端显示宽度补齐 (中文字符占两列)"""
+    text = str(text)
+    pad = width - sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1 for ch in text)
+    return text + ' ' * pad if left else ' ' * pad + text
+
+
+def print_summary(report):
+    """一屏摘要：各阶段按层级缩进，列出耗时、占比、CPU、行/秒与峰值内存"""
+    widths = (36, 9, 7, 9, 10, 10, 13)
+    memory_label = '峰值RSS(MB)' if report['memory_metric'] == 'rss' else '峰值分配(MB)'
+    print("\n" + "=" * sum(widths))
+    print(f"运行报告: {report['script']}  总耗时 {report['wall_sec']:.1f}s  CPU {report['cpu_sec']:.1f}s  "
+          f"峰值内存 {report['peak_memory_mb']:.0f} MB ({report['memory_metric']})")
+    print("-" * sum(widths))
+    header = ['阶段', '耗时(s)', '占比', 'CPU(s)', '行数', '行/秒', memory_label]
+    print(''.join(_cell(h, w, left=i == 0) for i, (h, w) in enumerate(zip(header, widths))))
+    total = report['wall_sec'] or 1.0
+    for s in report['stages']:
+        depth = s['stage'].count('/')
+        if depth >= SUMMARY_DEPTH:
+            continue
+        name = '  ' * depth + s['stage'].rsplit('/', 1)[-1]
+        if s['calls'] > 1:
+            name += f" x{s['calls']}"
+        row = [name, f"{s['wall_sec']:.2f}", f"{s['wall_sec'] / total:.0%}", f"{s['cpu_sec']:.2f}",
+               s['rows'] if s['rows'] is not None else '-',
+               f"{s['rows_per_sec']:.0f}" if s['rows_per_sec'] else '-', f"{s['peak_memory_mb']:.0f}"]
+        print(''.join(_cell(v, w, left=i == 0) for i, (v, w) in enumerate(zip(row, widths))))
+    if 'cprofile' in report:
+        print("-" * sum(widths))
+        top = report['cprofile']['top_functions']
+        if not top:
+            print(f"cProfile: 没有名为 {report['cprofile']['stage']} 的阶段被执行")
+        else:
+            print(f"cProfile ({report['cprofile']['stage']}) 累计耗时前 10 的函数:")
+        for fn in top[:10]:
+            print(f"  {fn['cumtime']:>8.2f}s  {fn['ncalls']:>9}  {fn['function']}")
+    print("=" * sum(widths))
@@ -0,0 +1,61 @@
+import os
+import re
+
+# 全局配置
+# 原始数据的两种布局 (可在 data/01_raw 中并存)：
+#   扁平文件: search_comments_2026-01-25_山姆必买.csv (早期 fetch_data.py 搬运并重命名的文件)
+#   分区文件: comments/2026-01-25/山姆必买.csv       (MediaCrawler 以 --partitioned 直接写入)
+FLAT_FILE_PATTERN = re.compile(r"search_(comments|contents)_(\d{4}-\d{2}-\d{2})_(.+)\.csv$")
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}$")
+DTYPES = ('comments', 'contents')
+
+
+def parse_raw_path(path):
+    """
+    由路径解析 (数据类型, 日期, 关键词)
+
+    Args:
+        path (str): 扁平文件名或分区文件路径
+
+    Returns:
+        tuple | None: (dtype, date, keyword)，无法识别时返回 None
+    """
+    name = os.path.basename(path)
+    match = FLAT_FILE_PATTERN.match(name)
+    if match:
+        return match.groups()
+
+    parent = os.path.dirname(os.path.abspath(path))
+    date, dtype = os.path.basename(parent), os.path.basename(os.path.dirname(parent))
+    if name.endswith('.csv') and dtype in DTYPES and DATE_PATTERN.match(date):
+        return dtype, date, name[:-len('.csv')]
+    return None
+
+
+def list_raw_files(raw_dir, dtype=None):
+    """
+    列出原始数据文件 (扁平文件 + {dtype}/{date}/{keyword}.csv 分区文件)
+
+    Args:
+        raw_dir (str): 原始数据目录
+        dtype (str, optional): 'comments' / 'contents'，为 None 时返回全部
+
+    Returns:
+        list: 按 (数据类型, 日期, 关键词) 排序的路径
+    """
+    if not os.path.isdir(raw_dir):
+        return []
+
+    files = [os.path.join(raw_dir, f) for f in os.listdir(raw_dir)]
+    for part_type in DTYPES:
+        part_dir = os.path.join(raw_dir, part_type)
+        if not os.path.isdir(part_dir):
+            continue
+        for date in os.listdir(part_dir):
+            date_dir = os.path.join(part_dir, date)
+            if os.path.isdir(date_dir):
+                files += [os.path.join(date_dir, f) for f in os.listdir(date_dir)]
+
+    parsed = [(parse_raw_path(f), f) for f in files if os.path.isfile(f)]
+    return [f for info, f in sorted(parsed, key=lambda x: (x[0] or ('',), x[1]))
+            if info and (dtype is None or info[0] == dtype)]
@@ -0,0 +1,130 @@
+import pandas as pd
+import numpy as np
+
+from data_pipeline.schema import read_table, raw_dataset_of
+
+# 全局配置
+# 每个分层 (关键词 x 时间段) 保留的样本数
+PER_STRATUM = 20
+# 分层的时间粒度 (pandas 频率字符串)：'D' 按天，'W' 按周，'M' 按月
+STRATUM_PERIOD = 'D'
+# 流式读取原始 CSV 的分块行数
+CHUNK_SIZE = 50_000
+# 置信区间的 z 值 (95%)
+Z_95 = 1.96
+
+STRATUM_COLS = ['keyword', 'sample_period']
+
+
+def _period_of(chunk, period):
+    """按记录自身的发布时间 (毫秒时间戳) 划分时间段，无时间的记为 unknown"""
+    for col in ('create_time', 'time'):
+        if col in chunk.columns:
+            dt = pd.to_datetime(pd.to_numeric(chunk[col], errors='coerce'), unit='ms', errors='coerce')
+            return dt.dt.to_period(period).astype(str).where(dt.notna(), 'unknown')
+    return pd.Series('unknown', index=chunk.index)
+
+
+def stratified_reservoir_sample(files, keyword_of, per_stratum=PER_STRATUM, period=STRATUM_PERIOD,
+                                chunk_size=CHUNK_SIZE, seed=42):
+    """
+    对多个原始 CSV 做按 关键词 x 时间段 分层的蓄水池抽样
+
+    每行分配一个均匀随机键，每层只保留键最小的 per_stratum 行 (bottom-k 抽样，与逐行蓄水池抽样等价)。
+    文件按块流式读取，内存只与 分层数 x per_stratum + 块大小 有关，与文件总行数无关。
+
+    Args:
+        files (list[str]): 原始 CSV 路径
+        keyword_of (callable): 由文件路径得到关键词，如 process_data.extract_keyword_from_filename
+        per_stratum (int): 每层样本数
+        period (str): 分层时间粒度
+        chunk_size (int): 分块行数
+        seed (int): 随机种子，保证预览结果可复现
+
+    Returns:
+        pd.DataFrame: 抽样结果，附加 keyword / sample_period / stratum_size (该层总行数) / sample_weight 列
+    """
+    rng = np.random.default_rng(seed)
+    held = None
+    population = []
+
+    for file_path in files:
+        keyword = keyword_of(file_path)
+        # 与 process_data.py 一致：优先 utf-8-sig，解码失败时整文件改用 gbk 重读 (先回滚本文件的中间状态)
+        held_before, population_before = held, len(population)
+        for encoding in ('utf-8-sig', 'gbk'):
+            held, population = held_before, population[:population_before]
+            try:
+                for chunk in read_table(file_path, raw_dataset_of(file_path), stage='process',
+                                        chunksize=chunk_size, encoding=encoding):
+                    chunk['keyword'] = keyword
+                    chunk['sample_period'] = _period_of(chunk, period)
+                    chunk['_sample_key'] = rng.random(len(chunk))
+                    population.append(chunk.groupby(STRATUM_COLS).size())
+                    # 每块合并后立即裁剪到每层 per_stratum 行
+                    merged = chunk if held is None else pd.concat([held, chunk], ignore_index=True)
+                    held = merged.sort_values('_sample_key').groupby(STRATUM_COLS, sort=False).head(per_stratum)
+                break
+            except UnicodeDecodeError:
+                continue
+            except Exception as e:
+                print(f"抽样读取文件 {file_path} 失败: {e}")
+                held, population = held_before, population[:population_before]
+                break
+
+    if held is None or held.empty:
+        return pd.DataFrame()
+
+    sizes = pd.concat(population).groupby(level=[0, 1]).sum().rename('stratum_size')
+    sample = held.drop(columns='_sample_key').join(sizes, on=STRATUM_COLS)
+    taken = sample.groupby(STRATUM_COLS)['keyword'].transform('size')
+    sample['sample_weight'] = sample['stratum_size'] / taken
+    return sample.sort_values(STRATUM_COLS, ignore_index=True)
+
+
+def stratified_shares(df, group_col='keyword', label_col='sentiment_label', z=Z_95):
+    """
+    分层抽样下的情感占比估计与置信区间
+
+    组内占比 p = sum_h W_h * p_h (W_h 为第 h 层在组内的总体占比)，
+    方差 Var(p) = sum_h W_h^2 * p_h (1 - p_h) / (n_h - 1) * (1 - n_h / N_h)，含有限总体校正。
+    group_col 为 None 时给出整体估计。
+
+    Returns:
+        pd.DataFrame: 列为 [group, label, share, ci_low, ci_high, n_sample, n_population]
+    """
+    columns = ['group', 'label', 'share', 'ci_low', 'ci_high', 'n_sample', 'n_population']
+    if label_col not in df.columns or 'stratum_size' not in df.columns:
+        return pd.DataFrame(columns=columns)
+
+    data = df.copy()
+    data['_group'] = data[group_col].astype(str) if group_col else '全部'
+    # 分层列按 schema 可能读为 category，多列分组时会展开成未出现的组合，统一转为字符串
+    data[STRATUM_COLS] = data[STRATUM_COLS].astype(str)
+    labels = sorted(data[label_col].dropna().unique())
+
+    # 层级统计：n_h, N_h, p_h (每个标签)
+    strata = data.groupby(['_group'] + STRATUM_COLS).agg(n_h=(label_col, 'size'), N_h=('stratum_size', 'first'))
+    hits = pd.crosstab([data['_group']] + [data[c] for c in STRATUM_COLS], data[label_col])
+    p_h = hits.div(strata['n_h'], axis=0).reindex(columns=labels, fill_value=0)
+
+    N_group = strata.groupby(level=0)['N_h'].transform('sum')
+    W_h = strata['N_h'] / N_group
+    fpc = (1 - strata['n_h'] / strata['N_h']).clip(lower=0)
+    # 单样本层无法估计层内方差，按 n_h - 1 >= 1 处理
+    denom = (strata['n_h'] - 1).clip(lower=1)
+
+    share = p_h.mul(W_h, axis=0).groupby(level=0).sum()
+    var = (p_h * (1 - p_h)).mul(W_h ** 2 * fpc / denom, axis=0).groupby(level=0).sum()
+    half = z * np.sqrt(var)
+
+    result = share.stack().rename('share').to_frame()
+    result['ci_low'] = (share - half).clip(lower=0).stack()
+    result['ci_high'] = (share + half).clip(upper=1).stack()
+    result.index.names = ['group', 'label']
+    result = result.reset_index()
+    n_sample = strata.groupby(level=0)['n_h'].sum()
+    n_population = strata.groupby(level=0)['N_h'].sum()
+    result['n_sample'] = result['group'].map(n_sample)
+    result['n_population'] = result['group'].map(n_population)
+    return result[columns]
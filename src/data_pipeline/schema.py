@@ -0,0 +1,262 @@
+import pandas as pd
+import numpy as np
+import os
+import re
+import csv
+import sys
+import time
+import glob
+import argparse
+
+# 将 src 加入 sys.path 以便导入模块
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from data_pipeline.raw_files import parse_raw_path, list_raw_files
+
+# 全局配置
+# 各数据集的列类型
+#   - ID 与文本一律按 object 读取 (C 解析器直接保留原字符串，不做类型推断)，
+#     避免 parent_comment_id 等列因空值被推断成 float
+#   - 低基数文本 (关键词、IP 属地、标签) 使用 category
+#   - 毫秒时间戳与计数使用可空整数 Int64 (原始数据中存在缺失值)
+ID = object
+TEXT = object
+CATEGORY = 'category'
+TIMESTAMP = 'Int64'
+COUNT = 'Int64'
+
+SCHEMAS = {
+    'raw_comments': {
+        'comment_id': ID, 'create_time': TIMESTAMP, 'ip_location': CATEGORY, 'note_id': ID,
+        'content': TEXT, 'user_id': ID, 'nickname': TEXT, 'avatar': TEXT,
+        'sub_comment_count': COUNT, 'pictures': TEXT, 'parent_comment_id': ID,
+        'last_modify_ts': TIMESTAMP, 'like_count': COUNT,
+    },
+    'raw_contents': {
+        'note_id': ID, 'type': CATEGORY, 'title': TEXT, 'desc': TEXT, 'video_url': TEXT,
+        'time': TIMESTAMP, 'last_update_time': TIMESTAMP, 'user_id': ID, 'nickname': TEXT, 'avatar': TEXT,
+        'liked_count': COUNT, 'collected_count': COUNT, 'comment_count': COUNT, 'share_count': COUNT,
+        'ip_location': CATEGORY, 'image_list': TEXT, 'tag_list': TEXT, 'last_modify_ts': TIMESTAMP,
+        'note_url': TEXT, 'source_keyword': CATEGORY, 'xsec_token': TEXT,
+    },
+}
+
+# 02_processed：原始列 (去掉下游不使用的 URL / 头像 / token 等) + 预处理列
+SCHEMAS['processed'] = {
+    **{c: t for c, t in SCHEMAS['raw_comments'].items() if c not in ('avatar', 'pictures', 'last_modify_ts')},
+    **{c: t for c, t in SCHEMAS['raw_contents'].items()
+       if c not in ('avatar', 'video_url', 'image_list', 'last_modify_ts', 'note_url', 'xsec_token')},
+    'keyword': CATEGORY, 'cleaned_text': TEXT, 'tokens': TEXT, 'tokens_str': TEXT,
+    # 抽样模式 (sampling.py) 附加的列
+    'sample_period': CATEGORY, 'stratum_size': COUNT, 'sample_weight': 'float64',
+}
+
+# 03_analyzed：预处理列 + 情感 / 方面 / 聚类结果
+SCHEMAS['analyzed'] = {
+    **SCHEMAS['processed'],
+    'model_label': CATEGORY, 'model_confidence': 'float64',
+    'sentiment_label': CATEGORY, 'sentiment_score': 'float64',
+    'aspect_label': CATEGORY, 'cluster_id': 'Int64',
+}
+# 方面概率列 aspect_{name} 数量随方面头变化，按前缀匹配
+PREFIX_DTYPES = {'analyzed': {'aspect_': 'float32'}}
+
+# 各阶段需要的列 (None 表示读取全部列)
+STAGE_COLUMNS = {
+    # process_data.py / sampling.py：读取原始文件，写入 02_processed
+    'process': [c for c in {**SCHEMAS['raw_comments'], **SCHEMAS['raw_contents']} if c in SCHEMAS['processed']],
+    # sketches.py：去重用户、IP 属地、词频
+    'sketch': ['user_id', 'ip_location', 'content', 'desc', 'description'],
+    # visualizer.py (含突发词、共现、特征词图)
+    'visualize': ['comment_id', 'note_id', 'keyword', 'create_time', 'time', 'date', 'tokens_str',
+                  'sentiment_label', 'sentiment_score'],
+    # burst_detection.py
+    'burst': ['keyword', 'create_time', 'time', 'date', 'tokens_str'],
+    # cooccurrence.py
+    'cooccurrence': ['tokens_str', 'sentiment_label'],
+    # keyword_extraction.py
+    'keywords': ['comment_id', 'note_id', 'keyword', 'sentiment_label', 'tokens_str'],
+    # embedding_store.py / similarity_search.py
+    'embedding': ['comment_id', 'note_id', 'cleaned_text'],
+    'search': ['comment_id', 'note_id', 'keyword', 'sentiment_label', 'cleaned_text'],
+    # topic_clustering.py 训练阶段 (分配阶段需原样写回全部列)
+    'cluster': ['comment_id', 'note_id', 'keyword', 'tokens_str'],
+}
+
+ENCODINGS = ('utf-8-sig', 'gbk')
+# 计数中的中文量级，如 "2.1万"
+UNIT_SCALE = {'万': 1e4, '亿': 1e8}
+
+
+def raw_dataset_of(filename):
+    """由原始文件路径判断数据集：search_comments_* / comments 分区 -> raw_comments，笔记同理"""
+    info = parse_raw_path(filename)
+    if info:
+        return f"raw_{info[0]}"
+    # MediaCrawler 输出目录中尚未带关键词的文件，如 search_comments_2026-01-25.csv
+    match = re.search(r"_(comments|contents)_", os.path.basename(filename))
+    return f"raw_{match.group(1)}" if match else None
+
+
+def dtypes_for(dataset, columns):
+    """给定实际列名，返回 read_csv 使用的 dtype 映射 (含前缀匹配的列)"""
+    schema = SCHEMAS.get(dataset, {})
+    dtypes = {c: schema[c] for c in columns if c in schema}
+    for prefix, dtype in PREFIX_DTYPES.get(dataset, {}).items():
+        dtypes.update({c: dtype for c in columns if c.startswith(prefix) and c not in dtypes})
+    return dtypes
+
+
+def to_count(values):
+    """
+    把计数 / 时间戳列转为可空整数
+
+    平台导出的计数是展示用字符串，如 "2.1万"、"10万+"；错位行中的非数值记为缺失。
+    """
+    s = pd.Series(values, copy=False)
+    try:
+        # 绝大多数列是纯数字，numpy 直接转换比 pd.to_numeric(errors='coerce') 快数倍
+        v = s.to_numpy(dtype=object).astype(np.float64)
+    except (ValueError, TypeError):
+        numeric = pd.to_numeric(s, errors='coerce')
+        residual = numeric.isna() & s.notna()
+        if residual.any():
+            text = s[residual].astype(str).str.strip().str.rstrip('+')
+            scale = text.str[-1].map(UNIT_SCALE)
+            numeric[residual] = pd.to_numeric(text.str[:-1], errors='coerce') * scale
+        v = numeric.to_numpy(dtype=np.float64)
+    missing = np.isnan(v)
+    ints = np.where(missing, 0, np.rint(v)).astype(np.int64)
+    return pd.Series(pd.arrays.IntegerArray(ints, missing), index=s.index)
+
+
+def apply_schema(df, dataset, columns=None):
+    """
+    对已在内存中的数据做列裁剪与类型转换 (如 live_follow.py 从字节流解析出的数据)
+    """
+    if columns is not None:
+        df = df[[c for c in df.columns if c in set(columns)]]
+    df = df.copy()
+    for col, dtype in dtypes_for(dataset, df.columns).items():
+        if dtype in (TIMESTAMP, COUNT):
+            df[col] = to_count(df[col])
+        elif dtype is object:
+            df[col] = df[col].astype(str).where(df[col].notna(), np.nan)
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def read_header(path, encoding):
+    """只读取首行得到列名 (比 pd.read_csv(nrows=0) 开销小得多，小文件很多时差异明显)"""
+    with open(path, 'r', encoding=encoding, newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def read_table(path, dataset, stage=None, columns=None, chunksize=None, encoding=None, **kwargs):
+    """
+    按 schema 读取 CSV：只解析该阶段需要的列，文本 / 类别列直接以声明的类型解析
+
+    计数与时间戳列先按文本解析，再由 to_count 向量化转换 (原始数据中的 "2.1万" 与错位行会让 C 解析器
+    的整数解析整体失败，逐文件重试反而更慢)。
+
+    Args:
+        path (str): CSV 路径
+        dataset (str): SCHEMAS 中的数据集名 (raw_comments / raw_contents / processed / analyzed)；
+                       未登记的数据集只做列裁剪，类型交给 pandas 推断
+        stage (str, optional): STAGE_COLUMNS 中的阶段名，决定读取哪些列
+        columns (list, optional): 直接指定列 (优先于 stage)
+        chunksize (int, optional): 分块读取，返回迭代器
+        encoding (str, optional): 指定编码；默认先 utf-8-sig，失败再 gbk
+        **kwargs: 传给 pd.read_csv；若给出 dtype 则覆盖 schema 的类型且不做计数转换
+                  (merge_data.py 以 dtype=object 原样保留 "2.1万" 等展示文本)
+
+    Returns:
+        pd.DataFrame 或 分块迭代器
+    """
+    wanted = columns if columns is not None else STAGE_COLUMNS.get(stage) if stage else None
+    encodings = (encoding,) if encoding else ENCODINGS
+
+    for enc in encodings:
+        try:
+            header = read_header(path, enc)
+            use = [c for c in header if wanted is None or c in wanted]
+            dtypes = dtypes_for(dataset, use)
+            numeric = [c for c, t in dtypes.items() if t in (TIMESTAMP, COUNT)]
+            parse_dtypes = {c: (object if c in numeric else t) for c, t in dtypes.items()}
+            if 'dtype' in kwargs:
+                numeric, parse_dtypes = [], kwargs['dtype']
+            reader = pd.read_csv(path, encoding=enc, usecols=use, chunksize=chunksize,
+                                 **{**kwargs, 'dtype': parse_dtypes})
+            if chunksize:
+                return _convert_chunks(reader, numeric)
+            for col in numeric:
+                reader[col] = to_count(reader[col])
+            return reader
+        except UnicodeDecodeError:
+            if enc == encodings[-1]:
+                raise
+
+
+def _convert_chunks(reader, numeric):
+    for chunk in reader:
+        for col in numeric:
+            chunk[col] = to_count(chunk[col])
+        yield chunk
+
+
+def benchmark(raw_dir, analyzed_dir, repeat=3):
+    """
+    对比默认 read_csv 与按 schema 读取的耗时与内存
+
+    Returns:
+        pd.DataFrame: 列为 [file, stage, rows, default_sec, schema_sec, default_mb, schema_mb]
+    """
+    cases = [(f, raw_dataset_of(f), 'process') for f in list_raw_files(raw_dir)]
+    if os.path.isdir(analyzed_dir):
+        for f in sorted(glob.glob(os.path.join(analyzed_dir, 'analyzed_processed_all_*.csv'))):
+            cases += [(f, 'analyzed', 'visualize'), (f, 'analyzed', 'cooccurrence')]
+
+    def timed(fn):
+        best, result = np.inf, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    rows = []
+    for path, dataset, stage in cases:
+        if dataset is None:
+            continue
+        default_sec, default_df = timed(lambda: pd.read_csv(path, encoding='utf-8-sig'))
+        schema_sec, schema_df = timed(lambda: read_table(path, dataset, stage=stage))
+        rows.append({
+            'file': os.path.basename(path), 'stage': stage, 'rows': len(schema_df),
+            'default_sec': default_sec, 'schema_sec': schema_sec,
+            'default_mb': default_df.memory_usage(deep=True).sum() / 1e6,
+            'schema_mb': schema_df.memory_usage(deep=True).sum() / 1e6,
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据集 schema：对比默认读取与按 schema 读取的耗时与内存")
+    parser.add_argument('--raw-dir', default=os.path.join('data', '01_raw'))
+    parser.add_argument('--analyzed-dir', default=os.path.join('data', '03_analyzed'))
+    parser.add_argument('--repeat', type=int, default=3, help='每个文件重复读取次数 (取最快一次)')
+    args = parser.parse_args()
+
+    report = benchmark(args.raw_dir, args.analyzed_dir, repeat=args.repeat)
+    if report.empty:
+        print(f"未找到可测试的文件 ({args.raw_dir}, {args.analyzed_dir})")
+        return
+
+    summary = report.groupby('stage')[['rows', 'default_sec', 'schema_sec', 'default_mb', 'schema_mb']].sum()
+    summary['speedup'] = summary['default_sec'] / summary['schema_sec']
+    summary['memory_saving'] = 1 - summary['schema_mb'] / summary['default_mb']
+    with pd.option_context('display.width', 200, 'display.float_format', lambda x: f"{x:.3f}"):
+        print(summary)
+
+if __name__ == "__main__":
+    main()
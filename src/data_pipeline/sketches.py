@@ -0,0 +1,380 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import glob
+import heapq
+import argparse
+from collections import Counter
+
+# 将 src 加入 sys.path 以便导入模块
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from data_pipeline.preprocess.cleaner import clean_text
+from data_pipeline.preprocess.tokenizer import get_tokenizer
+from data_pipeline.schema import read_table, raw_dataset_of
+from data_pipeline.raw_files import parse_raw_path, list_raw_files
+
+# 全局配置
+# HyperLogLog 精度：寄存器数 m = 2^p，标准误差约 1.04 / sqrt(m) (p=12 时约 1.6%)
+HLL_PRECISION = 12
+# Count-Min Sketch 尺寸：误差 <= (e / width) * N 的概率至少为 1 - exp(-depth)
+CMS_WIDTH = 2048
+CMS_DEPTH = 5
+# 每个 sketch 保留的高频词数
+TOP_K = 50
+# 流式读取原始 CSV 的分块行数
+CHUNK_SIZE = 50_000
+
+SKETCH_DIR = os.path.join('data', '02_processed', 'sketches')
+TEXT_COLUMNS = {'comments': ['content'], 'contents': ['desc', 'description', 'content']}
+
+
+def hash_values(values):
+    """稳定的 64 位哈希 (跨进程一致，可安全地合并不同时间生成的 sketch)"""
+    arr = np.asarray(values, dtype=object)
+    return pd.util.hash_array(arr.astype(str).astype(object), categorize=False)
+
+
+def _bit_length(x):
+    """逐元素计算 uint64 的有效位数"""
+    x = x.copy()
+    n = np.zeros(len(x), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = x >= (np.uint64(1) << np.uint64(shift))
+        n[big] += shift
+        x[big] >>= np.uint64(shift)
+    return n + (x > 0)
+
+
+class HyperLogLog:
+    """HyperLogLog 基数估计，用于统计去重用户数"""
+
+    def __init__(self, p=HLL_PRECISION, registers=None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8) if registers is None else registers
+
+    @property
+    def relative_error(self):
+        return 1.04 / np.sqrt(self.m)
+
+    def add(self, values):
+        if len(values) == 0:
+            return
+        h = hash_values(values)
+        idx = (h >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = h & np.uint64((1 << (64 - self.p)) - 1)
+        # 剩余位中第一个 1 的位置 (从高位数起，1 开始)
+        rho = (64 - self.p) - _bit_length(rest) + 1
+        np.maximum.at(self.registers, idx, rho.astype(np.uint8))
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError(f"HyperLogLog 精度不一致: {self.p} != {other.p}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        # 小基数时改用线性计数
+        if estimate <= 2.5 * self.m and zeros > 0:
+            estimate = self.m * np.log(self.m / zeros)
+        return int(round(estimate))
+
+
+class CountMinSketch:
+    """Count-Min Sketch 频次估计 (只会高估，不会低估)"""
+
+    def __init__(self, width=CMS_WIDTH, depth=CMS_DEPTH, table=None):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64) if table is None else table
+
+    @property
+    def epsilon(self):
+        return np.e / self.width
+
+    @property
+    def delta(self):
+        return np.exp(-self.depth)
+
+    @property
+    def total(self):
+        return int(self.table[0].sum())
+
+    def _indices(self, items):
+        # 双重哈希：h_i = h1 + i * h2，只需计算一次 64 位哈希
+        h = hash_values(items)
+        h1 = (h & np.uint64(0xFFFFFFFF)).astype(np.int64)
+        h2 = (h >> np.uint64(32)).astype(np.int64) | 1
+        rows = np.arange(self.depth)[:, None]
+        return (h1[None, :] + rows * h2[None, :]) % self.width
+
+    def add(self, items, counts=None):
+        if len(items) == 0:
+            return
+        counts = np.ones(len(items), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        idx = self._indices(items)
+        for row in range(self.depth):
+            np.add.at(self.table[row], idx[row], counts)
+
+    def estimate(self, items):
+        if len(items) == 0:
+            return np.zeros(0, dtype=np.int64)
+        idx = self._indices(items)
+        return self.table[np.arange(self.depth)[:, None], idx].min(axis=0)
+
+    def merge(self, other):
+        if other.table.shape != self.table.shape:
+            raise ValueError("Count-Min Sketch 尺寸不一致，无法合并")
+        self.table += other.table
+        return self
+
+
+class HeavyHitters:
+    """Count-Min Sketch + 小顶堆，维护近似 Top-K 高频词"""
+
+    def __init__(self, k=TOP_K, cms=None, candidates=None):
+        self.k = k
+        self.cms = CountMinSketch() if cms is None else cms
+        # 候选集比 K 稍大，减少边界词被过早淘汰
+        self.capacity = 2 * k
+        self.candidates = {} if candidates is None else candidates
+
+    def _prune(self, items):
+        estimates = self.cms.estimate(items)
+        kept = heapq.nlargest(self.capacity, zip(estimates.tolist(), items))
+        self.candidates = {item: est for est, item in kept}
+
+    def add(self, items):
+        if len(items) == 0:
+            return
+        uniques, counts = np.unique(np.asarray(items, dtype=object).astype(str), return_counts=True)
+        self.cms.add(uniques, counts)
+        self._prune(list(self.candidates) + [u for u in uniques.tolist() if u not in self.candidates])
+
+    def merge(self, other):
+        self.cms.merge(other.cms)
+        self._prune(list(set(self.candidates) | set(other.candidates)))
+        return self
+
+    def top(self, k=None):
+        k = k or self.k
+        return heapq.nlargest(k, self.candidates.items(), key=lambda kv: kv[1])
+
+
+class DaySketch:
+    """
+    单个 (数据类型, 抓取日期, 关键词) 的汇总 sketch
+
+    内存与行数无关：HLL 寄存器 + CMS 计数表 + Top-K 候选 + IP 属地计数 (属地基数很小，直接精确计数)。
+    同一关键词的多天 sketch 可以直接 merge。
+    """
+
+    def __init__(self, dtype, date, keyword):
+        self.dtype = dtype
+        self.date = date
+        self.keyword = keyword
+        self.n_rows = 0
+        self.users = HyperLogLog()
+        self.terms = HeavyHitters()
+        self.ip_locations = Counter()
+
+    def update(self, df, text_col):
+        """用一个数据块更新 sketch"""
+        self.n_rows += len(df)
+        if 'user_id' in df.columns:
+            self.users.add(df['user_id'].dropna().astype(str).to_numpy())
+        if 'ip_location' in df.columns:
+            self.ip_locations.update(df['ip_location'].astype(object).fillna('未知').astype(str).tolist())
+        if text_col:
+            tokenizer = get_tokenizer()
+            words = [w for text in df[text_col].fillna('').astype(str) for w in tokenizer.tokenize(clean_text(text)) if len(w) > 1]
+            self.terms.add(words)
+
+    def merge(self, other):
+        self.n_rows += other.n_rows
+        self.users.merge(other.users)
+        self.terms.merge(other.terms)
+        self.ip_locations.update(other.ip_locations)
+        if other.date != self.date:
+            self.date = 'merged'
+        return self
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        meta = {
+            'dtype': self.dtype, 'date': self.date, 'keyword': self.keyword, 'n_rows': self.n_rows,
+            'hll_p': self.users.p, 'top_k': self.terms.k,
+            'candidates': self.terms.candidates, 'ip_locations': dict(self.ip_locations),
+        }
+        np.savez_compressed(path, hll=self.users.registers, cms=self.terms.cms.table,
+                            meta=np.array(json.dumps(meta, ensure_ascii=False)))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            sketch = cls(meta['dtype'], meta['date'], meta['keyword'])
+            sketch.n_rows = meta['n_rows']
+            sketch.users = HyperLogLog(p=meta['hll_p'], registers=data['hll'].copy())
+            table = data['cms'].copy()
+            cms = CountMinSketch(width=table.shape[1], depth=table.shape[0], table=table)
+            sketch.terms = HeavyHitters(k=meta['top_k'], cms=cms, candidates=meta['candidates'])
+            sketch.ip_locations = Counter(meta['ip_locations'])
+        return sketch
+
+
+def sketch_raw_file(file_path, chunk_size=CHUNK_SIZE):
+    """
+    流式读取一个原始 CSV 并生成 DaySketch (只读取需要的列，分块处理)
+
+    Returns:
+        DaySketch | None: 路径不是 search_{dtype}_{date}_{keyword}.csv 或 {dtype}/{date}/{keyword}.csv 时返回 None
+    """
+    info = parse_raw_path(file_path)
+    if not info:
+        return None
+    dtype, date, keyword = info
+    sketch = DaySketch(dtype, date, keyword)
+
+    # 与 process_data.py 一致：优先 utf-8-sig，解码失败时整文件改用 gbk 重读
+    for encoding in ('utf-8-sig', 'gbk'):
+        sketch = DaySketch(dtype, date, keyword)
+        try:
+            reader = read_table(file_path, raw_dataset_of(file_path), stage='sketch',
+                                chunksize=chunk_size, encoding=encoding)
+            for chunk in reader:
+                text_col = next((c for c in TEXT_COLUMNS[dtype] if c in chunk.columns), None)
+                sketch.update(chunk, text_col)
+            break
+        except UnicodeDecodeError:
+            continue
+    return sketch
+
+
+def sketch_path(sketch_dir, dtype, date, keyword):
+    return os.path.join(sketch_dir, dtype, f"{date}_{keyword}.npz")
+
+
+def build_sketches(raw_dir, sketch_dir=SKETCH_DIR, rebuild=False):
+    """
+    为 raw_dir 下每个原始文件生成一个 DaySketch 并写盘
+
+    每个原始文件对应唯一的 sketch 文件，重复运行会直接跳过已存在的 sketch (rebuild=True 时覆盖)，
+    因此新增一天的数据只需处理当天的文件。
+    """
+    built = 0
+    for file_path in list_raw_files(raw_dir):
+        path = sketch_path(sketch_dir, *parse_raw_path(file_path))
+        if os.path.exists(path) and not rebuild:
+            continue
+        sketch = sketch_raw_file(file_path)
+        sketch.save(path)
+        built += 1
+        print(f"  [Sketch] {os.path.relpath(file_path, raw_dir)} -> {path} ({sketch.n_rows} 行)")
+    return built
+
+
+def load_sketches(sketch_dir=SKETCH_DIR, dtype='comments'):
+    """按关键词合并某类数据的全部 DaySketch"""
+    merged = {}
+    for path in sorted(glob.glob(os.path.join(sketch_dir, dtype, "*.npz"))):
+        sketch = DaySketch.load(path)
+        if sketch.keyword in merged:
+            merged[sketch.keyword].merge(sketch)
+        else:
+            merged[sketch.keyword] = sketch
+    return merged
+
+
+def summarize(merged, top_terms=10, top_locations=5):
+    """将合并后的 sketch 汇总为表格"""
+    rows = []
+    for keyword, sketch in sorted(merged.items()):
+        rows.append({
+            'keyword': keyword,
+            'rows': sketch.n_rows,
+            'unique_users': sketch.users.count(),
+            'top_terms': ' '.join(f"{t}:{c}" for t, c in sketch.terms.top(top_terms)),
+            'top_ip_locations': ' '.join(f"{l}:{c}" for l, c in sketch.ip_locations.most_common(top_locations)),
+        })
+    return pd.DataFrame(rows)
+
+
+def verify_against_exact(raw_dir, merged, dtype='comments'):
+    """
+    用精确计数检验 sketch 的误差是否在理论界内 (仅适合 demo 规模的数据)
+
+    - HLL: 相对误差应大多落在 3 倍标准误差内
+    - CMS: 估计值 - 真实值 <= epsilon * N 的比例应不低于 1 - delta
+    """
+    tokenizer = get_tokenizer()
+    exact_users, exact_terms = {}, {}
+    for file_path in list_raw_files(raw_dir, dtype):
+        keyword = parse_raw_path(file_path)[2]
+        df = read_table(file_path, raw_dataset_of(file_path), stage='sketch')
+        text_col = next((c for c in TEXT_COLUMNS[dtype] if c in df.columns), None)
+        exact_users.setdefault(keyword, set()).update(df['user_id'].dropna())
+        counter = exact_terms.setdefault(keyword, Counter())
+        for text in df[text_col].fillna(''):
+            counter.update(w for w in tokenizer.tokenize(clean_text(text)) if len(w) > 1)
+
+    rows = []
+    for keyword, sketch in sorted(merged.items()):
+        if keyword not in exact_users:
+            continue
+        true_users = len(exact_users[keyword])
+        est_users = sketch.users.count()
+        counter = exact_terms[keyword]
+        items = list(counter)
+        truth = np.array([counter[i] for i in items])
+        est = sketch.terms.cms.estimate(items)
+        bound = sketch.terms.cms.epsilon * truth.sum()
+        exact_top = {t for t, _ in counter.most_common(10)}
+        sketch_top = {t for t, _ in sketch.terms.top(10)}
+        rows.append({
+            'keyword': keyword,
+            'users_exact': true_users,
+            'users_hll': est_users,
+            'users_rel_err': abs(est_users - true_users) / max(true_users, 1),
+            'hll_3sigma': 3 * sketch.users.relative_error,
+            'cms_max_over': int((est - truth).max()) if len(items) else 0,
+            'cms_bound': bound,
+            'cms_within_bound': float(np.mean(est - truth <= bound)) if len(items) else 1.0,
+            'top10_recall': len(exact_top & sketch_top) / max(len(exact_top), 1),
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="为原始数据生成可合并的流式 sketch 并输出汇总统计")
+    parser.add_argument('--raw-dir', default=os.path.join('data', '01_raw'))
+    parser.add_argument('--sketch-dir', default=SKETCH_DIR)
+    parser.add_argument('--rebuild', action='store_true', help='覆盖已存在的 sketch')
+    parser.add_argument('--verify', action='store_true', help='与精确计数对比，检验误差界 (仅限小数据)')
+    args = parser.parse_args()
+
+    built = build_sketches(args.raw_dir, args.sketch_dir, rebuild=args.rebuild)
+    print(f"新生成 {built} 个 sketch")
+
+    for dtype in ('comments', 'contents'):
+        merged = load_sketches(args.sketch_dir, dtype)
+        if not merged:
+            continue
+        print("\n" + "=" * 50)
+        print(f"{dtype} 汇总 (基于 sketch)")
+        print("=" * 50)
+        print(summarize(merged).to_string(index=False))
+
+        if args.verify:
+            report = verify_against_exact(args.raw_dir, merged, dtype)
+            print(f"\n{dtype} 误差检验:")
+            print(report.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+if __name__ == "__main__":
+    main()
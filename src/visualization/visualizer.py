@@ -4,10 +4,20 @@ import seaborn as sns
 from wordcloud import WordCloud
 import os
 import sys
+import argparse
 import numpy as np
 from collections import Counter
 from datetime import datetime
 
+# 将 src 加入 sys.path 以便导入模块
+sys.path.append(os.path.join(os.getcwd(), 'src'))
+
+from analysis.burst_detection import detect_bursts, BASELINE_WINDOW
+from analysis.cooccurrence import build_cooccurrence_graph, export_graph
+from analysis.keyword_extraction import extract_distinctive_terms
+from data_pipeline.schema import read_table
+from data_pipeline import profiling
+
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei']
 plt.rcParams['axes.unicode_minus'] = False
@@ -18,6 +28,7 @@ class Visualizer:
     def __init__(self):
         self.output_dir = os.path.join('data', '03_visualizations')
         os.makedirs(self.output_dir, exist_ok=True)
+        self._stopwords = None
 
     # =========================================================================
     # (一) 词频统计与词云图绘制 (针对整体)
@@ -59,6 +70,17 @@ class Visualizer:
         words = text_processed.split()
         if not words: return []
         
+        stopwords = self._get_stopwords()
+
+        # 3. 过滤
+        # 同时过滤单字
+        return [w for w in words if w not in stopwords and len(w) > 1] 
+
+    def _get_stopwords(self):
+        """加载停用词表 + 自定义无意义词 (结果缓存，供词云与突发词检测共用)"""
+        if self._stopwords is not None:
+            return self._stopwords
+
         # 1. 加载停用词表
         stopwords = set()
         stopwords_path = os.path.join('data', 'dictionaries', 'hit_stopwords.txt')
@@ -86,9 +108,8 @@ class Visualizer:
         }
         stopwords.update(custom_stopwords)
 
-        # 3. 过滤
-        # 同时过滤单字
-        return [w for w in words if w not in stopwords and len(w) > 1] 
+        self._stopwords = stopwords
+        return stopwords
 
     def _generate_wordcloud(self, text, filename):
         if not text.strip(): return
@@ -240,13 +261,25 @@ class Visualizer:
         if 'keyword' in df.columns:
             self._plot_keyword_sentiment_comparison(df, prefix)
 
+    @staticmethod
+    def _known_keywords(df):
+        """
+        去掉 keyword 为 unknown 的行
+
+        keyword 按 schema 读为 category，过滤后需去掉未出现的类别，否则统计与绘图中会多出 0 值的 unknown
+        """
+        df_k = df[df['keyword'] != 'unknown'].copy()
+        if isinstance(df_k['keyword'].dtype, pd.CategoricalDtype):
+            df_k['keyword'] = df_k['keyword'].cat.remove_unused_categories()
+        return df_k
+
     def _plot_keyword_sentiment_comparison(self, df, prefix):
         """
         绘制不同关键词下的情感分布对比（堆叠柱状图）
         """
         try:
             # 过滤掉 keyword 为 unknown 的
-            df_k = df[df['keyword'] != 'unknown'].copy()
+            df_k = self._known_keywords(df)
             if df_k.empty: return
 
             # 统计每个 keyword 下各情感的比例
@@ -290,7 +323,7 @@ class Visualizer:
         if 'keyword' not in df.columns:
             return
 
-        df_k = df[df['keyword'] != 'unknown']
+        df_k = self._known_keywords(df)
         if df_k.empty: return
         
         counts = df_k['keyword'].value_counts()
@@ -312,12 +345,182 @@ class Visualizer:
         plt.close()
         print(f"  [√] 关键词声量图已保存: {filename}")
 
+    # =========================================================================
+    # (五) [新增] 突发/新兴词检测
+    # =========================================================================
+    def plot_emerging_terms(self, df, prefix, top_n=20):
+        print("\n### (五) 突发/新兴词检测")
+        if 'tokens_str' not in df.columns:
+            print("跳过: 缺少 tokens_str 列")
+            return
+
+        bursts = detect_bursts(df, stopwords=self._get_stopwords())
+        if bursts.empty:
+            print("跳过: 未检测到突发词")
+            return
+
+        # 保存完整的分关键词排名，便于追溯具体事件
+        csv_name = f"{prefix}_emerging_terms.csv"
+        bursts.to_csv(os.path.join(self.output_dir, csv_name), index=False, encoding='utf-8-sig')
+        print(f"  [√] 突发词排名已保存: {csv_name}")
+
+        top = bursts.sort_values('z_score', ascending=False).head(top_n).copy()
+        top['label'] = top['term'] + ' (' + top['keyword'].astype(str) + ', ' + top['date'].astype(str) + ')'
+
+        plt.figure(figsize=(12, 8))
+        ax = sns.barplot(x='z_score', y='label', data=top, hue='keyword', dodge=False, palette='tab20')
+        for container in ax.containers:
+            ax.bar_label(container, fmt='%.1f', label_type='edge', padding=3, fontsize=9)
+
+        plt.title(f'Top {len(top)} 突发词 (相对前 {BASELINE_WINDOW} 天基线的 z-score)', fontsize=16)
+        plt.xlabel('突发得分 (z-score)')
+        plt.ylabel('词 (关键词, 突发日期)')
+        plt.legend(title='关键词', bbox_to_anchor=(1.05, 1), loc='upper left')
+
+        filename = f"{prefix}_emerging_terms.png"
+        plt.tight_layout()
+        plt.savefig(os.path.join(self.output_dir, filename), dpi=300)
+        plt.close()
+        print(f"  [√] 突发词图已保存: {filename}")
+
+    # =========================================================================
+    # (六) [新增] 关键词共现关联图
+    # =========================================================================
+    def plot_cooccurrence_network(self, df, prefix, sentiment='Negative', max_nodes=40):
+        print("\n### (六) 关键词共现关联图")
+        if 'tokens_str' not in df.columns:
+            print("跳过: 缺少 tokens_str 列")
+            return
+        if sentiment is not None and 'sentiment_label' not in df.columns:
+            sentiment = None
+
+        nodes, edges = build_cooccurrence_graph(df, stopwords=self._get_stopwords(), sentiment=sentiment)
+        if edges.empty:
+            print("跳过: 无满足条件的共现词对")
+            return
+
+        tag = sentiment.lower() if sentiment else 'all'
+        export_graph(nodes, edges, self.output_dir, f"{prefix}_{tag}")
+        print(f"  [√] 共现图节点/边已导出: {prefix}_{tag}_cooccurrence_*.csv")
+
+        # 只绘制文档频次最高的若干词及其之间的边，避免图过密；孤立词不绘制
+        top_terms = set(nodes['term'].head(max_nodes))
+        sub = edges[edges['source'].isin(top_terms) & edges['target'].isin(top_terms)]
+        if sub.empty:
+            print("跳过: 高频词之间无关联边")
+            return
+        linked = set(sub['source']) | set(sub['target'])
+        top_nodes = nodes[nodes['term'].isin(linked)].reset_index(drop=True)
+        index = {t: i for i, t in enumerate(top_nodes['term'])}
+
+        src = sub['source'].map(index).to_numpy()
+        dst = sub['target'].map(index).to_numpy()
+        weights = np.clip(sub['npmi'].to_numpy(), 0.05, None)
+        pos = self._spring_layout(len(top_nodes), src, dst, weights)
+
+        plt.figure(figsize=(14, 12))
+        for s_i, d_i, w in zip(src, dst, weights):
+            plt.plot(pos[[s_i, d_i], 0], pos[[s_i, d_i], 1], color='#999999', alpha=0.3 + 0.5 * w, linewidth=0.5 + 3 * w, zorder=1)
+
+        sizes = top_nodes['df'].to_numpy(dtype=float)
+        sizes = 300 + 2700 * (sizes - sizes.min()) / max(sizes.max() - sizes.min(), 1)
+        colors = top_nodes['neg_share'].fillna(0.5).to_numpy()
+        sc = plt.scatter(pos[:, 0], pos[:, 1], s=sizes, c=colors, cmap='coolwarm', vmin=0, vmax=1,
+                         edgecolors='white', linewidths=1.5, zorder=2)
+        for i, term in enumerate(top_nodes['term']):
+            plt.text(pos[i, 0], pos[i, 1], term, ha='center', va='center', fontsize=10, zorder=3)
+
+        plt.colorbar(sc, shrink=0.6, label='负面评论占比')
+        title_tag = {'Negative': '负面', 'Positive': '正面', 'Neutral': '中性'}.get(sentiment, '全部')
+        plt.title(f'关键词共现关联图 ({title_tag}评论，节点大小=文档频次，连线粗细=NPMI)', fontsize=16)
+        plt.axis('off')
+
+        filename = f"{prefix}_{tag}_cooccurrence.png"
+        plt.tight_layout()
+        plt.savefig(os.path.join(self.output_dir, filename), dpi=300)
+        plt.close()
+        print(f"  [√] 共现关联图已保存: {filename}")
+
+    def _spring_layout(self, n, src, dst, weights, iterations=300, seed=42):
+        """
+        简易力导向布局 (Fruchterman-Reingold)，避免为画图额外引入 networkx
+        """
+        rng = np.random.default_rng(seed)
+        pos = rng.uniform(-1, 1, size=(n, 2))
+        k = 1.0 / np.sqrt(n)
+        temperature = 0.1
+        for _ in range(iterations):
+            delta = pos[:, None, :] - pos[None, :, :]
+            dist = np.maximum(np.linalg.norm(delta, axis=-1), 1e-3)
+            # 斥力 (所有点对)
+            disp = ((k * k / dist ** 2)[:, :, None] * delta).sum(axis=1)
+            # 引力 (仅相连的点对)，按边权重加权
+            d = pos[src] - pos[dst]
+            d_len = np.maximum(np.linalg.norm(d, axis=1), 1e-3)
+            pull = (d_len / k * weights)[:, None] * d
+            np.add.at(disp, src, -pull)
+            np.add.at(disp, dst, pull)
+            # 向心力，防止不连通的子图漂离画面
+            disp -= 0.05 * pos / k
+
+            length = np.maximum(np.linalg.norm(disp, axis=1), 1e-3)
+            pos += disp / length[:, None] * np.minimum(length, temperature)[:, None]
+            temperature *= 0.99
+        return pos
+
+    # =========================================================================
+    # (七) [新增] 分关键词 x 情感的 TF-IDF 特征词
+    # =========================================================================
+    def plot_distinctive_terms(self, df, prefix, top_n=8):
+        print("\n### (七) 分关键词 x 情感的特征词 (TF-IDF)")
+        if 'tokens_str' not in df.columns or 'keyword' not in df.columns:
+            print("跳过: 缺少 tokens_str 或 keyword 列")
+            return
+
+        terms = extract_distinctive_terms(self._known_keywords(df), exclude=self._get_stopwords())
+        if terms.empty:
+            print("跳过: 无有效特征词")
+            return
+
+        csv_name = f"{prefix}_distinctive_terms.csv"
+        terms.to_csv(os.path.join(self.output_dir, csv_name), index=False, encoding='utf-8-sig')
+        print(f"  [√] 特征词排名已保存: {csv_name}")
+
+        # 每个情感标签一张图，子图为各关键词的 Top N 特征词
+        for label, part in terms.groupby('sentiment_label'):
+            keywords = sorted(part['keyword'].unique())
+            ncols = 3
+            nrows = int(np.ceil(len(keywords) / ncols))
+            fig, axes = plt.subplots(nrows, ncols, figsize=(18, 3.2 * nrows), squeeze=False)
+
+            for ax, keyword in zip(axes.flat, keywords):
+                top = part[part['keyword'] == keyword].head(top_n)
+                sns.barplot(x='score', y='term', data=top, ax=ax, color='#4c72b0')
+                ax.set_title(keyword, fontsize=12)
+                ax.set_xlabel('')
+                ax.set_ylabel('')
+            for ax in axes.flat[len(keywords):]:
+                ax.axis('off')
+
+            fig.suptitle(f'各关键词特征词 Top {top_n} (TF-IDF, 情感={label})', fontsize=16)
+            filename = f"{prefix}_distinctive_terms_{label.lower()}.png"
+            fig.tight_layout()
+            fig.savefig(os.path.join(self.output_dir, filename), dpi=300)
+            plt.close(fig)
+            print(f"  [√] 特征词图已保存: {filename}")
+
 def main():
+    parser = argparse.ArgumentParser(description="读取分析结果并生成全套图表")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiling.start_from_args('visualizer', args)
+
     viz = Visualizer()
     input_dir = os.path.join('data', '03_analyzed')
     
     if not os.path.exists(input_dir):
         print(f"输入目录 {input_dir} 不存在")
+        profiling.finish()
         return
 
     files = [f for f in os.listdir(input_dir) if f.endswith('.csv')]
@@ -337,22 +540,43 @@ def main():
         print("="*50)
         
         try:
-            df = pd.read_csv(file_path, encoding='utf-8-sig')
-            
-            # 1. 词云与词频
-            viz.plot_word_cloud_and_freq(df, clean_name)
-            
-            # 2. 时间分布
-            viz.plot_time_distribution(df, clean_name)
-            
-            # 3. 情感分布 (含关键词对比)
-            viz.plot_sentiment_distribution(df, clean_name)
-            
-            # 4. 关键词声量
-            viz.plot_keyword_volume(df, clean_name)
+            with profiling.stage(clean_name):
+                with profiling.stage('read') as rec:
+                    df = read_table(file_path, 'analyzed', stage='visualize')
+                    rec['rows'] = len(df)
+                
+                # 1. 词云与词频
+                with profiling.stage('word_cloud_and_freq', rows=len(df)):
+                    viz.plot_word_cloud_and_freq(df, clean_name)
+                
+                # 2. 时间分布
+                with profiling.stage('time_distribution', rows=len(df)):
+                    viz.plot_time_distribution(df, clean_name)
+                
+                # 3. 情感分布 (含关键词对比)
+                with profiling.stage('sentiment_distribution', rows=len(df)):
+                    viz.plot_sentiment_distribution(df, clean_name)
+                
+                # 4. 关键词声量
+                with profiling.stage('keyword_volume', rows=len(df)):
+                    viz.plot_keyword_volume(df, clean_name)
+
+                # 5. 突发/新兴词
+                with profiling.stage('emerging_terms', rows=len(df)):
+                    viz.plot_emerging_terms(df, clean_name)
+
+                # 6. 关键词共现关联图 (负面评论)
+                with profiling.stage('cooccurrence_network', rows=len(df)):
+                    viz.plot_cooccurrence_network(df, clean_name)
+
+                # 7. 分关键词 x 情感的特征词
+                with profiling.stage('distinctive_terms', rows=len(df)):
+                    viz.plot_distinctive_terms(df, clean_name)
             
         except Exception as e:
             print(f"处理 {file} 时发生错误: {e}")
 
+    profiling.finish()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,37 @@
+import os
+import sys
+import json
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from data_pipeline import profiling
+
+
+def test_unknown_profile_stage_still_writes_report(tmp_path):
+    """--profile-stage 指定的阶段从未执行时，仍写出运行报告且不生成 .prof 文件"""
+    profiling.start('test', cprofile_stage='tokenize', report_dir=str(tmp_path))
+    with profiling.stage('plot', rows=3):
+        sum(range(1000))
+
+    report_path = profiling.finish()
+
+    with open(report_path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    assert report['cprofile']['stage'] == 'tokenize'
+    assert report['cprofile']['top_functions'] == []
+    assert 'prof_file' not in report['cprofile']
+    assert [s['stage'] for s in report['stages']] == ['plot']
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.prof')]
+
+
+def test_profile_stage_collects_top_functions(tmp_path):
+    profiling.start('test', cprofile_stage='plot', report_dir=str(tmp_path))
+    with profiling.stage('plot'):
+        sorted(range(1000), key=lambda x: -x)
+
+    report_path = profiling.finish()
+
+    with open(report_path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    assert report['cprofile']['top_functions']
+    assert os.path.exists(report['cprofile']['prof_file'])